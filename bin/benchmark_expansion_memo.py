@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Measure shared-subtree memoization on a layered prompt library.
+
+Builds ``--layers`` layers of ``--width`` prompts where every prompt includes
+each prompt of the next layer, so the number of paths through the library
+grows exponentially with depth while the output is what it is. Expands the top
+prompt without the memo (as streaming does) and with it (expand_prompt_content,
+with the expansion cache disabled).
+
+Usage:
+    benchmark_expansion_memo.py [--layers 8] [--width 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(layers, width):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    service.expansion_cache.max_bytes = 0
+    service.EXPANSION_MAX_NODES = 0
+    service.EXPANSION_MAX_CHARS = 0
+    now = datetime.now(timezone.utc)
+    for layer in range(layers + 1):
+        for i in range(width if layer else 1):
+            name = f"l{layer}_{i}"
+            if layer == layers:
+                content = f"leaf {i}\n"
+            else:
+                content = "".join(f"[[l{layer + 1}_{j}]]" for j in range(width))
+            service.prompts[f"/prompts/{name}"] = Prompt(
+                id=f"/prompts/{name}", name=name, filename=f"{name}.md", directory="/prompts",
+                content=content, created_at=now, updated_at=now)
+    return service
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--width", type=int, default=3)
+    args = parser.parse_args()
+    logger.remove()
+    service = build_service(args.layers, args.width)
+
+    start = time.perf_counter()
+    unmemoized = "".join(service.stream_prompt_expansion("/prompts/l0_0"))
+    without = time.perf_counter() - start
+
+    start = time.perf_counter()
+    memoized, _, _ = service.expand_prompt_content("/prompts/l0_0")
+    with_memo = time.perf_counter() - start
+
+    assert memoized == unmemoized
+    print(f"{args.width}^{args.layers} paths, {len(memoized) / 1e3:.0f} KB output")
+    print(f"without memo: {without * 1000:9.1f} ms")
+    print(f"   with memo: {with_memo * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
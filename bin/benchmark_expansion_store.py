@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure the first expansion after a restart with and without the expansion store.
+
+Writes a layered library of ``--layers`` layers of ``--width`` prompts (every
+prompt includes each prompt of the next layer, leaves hold ``--leaf-kb`` KB of
+text) to a temporary directory, then starts a fresh service in lazy content
+mode, as after a restart, and times the first expansion of the top prompt:
+once with nothing persisted, and once with the store filled by a previous
+process.
+
+Usage:
+    benchmark_expansion_store.py [--layers 4] [--width 6] [--leaf-kb 4]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.services.expansion_store import ExpansionStore  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def write_library(directory, layers, width, leaf_kb):
+    for layer in range(layers + 1):
+        for i in range(width if layer else 1):
+            if layer == layers:
+                content = f"leaf {i}: " + "x" * (leaf_kb * 1024) + "\n"
+            else:
+                content = "".join(f"[[l{layer + 1}_{j}]]" for j in range(width))
+            with open(os.path.join(directory, f"l{layer}_{i}.md"), "w", encoding="utf-8") as f:
+                f.write(content)
+
+
+def first_expansion(prompt_dir, store_dir):
+    service = PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False,
+                            lazy_content=True)
+    service.EXPANSION_MAX_NODES = 0
+    service.EXPANSION_MAX_CHARS = 0
+    service.expansion_store = ExpansionStore(store_dir) if store_dir else None
+    start = time.perf_counter()
+    expanded, _, _ = service.expand_prompt_content(os.path.join(prompt_dir, "l0_0"))
+    elapsed = time.perf_counter() - start
+    if service.expansion_store is not None:
+        service.expansion_store.flush()
+    return expanded, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--width", type=int, default=6)
+    parser.add_argument("--leaf-kb", type=int, default=4)
+    args = parser.parse_args()
+    logger.remove()
+    prompt_dir = tempfile.mkdtemp()
+    store_dir = tempfile.mkdtemp()
+    try:
+        write_library(prompt_dir, args.layers, args.width, args.leaf_kb)
+        expanded, without = first_expansion(prompt_dir, None)
+        first_expansion(prompt_dir, store_dir)  # fills the store
+        stored, with_store = first_expansion(prompt_dir, store_dir)
+    finally:
+        shutil.rmtree(prompt_dir)
+        shutil.rmtree(store_dir)
+
+    assert stored == expanded
+    print(f"{args.width}^{args.layers} paths, {len(expanded) / 1e3:.0f} KB output")
+    print(f"first expansion, no store: {without * 1000:9.1f} ms")
+    print(f"first expansion, stored:   {with_store * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare full and streamed expansion of a large aggregated prompt.
+
+Builds a prompt that includes ``--parts`` prompts of ``--part-size`` characters
+each (every part including a shared footer) and expands it once with
+PromptService.expand_prompt_content plus the JSON encoding /expand does, and
+once with PromptService.stream_prompt_expansion. Reports the time to the first
+byte and the peak memory allocated during the expansion (tracemalloc).
+
+Usage:
+    benchmark_expansion_stream.py [--parts 200] [--part-size 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(parts, part_size):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    service.expansion_cache.max_bytes = 0
+    now = datetime.now(timezone.utc)
+
+    def add(name, content):
+        service.prompts[f"/prompts/{name}"] = Prompt(
+            id=f"/prompts/{name}", name=name, filename=f"{name}.md", directory="/prompts",
+            content=content, created_at=now, updated_at=now)
+
+    add("footer", "-- footer --\n")
+    for i in range(parts):
+        add(f"part_{i}", ("x" * (part_size - 20)) + "\n[[footer]]\n")
+    add("all", "\n".join(f"[[part_{i}]]" for i in range(parts)))
+    return service
+
+
+def measure(label, run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte, total = run(start)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:>8}: first byte {first_byte * 1000:8.2f} ms, total {elapsed * 1000:8.2f} ms, "
+          f"{total / 1e6:6.1f} MB out, peak {peak / 2**20:7.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=200)
+    parser.add_argument("--part-size", type=int, default=20000)
+    args = parser.parse_args()
+    service = build_service(args.parts, args.part_size)
+    prompt = service.get_prompt("/prompts/all")
+
+    def full(start):
+        expanded, dependencies, warnings = service.expand_prompt_content(prompt.id)
+        body = json.dumps({"prompt_id": prompt.id, "original_content": prompt.content,
+                           "expanded_content": expanded, "dependencies": dependencies, "warnings": warnings})
+        return time.perf_counter() - start, len(body)
+
+    def streamed(start):
+        first_byte, total = None, 0
+        for chunk in service.stream_prompt_expansion(prompt.id):
+            line = json.dumps({"type": "chunk", "content": chunk})
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            total += len(line)
+        return first_byte, total
+
+    measure("full", full)
+    measure("streamed", streamed)
+
+
+if __name__ == "__main__":
+    main()
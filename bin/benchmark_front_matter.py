@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for front matter parsing.
+
+Parses the front matter of a synthetic corpus of prompt files with:
+- the previous approach (a SafeLoader subclass built for every file)
+- the shared loader only (CSafeLoader when libyaml is installed)
+- the shared loader behind the flat fast path (what the services use)
+
+Usage:
+    benchmark_front_matter.py [--files 20000] [--repeat 3]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.front_matter import parse_front_matter, split_front_matter  # noqa: E402
+
+
+def build_corpus(count, seed=0):
+    """Front matter shaped like the files PromptService.save_prompt writes, plus a few oddballs."""
+    rng = random.Random(seed)
+    words = ["deploy", "restart", "review", "summarize", "python", "ops", "docs", "test", "plan"]
+    texts = []
+    for i in range(count):
+        tags = rng.sample(words, rng.randint(0, 4))
+        description = " ".join(rng.choice(words) for _ in range(rng.randint(3, 12)))
+        if i % 50 == 0:
+            # Less common shapes that take the PyYAML path
+            block = f"description: >\n  {description}\npriority: {i % 5}\ntags: [{', '.join(tags)}]\n"
+        else:
+            block = f"description: {description}\ntags:\n" + "".join(f"- {tag}\n" for tag in tags)
+        texts.append(f"---\n{block}---\n\nBody of prompt {i} [[shared_{i % 20}]]\n")
+    return texts
+
+
+def parse_per_call_loader(block):
+    """The old PromptService approach: define and register a loader for every file."""
+    block = block.replace('!!python/object/apply:coordinator.', '!python_object ')
+
+    class CustomLoader(yaml.SafeLoader):
+        pass
+
+    def python_object_constructor(loader, node):
+        return str(node.value)
+
+    CustomLoader.add_constructor('!python_object', python_object_constructor)
+    return yaml.load(block, Loader=CustomLoader)
+
+
+def run(label, parse, blocks, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in blocks:
+            parse(block)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_file = best / len(blocks) * 1e6
+    print(f"{label:<34} {best * 1000:10.1f} ms   {per_file:8.1f} us/file")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    blocks = [split_front_matter(text)[0] for text in build_corpus(args.files)]
+    print(f"{len(blocks)} front matter blocks, libyaml available: {yaml.__with_libyaml__}\n")
+
+    baseline = run("per-call SafeLoader subclass", parse_per_call_loader, blocks, args.repeat)
+    shared = run("shared loader only", lambda block: parse_front_matter(block, fast=False), blocks, args.repeat)
+    fast = run("fast path + shared loader", parse_front_matter, blocks, args.repeat)
+
+    print(f"\nShared loader: {baseline / shared:.1f}x faster than the per-call loader")
+    print(f"Fast path:     {baseline / fast:.1f}x faster than the per-call loader")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Compare the old full /api/prompts/all listing with a paginated, projected page.
+
+Builds ``--prompts`` prompts of ``--content-kb`` KB in ``--directories``
+configured directories, then times (and measures the JSON size of) the old
+listing, with content and a directory name lookup per prompt, against one
+``--page``-sized page of the default fields (content excluded), sorted by ID
+and by display name, from the middle of the listing.
+
+Usage:
+    benchmark_listing.py [--prompts 20000] [--content-kb 2] [--directories 30] [--page 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.prompt import PromptDirectory  # noqa: E402
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(count, content_kb, directories):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    service.directories = [PromptDirectory(path=f"/library/d{i}", name=f"Directory {i}") for i in range(directories)]
+    now = datetime.now(timezone.utc)
+    content = "x" * (content_kb * 1024)
+    for i in range(count):
+        name = f"prompt_{i}"
+        directory = f"/library/d{i % directories}"
+        service.prompts[f"{directory}/{name}"] = Prompt(
+            id=f"{directory}/{name}", name=name, filename=f"{name}.md", directory=directory, content=content,
+            created_at=now, updated_at=now)
+    return service
+
+
+def old_listing(service):
+    # What the route did before: every prompt, content included, directory names by scan
+    prompts = service.get_all_prompts(include_content=True, include_display_names=True)
+    for prompt_dict in prompts:
+        prompt_dict["directory_name"] = next(
+            (d.name for d in service.directories if d.path == prompt_dict["directory"]), None)
+    return prompts
+
+
+def page(service, sort, size):
+    # Second page onwards: start from a cursor in the middle of the listing
+    _, cursor = service.list_prompts(sort=sort, limit=len(service.prompts) // 2)
+    start = time.perf_counter()
+    prompts, _ = service.list_prompts(sort=sort, cursor=cursor, limit=size)
+    names = {d.path: d.name for d in service.directories}
+    for prompt_dict in prompts:
+        prompt_dict["directory_name"] = names.get(prompt_dict["directory"])
+    return prompts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=20000)
+    parser.add_argument("--content-kb", type=int, default=2)
+    parser.add_argument("--directories", type=int, default=30)
+    parser.add_argument("--page", type=int, default=50)
+    args = parser.parse_args()
+    logger.remove()
+    service = build_service(args.prompts, args.content_kb, args.directories)
+
+    start = time.perf_counter()
+    body = json.dumps(old_listing(service))
+    old_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.prompts} prompts")
+    print(f"{'':<34}{'ms':>10}{'JSON KB':>10}")
+    print(f"{'full listing with content':<34}{old_ms:>10.1f}{len(body) / 1024:>10.0f}")
+    for sort in ("id", "display_name"):
+        prompts, elapsed = page(service, sort, args.page)
+        start = time.perf_counter()
+        body = json.dumps(prompts)
+        elapsed += time.perf_counter() - start
+        print(f"{f'page of {args.page}, sort={sort}':<34}{elapsed * 1000:>10.2f}{len(body) / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
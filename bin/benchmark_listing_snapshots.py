@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Time /api/prompts/all built per request, served from its snapshot, and revalidated.
+
+Builds ``--prompts`` prompts in ``--directories`` configured directories and
+requests the full listing (content excluded) through the API: once after
+every change (the snapshot is rebuilt), repeatedly with nothing changed
+(served from the pre-encoded snapshot, plain and gzip), and with the ETag in
+``If-None-Match`` (304).
+
+Usage:
+    benchmark_listing_snapshots.py [--prompts 20000] [--directories 30] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from src.api.router import get_prompt_service_dependency, router  # noqa: E402
+from src.models.prompt import PromptDirectory  # noqa: E402
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(count, directories):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    service.directories = [PromptDirectory(path=f"/library/d{i}", name=f"Directory {i}") for i in range(directories)]
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        name = f"prompt_{i}"
+        directory = f"/library/d{i % directories}"
+        service.prompts[f"{directory}/{name}"] = Prompt(
+            id=f"{directory}/{name}", name=name, filename=f"{name}.md", directory=directory, content="text",
+            tags=["benchmark"], created_at=now, updated_at=now)
+    return service
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        response = function()
+    return (time.perf_counter() - start) / repeat * 1000, response
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=20000)
+    parser.add_argument("--directories", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    logger.remove()
+    service = build_service(args.prompts, args.directories)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+    client = TestClient(app)
+    plain = {"Accept-Encoding": "identity"}
+
+    def changed():
+        service.listing_snapshots.generation += 1
+        return client.get("/api/prompts/all", headers=plain)
+
+    etag = client.get("/api/prompts/all", headers=plain).headers["ETag"]
+    cases = [
+        ("rebuilt after a change", changed),
+        ("snapshot", lambda: client.get("/api/prompts/all", headers=plain)),
+        ("snapshot, gzip", lambda: client.get("/api/prompts/all", headers={"Accept-Encoding": "gzip"})),
+        ("If-None-Match -> 304", lambda: client.get("/api/prompts/all", headers={"If-None-Match": etag})),
+    ]
+    print(f"{args.prompts} prompts")
+    print(f"{'':<26}{'ms':>10}{'status':>8}{'wire KB':>10}")
+    for label, request in cases:
+        elapsed, response = timed(request, args.repeat)
+        size = int(response.headers.get("content-length", 0)) / 1024
+        print(f"{label:<26}{elapsed:>10.2f}{response.status_code:>8}{size:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Measure per-request logging overhead on the service hot paths.
+
+Runs PromptService.get_prompt and the WebSocket per-message logging against
+a synthetic index, with loguru writing to a null sink at INFO (the normal
+production setting) and at DEBUG. "before" replays the log statements the
+code used to make (f-strings listing every index key, reprs of whole prompts
+and messages); "after" is the current code.
+
+Usage:
+    benchmark_logging.py [--prompts 5000] [--calls 2000] [--content-size 2000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.hot_logging import configure_handlers, sampled  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(count, content_size):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    now = datetime.now(timezone.utc)
+    content = ("Body text [[shared]] " * (content_size // 20 + 1))[:content_size]
+    for i in range(count):
+        prompt_id = f"/prompts/dir{i % 20}/prompt_{i}"
+        service.prompts[prompt_id] = Prompt(
+            id=prompt_id, name=f"prompt_{i}", filename=f"prompt_{i}.md", directory=f"/prompts/dir{i % 20}",
+            content=content, description="d", tags=["a"], created_at=now, updated_at=now, unique_id=prompt_id,
+        )
+    return service
+
+
+def get_prompt_before(service, identifier):
+    """get_prompt with the log statements it used to make."""
+    logger.debug(f"get_prompt CALLED for identifier: '{identifier}', directory: '{None}'")
+    logger.debug(f"Current prompt cache keys: {list(service.prompts.keys())}")
+    prompt = service.get_prompt(identifier)
+    logger.debug(f"Found prompt directly by full ID '{identifier}'")
+    return prompt
+
+
+def ws_message_before(prompt_id, data):
+    logger.debug(f"WebSocket EP ({prompt_id}): Received data: {data!r}")
+
+
+def ws_message_after(prompt_id, data):
+    action = data.get("action")
+    if sampled("ws.message"):
+        logger.debug("WebSocket EP ({}): Received '{}' message with keys {}", prompt_id, action, sorted(data))
+
+
+def time_per_call(func, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--content-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    configure_handlers()
+    service = build_service(args.prompts, args.content_size)
+    ids = list(service.prompts.keys())
+    message = {"action": "update", "content": "x" * args.content_size}
+
+    print(f"{args.prompts} prompts, {args.calls} calls, {args.content_size} chars of content\n")
+    print(f"{'sink level':<12}{'path':<22}{'before us':>12}{'after us':>12}")
+    for level in ("INFO", "DEBUG"):
+        configure_handlers({"sink": open(os.devnull, "w"), "level": level})
+        rows = [
+            ("get_prompt",
+             lambda i: get_prompt_before(service, ids[i % len(ids)]),
+             lambda i: service.get_prompt(ids[i % len(ids)])),
+            ("websocket message",
+             lambda i: ws_message_before("p", message),
+             lambda i: ws_message_after("p", message)),
+        ]
+        for label, before, after in rows:
+            print(f"{level:<12}{label:<22}{time_per_call(before, args.calls):12.1f}{time_per_call(after, args.calls):12.1f}")
+    configure_handlers()
+
+
+if __name__ == "__main__":
+    main()
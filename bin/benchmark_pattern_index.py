@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Measure [[regex:pattern]] resolution against a large prompt index.
+
+Compares a scan of every prompt name with PatternIndex for a literal-prefix
+pattern and for a pattern without a prefix, uncached (first lookup after the
+ID set changed) and cached.
+
+Usage:
+    benchmark_pattern_index.py [--prompts 50000] [--calls 200]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.services.pattern_index import PatternIndex  # noqa: E402
+
+
+class _Record:
+    def __init__(self, name):
+        self.name = name
+
+
+def per_call(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=50000)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    families = ["feature", "issue", "note", "draft", "spec", "task", "idea", "howto"]
+    index = {f"/prompts/d{i % 50}/{families[i % len(families)]}_{i}": _Record(f"{families[i % len(families)]}_{i}")
+             for i in range(args.prompts)}
+    patterns = PatternIndex()
+    patterns.rebuild(index)
+
+    for pattern in ("feature_1.*", ".*_12.*"):
+        regex = re.compile(pattern)
+
+        def scan():
+            return sorted(prompt_id for prompt_id, record in index.items() if regex.fullmatch(record.name))
+
+        def uncached():
+            patterns._changed()
+            return patterns.match(pattern)
+
+        assert list(uncached()) == scan()
+        print(f"{pattern!r:14} scan {per_call(scan, args.calls):9.1f} us   "
+              f"index {per_call(uncached, args.calls):9.1f} us   "
+              f"cached {per_call(lambda: patterns.match(pattern), args.calls):6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Measure the memory used to hold prompts in the service index.
+
+Builds a synthetic corpus and compares, with tracemalloc, the memory held by:
+- one pydantic Prompt model per prompt (the previous index representation)
+- a PromptIndex of compact PromptRecord objects (content kept)
+- a PromptIndex of metadata-only records (lazy content mode)
+
+Usage:
+    benchmark_prompt_memory.py [--prompts 100000] [--directories 200] [--content-size 400]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_index import PromptIndex  # noqa: E402
+from src.services.prompt_record import PromptRecord  # noqa: E402
+
+
+def build_prompts(count, directories, content_size):
+    """Build Prompt models the way PromptService._build_prompt does."""
+    now = datetime.now(timezone.utc)
+    prompts = []
+    for i in range(count):
+        directory = f"/home/user/prompts/project{i % directories}/section{i % 7}"
+        name = f"prompt_{i % (count // 4 or 1)}"
+        prompt_id = os.path.join(directory, name) + f"_{i}"
+        content = (f"Body of prompt {i} [[shared_{i % 50}]] " * (content_size // 40 + 1))[:content_size]
+        prompts.append(Prompt(
+            id=prompt_id,
+            name=os.path.basename(prompt_id),
+            filename=os.path.basename(prompt_id) + ".md",
+            # Separate string objects per prompt, as produced by str(path.parent)
+            directory=str(Path(prompt_id).parent),
+            content=content,
+            description=f"Description {i}",
+            tags=[f"tag{i % 20}", f"team{i % 5}"],
+            created_at=now,
+            updated_at=now,
+            unique_id=prompt_id,
+        ))
+    return prompts
+
+
+def measure(label, build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    size = after - before
+    print(f"{label:<32} {size / 1024 / 1024:10.1f} MiB")
+    del held
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=100000)
+    parser.add_argument("--directories", type=int, default=200)
+    parser.add_argument("--content-size", type=int, default=400)
+    args = parser.parse_args()
+
+    print(f"{args.prompts} prompts, {args.directories} directories, {args.content_size} chars of content each")
+
+    models = measure("pydantic Prompt models", lambda: build_prompts(args.prompts, args.directories, args.content_size))
+
+    def build_index(keep_content):
+        index = PromptIndex()
+        # Records are built one at a time so the source models are never all alive at once
+        for prompt in build_prompts(args.prompts, args.directories, args.content_size):
+            index[prompt.id] = PromptRecord.from_prompt(prompt, keep_content=keep_content)
+        return index
+
+    records = measure("PromptIndex of records", lambda: build_index(True))
+    metadata = measure("PromptIndex, metadata only", lambda: build_index(False))
+
+    print(f"\nRecords use {records / models:.0%} of the model memory "
+          f"({(models - records) / args.prompts:.0f} bytes saved per prompt, including the index's lookup tables).")
+    print(f"Metadata-only records use {metadata / models:.0%} of the model memory.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare full-text search through the inverted index with a substring scan.
+
+Builds ``--prompts`` prompts of ``--words`` random words drawn from a
+vocabulary of ``--vocabulary`` words, then times the scan ``find_prompts``
+used to do (lowercasing every prompt's ID, description and content) and
+``SearchIndex.search`` for single words, two-word queries, phrases and
+prefixes. Index build time is reported separately.
+
+Usage:
+    benchmark_search_index.py [--prompts 5000] [--words 400] [--vocabulary 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+
+def build_service(count, words, vocabulary):
+    rng = random.Random(42)
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    now = datetime.now(timezone.utc)
+    for i in range(count):
+        text = " ".join(rng.choice(vocabulary) for _ in range(words))
+        name = f"prompt_{i}"
+        service.prompts[f"/prompts/{name}"] = Prompt(
+            id=f"/prompts/{name}", name=name, filename=f"{name}.md", directory="/prompts",
+            description=f"Prompt number {i}", content=text, created_at=now, updated_at=now)
+    return service
+
+
+def scan(service, search):
+    # The substring scan find_prompts used before the index
+    search = search.lower()
+    return [prompt.id for prompt in service.prompts.values()
+            if search in prompt.id.lower()
+            or (prompt.description and search in prompt.description.lower())
+            or search in service.get_prompt_content(prompt).lower()]
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=5000)
+    parser.add_argument("--words", type=int, default=400)
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    args = parser.parse_args()
+    logger.remove()
+    rng = random.Random(7)
+    vocabulary = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+                  for _ in range(args.vocabulary)]
+    service = build_service(args.prompts, args.words, vocabulary)
+    corpus_mb = sum(len(p.content) for p in service.prompts.values()) / 1e6
+
+    build = timed(service.search_index.flush, 1)
+    print(f"{args.prompts} prompts, {corpus_mb:.1f} MB; index build {build:.0f} ms")
+    print(f"{'query':<28}{'scan ms':>10}{'index ms':>10}{'hits':>8}")
+    queries = [vocabulary[0], f"{vocabulary[1]} {vocabulary[2]}", f'"{vocabulary[3]} {vocabulary[4]}"',
+               vocabulary[5][:3] + "*"]
+    for query in queries:
+        hits = len(service.search_index.search(query))
+        scan_ms = timed(lambda: scan(service, query.strip('"*')), 3)
+        index_ms = timed(lambda: service.search_index.search(query, 20), 20)
+        print(f"{query:<28}{scan_ms:>10.2f}{index_ms:>10.2f}{hits:>8}")
+
+
+if __name__ == "__main__":
+    main()
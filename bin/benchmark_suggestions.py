@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Measure per-keystroke latency of [[ autocompletion as the library grows.
+
+For each library size in ``--sizes``, builds prompts named from random words
+in ``--directories`` directories, then replays ``--words`` typed names one
+keystroke at a time (the empty query after ``[[`` included) against the
+substring scan ``search_prompt_suggestions`` used to do and against the
+suggestion index, and reports the median and p99 latency of each.
+
+Usage:
+    benchmark_suggestions.py [--sizes 1000,10000,50000] [--directories 50] [--words 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pra", "str", "eng"]
+
+
+def word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def build_service(count, directories, rng):
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    now = datetime.now(timezone.utc)
+    folders = [f"/library/{word(rng)}" for _ in range(directories)]
+    for _ in range(count):
+        name = f"{word(rng)}_{word(rng)}"
+        directory = rng.choice(folders)
+        prompt_id = f"{directory}/{name}"
+        service.prompts[prompt_id] = Prompt(id=prompt_id, name=name, filename=f"{name}.md", directory=directory,
+                                            content="", created_at=now, updated_at=now)
+    return service
+
+
+def scan(service, query, exclude_id):
+    # The scan search_prompt_suggestions used before the index
+    service.calculate_and_cache_display_names()
+    query_lower = query.lower()
+    suggestions = [{"id": prompt.id, "display_name": prompt.display_name} for prompt in service.prompts.values()
+                   if prompt.id != exclude_id
+                   and (not query or query_lower in prompt.id.lower() or query_lower in prompt.display_name.lower())]
+    suggestions.sort(key=lambda x: x["display_name"].lower())
+    return suggestions[:50]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000, samples[int(len(samples) * 0.99)] * 1000
+
+
+def replay(function, queries):
+    samples = []
+    for query, exclude_id in queries:
+        start = time.perf_counter()
+        function(query, exclude_id)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--directories", type=int, default=50)
+    parser.add_argument("--words", type=int, default=40)
+    args = parser.parse_args()
+    logger.remove()
+
+    print(f"{'prompts':>8}{'scan p50':>11}{'scan p99':>11}{'index p50':>11}{'index p99':>11}   (ms)")
+    for size in (int(s) for s in args.sizes.split(",")):
+        rng = random.Random(size)
+        service = build_service(size, args.directories, rng)
+        ids = list(service.prompts)
+        queries = []
+        for _ in range(args.words):
+            editing = rng.choice(ids)
+            # Type the name of another prompt, or a word that may match nothing
+            typed = os.path.basename(rng.choice(ids)) if rng.random() < 0.7 else word(rng)
+            queries.extend((typed[:length], editing) for length in range(len(typed) + 1))
+        service.search_prompt_suggestions("")  # build the index
+        scan_p50, scan_p99 = replay(lambda q, e: scan(service, q, e), queries)
+        index_p50, index_p99 = replay(service.search_prompt_suggestions, queries)
+        print(f"{size:>8}{scan_p50:>11.2f}{scan_p99:>11.2f}{index_p50:>11.3f}{index_p99:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Compare tag queries and facet counts through the tag index with a scan.
+
+Builds ``--prompts`` prompts in ``--directories`` directories, each with up to
+five tags drawn (Zipf-like) from ``--tags`` tags, then times the scan
+``get_prompts_by_tag`` used to do, an AND/NOT/directory query, and the tag
+and directory counts a sidebar needs, both by scanning every prompt and
+through the index.
+
+Usage:
+    benchmark_tag_index.py [--prompts 20000] [--tags 300] [--directories 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# Keep the benchmark away from the user's directory config (read at import)
+os.environ.setdefault("PROMPT_MANAGER_CONFIG_FILE", os.path.join(tempfile.mkdtemp(), "prompt_directories.json"))
+
+from src.models.unified_prompt import Prompt  # noqa: E402
+from src.services.prompt_service import PromptService  # noqa: E402
+from src.services.tag_index import TagQuery  # noqa: E402
+
+
+def build_service(count, tags, directories):
+    rng = random.Random(42)
+    service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+    now = datetime.now(timezone.utc)
+    weights = [1 / (rank + 1) for rank in range(tags)]
+    for i in range(count):
+        name = f"prompt_{i}"
+        directory = f"/library/d{rng.randrange(directories)}"
+        prompt_tags = sorted({f"t{t}" for t in rng.choices(range(tags), weights, k=rng.randint(0, 5))})
+        service.prompts[f"{directory}/{name}"] = Prompt(
+            id=f"{directory}/{name}", name=name, filename=f"{name}.md", directory=directory, content="text",
+            tags=prompt_tags, created_at=now, updated_at=now)
+    return service
+
+
+def timed(function, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=20000)
+    parser.add_argument("--tags", type=int, default=300)
+    parser.add_argument("--directories", type=int, default=40)
+    args = parser.parse_args()
+    logger.remove()
+    service = build_service(args.prompts, args.tags, args.directories)
+    records = list(service.prompts.values())
+
+    def scan_query():
+        return [p.id for p in records
+                if p.has_tag("t0") and p.has_tag("t3") and not p.has_tag("t1") and p.directory != "/library/d0"]
+
+    def scan_facets():
+        return Counter(tag for p in records for tag in p.tags), Counter(p.directory for p in records)
+
+    query = TagQuery(all_tags=["t0", "t3"], no_tags=["t1"], exclude_directories=["/library/d0"])
+    cases = [
+        ("one tag", lambda: [p.id for p in records if p.has_tag("t5")], lambda: service.tag_index.tagged("t5")),
+        ("t0 AND t3, NOT t1, NOT dir", scan_query, lambda: service.tag_index.query(query)),
+        ("facets, all prompts", scan_facets, service.tag_facets),
+        ("facets, one directory", lambda: Counter(t for p in records if p.directory == "/library/d1" for t in p.tags),
+         lambda: service.tag_facets(TagQuery(directories=["/library/d1"]))),
+    ]
+    print(f"{args.prompts} prompts, {args.tags} tags")
+    print(f"{'':<30}{'scan ms':>10}{'index ms':>10}")
+    for label, scan, indexed in cases:
+        print(f"{label:<30}{timed(scan)[0]:>10.2f}{timed(indexed)[0]:>10.3f}")
+    assert sorted(scan_query()) == sorted(service.tag_index.query(query))
+
+
+if __name__ == "__main__":
+    main()
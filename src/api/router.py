@@ -4,13 +4,18 @@ API routes for prompt management.
 
 import os
 import sys
-from typing import List, Dict, Optional
-from fastapi import APIRouter, HTTPException, Depends
+import json
+from urllib.parse import quote
+from typing import Any, Callable, Hashable, List, Dict, Literal, Optional, Tuple
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from loguru import logger
 from datetime import datetime, timezone
 
 from src.models.prompt import PromptDirectory
+from src.services.hot_logging import sampled
+from src.services.tag_index import TagQuery
 
 # Add parent directory to sys.path to make imports work from anywhere
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -79,6 +84,16 @@ class DefaultPromptsCreate(BaseModel):
 class PromptExpandRequest(BaseModel):
     prompt_id: str  # Can be full path ID or display name
     directory: Optional[str] = None # To disambiguate if prompts have same display name in different dirs
+    # Stream the expansion instead of returning one JSON document:
+    # "text" sends the expanded content as plain text, "ndjson" sends
+    # start/chunk/end records with dependencies and warnings in the end record
+    stream: Optional[Literal["text", "ndjson"]] = None
+
+# Model for batch prompt expansion request
+class PromptBatchExpandRequest(BaseModel):
+    prompt_ids: List[str]  # Full path IDs or display names
+    directory: Optional[str] = None  # To disambiguate display names
+    stream: bool = False  # Send one NDJSON line per prompt as soon as it is expanded
 
 # Model for prompt expansion response
 class PromptExpandResponse(BaseModel):
@@ -106,13 +121,23 @@ class FilesystemCompletionResponse(BaseModel):
     is_directory: bool
 
 # Helper functions
-def get_directory_name(directory_path: str, prompt_service: PromptServiceClass = None) -> str:
-    """Get directory name from path."""
+def get_directory_name(directory_path: str, prompt_service: PromptServiceClass = None,
+                       configured_names: Optional[Dict[str, str]] = None) -> str:
+    """Get directory name from path.
+
+    Callers resolving many paths pass the same, initially empty,
+    ``configured_names`` dict to every call; it is filled with the path to
+    name map of the service's directories on first use, so they are scanned once.
+    """
     # Try to get from prompt service directories if available
     if prompt_service:
-        for dir_obj in prompt_service.directories:
-            if dir_obj.path == directory_path:
-                return dir_obj.name
+        if configured_names is None:
+            configured_names = {}
+        if not configured_names:
+            for dir_obj in prompt_service.directories:
+                configured_names.setdefault(dir_obj.path, dir_obj.name)
+        if directory_path in configured_names:
+            return configured_names[directory_path]
     
     # Try to get from directory service (legacy fallback)
     dir_info = get_directory_by_path(directory_path)
@@ -123,21 +148,102 @@ def get_directory_name(directory_path: str, prompt_service: PromptServiceClass =
     return os.path.basename(directory_path)
 
 
+def _listing_response(request: Request, prompt_service: PromptServiceClass, variant: Hashable,
+                      build: Callable[[], Tuple[Any, Dict[str, str]]]) -> Response:
+    """Serve a listing from its pre-encoded snapshot, building and storing it if needed.
+
+    The snapshot is current as long as ``prompt_service.listing_version()`` is
+    unchanged, so a request whose ``If-None-Match`` names it gets a 304 without
+    touching the prompt index. Bodies are sent gzip-compressed to clients that accept it.
+    """
+    snapshots = prompt_service.listing_snapshots
+    version = prompt_service.listing_version()
+    snapshot = snapshots.get(variant, version)
+    if snapshot is None:
+        payload, extra_headers = build()
+        snapshot = snapshots.put(variant, version, payload, extra_headers)
+
+    use_gzip = snapshot.compressible and "gzip" in request.headers.get("accept-encoding", "")
+    headers = {"ETag": snapshot.gzip_etag if use_gzip else snapshot.etag,
+               "Cache-Control": "no-cache", "Vary": "Accept-Encoding", **snapshot.headers}
+    if snapshot.matches(request.headers.get("if-none-match")):
+        snapshots.not_modified += 1
+        return Response(status_code=304, headers=headers)
+    if use_gzip:
+        return Response(snapshots.compress(variant, snapshot), media_type="application/json",
+                        headers={**headers, "Content-Encoding": "gzip"})
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
+
+def _all_prompts_listing(prompt_service: PromptServiceClass, fields: Optional[str], sort: str, order: str,
+                         directory: Optional[str], tag: Optional[str], is_composite: Optional[bool],
+                         q: Optional[str], cursor: Optional[str], limit: Optional[int]) -> Tuple[List[Dict], Dict[str, str]]:
+    """Build one page of ``/all``: the prompt dicts and the ``X-Next-Cursor`` header, if any."""
+    requested = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    with_directory_name = requested is None or "directory_name" in requested
+    service_fields = None
+    if requested is not None:
+        service_fields = [field for field in requested if field != "directory_name"]
+        if with_directory_name and "directory" not in service_fields:
+            service_fields.append("directory")
+    query = TagQuery(all_tags=[t.strip() for t in tag.split(",") if t.strip()] if tag else (),
+                     directories=[directory] if directory else (), is_composite=is_composite)
+    try:
+        prompts, next_cursor = prompt_service.list_prompts(service_fields, sort, order == "desc", query, q,
+                                                           cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if with_directory_name:
+        # Resolved once per directory, from one map of the configured directories
+        configured_names: Dict[str, str] = {}
+        names: Dict[str, str] = {}
+        for prompt_dict in prompts:
+            path = prompt_dict["directory"]
+            if path not in names:
+                names[path] = get_directory_name(path, prompt_service, configured_names)
+            prompt_dict["directory_name"] = names[path]
+            if requested is not None and "directory" not in requested:
+                del prompt_dict["directory"]
+
+    logger.debug("Returning {} prompts with display names", len(prompts))
+    return prompts, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+
 # Routes
 
 @router.get("/all", response_model=List[Dict])
-async def get_all_prompts(prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
-    """Get all prompts with smart display names."""
-    # Use the service method that includes display name calculation
-    prompts = prompt_service.get_all_prompts(include_content=True, include_display_names=True)
-    
-    # Add directory name for each prompt
-    for prompt_dict in prompts:
-        prompt_dict["directory_name"] = get_directory_name(prompt_dict["directory"], prompt_service)
-    
-    logger.info(f"Returning {len(prompts)} prompts with display names")
-    
-    return prompts
+async def get_all_prompts(
+    request: Request,
+    prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency),
+    fields: Optional[str] = None,
+    sort: str = "id",
+    order: Literal["asc", "desc"] = "asc",
+    directory: Optional[str] = None,
+    tag: Optional[str] = None,
+    is_composite: Optional[bool] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Get prompts with smart display names, sorted, filtered and optionally paginated.
+
+    - ``fields``: comma-separated fields to return; content is only included when listed
+    - ``sort`` / ``order``: id, name, display_name, directory, updated_at or created_at
+    - ``directory``, ``tag`` (comma-separated, all required), ``is_composite``, ``q`` (text in ID, name or description)
+    - ``limit`` / ``cursor``: page size, and the ``X-Next-Cursor`` header of the previous page
+
+    Responses carry an ETag and are served from a pre-encoded snapshot until a
+    prompt or directory changes; ``If-None-Match`` gets a 304.
+    """
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+
+    def build():
+        return _all_prompts_listing(prompt_service, fields, sort, order, directory, tag, is_composite, q, cursor, limit)
+
+    variant = ("all", fields, sort, order, directory, tag, is_composite, q, cursor, limit)
+    return _listing_response(request, prompt_service, variant, build)
 
 @router.get("/search_suggestions", response_model=List[Dict])
 async def get_prompt_suggestions(
@@ -146,7 +252,9 @@ async def get_prompt_suggestions(
     prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
 ):
     """Get prompt suggestions for autocompletion based on a query string."""
-    logger.info(f"Searching suggestions for query: '{query}', excluding: '{exclude}'")
+    # Called on every keystroke in the editor
+    if sampled("api.search_suggestions"):
+        logger.debug("Searching suggestions for query: '{}', excluding: '{}'", query, exclude)
     try:
         suggestions = prompt_service.search_prompt_suggestions(query, exclude)
         return suggestions 
@@ -154,6 +262,54 @@ async def get_prompt_suggestions(
         logger.opt(exception=True).error(f"Error searching prompt suggestions: {e}")
         raise HTTPException(status_code=500, detail="Internal server error while searching prompt suggestions")
 
+@router.get("/search", response_model=List[Dict])
+async def search_prompts(
+    q: str,
+    limit: int = Query(20, ge=1, le=500),
+    prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
+):
+    """Full-text search of prompt names, descriptions and content, ranked by relevance."""
+    try:
+        return prompt_service.search_prompts(q, limit)
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error searching prompts for '{q}': {e}")
+        raise HTTPException(status_code=500, detail="Internal server error while searching prompts")
+
+def tag_query_parameters(
+    tag: Optional[List[str]] = Query(None, description="Tags the prompts must all have (AND)"),
+    any_tag: Optional[List[str]] = Query(None, description="Tags the prompts must have at least one of (OR)"),
+    not_tag: Optional[List[str]] = Query(None, description="Tags the prompts must not have (NOT)"),
+    directory: Optional[List[str]] = Query(None, description="Directories the prompts must be in (any of)"),
+    not_directory: Optional[List[str]] = Query(None, description="Directories the prompts must not be in"),
+    is_composite: Optional[bool] = Query(None, description="Only composite (true) or plain (false) prompts"),
+) -> TagQuery:
+    """Build a tag query from repeated query string parameters."""
+    return TagQuery(all_tags=tag or (), any_tags=any_tag or (), no_tags=not_tag or (),
+                    directories=directory or (), exclude_directories=not_directory or (),
+                    is_composite=is_composite)
+
+@router.get("/tags/query", response_model=List[Dict])
+async def query_prompts_by_tags(
+    query: TagQuery = Depends(tag_query_parameters),
+    limit: Optional[int] = Query(None, ge=1),
+    prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
+):
+    """Get the prompts matching tags (AND/OR/NOT), directories and composite flag."""
+    return prompt_service.query_prompts(query, limit)
+
+@router.get("/tags/facets", response_model=Dict)
+async def get_tag_facets(
+    query: TagQuery = Depends(tag_query_parameters),
+    prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
+):
+    """Count prompts per tag and per directory, over all prompts or the matches of a tag query."""
+    return prompt_service.tag_facets(query)
+
+@router.get("/cache_stats", response_model=Dict)
+async def get_cache_stats(prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
+    """Get size, hit rate and invalidation counters of the service caches."""
+    return prompt_service.cache_stats()
+
 # Directory routes - MUST come before the catch-all {prompt_id:path} route
 @router.get("/directories/all", response_model=List[Dict])
 async def get_all_directories(prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
@@ -161,23 +317,23 @@ async def get_all_directories(prompt_service: PromptServiceClass = Depends(get_p
     return [d.model_dump() for d in prompt_service.directories]
 
 @router.get("/directories/{directory_path:path}/prompts", response_model=List[Dict])
-async def get_directory_prompts(directory_path: str, prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
+async def get_directory_prompts(request: Request, directory_path: str,
+                                prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
     """Get all prompts in a specific directory with display names."""
-    logger.info(f"Getting prompts for directory: {directory_path}")
-    try:
-        # Get all prompts and filter by directory
-        all_prompts = prompt_service.get_all_prompts(include_content=False, include_display_names=True)
-        directory_prompts = [p for p in all_prompts if p["directory"] == directory_path]
-        
-        # Sort alphabetically by display name for better UX
-        directory_prompts.sort(key=lambda p: p.get("display_name", p["id"]).lower())
-        
-        logger.info(f"Found {len(directory_prompts)} prompts in directory: {directory_path}")
-        return directory_prompts
-        
-    except Exception as e:
-        logger.opt(exception=True).error(f"Error getting directory prompts for {directory_path}: {e}")
-        raise HTTPException(status_code=500, detail="Internal server error while getting directory prompts")
+    logger.debug("Getting prompts for directory: {}", directory_path)
+
+    def build():
+        try:
+            # Sorted alphabetically by display name for better UX
+            directory_prompts, _ = prompt_service.list_prompts(
+                sort="display_name", query=TagQuery(directories=[directory_path]))
+        except Exception as e:
+            logger.opt(exception=True).error(f"Error getting directory prompts for {directory_path}: {e}")
+            raise HTTPException(status_code=500, detail="Internal server error while getting directory prompts")
+        logger.debug("Found {} prompts in directory: {}", len(directory_prompts), directory_path)
+        return directory_prompts, {}
+
+    return _listing_response(request, prompt_service, ("directory", directory_path), build)
 
 @router.post("/directories", response_model=Dict)
 async def add_directory(directory: DirectoryCreate, prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
@@ -327,24 +483,73 @@ async def reload_all_prompts_endpoint(prompt_service: PromptServiceClass = Depen
     """Reload all prompts from all configured directories."""
     logger.info("API endpoint /reload called. Reloading all prompts.")
     try:
-        count = prompt_service.load_all_prompts()
-        return {"message": f"Successfully reloaded {count} prompts from all directories.", "count": count}
+        stats = prompt_service.reload_prompts()
+        count = stats["total"]
+        return {
+            "message": f"Successfully reloaded {count} prompts from all directories.",
+            "count": count,
+            **stats,
+        }
     except Exception as e:
         logger.opt(exception=True).error(f"Error during /reload endpoint: {e}")
         raise HTTPException(status_code=500, detail=f"Internal server error while reloading prompts: {str(e)}")
 
+def _ndjson_line(record: Dict) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+_STREAM_ERROR_DETAIL = "Internal server error during prompt expansion"
+
+def _stream_expansion(stream, mode: str) -> StreamingResponse:
+    """Wrap an ExpansionStream in a text or NDJSON streaming response.
+
+    The status line is already sent when the expansion fails mid-stream, so
+    the failure is reported in the body: text streams end with an
+    ``[[EXPANSION ERROR]]`` marker, NDJSON streams with an "error" record
+    instead of "end".
+    """
+    def log_failure(e: Exception) -> None:
+        logger.opt(exception=True).error(f"Error streaming expansion of {stream.prompt_id}: {e}")
+
+    if mode == "text":
+        def text():
+            try:
+                yield from stream
+            except Exception as e:
+                log_failure(e)
+                yield f"\n[[EXPANSION ERROR: {_STREAM_ERROR_DETAIL}]]"
+
+        return StreamingResponse(text(), media_type="text/plain; charset=utf-8",
+                                 headers={"X-Prompt-Id": quote(stream.prompt_id, safe="/:")})
+
+    def records():
+        yield _ndjson_line({"type": "start", "prompt_id": stream.prompt_id})
+        try:
+            for chunk in stream:
+                yield _ndjson_line({"type": "chunk", "content": chunk})
+        except Exception as e:
+            log_failure(e)
+            yield _ndjson_line({"type": "error", "prompt_id": stream.prompt_id, "detail": _STREAM_ERROR_DETAIL})
+            return
+        yield _ndjson_line({"type": "end", "prompt_id": stream.prompt_id,
+                            "dependencies": stream.dependencies, "warnings": stream.warnings})
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
+
 @router.post("/expand", response_model=PromptExpandResponse)
 async def expand_prompt_content(
     request_data: PromptExpandRequest,
     prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
 ):
     """Expand a prompt's content by recursively including dependencies."""
-    logger.info(f"Expanding prompt: {request_data.prompt_id}")
+    logger.debug("Expanding prompt: {}", request_data.prompt_id)
     try:
         prompt = prompt_service.get_prompt(request_data.prompt_id, directory=request_data.directory)
         if not prompt:
             raise HTTPException(status_code=404, detail=f"Prompt '{request_data.prompt_id}' not found for expansion.")
 
+        if request_data.stream:
+            return _stream_expansion(prompt_service.stream_prompt_expansion(prompt.id), request_data.stream)
+
         expanded_content, dependencies, warnings = prompt_service.expand_prompt_content(prompt.id)
         
         return PromptExpandResponse(
@@ -354,6 +559,8 @@ async def expand_prompt_content(
             dependencies=dependencies,
             warnings=warnings
         )
+    except HTTPException: # Re-raise HTTP exceptions directly
+        raise
     except ValueError as ve:
         logger.error(f"ValueError expanding prompt: {ve}")
         raise HTTPException(status_code=400, detail=str(ve))
@@ -361,6 +568,27 @@ async def expand_prompt_content(
         logger.opt(exception=True).error(f"Error expanding prompt: {e}")
         raise HTTPException(status_code=500, detail="Internal server error during prompt expansion")
 
+@router.post("/expand/batch", response_model=Dict)
+async def expand_prompts_batch(
+    request_data: PromptBatchExpandRequest,
+    prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)
+):
+    """Expand several prompts in one request, sharing the expansion of common dependencies.
+
+    Prompts that do not exist or fail to expand get an "error" entry instead
+    of failing the batch, also when the results are streamed.
+    """
+    logger.debug("Expanding batch of {} prompts", len(request_data.prompt_ids))
+    results = prompt_service.expand_prompts(request_data.prompt_ids, directory=request_data.directory)
+    if request_data.stream:
+        return StreamingResponse((_ndjson_line(result) for result in results), media_type="application/x-ndjson")
+    try:
+        expanded = list(results)
+    except Exception as e:
+        logger.opt(exception=True).error(f"Error expanding prompt batch: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error during batch expansion")
+    return {"results": expanded, "count": len(expanded)}
+
 @router.post("/rename", response_model=Dict)
 async def rename_prompt_endpoint(
     rename_data: PromptRenameRequest,
@@ -469,7 +697,7 @@ async def create_new_prompt(
     
     # Print the incoming data for debugging
     import json
-    logger.info(f"Prompt data: {json.dumps(prompt_data.model_dump(), indent=2)}")
+    logger.opt(lazy=True).debug("Prompt data: {}", lambda: json.dumps(prompt_data.model_dump(), indent=2))
     
     # Validate directory
     if not prompt_data.directory:
@@ -504,7 +732,7 @@ async def create_new_prompt(
 @router.get("/{prompt_id:path}/referenced_by", response_model=List[Dict])
 async def get_prompt_references(prompt_id: str, prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
     """Get all prompts that reference the given prompt_id."""
-    logger.info(f"Fetching references for prompt_id: {prompt_id}")
+    logger.debug("Fetching references for prompt_id: {}", prompt_id)
     references = prompt_service.get_references_to_prompt(prompt_id)
     if references is None: # Prompt doesn't exist, return empty list instead of 404
         logger.warning(f"Prompt '{prompt_id}' not found when trying to get its references. Returning empty list.")
@@ -514,7 +742,8 @@ async def get_prompt_references(prompt_id: str, prompt_service: PromptServiceCla
 @router.put("/{prompt_id:path}", response_model=Dict)
 async def update_existing_prompt(prompt_id: str, update_data: PromptUpdate, prompt_service: PromptServiceClass = Depends(get_prompt_service_dependency)):
     """Update an existing prompt's content, description, or tags."""
-    logger.info(f"Updating prompt: {prompt_id} with data: {update_data.model_dump(exclude_none=True)}")
+    # The update carries the full content on every editor save; log the field names only
+    logger.info("Updating prompt: {} (fields: {})", prompt_id, sorted(update_data.model_fields_set))
     
     prompt = prompt_service.get_prompt(prompt_id)
     if not prompt:
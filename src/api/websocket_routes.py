@@ -7,6 +7,8 @@ from typing import Dict, List, Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from loguru import logger
 
+from src.services.hot_logging import sampled
+from src.services.live_preview import LivePreview
 from src.services.prompt_service import PromptService
 
 # Store for the PromptService instance, to be set by server.py
@@ -14,7 +16,7 @@ from src.services.prompt_service import PromptService
 websocket_prompt_service_store: Optional[PromptService] = None
 
 async def get_ws_prompt_service() -> PromptService:
-    logger.debug(f"get_ws_prompt_service called. websocket_prompt_service_store is set: {websocket_prompt_service_store is not None}")
+    logger.debug("get_ws_prompt_service called. websocket_prompt_service_store is set: {}", websocket_prompt_service_store is not None)
     if websocket_prompt_service_store:
         return websocket_prompt_service_store
     # This error indicates a setup problem in server.py
@@ -39,14 +41,14 @@ class ConnectionManager:
             self.connections[prompt_id] = []
         
         self.connections[prompt_id].append(websocket)
-        logger.debug(f"WebSocket client connected to prompt {prompt_id}")
+        logger.debug("WebSocket client connected to prompt {}", prompt_id)
     
     def disconnect(self, websocket: WebSocket, prompt_id: str):
         """Disconnect a WebSocket client."""
         if prompt_id in self.connections:
             if websocket in self.connections[prompt_id]:
                 self.connections[prompt_id].remove(websocket)
-                logger.debug(f"WebSocket client disconnected from prompt {prompt_id}")
+                logger.debug("WebSocket client disconnected from prompt {}", prompt_id)
             
             # Clean up empty lists
             if not self.connections[prompt_id]:
@@ -68,11 +70,10 @@ manager = ConnectionManager()
 @router.websocket("/ws/prompts/{prompt_id}", name="ws_prompt")
 async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
     try:
-        logger.debug(f"WebSocket EP ({prompt_id}): Entry (Top Level Try)")
+        logger.debug("WebSocket EP ({}): Entry (Top Level Try)", prompt_id)
         
-        logger.debug(f"WebSocket EP ({prompt_id}): Attempting to get prompt_service via get_ws_prompt_service")
         prompt_service = await get_ws_prompt_service()
-        logger.debug(f"WebSocket EP ({prompt_id}): get_ws_prompt_service returned type: {type(prompt_service)}, is None: {prompt_service is None}")
+        logger.debug("WebSocket EP ({}): get_ws_prompt_service returned type: {}", prompt_id, type(prompt_service))
         
         if prompt_service is None:
             logger.error(f"WebSocket EP ({prompt_id}): Critical error - prompt_service_instance is None!")
@@ -82,10 +83,10 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
                 logger.warning(f"WebSocket EP ({prompt_id}): Exception during websocket.close after prompt_service was None: {close_exc}", exc_info=True)
             return
 
-        logger.debug(f"WebSocket EP ({prompt_id}): Attempting prompt_service.get_prompt('{prompt_id}') (PS id: {id(prompt_service)})")
         prompt = prompt_service.get_prompt(prompt_id)
-        logger.debug(f"WebSocket EP ({prompt_id}): get_prompt returned type: {type(prompt)}. Value: {prompt!r}")
-        logger.debug(f"WebSocket EP ({prompt_id}): Evaluation of 'not prompt': {not prompt}")
+        # The repr includes the whole prompt content; only build it for sampled connections
+        if sampled("ws.prompt_repr"):
+            logger.debug("WebSocket EP ({}): get_prompt (PS id: {}) returned: {!r}", prompt_id, id(prompt_service), prompt)
 
         if not prompt:
             logger.warning(f"WebSocket EP ({prompt_id}): Prompt not found by service. Closing with 4004.")
@@ -96,11 +97,11 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
             return
         
         logger.info(f"WebSocket EP ({prompt_id}): Prompt found. Name: '{getattr(prompt, 'name', prompt.id)}', Unique ID: '{prompt.unique_id}'")
-        logger.debug(f"WebSocket EP ({prompt_id}): All checks passed, proceeding to manager.connect")
+        logger.debug("WebSocket EP ({}): All checks passed, proceeding to manager.connect", prompt_id)
         
         # This inner try-except is for manager.connect and subsequent operations
         try:
-            logger.debug(f"WebSocket EP ({prompt_id}): Inside inner try, attempting manager.connect (will call websocket.accept())")
+            logger.debug("WebSocket EP ({}): Inside inner try, attempting manager.connect (will call websocket.accept())", prompt_id)
             await manager.connect(websocket, prompt_id)
             logger.info(f"WebSocket EP ({prompt_id}): manager.connect succeeded (websocket.accept() called).")
         except WebSocketDisconnect:
@@ -124,7 +125,10 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
                 "is_composite": prompt.is_composite,
                 "updated_at": prompt.updated_at.isoformat() if prompt.updated_at else None
             }
-            logger.debug(f"WebSocket EP ({prompt_id}): Attempting to send initial data: {initial_data_payload!r}")
+            logger.opt(lazy=True).debug(
+                "WebSocket EP ({}): Attempting to send initial data ({} chars of content)",
+                lambda: prompt_id, lambda: len(prompt.content or ""),
+            )
             await websocket.send_json(initial_data_payload)
             logger.info(f"WebSocket EP ({prompt_id}): Successfully sent initial data.")
         except WebSocketDisconnect:
@@ -137,11 +141,15 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
             return # Return from outer function
         
         # Message handling loop
-        logger.debug(f"WebSocket EP ({prompt_id}): Entering message handling loop.")
+        logger.debug("WebSocket EP ({}): Entering message handling loop.", prompt_id)
+        # Incremental expansion state of this connection's editor buffer
+        preview: Optional[LivePreview] = None
         while True:
             data = await websocket.receive_json() # This can raise WebSocketDisconnect
-            logger.debug(f"WebSocket EP ({prompt_id}): Received data: {data!r}")
             action = data.get("action")
+            # Messages carry the full editor content; log a summary of a sample of them
+            if sampled("ws.message"):
+                logger.debug("WebSocket EP ({}): Received '{}' message with keys {}", prompt_id, action, sorted(data))
             
             if action == "update":
                 content = data.get("content")
@@ -149,11 +157,11 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
                     prompt.content = content
                     now = datetime.now(timezone.utc)
                     prompt.updated_at = now
-                    logger.debug(f"WebSocket EP ({prompt_id}): Saving updated content.")
+                    logger.debug("WebSocket EP ({}): Saving updated content.", prompt_id)
                     success = prompt_service.save_prompt(prompt)
                     await websocket.send_json({"action": "update_status", "success": success, "timestamp": now.isoformat()})
                     if success:
-                        logger.debug(f"WebSocket EP ({prompt_id}): Broadcasting content update.")
+                        logger.debug("WebSocket EP ({}): Broadcasting content update.", prompt_id)
                         await manager.broadcast({"action": "update", "content": content, "timestamp": now.isoformat()}, prompt_id, exclude=websocket)
             
             elif action == "update_metadata":
@@ -165,17 +173,28 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
                     prompt.tags = tags
                 now = datetime.now(timezone.utc)
                 prompt.updated_at = now
-                logger.debug(f"WebSocket EP ({prompt_id}): Saving updated metadata.")
+                logger.debug("WebSocket EP ({}): Saving updated metadata.", prompt_id)
                 success = prompt_service.save_prompt(prompt)
                 await websocket.send_json({"action": "update_status", "success": success, "timestamp": now.isoformat()})
                 if success:
-                    logger.debug(f"WebSocket EP ({prompt_id}): Broadcasting metadata update.")
+                    logger.debug("WebSocket EP ({}): Broadcasting metadata update.", prompt_id)
                     await manager.broadcast({"action": "update_metadata", "description": description, "tags": tags, "timestamp": now.isoformat()}, prompt_id, exclude=websocket)
             
+            elif action == "expand" and data.get("incremental"):
+                # Live preview: reply with only the changed region of the expansion
+                content = data.get("content")
+                if content is not None:
+                    if preview is None:
+                        preview = LivePreview(prompt_service, prompt.id)
+                    elif data.get("reset"):
+                        preview.reset()
+                    delta = preview.update(content)
+                    await websocket.send_json({"action": "expanded_delta", **delta})
+
             elif action == "expand":
                 content = data.get("content")
                 if content is not None:
-                    logger.debug(f"WebSocket EP ({prompt_id}): Expanding content.")
+                    logger.debug("WebSocket EP ({}): Expanding content.", prompt_id)
                     expanded, dependencies, warnings = prompt_service.expand_inclusions(content, parent_id=prompt.id) # Use prompt.id for consistency
                     await websocket.send_json({"action": "expanded", "content": content, "expanded": expanded, "dependencies": list(dependencies), "warnings": warnings})
             else:
@@ -191,9 +210,9 @@ async def websocket_endpoint(websocket: WebSocket, prompt_id: str):
         # as it might raise another error. FastAPI/Starlette will likely handle sending a 500.
     finally:
         # This finally block will always execute, regardless of how the try block exits (return, exception)
-        logger.debug(f"WebSocket EP ({prompt_id}): In outer finally block. Disconnecting client.")
+        logger.debug("WebSocket EP ({}): In outer finally block. Disconnecting client.", prompt_id)
         manager.disconnect(websocket, prompt_id) # Ensure cleanup
-        logger.debug(f"WebSocket EP ({prompt_id}): Exiting endpoint (from outer finally).")
+        logger.debug("WebSocket EP ({}): Exiting endpoint (from outer finally).", prompt_id)
 
 # The fragment_websocket_endpoint below is legacy and should be removed.
 # All WebSocket interactions for prompts (and what were previously fragments)
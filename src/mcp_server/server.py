@@ -17,6 +17,7 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from src.services.hot_logging import sample
 from src.services.prompt_service import PromptService
 from src.models.unified_prompt import Prompt
 
@@ -85,7 +86,7 @@ class PromptManagerMCPServer:
     async def handle_client(self, reader, writer):
         """Handle a client connection."""
         peer = writer.get_extra_info('peername')
-        logger.info(f"Client connected from {peer}")
+        logger.info("Client connected from %s", peer)
         
         try:
             while True:
@@ -143,10 +144,13 @@ class PromptManagerMCPServer:
                 await writer.wait_closed()
             except:
                 pass
-            logger.info(f"Client {peer} disconnected")
+            logger.info("Client %s disconnected", peer)
             
     async def handle_request(self, request: MCPRequest) -> MCPResponse:
         """Handle an MCP request and return a response."""
+        # This server logs through the standard library, so use its level check and %-formatting
+        if logger.isEnabledFor(logging.DEBUG) and sample("mcp.request"):
+            logger.debug("MCP request %s (id: %s)", request.method, request.id)
         try:
             if request.method == 'tools/list':
                 return await self.list_tools(request)
@@ -219,13 +223,17 @@ class PromptManagerMCPServer:
             },
             {
                 'name': 'search_prompts',
-                'description': 'Search prompts by text content',
+                'description': 'Search prompts by name, description and content, best matches first',
                 'inputSchema': {
                     'type': 'object',
                     'properties': {
                         'query': {
                             'type': 'string',
-                            'description': 'Search query to find prompts'
+                            'description': 'Search query: words, "quoted phrases" and prefix* terms'
+                        },
+                        'limit': {
+                            'type': 'integer',
+                            'description': 'Maximum number of results (default 50)'
                         }
                     },
                     'required': ['query']
@@ -357,14 +365,17 @@ class PromptManagerMCPServer:
     # Tool implementations
     async def tool_list_prompts(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """List all prompts."""
+        service = self.prompt_service
+        assert service is not None  # checked by call_tool
         prompts = []
-        for prompt in self.prompt_service.prompts.values():
+        for prompt in service.prompts.values():
+            content = service.get_prompt_content(prompt)
             prompts.append({
                 'id': prompt.id,
                 'unique_id': prompt.unique_id,
                 'directory': prompt.directory,
-                'path': str(prompt.path) if prompt.path else None,
-                'content_preview': prompt.content[:100] + '...' if len(prompt.content) > 100 else prompt.content
+                'path': prompt.full_path,
+                'content_preview': content[:100] + '...' if len(content) > 100 else content
             })
             
         return {
@@ -384,24 +395,28 @@ class PromptManagerMCPServer:
             'id': prompt.id,
             'unique_id': prompt.unique_id,
             'directory': prompt.directory,
-            'path': str(prompt.path) if prompt.path else None,
+            'path': prompt.full_path,
             'content': prompt.content
         }
         
     async def tool_search_prompts(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
-        """Search prompts by content."""
-        query = arguments['query'].lower()
+        """Search prompts through the service's full-text index."""
+        service = self.prompt_service
+        assert service is not None  # checked by call_tool
+        matches = service.search_index.search(arguments['query'], arguments.get('limit', 50))
         matching_prompts = []
         
-        for prompt in self.prompt_service.prompts.values():
-            if query in prompt.content.lower() or query in prompt.id.lower():
-                matching_prompts.append({
-                    'id': prompt.id,
-                    'unique_id': prompt.unique_id,
-                    'directory': prompt.directory,
-                    'path': str(prompt.path) if prompt.path else None,
-                    'content_preview': prompt.content[:200] + '...' if len(prompt.content) > 200 else prompt.content
-                })
+        for prompt_id, score in matches:
+            prompt = service.prompts[prompt_id]
+            content = service.get_prompt_content(prompt)
+            matching_prompts.append({
+                'id': prompt.id,
+                'unique_id': prompt.unique_id,
+                'directory': prompt.directory,
+                'path': prompt.full_path,
+                'score': round(score, 4),
+                'content_preview': content[:200] + '...' if len(content) > 200 else content
+            })
                 
         return {
             'prompts': matching_prompts,
@@ -197,13 +197,15 @@ class Prompt(BaseModel):
         if not prompt_data:
             return {}
         
-        all_prompt_ids = [p['id'] for p in prompt_data]
-        display_names = {}
-        
+        # Only prompts sharing a filename can conflict, so compare within those groups
+        groups: Dict[str, List[str]] = {}
         for prompt in prompt_data:
-            prompt_id = prompt['id']
-            display_name = cls.calculate_display_name(prompt_id, all_prompt_ids)
-            display_names[prompt_id] = display_name
+            groups.setdefault(Path(prompt['id']).name, []).append(prompt['id'])
+        
+        display_names = {}
+        for group_ids in groups.values():
+            for prompt_id in group_ids:
+                display_names[prompt_id] = cls.calculate_display_name(prompt_id, group_ids)
         
         return display_names
     
@@ -5,6 +5,7 @@ This module provides a FastAPI application that serves the prompt management
 interface and API.
 """
 
+import asyncio
 import sys
 from pathlib import Path
 from typing import Optional, Callable, Coroutine, Any
@@ -20,6 +21,7 @@ from starlette.middleware.base import BaseHTTPMiddleware
 # from services.prompt_service import PromptService # Old import on line 33, now removed/commented
 from src.services.prompt_service import PromptService as PromptServiceClass # Changed import
 from src.services.filesystem_service import FilesystemService
+from src.services.prompt_watcher import PromptWatcher
 
 # Get the base path and add to sys.path to ensure imports work
 BASE_DIR = Path(__file__).resolve().parent
@@ -32,6 +34,8 @@ print(f"Python path in server.py: {sys.path}")
 
 # Global prompt service instance - initialized lazily
 prompt_service_instance: Optional[PromptServiceClass] = None
+# Filesystem watcher, started in lifespan when PromptServiceClass.WATCH_FILES is set
+prompt_watcher_instance: Optional[PromptWatcher] = None
 
 def _get_or_create_global_prompt_service() -> Optional[PromptServiceClass]:
     """Get or create the global PromptService instance."""
@@ -105,11 +109,21 @@ async def lifespan(app: FastAPI):
              logger.warning("Startup check: PromptService has directories but no prompts loaded.")
     else:
         logger.error("Application startup: Global PromptService instance is NOT available!")
+
+    global prompt_watcher_instance
+    if service and PromptServiceClass.WATCH_FILES:
+        # Apply watcher batches on the event loop so they never race request handlers
+        loop = asyncio.get_running_loop()
+        prompt_watcher_instance = PromptWatcher(service, dispatch=loop.call_soon_threadsafe)
+        prompt_watcher_instance.start()
     
     yield
     
     # Shutdown
     logger.info("Application shutdown event triggered.")
+    if prompt_watcher_instance is not None:
+        prompt_watcher_instance.stop()
+        prompt_watcher_instance = None
 
 # Create the FastAPI app
 app = FastAPI(
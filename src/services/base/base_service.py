@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timezone
 from loguru import logger
 
+from src.services.front_matter import extract_front_matter
+
 
 class ResourceDirectory:
     """Base class for resource directories."""
@@ -280,30 +282,7 @@ class BaseResourceService:
         Returns:
             Tuple of (front matter dict, content without front matter)
         """
-        front_matter: Dict[str, Any] = {}
-        
-        if not content.startswith('---'):
-            return front_matter, content
-            
-        # Parse YAML front matter
-        end_idx = content.find('---', 3)
-        if end_idx <= 0:
-            return front_matter, content
-            
-        try:
-            yaml_content = content[3:end_idx].strip()
-            meta = yaml.safe_load(yaml_content)
-            
-            if isinstance(meta, dict):
-                front_matter = meta
-                
-            # Remove front matter from content
-            content = content[end_idx+3:].strip()
-            
-        except Exception as e:
-            logger.warning(f"Error parsing front matter: {e}")
-            
-        return front_matter, content
+        return extract_front_matter(content)
 
     def create_front_matter(self, metadata: Dict[str, Any]) -> str:
         """
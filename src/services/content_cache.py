@@ -0,0 +1,98 @@
+"""
+Bounded cache of prompt content.
+
+In metadata-only mode ``PromptService`` keeps prompts in its index without
+their content. Content is read from disk when it is needed and held here, in
+an LRU bounded by the total UTF-8 size of the cached strings, so that memory
+use stays flat no matter how large the corpus is.
+
+Entries are tied to the index record they were loaded for: once the index
+holds a different record for an ID (after an edit or a reload that found the
+file changed), the old entry is no longer returned.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.services.prompt_record import PromptRecord
+
+
+class ContentCache:
+    """LRU of prompt ID -> content, evicting by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Upper bound on the summed UTF-8 size of cached content
+        """
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[str, Tuple[PromptRecord, str, int]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, prompt: PromptRecord) -> Optional[str]:
+        """Return the cached content of ``prompt``, or None on a miss."""
+        entry = self._entries.get(prompt.id)
+        if entry is None or entry[0] is not prompt:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(prompt.id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, prompt: PromptRecord, content: str) -> None:
+        """Cache the content of ``prompt``, evicting least recently used entries as needed."""
+        self.discard(prompt.id)
+        size = len(content.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        self._entries[prompt.id] = (prompt, content, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def discard(self, prompt_id: str) -> None:
+        """Drop the entry for ``prompt_id`` if present."""
+        entry = self._entries.pop(prompt_id, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        for prompt_id in [pid for pid, entry in self._entries.items() if index.get(pid) is not entry[0]]:
+            self.discard(prompt_id)
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        pass
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self.discard(prompt_id)
@@ -0,0 +1,141 @@
+"""
+Incremental display name calculation.
+
+Display names only depend on the other prompts that share the same filename
+stem, so prompts are grouped by stem and each group is recomputed only when
+one of its members is added, removed or renamed. The per-group computation
+produces exactly the same colon-separated names as
+``Prompt.calculate_display_name``.
+"""
+
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+def group_key(prompt_id: str) -> str:
+    """Return the collision group of a prompt ID (its filename stem)."""
+    return Path(prompt_id).name
+
+
+def compute_group_display_names(prompt_ids: List[str]) -> Dict[str, str]:
+    """Compute display names for a group of prompt IDs sharing one filename stem.
+
+    Equivalent to calling ``Prompt.calculate_display_name`` for every member
+    against the group, but linear in the size of the group: per-position
+    segment counters answer "is this directory segment unique at this depth"
+    and a prefix trie over the directory segments answers "is this directory
+    prefix unique".
+
+    Args:
+        prompt_ids: Full path IDs that all share the same filename stem
+
+    Returns:
+        Dictionary mapping prompt_id -> display_name
+    """
+    if len(prompt_ids) == 1:
+        return {prompt_ids[0]: group_key(prompt_ids[0])}
+
+    parts_by_id = {prompt_id: Path(prompt_id).parts for prompt_id in prompt_ids}
+
+    position_counts: List[Counter] = []
+    # Trie node: [number of members under this prefix, children by segment]
+    trie_root: list = [0, {}]
+    for parts in parts_by_id.values():
+        node = trie_root
+        for pos, segment in enumerate(parts[:-1]):
+            if pos == len(position_counts):
+                position_counts.append(Counter())
+            position_counts[pos][segment] += 1
+            node = node[1].setdefault(segment, [0, {}])
+            node[0] += 1
+
+    display_names: Dict[str, str] = {}
+    for prompt_id, parts in parts_by_id.items():
+        name = parts[-1]
+        dir_parts = parts[:-1]
+        display_names[prompt_id] = _display_name_in_group(name, dir_parts, parts,
+                                                          position_counts, trie_root)
+    return display_names
+
+
+def _display_name_in_group(name, dir_parts, parts, position_counts, trie_root) -> str:
+    # First directory segment that no other member has at the same position
+    for pos, segment in enumerate(dir_parts):
+        if position_counts[pos][segment] == 1:
+            return f"{segment}:{name}"
+
+    # Otherwise the shortest directory prefix that no other member shares
+    node = trie_root
+    for depth, segment in enumerate(dir_parts, start=1):
+        node = node[1][segment]
+        if node[0] == 1:
+            return ":".join(dir_parts[:depth]) + f":{name}"
+
+    return ":".join(parts)
+
+
+class DisplayNameIndex:
+    """Display names for a PromptIndex, maintained incrementally.
+
+    Registered as a PromptIndex listener: additions and removals only mark
+    the affected stem group dirty, and dirty groups are recomputed lazily on
+    the next read. Recomputed names are also written to the prompts'
+    ``display_name_cache`` so ``Prompt.display_name`` stays in sync.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, Dict[str, None]] = {}
+        self._names: Dict[str, str] = {}
+        self._dirty: Set[str] = set()
+        self._prompts: Optional[dict] = None
+        self.groups_recomputed = 0
+
+    # PromptIndex listener interface
+
+    def rebuild(self, prompts: dict) -> None:
+        self._prompts = prompts
+        self._groups = {}
+        self._names = {}
+        for prompt_id in prompts:
+            self._groups.setdefault(group_key(prompt_id), {})[prompt_id] = None
+        self._dirty = set(self._groups)
+
+    def prompt_added(self, prompt_id: str, prompt) -> None:
+        key = group_key(prompt_id)
+        self._groups.setdefault(key, {})[prompt_id] = None
+        self._dirty.add(key)
+
+    def prompt_removed(self, prompt_id: str, prompt) -> None:
+        key = group_key(prompt_id)
+        group = self._groups.get(key)
+        if group is not None:
+            group.pop(prompt_id, None)
+            if not group:
+                del self._groups[key]
+        self._names.pop(prompt_id, None)
+        self._dirty.add(key)
+
+    # Queries
+
+    def flush(self) -> None:
+        """Recompute every dirty group and refresh the affected prompts' caches."""
+        while self._dirty:
+            key = self._dirty.pop()
+            group = self._groups.get(key)
+            if not group:
+                continue
+            names = compute_group_display_names(list(group))
+            self._names.update(names)
+            self.groups_recomputed += 1
+            if self._prompts is not None:
+                for prompt_id, display_name in names.items():
+                    prompt = self._prompts.get(prompt_id)
+                    if prompt is not None:
+                        prompt.set_display_name_cache(display_name)
+
+    def get(self, prompt_id: str) -> Optional[str]:
+        """Return the display name of ``prompt_id``, or None if it is not indexed."""
+        if self._dirty:
+            self.flush()
+        return self._names.get(prompt_id)
@@ -0,0 +1,209 @@
+"""
+Cache of expanded prompt content.
+
+Expanding a prompt walks its whole inclusion tree. ``PromptService`` keeps the
+result of expanding each stored prompt here, together with its dependency set
+and warnings, and reuses it until something it was built from changes.
+
+Invalidation follows the inclusion graph. Each entry records every inclusion
+reference (``[[...]]`` text) met anywhere in its expansion tree; the cache
+keeps the reverse mapping from reference to entries. A reference can only
+resolve to a prompt through that prompt's ID, legacy unique_id or simple name,
+so when a prompt is added, replaced or removed the cache drops exactly the
+entries that reference one of those three keys, plus the prompt's own entries.
+This also covers references that used to be missing and now resolve, and
+name lookups whose set of candidates changed. Pattern references
+(``[[regex:...]]``) are kept apart; a prompt invalidates the entries of every
+pattern that matches it.
+
+The cache is bounded by the total UTF-8 size of the expanded strings and
+evicts least recently used entries.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.services.pattern_index import inclusion_pattern, pattern_matches
+from src.services.prompt_record import PromptRecord
+
+# (prompt ID, directory used to resolve simple names, whether the prompt
+# itself counts as already included) - the inputs expand_inclusions varies on
+ExpansionKey = Tuple[str, Optional[str], bool]
+
+# (expanded content, dependencies, warnings)
+Expansion = Tuple[str, Set[str], List[str]]
+
+
+class _Entry:
+    __slots__ = ('record', 'expanded', 'dependencies', 'warnings', 'size')
+
+    def __init__(self, record: PromptRecord, expanded: str, dependencies: FrozenSet[str],
+                 warnings: Tuple[str, ...], size: int):
+        self.record = record
+        self.expanded = expanded
+        self.dependencies = dependencies
+        self.warnings = warnings
+        self.size = size
+
+
+class ExpansionCache:
+    """LRU of expansion results with reverse-dependency invalidation."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the cache.
+
+        Args:
+            max_bytes: Upper bound on the summed UTF-8 size of cached expansions
+        """
+        self.max_bytes = max(0, max_bytes)
+        self._entries: "OrderedDict[ExpansionKey, _Entry]" = OrderedDict()
+        # Inclusion reference -> keys of the entries whose expansion met it
+        self._dependents: Dict[str, Set[ExpansionKey]] = {}
+        # Prompt ID -> keys of the entries expanding that prompt
+        self._by_prompt: Dict[str, Set[ExpansionKey]] = {}
+        # The references in _dependents that are patterns -> their pattern
+        self._patterns: Dict[str, str] = {}
+        self._index: Any = None
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def get(self, key: ExpansionKey, record: PromptRecord) -> Optional[Expansion]:
+        """
+        Return a copy of the cached expansion for ``key``, or None on a miss.
+
+        ``record`` is the prompt's current index record; an entry built from
+        another record is never returned.
+        """
+        entry = self._entries.get(key)
+        if entry is None or entry.record is not record:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.expanded, set(entry.dependencies), list(entry.warnings)
+
+    def put(self, key: ExpansionKey, record: PromptRecord, expanded: str,
+            dependencies: Iterable[str], warnings: Iterable[str]) -> None:
+        """Cache an expansion of ``record`` computed for ``key``."""
+        self._drop(key)
+        size = len(expanded.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        entry = _Entry(record, expanded, frozenset(dependencies), tuple(warnings), size)
+        self._entries[key] = entry
+        self.bytes += size
+        self._by_prompt.setdefault(key[0], set()).add(key)
+        for reference in entry.dependencies:
+            keys = self._dependents.get(reference)
+            if keys is None:
+                keys = self._dependents[reference] = set()
+                pattern = inclusion_pattern(reference)
+                if pattern is not None:
+                    self._patterns[reference] = pattern
+            keys.add(key)
+        while self.bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def dependents(self, reference: str) -> Set[ExpansionKey]:
+        """Return the keys of cached expansions whose tree contains ``[[reference]]``."""
+        return set(self._dependents.get(reference, ()))
+
+    def invalidate_prompt(self, prompt_id: str, prompt: Optional[PromptRecord] = None) -> int:
+        """
+        Drop every entry that may depend on the given prompt.
+
+        Args:
+            prompt_id: ID of the prompt that was added, replaced or removed
+            prompt: Its record, used for the name and unique_id keys
+
+        Returns:
+            Number of entries dropped
+        """
+        keys: Set[ExpansionKey] = set(self._by_prompt.get(prompt_id, ()))
+        references = {prompt_id}
+        if prompt is not None:
+            references.add(prompt.name)
+            if prompt.unique_id:
+                references.add(prompt.unique_id)
+        for reference in references:
+            keys.update(self._dependents.get(reference, ()))
+        if prompt is not None:
+            for reference, pattern in self._patterns.items():
+                if pattern_matches(pattern, prompt_id, prompt.name):
+                    keys.update(self._dependents[reference])
+        for key in keys:
+            self._drop(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def _drop(self, key: ExpansionKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        keys = self._by_prompt.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_prompt[key[0]]
+        for reference in entry.dependencies:
+            keys = self._dependents.get(reference)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._dependents[reference]
+                    self._patterns.pop(reference, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._dependents.clear()
+        self._by_prompt.clear()
+        self._patterns.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size, hit/miss and invalidation counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        previous, self._index = self._index, index
+        if previous is None or previous is index:
+            # Nothing to compare against (first attach, or the index was cleared)
+            self.invalidations += len(self._entries)
+            self.clear()
+            return
+        # A reload swapped in a new index; unchanged prompts keep their records
+        for prompt_id, prompt in previous.items():
+            if index.get(prompt_id) is not prompt:
+                self.invalidate_prompt(prompt_id, prompt)
+        for prompt_id, prompt in index.items():
+            if previous.get(prompt_id) is not prompt:
+                self.invalidate_prompt(prompt_id, prompt)
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self.invalidate_prompt(prompt_id, prompt)
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self.invalidate_prompt(prompt_id, prompt)
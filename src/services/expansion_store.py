@@ -0,0 +1,197 @@
+"""
+Persistent store of expanded prompts.
+
+``ExpansionCache`` is lost on restart, so the first expansion of each heavy
+composite prompt pays the full cost again in every process (web server, MCP
+server). This store keeps expansions on disk, one file per expansion key,
+next to the parse cache.
+
+Each artifact is tagged with a *closure digest* computed by the service: a
+hash of every prompt the expansion can read (the prompt, what its references
+resolve to, recursively) together with the version (file signature) of each,
+and of the settings the output depends on. The digest is derived from the
+index alone, without reading any content, and an artifact is only used when
+its digest equals the current one. An artifact is a one-line JSON header
+(key, digest, dependencies, warnings) followed by the expanded text, so a
+stale artifact is rejected after reading one line and a valid one costs a
+read and a UTF-8 decode.
+
+Writes happen on a background thread and are atomic. Files of prompts that
+no longer exist are removed by ``prune``. A missing, unreadable or corrupt
+artifact is a miss.
+"""
+
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+# (expanded content, dependencies, warnings)
+Expansion = Tuple[str, Set[str], List[str]]
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ExpansionStore:
+    """On-disk expansions keyed by expansion key and validated by closure digest."""
+
+    # Bump when the file layout or the expansion output changes
+    FORMAT_VERSION = 1
+
+    def __init__(self, directory: str, background: bool = True):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding the artifacts (created on first write)
+            background: Write artifacts on a background thread. If False,
+                        ``put`` writes before returning.
+        """
+        self.directory = directory
+        self.background = background
+        self._lock = threading.Lock()
+        # File name -> contents of the artifacts not written yet
+        self._pending: Dict[str, bytes] = {}
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.writes = 0
+
+    def _filename(self, key: Tuple[Any, ...]) -> str:
+        # Artifacts of one prompt share a prefix, so prune only needs the names
+        return f"{_digest(key[0])[:24]}-{_digest(json.dumps(key[1:]))[:16]}.json"
+
+    def get(self, key: Tuple[Any, ...], closure: str) -> Optional[Expansion]:
+        """Return the stored expansion for ``key`` if it was built from ``closure``."""
+        filename = self._filename(key)
+        with self._lock:
+            pending = self._pending.get(filename)
+        try:
+            if pending is not None:
+                header, _, body = pending.partition(b'\n')
+            else:
+                with open(os.path.join(self.directory, filename), 'rb') as f:
+                    header = f.readline()
+                    if json.loads(header).get("closure") != closure:
+                        self.stale += 1
+                        return None
+                    body = f.read()
+            meta = json.loads(header)
+            if (meta.get("version") != self.FORMAT_VERSION or meta.get("closure") != closure
+                    or meta.get("key") != list(key)):
+                self.stale += 1
+                return None
+            result = body.decode('utf-8'), set(meta["dependencies"]), list(meta["warnings"])
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.debug(f"Ignoring unreadable expansion artifact {filename}: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key: Tuple[Any, ...], closure: str, expanded: str,
+            dependencies: Iterable[str], warnings: Iterable[str]) -> None:
+        """Store an expansion of ``key`` built from ``closure``."""
+        # A one-line JSON header, then the expanded text as is
+        header = json.dumps({"version": self.FORMAT_VERSION, "key": list(key), "closure": closure,
+                             "dependencies": sorted(dependencies), "warnings": list(warnings)})
+        filename = self._filename(key)
+        data = header.encode('utf-8') + b'\n' + expanded.encode('utf-8')
+        if not self.background:
+            self._write(filename, data)
+            return
+        with self._lock:
+            self._pending[filename] = data
+        self._submit(filename)
+
+    def prune(self, live_prompt_ids: Iterable[str]) -> None:
+        """Remove the artifacts of prompts that are not in ``live_prompt_ids``."""
+        live = {_digest(prompt_id)[:24] for prompt_id in live_prompt_ids}
+        if self.background:
+            self._submit(("prune", live))
+        else:
+            self._prune(live)
+
+    def flush(self) -> None:
+        """Wait until every queued write has been done."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the read and write counters."""
+        return {"hits": self.hits, "misses": self.misses, "stale": self.stale, "writes": self.writes,
+                "pending": len(self._pending)}
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _submit(self, item: Any) -> None:
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="ExpansionStoreWriter", daemon=True)
+                self._writer.start()
+        self._queue.put(item)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if isinstance(item, tuple):
+                    self._prune(item[1])
+                    continue
+                with self._lock:
+                    pending = self._pending.get(item)
+                if pending is not None:
+                    self._write(item, pending)
+                    with self._lock:
+                        # Unless a newer version was queued meanwhile
+                        if self._pending.get(item) is pending:
+                            del self._pending[item]
+            except Exception as e:
+                logger.warning(f"Expansion store writer error: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, filename: str, data: bytes) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".expansion.", dir=self.directory)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, os.path.join(self.directory, filename))
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self.writes += 1
+        except Exception as e:
+            logger.warning(f"Could not write expansion artifact {filename}: {e}")
+
+    def _prune(self, live: Set[str]) -> None:
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        removed = 0
+        for name in names:
+            if name.endswith('.json') and name.split('-', 1)[0] not in live:
+                try:
+                    os.unlink(os.path.join(self.directory, name))
+                    removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logger.debug(f"Pruned {removed} expansion artifacts from {self.directory}")
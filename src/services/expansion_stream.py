@@ -0,0 +1,76 @@
+"""
+Streamed prompt expansion.
+
+``PromptService.stream_prompt_expansion`` walks a prompt's inclusion tree
+lazily and hands the result out as an ``ExpansionStream``: an iterable of
+text chunks that is produced while it is consumed, so the API can start
+answering before the expansion is complete and never holds all of it.
+
+The pieces coming out of the tree walk are slices of individual prompts and
+can be very small (the text between two markers) or very large (a big
+included file). The stream regroups them into chunks of roughly
+``chunk_chars`` characters.
+
+Dependencies and warnings are only known once the tree has been walked; they
+are filled in as the stream is consumed and are complete when ``finished``
+is true.
+"""
+
+from typing import Iterable, Iterator, List, Set
+
+DEFAULT_CHUNK_CHARS = 64 * 1024
+
+
+class ExpansionStream:
+    """Iterable over the text chunks of one prompt's expansion."""
+
+    def __init__(self, prompt_id: str, pieces: Iterable[str], dependencies: Set[str],
+                 warnings: List[str], chunk_chars: int = DEFAULT_CHUNK_CHARS):
+        """
+        Initialize the stream.
+
+        Args:
+            prompt_id: ID of the prompt being expanded
+            pieces: Expansion pieces in document order
+            dependencies: Set the producer of ``pieces`` adds inclusion IDs to
+            warnings: List the producer of ``pieces`` appends warnings to
+            chunk_chars: Target size of the chunks handed out
+        """
+        self.prompt_id = prompt_id
+        self.chunk_chars = max(1, chunk_chars)
+        self.finished = False
+        self._pieces = pieces
+        self._dependencies = dependencies
+        self._warnings = warnings
+
+    @property
+    def dependencies(self) -> List[str]:
+        """Inclusion IDs met so far (all of them once ``finished``)."""
+        return list(self._dependencies)
+
+    @property
+    def warnings(self) -> List[str]:
+        """Warnings raised so far (all of them once ``finished``)."""
+        return list(self._warnings)
+
+    def __iter__(self) -> Iterator[str]:
+        limit = self.chunk_chars
+        buffered: List[str] = []
+        size = 0
+        for piece in self._pieces:
+            if size + len(piece) < limit:
+                buffered.append(piece)
+                size += len(piece)
+                continue
+            # Fill the current chunk, then hand out whole chunks of the rest
+            cut = limit - size
+            buffered.append(piece[:cut])
+            yield "".join(buffered)
+            while len(piece) - cut >= limit:
+                yield piece[cut:cut + limit]
+                cut += limit
+            buffered = [piece[cut:]] if cut < len(piece) else []
+            size = len(piece) - cut
+        if size:
+            yield "".join(buffered)
+        self.finished = True
@@ -0,0 +1,150 @@
+"""
+Per-call state of a prompt expansion.
+
+One ``ExpansionWalk`` is created for every call that expands a prompt. It
+collects the dependencies and warnings, enforces the expansion budgets, and
+(when enabled) memoizes the sub-expansions made during that call.
+
+Budgets
+    ``max_depth`` bounds how deeply inclusions nest; an inclusion beyond it is
+    replaced by a marker and expansion carries on with its siblings.
+    ``max_nodes`` bounds the number of inclusions resolved and ``max_chars``
+    the length of the output; when either is reached the whole expansion
+    stops where it is. Each case leaves an ``[[EXPANSION LIMIT: ...]]`` marker
+    in the output and a warning starting with ``Expansion limit reached``.
+    A limit of 0 disables that budget.
+
+Memoization
+    In a diamond-shaped library (A includes B and C, both include D) D is
+    expanded once per path. The memo keeps the expansion of each included
+    prompt, keyed by prompt ID (which fixes the directory its own inclusions
+    are resolved in), together with the references met inside it. The
+    expansion of a prompt only depends on the current inclusion chain
+    through those references, so an entry is reused whenever none of them
+    is in the chain, and it was only stored if none of them was. Reuse is
+    also skipped when it would not fit in the remaining budgets, so the
+    output is the same with or without the memo.
+"""
+
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+
+class SubExpansion(NamedTuple):
+    expanded: str
+    dependencies: FrozenSet[str]
+    warnings: Tuple[str, ...]
+    nodes: int   # inclusions resolved inside it
+    height: int  # nesting depth below it
+
+
+class ExpansionBudget:
+    """Limits of one expansion and the usage counted against them."""
+
+    __slots__ = ('max_depth', 'max_nodes', 'max_chars', 'nodes', 'chars', 'stopped')
+
+    def __init__(self, max_depth: int = 0, max_nodes: int = 0, max_chars: int = 0):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_chars = max_chars
+        self.nodes = 0
+        self.chars = 0
+        # Name of the budget that stopped the expansion, if any
+        self.stopped: Optional[str] = None
+
+
+class ExpansionWalk:
+    """Dependencies, warnings, budget and memo of one expansion."""
+
+    def __init__(self, budget: Optional[ExpansionBudget] = None, memoize: bool = True,
+                 memo: Optional[Dict[str, SubExpansion]] = None):
+        self.dependencies: Set[str] = set()
+        self.warnings: List[str] = []
+        self.budget = budget or ExpansionBudget()
+        self.memo = memo if memo is not None else ({} if memoize else None)
+        # Deepest nesting level reached, and whether a depth limit cut something off
+        self.deepest = 0
+        self.truncated = False
+        self.memo_hits = 0
+
+    def fork(self) -> "ExpansionWalk":
+        """Return a walk sharing this one's budget and memo, with its own dependencies and warnings."""
+        return ExpansionWalk(self.budget, memo=self.memo)
+
+    def merge(self, child: "ExpansionWalk") -> None:
+        self.dependencies.update(child.dependencies)
+        self.warnings.extend(child.warnings)
+        self.deepest = max(self.deepest, child.deepest)
+        self.truncated = self.truncated or child.truncated
+        self.memo_hits += child.memo_hits
+
+    @property
+    def stopped(self) -> bool:
+        return self.budget.stopped is not None
+
+    def enter(self, reference: str, depth: int) -> Optional[str]:
+        """
+        Account for including ``reference`` at nesting level ``depth``.
+
+        Returns:
+            None if it may be expanded, otherwise the marker to put in its place
+        """
+        budget = self.budget
+        if budget.max_depth and depth > budget.max_depth:
+            self.truncated = True
+            self.warnings.append(f"Expansion limit reached: max_depth={budget.max_depth} exceeded at '{reference}'")
+            return f"[[EXPANSION LIMIT: max_depth at {reference}]]"
+        budget.nodes += 1
+        if budget.max_nodes and budget.nodes > budget.max_nodes:
+            return self._stop("max_nodes", budget.max_nodes, reference)
+        self.deepest = max(self.deepest, depth)
+        return None
+
+    def take(self, text: str) -> str:
+        """Count ``text`` against the output budget, returning what fits of it."""
+        budget = self.budget
+        if not budget.max_chars:
+            return text
+        remaining = budget.max_chars - budget.chars
+        if len(text) <= remaining:
+            budget.chars += len(text)
+            return text
+        budget.chars = budget.max_chars
+        return text[:remaining] + self._stop("max_chars", budget.max_chars)
+
+    def _stop(self, name: str, limit: int, reference: Optional[str] = None) -> str:
+        self.budget.stopped = name
+        where = f" at '{reference}'" if reference else ""
+        self.warnings.append(f"Expansion limit reached: {name}={limit} exceeded{where}; output truncated")
+        return f"[[EXPANSION LIMIT: {name}]]"
+
+    def reuse(self, prompt_id: str, chain: Set[str], depth: int) -> Optional[str]:
+        """
+        Return the memoized expansion of ``prompt_id`` included at ``depth``,
+        if it is valid under ``chain`` and fits the remaining budgets.
+        """
+        if self.memo is None:
+            return None
+        sub = self.memo.get(prompt_id)
+        if sub is None or not sub.dependencies.isdisjoint(chain):
+            return None
+        budget = self.budget
+        if ((budget.max_depth and depth + sub.height > budget.max_depth)
+                or (budget.max_nodes and budget.nodes + sub.nodes > budget.max_nodes)
+                or (budget.max_chars and budget.chars + len(sub.expanded) > budget.max_chars)):
+            return None
+        budget.nodes += sub.nodes
+        if budget.max_chars:
+            budget.chars += len(sub.expanded)
+        self.dependencies.update(sub.dependencies)
+        self.warnings.extend(sub.warnings)
+        self.deepest = max(self.deepest, depth + sub.height)
+        self.memo_hits += 1
+        return sub.expanded
+
+    def remember(self, prompt_id: str, chain: Set[str], depth: int, nodes_before: int,
+                 sub: "ExpansionWalk", expanded: str) -> None:
+        """Memoize the expansion ``sub`` made of ``prompt_id`` at ``depth``, unless it depends on ``chain``."""
+        if self.memo is None or self.stopped or sub.truncated or not sub.dependencies.isdisjoint(chain):
+            return
+        self.memo[prompt_id] = SubExpansion(expanded, frozenset(sub.dependencies), tuple(sub.warnings),
+                                            self.budget.nodes - nodes_before, max(sub.deepest, depth) - depth)
@@ -14,6 +14,7 @@ import yaml
 from loguru import logger
 
 from src.models.prompt import PromptFragment, PromptDirectory
+from src.services.front_matter import parse_front_matter, split_front_matter
 
 
 class FragmentService:
@@ -159,22 +160,19 @@ class FragmentService:
             description = None
             tags = []
             
-            if content.startswith('---'):
-                # Parse YAML front matter
-                end_idx = content.find('---', 3)
-                if end_idx > 0:
-                    front_matter = content[3:end_idx].strip()
-                    try:
-                        meta = yaml.safe_load(front_matter)
-                        if isinstance(meta, dict):
-                            description = meta.get('description')
-                            if 'tags' in meta and isinstance(meta['tags'], list):
-                                tags = meta['tags']
-                        
-                        # Remove front matter from content
-                        content = content[end_idx+3:].strip()
-                    except Exception as e:
-                        logger.warning(f"Error parsing front matter in {file_path}: {e}")
+            front_matter, body_offset = split_front_matter(content)
+            if front_matter is not None:
+                try:
+                    meta = parse_front_matter(front_matter)
+                    if isinstance(meta, dict):
+                        description = meta.get('description')
+                        if 'tags' in meta and isinstance(meta['tags'], list):
+                            tags = meta['tags']
+                    
+                    # Remove front matter from content
+                    content = content[body_offset:].strip()
+                except Exception as e:
+                    logger.warning(f"Error parsing front matter in {file_path}: {e}")
             
             # Create fragment
             fragment_id = Path(filename).stem  # filename without extension
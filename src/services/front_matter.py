@@ -0,0 +1,214 @@
+"""
+Front matter parsing.
+
+Prompt and fragment files may start with a YAML front matter block delimited
+by ``---`` lines. Almost all of them use the flat shape written by
+``PromptService.save_prompt``:
+
+    ---
+    description: Some text
+    tags:
+    - one
+    - two
+    ---
+
+Such blocks are parsed by a small hand-written parser that only accepts input
+whose YAML meaning is unambiguous (plain or simply quoted string scalars, and
+lists of them). Anything else - numbers, booleans, nested mappings, multi-line
+scalars, anchors, tags - goes to PyYAML, using the libyaml-backed
+``CSafeLoader`` when it is available. The loader class is built once at import.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import yaml  # type: ignore[import-untyped]
+from loguru import logger
+
+# Files written by the old coordinator project carry Python object tags; they
+# are rewritten to a local tag whose value is kept as a plain string
+_LEGACY_TAG = '!!python/object/apply:coordinator.'
+_LEGACY_TAG_REPLACEMENT = '!python_object '
+
+try:
+    from yaml import CSafeLoader as _BaseLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _BaseLoader  # type: ignore[assignment]
+
+
+class FrontMatterLoader(_BaseLoader):
+    """Safe YAML loader (libyaml when available) that accepts legacy ``!python_object`` tags."""
+
+
+def _python_object_constructor(loader, node):
+    # Just return the value as a string, we'll parse it later
+    return str(node.value)
+
+
+FrontMatterLoader.add_constructor('!python_object', _python_object_constructor)
+
+_KEY_LINE = re.compile(r'([A-Za-z_][A-Za-z0-9_-]*):(?: +(.*))?$')
+_ITEM_LINE = re.compile(r'( *)- +(.*)$')
+# Plain scalars that YAML 1.1 would resolve to something other than a string
+_RESERVED_WORDS = {'yes', 'no', 'true', 'false', 'on', 'off', 'null'}
+_FLOW_SPECIAL = set('[]{},')
+
+
+def _plain_scalar(value: str, in_flow: bool = False) -> Optional[str]:
+    """Return ``value`` if YAML would read it as exactly this string, else None."""
+    if not value or not (value[0].isalpha() or value[0] == '_'):
+        return None
+    if ': ' in value or ' #' in value or value.endswith(':') or '\t' in value:
+        return None
+    if in_flow and (_FLOW_SPECIAL.intersection(value) or ':' in value):
+        return None
+    if value.lower() in _RESERVED_WORDS:
+        return None
+    return value
+
+
+def _scalar(value: str, in_flow: bool = False) -> Optional[str]:
+    """Parse a single-line scalar the fast path understands, or return None."""
+    if len(value) >= 2 and value[0] == "'" and value[-1] == "'":
+        inner = value[1:-1]
+        if "'" in inner.replace("''", ''):
+            return None
+        return inner.replace("''", "'")
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        inner = value[1:-1]
+        if '\\' in inner or '"' in inner:
+            return None
+        return inner
+    return _plain_scalar(value, in_flow)
+
+
+def _flow_list(value: str) -> Optional[List[str]]:
+    inner = value[1:-1].strip()
+    if not inner:
+        return []
+    items = []
+    for raw in inner.split(','):
+        item = _scalar(raw.strip(), in_flow=True)
+        if item is None:
+            return None
+        items.append(item)
+    return items
+
+
+class _PendingList(list):
+    """List collecting block items for a key; empty means the key's value is null."""
+
+
+def parse_flat_front_matter(block: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a flat front matter block without PyYAML.
+
+    Returns:
+        The mapping, or None if the block uses any YAML feature outside the
+        supported subset (the caller then falls back to PyYAML).
+    """
+    result: Dict[str, Any] = {}
+    list_key: Optional[str] = None
+    list_indent: Optional[int] = None
+    for line in block.split('\n'):
+        line = line.rstrip()
+        if not line or line.lstrip().startswith('#'):
+            continue
+        item = _ITEM_LINE.match(line)
+        if item is not None:
+            indent = len(item.group(1))
+            if list_key is None or (list_indent is not None and indent != list_indent):
+                return None
+            value = _scalar(item.group(2))
+            if value is None:
+                return None
+            list_indent = indent
+            result[list_key].append(value)
+            continue
+        match = _KEY_LINE.match(line)
+        if match is None:
+            return None
+        key, value = match.group(1), match.group(2)
+        list_key, list_indent = None, None
+        if key.lower() in _RESERVED_WORDS:
+            return None
+        if value is None or not value.strip():
+            # Either a block list follows, or the value is null
+            list_key = key
+            result[key] = _PendingList()
+            continue
+        value = value.strip()
+        parsed: Union[str, List[str], None]
+        if value.startswith('['):
+            if not value.endswith(']'):
+                return None
+            parsed = _flow_list(value)
+        else:
+            parsed = _scalar(value)
+        if parsed is None:
+            return None
+        result[key] = parsed
+    # Keys without items are YAML nulls
+    for key, value in result.items():
+        if isinstance(value, _PendingList):
+            result[key] = list(value) if value else None
+    return result
+
+
+def parse_front_matter(block: str, fast: bool = True) -> Any:
+    """
+    Parse the text between the ``---`` markers.
+
+    Args:
+        block: Front matter text, without the markers
+        fast: Try the flat fast path before PyYAML
+
+    Returns:
+        The parsed YAML value (normally a dict)
+
+    Raises:
+        yaml.YAMLError: If the block is not valid YAML
+    """
+    if _LEGACY_TAG in block:
+        block = block.replace(_LEGACY_TAG, _LEGACY_TAG_REPLACEMENT)
+    if fast:
+        parsed = parse_flat_front_matter(block)
+        if parsed is not None:
+            return parsed
+    return yaml.load(block, Loader=FrontMatterLoader)
+
+
+def split_front_matter(text: str) -> Tuple[Optional[str], int]:
+    """
+    Locate the front matter of a file.
+
+    Returns:
+        (front matter block stripped of surrounding whitespace, offset just past
+        the closing marker), or (None, 0) when the text has no front matter.
+    """
+    if not text.startswith('---'):
+        return None, 0
+    end_idx = text.find('---', 3)
+    if end_idx <= 0:
+        return None, 0
+    return text[3:end_idx].strip(), end_idx + 3
+
+
+def extract_front_matter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Split text into its front matter mapping and its body.
+
+    Returns:
+        (front matter dict, body without front matter, stripped). If the front
+        matter is missing or invalid, the dict is empty and the text is
+        returned unchanged.
+    """
+    block, body_offset = split_front_matter(text)
+    if block is None:
+        return {}, text
+    try:
+        meta = parse_front_matter(block)
+    except Exception as e:
+        logger.warning(f"Error parsing front matter: {e}")
+        return {}, text
+    return (meta if isinstance(meta, dict) else {}), text[body_offset:].strip()
@@ -0,0 +1,89 @@
+"""
+Logging helpers for request hot paths.
+
+Code that runs on every request must not pay for debug logging that nobody
+reads. The conventions used by the services and API handlers are:
+
+- Pass values as loguru ``{}`` arguments instead of building f-strings, so the
+  message is only formatted if a handler accepts the record.
+- Wrap anything expensive to compute (reprs, previews, collection sizes that
+  need a scan) in ``logger.opt(lazy=True)`` callables, or guard the call with
+  ``debug_enabled()``.
+- Log per-request trace lines through ``sampled()``, which lets one call in
+  ``DEBUG_SAMPLE_EVERY`` through (per key), so DEBUG output from a busy server
+  stays readable. Set ``PROMPT_MANAGER_DEBUG_SAMPLE=1`` to log every call.
+  Modules on the standard ``logging`` module pair ``sample()`` with
+  ``isEnabledFor``.
+
+The guards know which levels are enabled from ``configure_handlers``, which
+replaces loguru's handlers and remembers the lowest level they accept. Until
+it is called, loguru's default handler is assumed and everything is enabled.
+"""
+
+import os
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, DefaultDict, Dict, Optional, Union
+
+from loguru import logger
+
+DEBUG_SAMPLE_EVERY = max(1, int(os.environ.get('PROMPT_MANAGER_DEBUG_SAMPLE', '100')))
+
+_sample_counts: DefaultDict[str, int] = defaultdict(int)
+
+# Lowest level accepted by a handler set up through configure_handlers (None: no handlers)
+_min_level: Optional[int] = 0
+
+
+@lru_cache(maxsize=None)
+def _level_no(level: Union[str, int]) -> int:
+    return level if isinstance(level, int) else logger.level(level).no
+
+
+def configure_handlers(*handlers: Dict[str, Any]) -> None:
+    """
+    Replace the loguru handlers and record the levels they accept.
+
+    Each handler is a dict of ``logger.add`` arguments; the level defaults
+    to DEBUG. Calling it without handlers silences logging. Handlers added or
+    removed directly on ``logger`` are not seen by the guards.
+    """
+    global _min_level
+    logger.remove()
+    for handler in handlers:
+        logger.add(**handler)
+    levels = [_level_no(handler.get("level", "DEBUG")) for handler in handlers]
+    _min_level = min(levels) if levels else None
+
+
+def level_enabled(level: str) -> bool:
+    """Return True if a handler set up with ``configure_handlers`` accepts records at ``level``."""
+    return _min_level is not None and _level_no(level) >= _min_level
+
+
+def debug_enabled() -> bool:
+    """Shortcut for ``level_enabled("DEBUG")``."""
+    return level_enabled("DEBUG")
+
+
+def sample(key: str, every: Optional[int] = None) -> bool:
+    """
+    Return True for the first call and every ``every``-th call after it for ``key``.
+
+    ``every`` defaults to ``DEBUG_SAMPLE_EVERY``. Counting is not synchronized;
+    under concurrency the rate is approximate, which is fine for log sampling.
+    """
+    every = DEBUG_SAMPLE_EVERY if every is None else every
+    count = _sample_counts[key]
+    _sample_counts[key] = count + 1
+    return count % every == 0
+
+
+def sampled(key: str, every: Optional[int] = None) -> bool:
+    """
+    Decide whether this occurrence of a sampled loguru DEBUG line should be emitted.
+
+    Returns False straight away when DEBUG is off, so callers can use it as a
+    guard around the log call; otherwise defers to ``sample``.
+    """
+    return debug_enabled() and sample(key, every)
@@ -0,0 +1,97 @@
+"""
+Reverse index of prompt inclusions.
+
+``PromptService`` answers "which prompts include X?" (the editor's
+*referenced by* panel, ``find_prompts_by_inclusion``) from this index instead
+of expanding every composite prompt. For every ``[[reference]]`` text it keeps
+the IDs of the prompts whose content contains it, in index order. The index is
+maintained through the ``PromptIndex`` listener protocol, so it follows loads,
+saves, renames, deletes and reloads.
+
+References are stored as written; which prompt a reference resolves to depends
+on the referring prompt's directory and on the prompts that currently exist,
+so resolution is left to the service at query time. Pattern references
+(``[[regex:...]]``) are also listed separately, since they are found by matching
+rather than by key. A section reference (``[[name#heading]]``) is indexed
+under its own text and under the ``name`` it includes a part of.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+from src.services.pattern_index import inclusion_pattern
+from src.services.prompt_record import PromptRecord
+from src.services.sections import split_section_reference
+
+
+def _indexed_keys(references: Tuple[str, ...]) -> Iterable[str]:
+    """Return the keys a prompt with these references is listed under."""
+    keys = dict.fromkeys(references)
+    for reference in references:
+        if '#' in reference:
+            keys.setdefault(split_section_reference(reference)[0] or reference, None)
+    return keys
+
+
+class InclusionGraph:
+    """Reference text -> referring prompt IDs, plus each prompt's own references."""
+
+    def __init__(self):
+        self._referrers: Dict[str, Dict[str, None]] = {}
+        self._references: Dict[str, Tuple[str, ...]] = {}
+        self._patterns: Dict[str, str] = {}
+
+    def referrers(self, reference: str) -> List[str]:
+        """Return the IDs of prompts whose content contains ``[[reference]]``."""
+        return list(self._referrers.get(reference, ()))
+
+    def references(self, prompt_id: str) -> Tuple[str, ...]:
+        """Return the references made by a prompt, as indexed."""
+        return self._references.get(prompt_id, ())
+
+    def pattern_references(self) -> List[Tuple[str, str]]:
+        """Return the references that are patterns, with their pattern."""
+        return list(self._patterns.items())
+
+    def __len__(self) -> int:
+        """Number of distinct references."""
+        return len(self._referrers)
+
+    def _add(self, prompt_id: str, prompt: PromptRecord) -> None:
+        references = prompt.references
+        if not references:
+            return
+        self._references[prompt_id] = references
+        for reference in _indexed_keys(references):
+            bucket = self._referrers.get(reference)
+            if bucket is None:
+                bucket = self._referrers[reference] = {}
+                pattern = inclusion_pattern(reference)
+                if pattern is not None:
+                    self._patterns[reference] = pattern
+            bucket[prompt_id] = None
+
+    def _remove(self, prompt_id: str) -> None:
+        for reference in _indexed_keys(self._references.pop(prompt_id, ())):
+            bucket = self._referrers.get(reference)
+            if bucket is not None:
+                bucket.pop(prompt_id, None)
+                if not bucket:
+                    del self._referrers[reference]
+                    self._patterns.pop(reference, None)
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        self._referrers.clear()
+        self._references.clear()
+        self._patterns.clear()
+        for prompt_id, prompt in index.items():
+            self._add(prompt_id, prompt)
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._add(prompt_id, prompt)
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._remove(prompt_id)
@@ -0,0 +1,183 @@
+"""
+Pre-serialized prompt listings, validated by a generation counter.
+
+``GET /api/prompts/all`` and ``GET /api/prompts/directories/{path}/prompts``
+return the same bytes until a prompt or a directory changes, yet every call
+used to build the dicts, look up display names and JSON-encode the result
+again. ``ListingSnapshots`` keeps the encoded body of each listing variant
+(one per distinct set of query parameters) together with its ETag:
+
+- ``generation`` increases with every change reported by the PromptIndex it
+  listens to. Unlike ``PromptIndex.generation`` it also increases when the
+  service swaps in a new index after a reload, so it never repeats.
+- Snapshots are only returned for the version they were stored under; the
+  service's version is the generation plus the configured directory names,
+  which listings include. A new version drops all snapshots at once.
+- The ETag is a hash of the body, so it is strong, and a client revalidating
+  after a restart, or after changes that did not alter the listing, still
+  gets a 304.
+- A gzip copy of the body is made the first time a client accepts it, and
+  kept with the snapshot.
+
+Snapshots are held in an LRU bounded by their total size in bytes.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+from src.services.prompt_record import PromptRecord
+
+
+class ListingSnapshot:
+    """The encoded body of one listing variant, its ETag and extra headers."""
+
+    __slots__ = ("body", "etag", "headers", "_gzipped")
+
+    # Bodies smaller than this are not worth compressing
+    GZIP_MIN_BYTES = 1024
+
+    def __init__(self, body: bytes, headers: Optional[Dict[str, str]] = None):
+        self.body = body
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        self.headers = dict(headers or {})
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzip_etag(self) -> str:
+        """ETag of the gzip-encoded body (a different representation, so a different tag)."""
+        return self.etag[:-1] + '-gzip"'
+
+    @property
+    def compressible(self) -> bool:
+        """Whether the body is large enough to be worth sending gzip-compressed."""
+        return len(self.body) >= self.GZIP_MIN_BYTES
+
+    def gzipped(self) -> Optional[bytes]:
+        """Return the body gzip-compressed, or None if it is too small to bother."""
+        if not self.compressible:
+            return None
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an ``If-None-Match`` header names this snapshot (weak comparison)."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(',')}
+        if '*' in tags:
+            return True
+        tags = {tag[2:] if tag.startswith('W/') else tag for tag in tags}
+        return self.etag in tags or self.gzip_etag in tags
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + (len(self._gzipped) if self._gzipped else 0)
+
+
+class ListingSnapshots:
+    """LRU of listing variant -> ListingSnapshot for the current version, evicting by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the store.
+
+        Args:
+            max_bytes: Upper bound on the summed size of the stored bodies
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.generation = 0
+        self._version: Any = None
+        self._entries: "OrderedDict[Hashable, ListingSnapshot]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def get(self, variant: Hashable, version: Any) -> Optional[ListingSnapshot]:
+        """Return the snapshot of ``variant`` stored under ``version``, or None."""
+        if version != self._version:
+            self.clear()
+            self._version = version
+        snapshot = self._entries.get(variant)
+        if snapshot is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(variant)
+        self.hits += 1
+        return snapshot
+
+    def put(self, variant: Hashable, version: Any, payload: Any,
+            headers: Optional[Dict[str, str]] = None) -> ListingSnapshot:
+        """Encode ``payload`` as JSON and store it as the snapshot of ``variant`` under ``version``."""
+        if version != self._version:
+            self.clear()
+            self._version = version
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        snapshot = ListingSnapshot(body, headers)
+        self.discard(variant)
+        if len(body) <= self.max_bytes:
+            self._entries[variant] = snapshot
+            self.bytes += len(body)
+            self._evict()
+        return snapshot
+
+    def compress(self, variant: Hashable, snapshot: ListingSnapshot) -> Optional[bytes]:
+        """Return the gzip body of ``snapshot``, accounting for it if ``variant`` is stored."""
+        size = snapshot.size
+        gzipped = snapshot.gzipped()
+        if snapshot.size != size and self._entries.get(variant) is snapshot:
+            self.bytes += snapshot.size - size
+            self._evict()
+        return gzipped
+
+    def discard(self, variant: Hashable) -> None:
+        """Drop the snapshot of ``variant`` if present."""
+        snapshot = self._entries.pop(variant, None)
+        if snapshot is not None:
+            self.bytes -= snapshot.size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.bytes = 0
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes and self._entries:
+            _, snapshot = self._entries.popitem(last=False)
+            self.bytes -= snapshot.size
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "generation": self.generation,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        self.generation += 1
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self.generation += 1
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self.generation += 1
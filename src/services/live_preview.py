@@ -0,0 +1,192 @@
+"""
+Incremental expansion of an editor buffer.
+
+The prompt editor's WebSocket asks for the expansion of the unsaved buffer
+while the user types. ``LivePreview`` keeps, for one connection, the buffer's
+expansion as a list of pieces (the literal text between inclusion markers and
+the expansion of each marker) and the expansion of every marker it contains.
+On each update the buffer is re-tokenized, markers already seen reuse their
+expansion and only new ones are expanded. The reply describes the change to
+the expanded text as a single replacement:
+
+    {"version": 3, "start": 120, "end": 131, "text": "...", "length": 5012,
+     "dependencies": [...], "warnings": [...], "reused": 4, "expanded": 1}
+
+Applying ``expanded[:start] + text + expanded[end:]`` to the previous version
+gives the new expansion, ``length`` characters long. Version 1 (and the
+version after a ``reset``) replaces the whole, empty, previous text.
+
+A marker's expansion depends on the rest of the library, so the saved
+expansions are dropped whenever the prompt index changes
+(``PromptIndex.generation``) or is replaced by a reload. Each marker is
+expanded with its own budgets (see ``expansion_walk``).
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.services.prompt_record import compile_inclusions
+
+# (expanded text, dependencies, warnings) of one inclusion marker
+MarkerExpansion = Tuple[str, Set[str], List[str]]
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Return the length of the longest common prefix of two strings."""
+    n = min(len(a), len(b))
+    if a[:n] == b[:n]:
+        return n
+    # Invariant: a[:lo] == b[:lo] and a[:hi] != b[:hi]
+    lo, hi = 0, n
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def common_suffix_length(a: str, b: str) -> int:
+    """Return the length of the longest common suffix of two strings."""
+    n = min(len(a), len(b))
+    la, lb = len(a), len(b)
+    if a[la - n:] == b[lb - n:]:
+        return n
+    lo, hi = 0, n
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[la - mid:la - lo] == b[lb - mid:lb - lo]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def _slice_pieces(pieces: List[str], start: int, stop: int) -> str:
+    """Return ``"".join(pieces)[start:stop]`` without joining everything."""
+    parts = []
+    offset = 0
+    for piece in pieces:
+        end = offset + len(piece)
+        if end > start and offset < stop:
+            parts.append(piece[max(start - offset, 0):stop - offset])
+        if end >= stop:
+            break
+        offset = end
+    return "".join(parts)
+
+
+def diff_pieces(old: List[str], new: List[str]) -> Tuple[int, int, int, int]:
+    """
+    Compare two texts given as pieces.
+
+    Returns:
+        (start, old_end, new_end, new_length): ``old`` and ``new`` differ only
+        in old[start:old_end] versus new[start:new_end]
+    """
+    old_length = sum(map(len, old))
+    new_length = sum(map(len, new))
+    limit = min(old_length, new_length)
+
+    # Common prefix: whole equal pieces, then within the first differing pair
+    prefix = 0
+    count = min(len(old), len(new))
+    i = 0
+    while i < count and old[i] == new[i]:
+        prefix += len(old[i])
+        i += 1
+    if i < count:
+        prefix += common_prefix_length(old[i], new[i])
+
+    # Common suffix, not overlapping the prefix
+    suffix = 0
+    j = 1
+    while j <= count and old[-j] == new[-j]:
+        suffix += len(old[-j])
+        j += 1
+    if j <= count:
+        suffix += common_suffix_length(old[-j], new[-j])
+    suffix = min(suffix, limit - min(prefix, limit))
+    prefix = min(prefix, limit)
+    return prefix, old_length - suffix, new_length - suffix, new_length
+
+
+class LivePreview:
+    """Expansion of one editor buffer, updated incrementally."""
+
+    def __init__(self, prompt_service: Any, parent_id: str, parent_directory: Optional[str] = None):
+        """
+        Initialize the preview.
+
+        Args:
+            prompt_service: PromptService used to expand markers
+            parent_id: ID of the prompt being edited
+            parent_directory: Directory simple names are resolved in first
+        """
+        self.prompt_service = prompt_service
+        self.parent_id = parent_id
+        self.parent_directory = parent_directory
+        self.version = 0
+        self._pieces: List[str] = []
+        self._markers: Dict[str, MarkerExpansion] = {}
+        self._index: Any = None
+        self._generation = -1
+
+    def reset(self) -> None:
+        """Forget the previous buffer; the next update sends the whole expansion."""
+        self._pieces = []
+        self._markers = {}
+
+    def _expand_marker(self, marker: str) -> MarkerExpansion:
+        return self.prompt_service.expand_inclusions(marker, self.parent_directory, {self.parent_id}, self.parent_id)
+
+    def update(self, content: str) -> Dict[str, Any]:
+        """Expand ``content`` and return the change from the previous version."""
+        index = self.prompt_service.prompts
+        if index is not self._index or index.generation != self._generation:
+            self._markers = {}
+            self._index, self._generation = index, index.generation
+
+        previous = self._markers
+        markers: Dict[str, MarkerExpansion] = {}
+        pieces: List[str] = []
+        dependencies: Set[str] = set()
+        warnings: List[str] = []
+        reused = expanded = 0
+        position = 0
+        for start, end, reference in compile_inclusions(content):
+            pieces.append(content[position:start])
+            position = end
+            # The expansion depends only on the normalized reference
+            result = markers.get(reference)
+            if result is None:
+                result = previous.get(reference)
+                if result is None:
+                    result = self._expand_marker(content[start:end])
+                    expanded += 1
+                else:
+                    reused += 1
+                markers[reference] = result
+            else:
+                reused += 1
+            pieces.append(result[0])
+            dependencies.update(result[1])
+            warnings.extend(result[2])
+        pieces.append(content[position:])
+
+        start, old_end, new_end, length = diff_pieces(self._pieces, pieces)
+        text = _slice_pieces(pieces, start, new_end)
+        self._pieces = pieces
+        self._markers = markers
+        self.version += 1
+        return {
+            "version": self.version,
+            "start": start,
+            "end": old_end,
+            "text": text,
+            "length": length,
+            "dependencies": list(dependencies),
+            "warnings": warnings,
+            "reused": reused,
+            "expanded": expanded,
+        }
@@ -0,0 +1,155 @@
+"""
+Persistent parse cache for prompt files.
+
+Parsing a prompt file means splitting off and YAML-parsing its front matter.
+The result only depends on the file's bytes, so it is cached on disk keyed by
+(path, mtime_ns, size): on the next start or reload, files that have not
+changed skip parsing entirely and their content is sliced out of the file text
+using the cached body offsets.
+
+The cache file is a versioned JSON document written atomically. A missing,
+unreadable, corrupt or outdated file simply results in an empty cache.
+"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from loguru import logger
+
+
+class CachedParse(NamedTuple):
+    """Parse result for one file."""
+    description: Optional[str]
+    tags: List[Any]
+    body_start: int
+    body_end: int
+
+
+def _is_int(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _well_formed(entry: Any) -> bool:
+    """Whether a cache entry has the layout and value types ``store`` writes."""
+    return (isinstance(entry, list) and len(entry) == 6
+            and _is_int(entry[0]) and _is_int(entry[1])
+            and (entry[2] is None or isinstance(entry[2], str)) and isinstance(entry[3], list)
+            and _is_int(entry[4]) and _is_int(entry[5]))
+
+
+class ParseCache:
+    """Cache of prompt file parse results keyed by (path, mtime_ns, size)."""
+
+    # Bump when the on-disk layout or the parser's output changes
+    FORMAT_VERSION = 2
+
+    def __init__(self, path: Optional[str] = None, persistent: bool = True):
+        """
+        Initialize the cache.
+
+        Args:
+            path: Location of the cache file
+            persistent: If False, the cache lives in memory only and is never
+                        read from or written to ``path``.
+        """
+        self.path = path
+        self.persistent = persistent and bool(path)
+        self._entries: Dict[str, list] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        if self.persistent:
+            self.load()
+
+    def load(self) -> None:
+        """Load entries from disk, discarding the file if it is unusable."""
+        self._entries = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("version") != self.FORMAT_VERSION:
+                logger.info(f"Ignoring parse cache {self.path}: unsupported version")
+                return
+            entries = data.get("entries")
+            if isinstance(entries, dict):
+                self._entries = entries
+                logger.debug(f"Loaded {len(entries)} parse cache entries from {self.path}")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable parse cache {self.path}: {e}")
+
+    def save(self) -> bool:
+        """Write the cache to disk if it changed. Returns True if a write happened."""
+        if not self.persistent or not self._dirty or not self.path:
+            return False
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(prefix=".parse_cache.", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({"version": self.FORMAT_VERSION, "entries": self._entries}, f,
+                              separators=(',', ':'))
+                os.replace(tmp_path, self.path)
+            except Exception:
+                os.unlink(tmp_path)
+                raise
+            self._dirty = False
+            logger.debug(f"Saved {len(self._entries)} parse cache entries to {self.path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Could not save parse cache {self.path}: {e}")
+            return False
+
+    def lookup(self, path: str, mtime_ns: int, size: int) -> Optional[CachedParse]:
+        """Return the cached parse for a file, or None if missing, stale or malformed."""
+        entry = self._entries.get(path)
+        if entry is not None:
+            if not _well_formed(entry):
+                # Malformed entry: drop it and treat as a miss
+                self._entries.pop(path, None)
+                self._dirty = True
+            elif entry[0] == mtime_ns and entry[1] == size:
+                self.hits += 1
+                return CachedParse(*entry[2:])
+        self.misses += 1
+        return None
+
+    def store(self, path: str, mtime_ns: int, size: int, description: Optional[str],
+              tags: List[Any], body_start: int, body_end: int) -> None:
+        """Record the parse result for a file."""
+        entry = [mtime_ns, size, description, tags, body_start, body_end]
+        try:
+            # Front matter may hold values JSON cannot represent (dates...); don't cache those
+            json.dumps(entry[2:4])
+        except (TypeError, ValueError):
+            self._entries.pop(path, None)
+            return
+        self._entries[path] = entry
+        self._dirty = True
+
+    def prune(self, live_paths: Iterable[str]) -> int:
+        """Drop entries for files that no longer exist. Returns the number dropped."""
+        live = set(live_paths)
+        stale = [path for path in self._entries if path not in live]
+        for path in stale:
+            del self._entries[path]
+        if stale:
+            self._dirty = True
+        return len(stale)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the hit rate since the cache was created."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,170 @@
+"""
+Pattern inclusions: ``[[regex:pattern]]`` markers that aggregate every matching prompt.
+
+Only references with the ``regex:`` prefix are patterns, so a prompt name that
+happens to contain regex syntax (``[[C++ notes]]``) is never mistaken for one.
+Like plain references, a pattern without ``/`` is matched against prompt names
+and one with ``/`` against full prompt IDs; it has to match the whole name or
+ID. See prompts/proposal_Embedding_Regular_Expressions.md.
+
+``PatternIndex`` keeps the prompt IDs and names sorted. A pattern that starts
+with literal text only looks at the range of keys sharing that prefix (found
+with ``bisect``) instead of testing every prompt, and the result of each
+pattern is cached until the set of prompt IDs changes. Compiled patterns are
+shared through an LRU cache.
+"""
+
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from src.services.prompt_record import PromptRecord
+
+# Marks an inclusion reference as a pattern: [[regex:feature_.*]]
+PATTERN_PREFIX = 'regex:'
+# Characters that end the literal prefix of a pattern
+_PREFIX_STOP = frozenset('.^$*+?{}[]\\|()')
+_QUANTIFIERS = frozenset('*?{')
+
+
+def inclusion_pattern(reference: str) -> Optional[str]:
+    """Return the pattern of a ``[[regex:...]]`` reference, or None for a plain reference."""
+    if reference.startswith(PATTERN_PREFIX):
+        return reference[len(PATTERN_PREFIX):].strip()
+    return None
+
+
+def literal_prefix(pattern: str) -> str:
+    """Return text every full match of ``pattern`` starts with ('' if unknown)."""
+    if '|' in pattern:
+        # Alternatives at the top level have no common prefix
+        return ''
+    prefix = []
+    i = 1 if pattern.startswith('^') else 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            char, step = pattern[i + 1], 2
+        elif char in _PREFIX_STOP:
+            break
+        else:
+            step = 1
+        if i + step < len(pattern) and pattern[i + step] in _QUANTIFIERS:
+            # The character is optional or repeated
+            break
+        prefix.append(char)
+        i += step
+    return ''.join(prefix)
+
+
+def _prefix_end(prefix: str) -> str:
+    """Return the smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> Tuple[Pattern, str]:
+    """
+    Compile an inclusion pattern.
+
+    Returns:
+        (compiled regex, literal prefix of its matches)
+
+    Raises:
+        re.error: If the pattern is not a valid regular expression
+    """
+    return re.compile(pattern), literal_prefix(pattern)
+
+
+def pattern_matches(pattern: str, prompt_id: str, name: str) -> bool:
+    """Return True if ``pattern`` includes the prompt with this ID and name."""
+    try:
+        regex, _ = compile_pattern(pattern)
+    except re.error:
+        return False
+    return regex.fullmatch(prompt_id if '/' in pattern else name) is not None
+
+
+class PatternIndex:
+    """Sorted prompt IDs and names, answering pattern inclusions."""
+
+    def __init__(self):
+        self._ids: List[str] = []
+        self._names: List[Tuple[str, str]] = []  # (name, prompt ID)
+        self._results: Dict[str, Tuple[str, ...]] = {}
+        self._pending_removal: Optional[Tuple[str, str]] = None
+        self.hits = 0
+        self.misses = 0
+
+    def match(self, pattern: str) -> Tuple[str, ...]:
+        """
+        Return the IDs of the prompts ``pattern`` includes, sorted.
+
+        Raises:
+            re.error: If the pattern is not a valid regular expression
+        """
+        if self._pending_removal is not None:
+            # A removal that was not part of a replacement
+            self._pending_removal = None
+            self._changed()
+        result = self._results.get(pattern)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        regex, prefix = compile_pattern(pattern)
+        fullmatch = regex.fullmatch
+        if '/' in pattern:
+            ids = self._ids
+            if prefix:
+                ids = ids[bisect_left(ids, prefix):bisect_left(ids, _prefix_end(prefix))]
+            matched = [prompt_id for prompt_id in ids if fullmatch(prompt_id)]
+        else:
+            names = self._names
+            if prefix:
+                names = names[bisect_left(names, (prefix,)):bisect_left(names, (_prefix_end(prefix),))]
+            matched = sorted(prompt_id for name, prompt_id in names if fullmatch(name))
+        result = self._results[pattern] = tuple(matched)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Return the size and hit/miss counters of the result cache."""
+        return {"prompts": len(self._ids), "patterns": len(self._results), "hits": self.hits, "misses": self.misses}
+
+    def _changed(self) -> None:
+        self._results.clear()
+
+    def _add(self, prompt_id: str, name: str) -> None:
+        insort(self._ids, prompt_id)
+        insort(self._names, (name, prompt_id))
+
+    def _remove(self, prompt_id: str, name: str) -> None:
+        for keys, key in ((self._ids, prompt_id), (self._names, (name, prompt_id))):
+            position = bisect_left(keys, key)
+            if position < len(keys) and keys[position] == key:
+                del keys[position]
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        self._ids = sorted(index)
+        self._names = sorted((prompt.name, prompt_id) for prompt_id, prompt in index.items())
+        self._pending_removal = None
+        self._changed()
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._add(prompt_id, prompt.name)
+        # Replacing a prompt is reported as a removal then an addition;
+        # when it keeps its ID and name, the matches are unchanged
+        if self._pending_removal != (prompt_id, prompt.name):
+            self._changed()
+        self._pending_removal = None
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._remove(prompt_id, prompt.name)
+        if self._pending_removal is not None:
+            self._changed()
+        self._pending_removal = (prompt_id, prompt.name)
@@ -0,0 +1,244 @@
+"""
+Indexed prompt store.
+
+This module provides the dictionary that backs ``PromptService.prompts``.
+Besides the primary ``id -> PromptRecord`` mapping it maintains secondary indexes
+for the lookups on the service's hot paths (simple name, legacy unique_id and
+directory), so that they no longer require a scan over every prompt.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.models.unified_prompt import Prompt
+from src.services.prompt_record import PromptRecord
+
+
+# (name, unique_id, directory) as they were when the prompt was indexed
+_IndexKeys = Tuple[str, Optional[str], str]
+
+# (mtime_ns, size, inode) of the file a prompt was loaded from
+FileSignature = Tuple[int, int, int]
+
+
+class PromptIndex(Dict[str, PromptRecord]):
+    """Dictionary of prompt ID -> PromptRecord with name, unique_id and directory indexes.
+
+    Every mutation path of the dictionary (item assignment, deletion, ``pop``,
+    ``update``, ``clear``...) updates the secondary indexes in the same call, so
+    the indexes can never drift from the primary mapping. The keys used to index
+    a prompt are remembered at insertion time; this keeps removal correct even
+    when the Prompt object was mutated in place (e.g. during a rename) before
+    being re-inserted under its new ID.
+
+    Values are stored as compact ``PromptRecord`` objects: assigning a pydantic
+    ``Prompt`` stores a record built from it.
+
+    Name, unique_id and directory buckets follow the iteration order of the
+    primary mapping that the previous linear scans relied on: replacing an
+    entry keeps its position in the buckets, as it does in the dict, and a
+    unique_id shared by several prompts resolves to the first of them.
+
+    Derived structures (display names, ...) can subscribe with ``add_listener``.
+    A listener implements ``rebuild(index)``, ``prompt_added(prompt_id, prompt)``
+    and ``prompt_removed(prompt_id, prompt)``; replacing an existing entry is
+    reported as a removal followed by an addition.
+
+    Prompts loaded from disk can carry the signature of their source file
+    (``set_signature``), which lets a reload skip files that have not changed.
+    Replacing or removing an entry forgets its signature.
+
+    ``generation`` increases with every change to the contents, so derived
+    data can be checked for staleness without subscribing as a listener.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._by_name: Dict[str, Dict[str, None]] = {}
+        self._by_unique_id: Dict[str, Dict[str, None]] = {}
+        self._by_directory: Dict[str, Dict[str, None]] = {}
+        self._indexed_keys: Dict[str, _IndexKeys] = {}
+        # Insertion sequence of each ID; kept when an entry is replaced, like its dict position
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = 0
+        self._signatures: Dict[str, FileSignature] = {}
+        self._listeners: List[Any] = []
+        self.generation = 0
+        self.update(*args, **kwargs)
+
+    def add_listener(self, listener: Any) -> None:
+        """Subscribe ``listener`` to changes and let it rebuild from the current contents."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+        listener.rebuild(self)
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _bucket_add(self, buckets: Dict[str, Dict[str, None]], key: str, prompt_id: str) -> None:
+        bucket = buckets.setdefault(key, {})
+        out_of_order = bool(bucket) and self._sequence[prompt_id] < self._sequence[next(reversed(bucket))]
+        bucket[prompt_id] = None
+        if out_of_order:
+            # Re-inserted under new keys: restore the position the ID has in the primary mapping
+            ordered = sorted(bucket, key=self._sequence.__getitem__)
+            bucket.clear()
+            bucket.update(dict.fromkeys(ordered))
+
+    @staticmethod
+    def _bucket_remove(buckets: Dict[str, Dict[str, None]], key: str, prompt_id: str) -> None:
+        bucket = buckets.get(key)
+        if bucket is not None:
+            bucket.pop(prompt_id, None)
+            if not bucket:
+                del buckets[key]
+
+    @staticmethod
+    def _keys_of(prompt_id: str, prompt: PromptRecord) -> _IndexKeys:
+        return (getattr(prompt, 'name', None) or prompt_id, getattr(prompt, 'unique_id', None),
+                getattr(prompt, 'directory', ''))
+
+    def _index(self, prompt_id: str, keys: _IndexKeys) -> None:
+        name, unique_id, directory = keys
+        self.generation += 1
+        if prompt_id not in self._sequence:
+            self._sequence[prompt_id] = self._next_sequence
+            self._next_sequence += 1
+        self._bucket_add(self._by_name, name, prompt_id)
+        self._bucket_add(self._by_directory, directory, prompt_id)
+        if unique_id:
+            self._bucket_add(self._by_unique_id, unique_id, prompt_id)
+        self._indexed_keys[prompt_id] = keys
+
+    def _unindex(self, prompt_id: str, replacing: bool = False) -> None:
+        self.generation += 1
+        self._signatures.pop(prompt_id, None)
+        if not replacing:
+            self._sequence.pop(prompt_id, None)
+        keys = self._indexed_keys.pop(prompt_id, None)
+        if keys is None:
+            return
+        name, unique_id, directory = keys
+        self._bucket_remove(self._by_name, name, prompt_id)
+        self._bucket_remove(self._by_directory, directory, prompt_id)
+        if unique_id:
+            self._bucket_remove(self._by_unique_id, unique_id, prompt_id)
+
+    # ------------------------------------------------------------------
+    # dict overrides
+    # ------------------------------------------------------------------
+
+    def __setitem__(self, prompt_id: str, value: Union[Prompt, PromptRecord]) -> None:
+        prompt = PromptRecord.from_prompt(value)
+        replacing = prompt_id in self
+        previous = super().get(prompt_id)
+        keys = self._keys_of(prompt_id, prompt)
+        super().__setitem__(prompt_id, prompt)
+        if replacing and self._indexed_keys.get(prompt_id) == keys:
+            # Same keys: the ID keeps its place in every bucket, as it does in the dict
+            self.generation += 1
+            self._signatures.pop(prompt_id, None)
+        else:
+            if replacing:
+                self._unindex(prompt_id, replacing=True)
+            self._index(prompt_id, keys)
+        for listener in self._listeners:
+            if replacing:
+                listener.prompt_removed(prompt_id, previous)
+            listener.prompt_added(prompt_id, prompt)
+
+    def __delitem__(self, prompt_id: str) -> None:
+        prompt = super().pop(prompt_id)
+        self._unindex(prompt_id)
+        self._notify_removed(prompt_id, prompt)
+
+    def _notify_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        for listener in self._listeners:
+            listener.prompt_removed(prompt_id, prompt)
+
+    _MISSING = object()
+
+    def pop(self, prompt_id, default=_MISSING):
+        if prompt_id not in self:
+            if default is self._MISSING:
+                raise KeyError(prompt_id)
+            return default
+        prompt = super().pop(prompt_id)
+        self._unindex(prompt_id)
+        self._notify_removed(prompt_id, prompt)
+        return prompt
+
+    def popitem(self):
+        prompt_id, prompt = super().popitem()
+        self._unindex(prompt_id)
+        self._notify_removed(prompt_id, prompt)
+        return prompt_id, prompt
+
+    def setdefault(self, prompt_id, default=None):
+        if prompt_id not in self:
+            self[prompt_id] = default
+        return self[prompt_id]
+
+    def update(self, *args, **kwargs) -> None:
+        for prompt_id, prompt in dict(*args, **kwargs).items():
+            self[prompt_id] = prompt
+
+    def __ior__(self, other):  # type: ignore[misc]  # dict.__or__ is overloaded in typeshed
+        self.update(other)
+        return self
+
+    def clear(self) -> None:
+        super().clear()
+        self._by_name.clear()
+        self._by_unique_id.clear()
+        self._by_directory.clear()
+        self._indexed_keys.clear()
+        self._sequence.clear()
+        self._signatures.clear()
+        self.generation += 1
+        for listener in self._listeners:
+            listener.rebuild(self)
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def set_signature(self, prompt_id: str, signature: FileSignature) -> None:
+        """Record the source file signature of a stored prompt."""
+        if prompt_id in self:
+            self._signatures[prompt_id] = signature
+
+    def signature(self, prompt_id: str) -> Optional[FileSignature]:
+        """Return the source file signature recorded for a prompt, if any."""
+        return self._signatures.get(prompt_id)
+
+    def ids_for_name(self, name: str) -> List[str]:
+        """Return the IDs of all prompts with the given simple name, in insertion order."""
+        return list(self._by_name.get(name, ()))
+
+    def id_for_unique_id(self, unique_id: str) -> Optional[str]:
+        """Return the ID of the first prompt carrying the given legacy unique_id, if any."""
+        return next(iter(self._by_unique_id.get(unique_id, ())), None)
+
+    def ids_in_directory(self, directory: str) -> List[str]:
+        """Return the IDs of all prompts stored directly in ``directory``."""
+        return list(self._by_directory.get(directory, ()))
+
+    def ids_under_directory(self, directory: str) -> List[str]:
+        """Return the IDs of all prompts in ``directory`` or any of its subdirectories."""
+        prefix = directory.rstrip(os.sep) + os.sep
+        return [prompt_id
+                for d, ids in self._by_directory.items() if d == directory or d.startswith(prefix)
+                for prompt_id in ids]
+
+    def prompts_for_name(self, name: str, directory: Optional[str] = None) -> List[PromptRecord]:
+        """Return prompts with the given simple name, optionally restricted to a directory."""
+        prompts = [self[prompt_id] for prompt_id in self._by_name.get(name, ())]
+        if directory:
+            prompts = [p for p in prompts if p.directory == directory]
+        return prompts
+
+    def directories(self) -> Iterable[str]:
+        """Return the directories that currently hold at least one prompt."""
+        return self._by_directory.keys()
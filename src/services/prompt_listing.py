@@ -0,0 +1,165 @@
+"""
+Sorted, filtered and paginated prompt listings.
+
+``GET /api/prompts/all`` used to build a dict per prompt, content included,
+for the whole library. ``PromptListing`` serves one page at a time instead:
+
+- Each sort field has a sorted ``(key, prompt ID)`` list, built the first time
+  it is needed and reused until ``PromptIndex.generation`` changes. A page is
+  found with a bisect from the cursor and costs its own size, not the
+  library's.
+- The cursor is the ``(key, ID)`` of the last prompt of the previous page,
+  so pages stay consistent while prompts are added or removed: nothing
+  already listed is repeated and nothing is skipped. It is encoded as opaque
+  URL-safe text, together with the sort it belongs to.
+- Filters come as a candidate set (from ``TagIndex``) and/or a predicate. A
+  small candidate set is sorted on its own; otherwise the full order is
+  walked and filtered until the page is full.
+
+Only the requested fields are built for each listed prompt (see
+``RECORD_FIELDS``).
+"""
+
+import base64
+import binascii
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple
+
+from src.services.prompt_record import PromptRecord
+
+
+def _timestamp(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+# Listing fields read straight from an index record
+RECORD_FIELDS: Dict[str, Callable[[PromptRecord], Any]] = {
+    "id": lambda record: record.id,
+    "name": lambda record: record.name,
+    "description": lambda record: record.description,
+    "tags": lambda record: record.tags,
+    "directory": lambda record: record.directory,
+    "filename": lambda record: record.filename,
+    "unique_id": lambda record: record.unique_id,
+    "is_composite": lambda record: record.is_composite,
+    "updated_at": lambda record: _timestamp(record.updated_at),
+    "created_at": lambda record: _timestamp(record.created_at),
+}
+
+# Sort keys; ties are broken by prompt ID
+SORT_KEYS: Dict[str, Callable[[PromptRecord, str], str]] = {
+    "id": lambda record, display_name: record.id,
+    "name": lambda record, display_name: record.name.lower(),
+    "display_name": lambda record, display_name: display_name.lower(),
+    "directory": lambda record, display_name: record.directory,
+    "updated_at": lambda record, display_name: _timestamp(record.updated_at) or "",
+    "created_at": lambda record, display_name: _timestamp(record.created_at) or "",
+}
+
+_Order = List[Tuple[str, str]]
+
+
+def encode_cursor(sort: str, descending: bool, entry: Tuple[str, str]) -> str:
+    """Encode the position after ``entry`` in a listing sorted by ``sort``."""
+    data = json.dumps([sort, descending, entry[0], entry[1]], separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[str, str]:
+    """
+    Decode a cursor made by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort order
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_descending, key, prompt_id = json.loads(data)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if (cursor_sort, cursor_descending) != (sort, descending):
+        raise ValueError("The cursor belongs to a listing with another sort order")
+    return str(key), str(prompt_id)
+
+
+class PromptListing:
+    """Sorted orders of a PromptIndex, and the pages cut from them."""
+
+    # Candidate sets smaller than 1/SORT_CANDIDATES_RATIO of the library are
+    # sorted on their own instead of filtering the full order
+    SORT_CANDIDATES_RATIO = 8
+
+    def __init__(self, display_name_of: Callable[[str], Optional[str]]):
+        """
+        Initialize the listing.
+
+        Args:
+            display_name_of: Returns the current display name of a prompt ID
+        """
+        self._display_name_of = display_name_of
+        # sort -> (index, generation, order)
+        self._orders: Dict[str, Tuple[Any, int, _Order]] = {}
+
+    def _key(self, sort: str, index, prompt_id: str) -> Tuple[str, str]:
+        record = index[prompt_id]
+        display_name = (self._display_name_of(prompt_id) or record.name) if sort == "display_name" else ""
+        return SORT_KEYS[sort](record, display_name), prompt_id
+
+    def order(self, index, sort: str) -> _Order:
+        """Return every prompt of ``index`` as ``(key, ID)``, sorted by ``sort``."""
+        cached = self._orders.get(sort)
+        if cached is not None and cached[0] is index and cached[1] == index.generation:
+            return cached[2]
+        order = sorted(self._key(sort, index, prompt_id) for prompt_id in index)
+        self._orders[sort] = (index, index.generation, order)
+        return order
+
+    def page(self, index, sort: str = "id", descending: bool = False,
+             candidates: Optional[Collection[str]] = None, accept: Optional[Callable[[str], bool]] = None,
+             cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[str], Optional[str]]:
+        """
+        Return the IDs of one page of prompts and the cursor of the next page.
+
+        Args:
+            index: The PromptIndex to list
+            sort: Sort field (a key of ``SORT_KEYS``)
+            descending: Reverse the order
+            candidates: Only list these prompts (all if None)
+            accept: Only list the prompts for which this returns True
+            cursor: Start after this position (from a previous page); the first page if None
+            limit: Page size (the rest of the listing if None)
+
+        Returns:
+            (prompt IDs, cursor of the next page or None on the last page)
+
+        Raises:
+            ValueError: If ``sort`` is unknown or ``cursor`` is invalid
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort field: {sort!r}")
+        position = decode_cursor(cursor, sort, descending) if cursor else None
+        if candidates is not None and len(candidates) * self.SORT_CANDIDATES_RATIO < len(index):
+            order = sorted(self._key(sort, index, prompt_id) for prompt_id in candidates if prompt_id in index)
+            candidates = None
+        else:
+            order = self.order(index, sort)
+
+        if descending:
+            end = bisect_left(order, position) if position else len(order)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect_right(order, position) if position else 0
+            positions = range(start, len(order))
+
+        entries: _Order = []
+        for i in positions:
+            entry = order[i]
+            if candidates is not None and entry[1] not in candidates:
+                continue
+            if accept is not None and not accept(entry[1]):
+                continue
+            if limit is not None and len(entries) == limit:
+                return [prompt_id for _, prompt_id in entries], encode_cursor(sort, descending, entries[-1])
+            entries.append(entry)
+        return [prompt_id for _, prompt_id in entries], None
@@ -0,0 +1,340 @@
+"""
+Prompt file loading.
+
+This module scans prompt directories, reads prompt files and parses their
+front matter. Loading can run serially (the default) or in parallel: a bounded
+thread pool scans directories and reads files, and an optional process pool
+parses front matter. Results are always returned in a deterministic order
+(configured directory order, then path order) so the merged prompt store does
+not depend on worker scheduling.
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from src.services.front_matter import parse_front_matter, split_front_matter
+from src.services.parse_cache import ParseCache
+
+# Same marker syntax as PromptService.inclusion_pattern
+INCLUSION_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+
+
+# Stat of a file that could not be stat'ed; only ever attached to a failed load
+NO_STAT = os.stat_result((0,) * 10)
+
+
+@dataclass
+class LoadedPromptFile:
+    """Raw result of loading one prompt file, before it becomes a Prompt."""
+    path: str
+    stat: os.stat_result
+    content: str = ""
+    description: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    from_cache: bool = False
+    error: Optional[str] = None
+
+
+# (description, tags, body_start, body_end)
+ParsedSource = Tuple[Optional[str], List[str], int, int]
+
+
+def _strip_span(text: str, start: int) -> Tuple[int, int]:
+    """Return the (start, end) offsets of ``text[start:].strip()`` within ``text``."""
+    rest = text[start:]
+    stripped = rest.strip()
+    if not stripped:
+        return len(text), len(text)
+    body_start = start + (len(rest) - len(rest.lstrip()))
+    return body_start, body_start + len(stripped)
+
+
+def parse_prompt_source(text: str, file_path: str = "") -> ParsedSource:
+    """
+    Parse a prompt file's text into front matter metadata and the body location.
+
+    This is a module-level function so it can be shipped to worker processes.
+
+    Args:
+        text: Full file content
+        file_path: Path of the file, used for log messages only
+
+    Returns:
+        Tuple of (description, tags, body start offset, body end offset).
+        ``text[start:end]`` is the prompt content without front matter.
+    """
+    description = None
+    tags: List[str] = []
+    body_start, body_end = 0, len(text)
+
+    front_matter, body_offset = split_front_matter(text)
+    if front_matter is not None:
+        try:
+            meta = parse_front_matter(front_matter)
+            if isinstance(meta, dict):
+                description = meta.get('description')
+                if 'tags' in meta and isinstance(meta['tags'], list):
+                    tags = meta['tags']
+
+            # Remove front matter from content
+            body_start, body_end = _strip_span(text, body_offset)
+        except Exception as e:
+            logger.opt(exception=True).warning(f"Error parsing front matter in {file_path}: {str(e)}")
+            # Continue with empty metadata but still process the file
+
+    return description, tags, body_start, body_end
+
+
+def parse_prompt_text(text: str, file_path: str = "") -> Tuple[Optional[str], List[str], str]:
+    """
+    Parse a prompt file's text into its front matter and body.
+
+    Returns:
+        Tuple of (description, tags, content without front matter)
+    """
+    description, tags, body_start, body_end = parse_prompt_source(text, file_path)
+    return description, tags, text[body_start:body_end]
+
+
+def _parse_batch(items: List[Tuple[str, str]]) -> List[ParsedSource]:
+    """Parse a batch of (path, text) pairs; used as the process pool work unit."""
+    return [parse_prompt_source(text, path) for path, text in items]
+
+
+class PromptLoader:
+    """Scans, reads and parses prompt files, serially or with worker pools."""
+
+    def __init__(self, workers: int = 0, parse_processes: int = 0,
+                 parse_cache: Optional[ParseCache] = None):
+        """
+        Initialize the loader.
+
+        Args:
+            workers: Size of the thread pool used for scanning and reading.
+                     0 loads serially in the calling thread.
+            parse_processes: Size of the process pool used for front matter
+                             parsing. 0 parses in the calling process.
+            parse_cache: Optional cache of parse results keyed by (path, mtime, size).
+        """
+        self.workers = max(0, workers)
+        self.parse_processes = max(0, parse_processes)
+        self.parse_cache = parse_cache
+        self.last_stats: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _scan_one(directory: str) -> Tuple[List[str], List[str]]:
+        """List the .md files and subdirectories directly inside ``directory``."""
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        # Like os.walk, do not descend into symlinked directories
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.endswith('.md') and entry.is_file():
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"Could not scan directory {directory}: {e}")
+        return files, subdirs
+
+    def scan_directories(self, directories: List[str],
+                         executor: Optional[ThreadPoolExecutor] = None) -> List[List[str]]:
+        """
+        Find all .md files below each of ``directories``.
+
+        The trees are walked breadth-first, one level at a time, so that every
+        level of every directory can be listed by the pool concurrently.
+
+        Returns:
+            One path-sorted list of files per input directory
+        """
+        found: List[List[str]] = [[] for _ in directories]
+        pending: List[Tuple[int, str]] = list(enumerate(directories))
+        while pending:
+            dirs = [d for _, d in pending]
+            if executor is not None and len(dirs) > 1:
+                results = list(executor.map(self._scan_one, dirs))
+            else:
+                results = [self._scan_one(d) for d in dirs]
+            next_pending: List[Tuple[int, str]] = []
+            for (root_idx, _), (files, subdirs) in zip(pending, results):
+                found[root_idx].extend(files)
+                next_pending.extend((root_idx, sub) for sub in subdirs)
+            pending = next_pending
+        for files in found:
+            files.sort()
+        return found
+
+    # ------------------------------------------------------------------
+    # Reading and parsing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def read_file(file_path: str) -> Tuple[Optional[os.stat_result], Optional[str], Optional[str]]:
+        """Return (stat, text, error) for a prompt file."""
+        try:
+            stat = os.stat(file_path)
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return stat, f.read(), None
+        except Exception as e:
+            return None, None, str(e)
+
+    def _parse_all(self, items: List[Tuple[str, str]]) -> List[ParsedSource]:
+        if self.parse_processes and len(items) > 1:
+            chunk = max(1, len(items) // (self.parse_processes * 4))
+            batches = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+            with ProcessPoolExecutor(max_workers=self.parse_processes) as pool:
+                return [parsed for batch in pool.map(_parse_batch, batches) for parsed in batch]
+        return _parse_batch(items)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _pool(self) -> Iterator[Optional[ThreadPoolExecutor]]:
+        if not self.workers:
+            yield None
+            return
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            yield executor
+        finally:
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _stat(file_path: str) -> Optional[os.stat_result]:
+        try:
+            return os.stat(file_path)
+        except OSError:
+            return None
+
+    def scan_files(self, directories: List[str]) -> List[Tuple[str, Optional[os.stat_result]]]:
+        """
+        Find all prompt files below the given directories and stat them, without reading them.
+
+        Returns:
+            (path, stat) pairs ordered by directory, then path. ``stat`` is None
+            for files that vanished or could not be stat'ed.
+        """
+        with self._pool() as executor:
+            paths = [path for files in self.scan_directories(directories, executor) for path in files]
+            if executor is not None:
+                stats = list(executor.map(self._stat, paths))
+            else:
+                stats = [self._stat(p) for p in paths]
+        return list(zip(paths, stats))
+
+    def load_directories(self, directories: List[str]) -> List[LoadedPromptFile]:
+        """
+        Load every prompt file below the given directories.
+
+        Args:
+            directories: Directory paths, in the order their prompts should be merged
+
+        Returns:
+            Loaded files ordered by directory, then path. Files that could not
+            be read are included with ``error`` set.
+        """
+        start = time.perf_counter()
+        with self._pool() as executor:
+            paths = [path for files in self.scan_directories(directories, executor) for path in files]
+        scan_ms = round((time.perf_counter() - start) * 1000, 2)
+
+        loaded = self.load_files(paths)
+        self.last_stats.update({"directories": len(directories), "scan_ms": scan_ms})
+        return loaded
+
+    def load_files(self, paths: List[str]) -> List[LoadedPromptFile]:
+        """
+        Read and parse the given prompt files.
+
+        Returns:
+            One LoadedPromptFile per path, in the same order. Files that could
+            not be read are included with ``error`` set.
+        """
+        start = time.perf_counter()
+        with self._pool() as executor:
+            if executor is not None:
+                read_results = list(executor.map(self.read_file, paths))
+            else:
+                read_results = [self.read_file(p) for p in paths]
+        read_done = time.perf_counter()
+
+        loaded: List[LoadedPromptFile] = []
+        to_parse: List[Tuple[str, str]] = []
+        to_parse_items: List[LoadedPromptFile] = []
+        cache_hits = 0
+        for path, (stat, text, error) in zip(paths, read_results):
+            if stat is None or text is None:
+                logger.error(f"Error loading prompt {path}: {error}")
+                loaded.append(LoadedPromptFile(path=path, stat=NO_STAT, error=error))
+                continue
+            item = LoadedPromptFile(path=path, stat=stat, content=text)
+            loaded.append(item)
+            if self._apply_cached(item, text):
+                cache_hits += 1
+            else:
+                to_parse.append((path, text))
+                to_parse_items.append(item)
+
+        for item, (path, text), parsed in zip(to_parse_items, to_parse, self._parse_all(to_parse)):
+            self._apply_parsed(item, text, parsed)
+        parse_done = time.perf_counter()
+
+        self.last_stats = {
+            "files": len(paths),
+            "workers": self.workers,
+            "parse_processes": self.parse_processes,
+            "read_ms": round((read_done - start) * 1000, 2),
+            "parse_ms": round((parse_done - read_done) * 1000, 2),
+            "parsed": len(to_parse),
+            "cache_hits": cache_hits,
+        }
+        return loaded
+
+    def load_file(self, file_path: str) -> LoadedPromptFile:
+        """Read and parse a single prompt file, using the parse cache when possible."""
+        stat, text, error = self.read_file(file_path)
+        if stat is None or text is None:
+            return LoadedPromptFile(path=file_path, stat=NO_STAT, error=error)
+        item = LoadedPromptFile(path=file_path, stat=stat, content=text)
+        if not self._apply_cached(item, text):
+            self._apply_parsed(item, text, parse_prompt_source(text, file_path))
+        return item
+
+    def _apply_cached(self, item: LoadedPromptFile, text: str) -> bool:
+        if self.parse_cache is None:
+            return False
+        entry = self.parse_cache.lookup(item.path, item.stat.st_mtime_ns, item.stat.st_size)
+        if entry is None or entry.body_end > len(text):
+            return False
+        item.description = entry.description
+        item.tags = list(entry.tags)
+        item.content = text[entry.body_start:entry.body_end]
+        item.from_cache = True
+        return True
+
+    def _apply_parsed(self, item: LoadedPromptFile, text: str, parsed: ParsedSource) -> None:
+        description, tags, body_start, body_end = parsed
+        item.description = description
+        item.tags = tags
+        item.content = text[body_start:body_end]
+        if self.parse_cache is not None:
+            self.parse_cache.store(item.path, item.stat.st_mtime_ns, item.stat.st_size,
+                                   description, tags, body_start, body_end)
@@ -0,0 +1,306 @@
+"""
+Compact in-memory prompt records.
+
+``PromptIndex`` stores one ``PromptRecord`` per prompt instead of a pydantic
+``Prompt`` model. Records use ``__slots__``, intern the strings that repeat
+across prompts (directories, names, tags), share the ID string with the legacy
+``unique_id``, derive the filename when it is the usual ``<name>.md`` and keep
+``is_composite``, the full path, the prompt's ``[[references]]`` and the position of its
+inclusion markers precomputed. The Markdown sections of the content are
+indexed the first time one is included and kept with the record. Pydantic models are only built, with
+``to_prompt``, when a prompt leaves the service.
+
+Records expose the same attributes as ``Prompt`` for reading, so code that
+inspects index entries works with either.
+"""
+
+import os
+import sys
+from array import array
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence, Tuple, overload
+
+from src.models.unified_prompt import Prompt
+from src.services.prompt_loader import INCLUSION_PATTERN
+
+
+# Marks a unique_id that is the same as the record's id
+_SAME_AS_ID = object()
+
+
+@overload
+def _intern(value: str) -> str: ...
+@overload
+def _intern(value: None) -> None: ...
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _is_composite(content: str) -> bool:
+    # Same test as Prompt.is_composite
+    return "[[" in content and "]]" in content
+
+
+class InclusionSpans:
+    """
+    Positions of the ``[[...]]`` markers in a piece of content.
+
+    Iterating yields ``(start, end, reference)`` for each marker; the text
+    between markers is literal. Offsets are packed in an unsigned int array
+    next to a tuple of references, so a marker costs a few bytes instead of
+    a tuple of boxed ints. References are normalized the way expansion does
+    it (a trailing ``.md`` is dropped, also before a ``#heading``); a marker
+    that normalizes to nothing keeps ``""``.
+    """
+
+    __slots__ = ('_offsets', '_references')
+
+    def __init__(self, offsets: Sequence[int] = (), references: Tuple[str, ...] = ()):
+        self._offsets = array('I', offsets)
+        self._references = references
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        offsets = self._offsets
+        for i, reference in enumerate(self._references):
+            yield offsets[2 * i], offsets[2 * i + 1], reference
+
+    def __len__(self) -> int:
+        return len(self._references)
+
+    def window(self, start: int, end: int) -> "InclusionSpans":
+        """Return the markers lying within ``content[start:end]``, with offsets relative to ``start``."""
+        offsets: List[int] = []
+        references = []
+        for marker_start, marker_end, reference in self:
+            if marker_start >= start and marker_end <= end:
+                offsets += (marker_start - start, marker_end - start)
+                references.append(reference)
+        return InclusionSpans(offsets, tuple(references)) if references else NO_INCLUSIONS
+
+    def distinct_references(self) -> Tuple[str, ...]:
+        """Return the distinct non-empty references, in order."""
+        return tuple(dict.fromkeys(reference for reference in self._references if reference))
+
+
+# Shared by every prompt without inclusions
+NO_INCLUSIONS = InclusionSpans()
+
+
+def compile_inclusions(content: str) -> InclusionSpans:
+    """Tokenize content into its inclusion markers."""
+    offsets: List[int] = []
+    references = []
+    for match in INCLUSION_PATTERN.finditer(content):
+        reference = match.group(1)
+        if reference.endswith('.md'):
+            reference = reference[:-3]
+        elif '.md#' in reference:
+            name, _, heading = reference.partition('#')
+            if name.endswith('.md'):
+                reference = name[:-3] + '#' + heading
+        offsets += match.span()
+        references.append(_intern(reference))
+    return InclusionSpans(offsets, tuple(references)) if references else NO_INCLUSIONS
+
+
+def inclusion_references(content: str) -> Tuple[str, ...]:
+    """Return the distinct, normalized inclusion references in ``content``, in order."""
+    return compile_inclusions(content).distinct_references()
+
+
+class PromptRecord:
+    """Slotted, interned representation of a prompt held by the index."""
+
+    __slots__ = (
+        'id', '_name', '_filename', '_directory', '_full_path', '_content', 'description', '_tags',
+        'created_at', 'updated_at', '_unique_id', 'display_name_cache',
+        'content_loaded', '_composite', '_references', '_segments', '_sections', 'source_signature',
+    )
+
+    def __init__(self, id: str, name: str, filename: str, directory: str, content: str,
+                 description: Optional[str], tags: List[Any], created_at: datetime,
+                 updated_at: datetime, unique_id: Optional[str] = None,
+                 display_name_cache: Optional[str] = None,
+                 content_loaded: bool = True, is_composite: Optional[bool] = None,
+                 references: Optional[Tuple[str, ...]] = None,
+                 segments: Optional[InclusionSpans] = None):
+        self.id = id
+        self._name = _intern(name)
+        self._directory = _intern(directory)
+        self.filename = filename
+        self.description = description
+        self.tags = tags
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.unique_id = unique_id
+        self.display_name_cache = display_name_cache
+        self.content_loaded = content_loaded
+        self._content = content
+        self._composite = _is_composite(content) if is_composite is None else is_composite
+        if content_loaded and segments is None:
+            segments = compile_inclusions(content)
+        # Spans are only kept next to the content they index
+        self._segments = segments if content_loaded else None
+        self._references = (segments or NO_INCLUSIONS).distinct_references() if references is None else references
+        self._sections: Optional[Tuple[Any, ...]] = None
+        # (mtime_ns, size) of the file the content was last read from, when read on demand
+        self.source_signature: Optional[Tuple[int, int]] = None
+
+    @classmethod
+    def from_prompt(cls, prompt: Any, keep_content: bool = True) -> "PromptRecord":
+        """
+        Build a record from a Prompt (a record is returned as-is when content is kept).
+
+        Args:
+            prompt: Prompt model or record
+            keep_content: If False, the record holds metadata only and
+                          ``content_loaded`` is False.
+        """
+        if isinstance(prompt, cls) and (keep_content or not prompt.content_loaded):
+            return prompt
+        content_loaded = keep_content and getattr(prompt, 'content_loaded', True)
+        if isinstance(prompt, cls):
+            segments, references = prompt.segments, prompt.references
+        else:
+            segments = compile_inclusions(prompt.content)
+            references = segments.distinct_references()
+        return cls(
+            id=prompt.id,
+            name=prompt.name,
+            filename=prompt.filename,
+            directory=prompt.directory,
+            content=prompt.content if content_loaded else "",
+            description=prompt.description,
+            tags=prompt.tags,
+            created_at=prompt.created_at,
+            updated_at=prompt.updated_at,
+            unique_id=prompt.unique_id,
+            display_name_cache=prompt.display_name_cache,
+            content_loaded=content_loaded,
+            is_composite=prompt.is_composite,
+            references=references,
+            segments=segments if content_loaded else None,
+        )
+
+    def to_prompt(self, content: Optional[str] = None) -> Prompt:
+        """Materialize a pydantic Prompt, optionally with content supplied by the caller."""
+        # The values were validated when the record was created
+        return Prompt.model_construct(
+            id=self.id,
+            name=self.name,
+            filename=self.filename,
+            directory=self.directory,
+            content=self._content if content is None else content,
+            description=self.description,
+            tags=list(self._tags),
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            unique_id=self.unique_id,
+            display_name_cache=self.display_name_cache,
+        )
+
+    # ------------------------------------------------------------------
+    # Prompt-compatible attributes
+    # ------------------------------------------------------------------
+
+    @property
+    def content(self) -> str:
+        return self._content
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self._content = value
+        self.content_loaded = True
+        self._composite = _is_composite(value)
+        self._segments = compile_inclusions(value)
+        self._references = self._segments.distinct_references()
+        self._sections = None
+
+    @property
+    def is_composite(self) -> bool:
+        return self._composite
+
+    @property
+    def references(self) -> Tuple[str, ...]:
+        """Distinct ``[[references]]`` in the content, available without loading it."""
+        return self._references
+
+    @property
+    def segments(self) -> Optional[InclusionSpans]:
+        """Inclusion markers of the content, or None when the content is not held."""
+        return self._segments
+
+    @property
+    def sections(self) -> Optional[Tuple[Any, ...]]:
+        """Markdown sections of the content (see ``sections``), or None until indexed."""
+        return self._sections
+
+    @sections.setter
+    def sections(self, value: Optional[Tuple[Any, ...]]) -> None:
+        self._sections = value
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        # The filename may be derived from the name; keep it as it was
+        filename = self.filename
+        self._name = _intern(value)
+        self.filename = filename
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @directory.setter
+    def directory(self, value: str) -> None:
+        self._directory = _intern(value)
+        self._full_path = os.path.join(self._directory, self.filename)
+
+    @property
+    def filename(self) -> str:
+        return self._filename if self._filename is not None else self._name + '.md'
+
+    @filename.setter
+    def filename(self, value: str) -> None:
+        self._filename = None if value == f"{self._name}.md" else value
+        self._full_path = os.path.join(self._directory, value)
+
+    @property
+    def tags(self) -> List[Any]:
+        return list(self._tags)
+
+    @tags.setter
+    def tags(self, value: List[Any]) -> None:
+        self._tags = tuple(_intern(tag) for tag in (value or ()))
+
+    @property
+    def unique_id(self) -> Optional[str]:
+        return self.id if self._unique_id is _SAME_AS_ID else self._unique_id
+
+    @unique_id.setter
+    def unique_id(self, value: Optional[str]) -> None:
+        # The common case (unique_id == id) is stored without a second string
+        self._unique_id = _SAME_AS_ID if value == self.id else value
+
+    @property
+    def full_path(self) -> str:
+        return self._full_path
+
+    @property
+    def display_name(self) -> str:
+        if self.display_name_cache is not None:
+            return self.display_name_cache
+        return self.name
+
+    def set_display_name_cache(self, display_name: str) -> None:
+        self.display_name_cache = display_name
+
+    def has_tag(self, tag: Any) -> bool:
+        """Check for a tag without copying the tag list."""
+        return tag in self._tags
+
+    def __repr__(self) -> str:
+        return f"PromptRecord(id={self.id!r}, content_loaded={self.content_loaded})"
@@ -5,17 +5,38 @@ This module provides functionality for loading, parsing, and manipulating
 prompts from the filesystem.
 """
 
+import hashlib
 import os
 import re
+import time
 import yaml
 import json
-from typing import Dict, List, Optional, Set, Tuple, Any
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple, Union, Any
 from datetime import datetime, timezone
 from pathlib import Path
 from loguru import logger
 
 from src.models.unified_prompt import Prompt
 from src.models.prompt import PromptDirectory
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_listing import RECORD_FIELDS, PromptListing
+from src.services.listing_snapshots import ListingSnapshots
+from src.services.prompt_record import InclusionSpans, PromptRecord, compile_inclusions
+from src.services.display_names import DisplayNameIndex
+from src.services.prompt_loader import PromptLoader, LoadedPromptFile
+from src.services.parse_cache import ParseCache
+from src.services.content_cache import ContentCache
+from src.services.expansion_cache import ExpansionCache
+from src.services.expansion_store import ExpansionStore
+from src.services.expansion_stream import DEFAULT_CHUNK_CHARS, ExpansionStream
+from src.services.expansion_walk import ExpansionBudget, ExpansionWalk, SubExpansion
+from src.services.inclusion_graph import InclusionGraph
+from src.services.pattern_index import PatternIndex, inclusion_pattern, pattern_matches
+from src.services.search_index import SearchIndex
+from src.services.suggestion_index import SuggestionIndex
+from src.services.tag_index import TagIndex, TagQuery
+from src.services.sections import Section, compile_sections, find_section, split_section_reference
+from src.services.hot_logging import sampled
 
 
 class PromptService:
@@ -26,11 +47,38 @@ class PromptService:
         os.path.join(os.path.expanduser("~"), ".prompt_manager", "prompt_directories.json")
     )
     PROJECT_ROOT_FOR_PROMPTS = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Thread pool size for scanning/reading and process pool size for front matter
+    # parsing during bulk loads. 0 means serial loading in the calling thread/process.
+    LOAD_WORKERS = int(os.environ.get('PROMPT_MANAGER_LOAD_WORKERS', '0'))
+    PARSE_PROCESSES = int(os.environ.get('PROMPT_MANAGER_PARSE_PROCESSES', '0'))
+    # On-disk cache of parsed prompt files, stored next to CONFIG_FILE
+    PARSE_CACHE_ENABLED = os.environ.get('PROMPT_MANAGER_PARSE_CACHE', '1') != '0'
+    PARSE_CACHE_FILENAME = "prompt_parse_cache.json"
+    # Keep prompts in sync with external edits using a filesystem watcher (server only)
+    WATCH_FILES = os.environ.get('PROMPT_MANAGER_WATCH', '0') == '1'
+    # Metadata-only index: content is read on demand into an LRU bounded by bytes
+    LAZY_CONTENT = os.environ.get('PROMPT_MANAGER_LAZY_CONTENT', '0') == '1'
+    CONTENT_CACHE_BYTES = int(os.environ.get('PROMPT_MANAGER_CONTENT_CACHE_BYTES', str(64 * 1024 * 1024)))
+    # Expanded prompt content, invalidated through the inclusion graph
+    EXPANSION_CACHE_BYTES = int(os.environ.get('PROMPT_MANAGER_EXPANSION_CACHE_BYTES', str(64 * 1024 * 1024)))
+    # Budgets of a single expansion (0 disables one): inclusion nesting depth,
+    # inclusions resolved, and characters of output
+    EXPANSION_MAX_DEPTH = int(os.environ.get('PROMPT_MANAGER_EXPANSION_MAX_DEPTH', '64'))
+    EXPANSION_MAX_NODES = int(os.environ.get('PROMPT_MANAGER_EXPANSION_MAX_NODES', '100000'))
+    EXPANSION_MAX_CHARS = int(os.environ.get('PROMPT_MANAGER_EXPANSION_MAX_CHARS', str(64 * 1024 * 1024)))
+    # Expanded prompts persisted next to CONFIG_FILE, so they survive restarts
+    EXPANSION_STORE_ENABLED = os.environ.get('PROMPT_MANAGER_EXPANSION_STORE', '0') == '1'
+    EXPANSION_STORE_DIRNAME = "expanded_prompts"
+    # Pre-encoded listing responses, kept until a prompt or directory changes
+    LISTING_SNAPSHOT_BYTES = int(os.environ.get('PROMPT_MANAGER_LISTING_SNAPSHOT_BYTES', str(32 * 1024 * 1024)))
     
     def __init__(self, 
                 base_directories: Optional[List[str]] = None, 
                 auto_load: bool = True,
-                create_default_directory_if_empty: bool = True):
+                create_default_directory_if_empty: bool = True,
+                load_workers: Optional[int] = None,
+                parse_processes: Optional[int] = None,
+                lazy_content: Optional[bool] = None):
         """
         Initialize the prompt service.
         
@@ -39,12 +87,50 @@ class PromptService:
             auto_load: Whether to automatically load prompts from configured/default directories on initialization.
             create_default_directory_if_empty: If True and no directories are loaded from config,
                                                attempts to add default directories (e.g., project's ./prompts, ~/prompts).
+            load_workers: Thread pool size for bulk loading (defaults to LOAD_WORKERS).
+            parse_processes: Process pool size for front matter parsing (defaults to PARSE_PROCESSES).
+            lazy_content: Keep only prompt metadata in memory and load content on demand
+                          (defaults to LAZY_CONTENT).
         """
         self.directories: List[PromptDirectory] = []
-        self.prompts: Dict[str, Prompt] = {}
+        # Derived indexes kept up to date by self.prompts
+        self.display_names = DisplayNameIndex()
+        self.lazy_content = self.LAZY_CONTENT if lazy_content is None else lazy_content
+        self.content_cache = ContentCache(self.CONTENT_CACHE_BYTES)
+        self.expansion_cache = ExpansionCache(self.EXPANSION_CACHE_BYTES)
+        self.inclusion_graph = InclusionGraph()
+        self.pattern_index = PatternIndex()
+        self.search_index = SearchIndex(self.get_prompt_content)
+        self.suggestion_index = SuggestionIndex(self.display_names.get)
+        self.tag_index = TagIndex()
+        self.listing = PromptListing(self.display_names.get)
+        self.listing_snapshots = ListingSnapshots(self.LISTING_SNAPSHOT_BYTES)
+        self._index_listeners = [self.display_names, self.content_cache, self.expansion_cache, self.inclusion_graph,
+                                 self.pattern_index, self.search_index, self.suggestion_index, self.tag_index,
+                                 self.listing_snapshots]
+        self.prompts = PromptIndex()
         
         self.inclusion_pattern = re.compile(r'\[\[([^\]]+)\]\]')
         
+        self.parse_cache: Optional[ParseCache] = None
+        if self.PARSE_CACHE_ENABLED:
+            # Like the directory config, the cache file is not touched during test runs
+            self.parse_cache = ParseCache(
+                os.path.join(os.path.dirname(self.CONFIG_FILE), self.PARSE_CACHE_FILENAME),
+                persistent="PYTEST_CURRENT_TEST" not in os.environ,
+            )
+        self.expansion_store: Optional[ExpansionStore] = None
+        if self.EXPANSION_STORE_ENABLED and "PYTEST_CURRENT_TEST" not in os.environ:
+            self.expansion_store = ExpansionStore(
+                os.path.join(os.path.dirname(self.CONFIG_FILE), self.EXPANSION_STORE_DIRNAME))
+        self.loader = PromptLoader(
+            workers=self.LOAD_WORKERS if load_workers is None else load_workers,
+            parse_processes=self.PARSE_PROCESSES if parse_processes is None else parse_processes,
+            parse_cache=self.parse_cache,
+        )
+        # Per-phase timings of the most recent bulk load
+        self.last_load_stats: Dict[str, Any] = {}
+        
         logger.debug(f"PromptService __init__ (id: {id(self)}) started. auto_load={auto_load}, create_default_directory_if_empty={create_default_directory_if_empty}")
 
         # 1. Load directories from the config file
@@ -122,6 +208,19 @@ class PromptService:
             logger.info("__init__: auto_load is False. Skipping initial load_all_prompts().")
 
         logger.debug(f"PromptService __init__ finished. {len(self.directories)} dirs, {len(self.prompts)} prompts.")
+
+    @property
+    def prompts(self) -> PromptIndex:
+        """The in-memory prompt store, keyed by prompt ID."""
+        return self._prompts
+
+    @prompts.setter
+    def prompts(self, value: Mapping[str, Union[Prompt, PromptRecord]]) -> None:
+        # Always keep an indexed store, even when callers assign a plain dict
+        index = value if isinstance(value, PromptIndex) else PromptIndex(value)
+        for listener in self._index_listeners:
+            index.add_listener(listener)
+        self._prompts = index
             
     def _normalize_path(self, path_str: str) -> str:
         """Normalize a path string: resolve ., .., handle multiple leading slashes, and remove trailing slashes."""
@@ -265,7 +364,7 @@ class PromptService:
             
         try:
             # Get list of prompts to remove
-            prompts_to_remove = [p_id for p_id, p in self.prompts.items() if p.directory == path]
+            prompts_to_remove = self.prompts.ids_in_directory(path)
             logger.debug(f"Found {len(prompts_to_remove)} prompts to remove from {path}")
             
             # Remove all prompts from this directory
@@ -284,26 +383,113 @@ class PromptService:
             logger.opt(exception=True).error(f"Error removing directory {path}: {str(e)}")
             return False
         
+    def _enabled_directory_paths(self) -> List[str]:
+        """Return the paths of enabled directories that exist, in configured order."""
+        paths = []
+        for directory in self.directories:
+            if not directory.enabled:
+                logger.debug(f"Skipping disabled directory: '{directory.name}' (Path: {directory.path})")
+            elif not os.path.isdir(directory.path):
+                logger.error(f"Directory not found or not a directory: {directory.path}")
+            else:
+                logger.debug(f"Loading prompts from enabled directory: '{directory.name}' (Path: {directory.path})")
+                paths.append(directory.path)
+        return paths
+
     def load_all_prompts(self) -> int:
-        """Clears existing prompts and reloads all prompts from all configured directories."""
-        logger.info(f"LOAD_ALL_PROMPTS (id: {id(self)}): Called. Current cache size: {len(self.prompts)}. Clearing cache.")
-        self.prompts.clear()  # Clear existing prompts from memory
-        total_prompts_loaded = 0
-        
+        """Reload all prompts from all configured directories. Returns the number of prompts loaded."""
+        return self.reload_prompts()["total"]
+
+    def reload_prompts(self) -> Dict[str, Any]:
+        """
+        Reconcile the in-memory prompts with all configured directories.
+
+        Files are found with ``os.scandir`` and compared by (mtime, size, inode)
+        against the signatures recorded when they were last loaded. Only new or
+        changed files are read and parsed; unchanged prompts are carried over
+        as-is and vanished ones are dropped. The result is built in a separate
+        store and swapped in at the end, so readers never observe a partially
+        reloaded service.
+
+        Returns:
+            Counts of added, changed, removed and unchanged prompts, the total
+            and the elapsed time in milliseconds.
+        """
+        logger.info(f"RELOAD_PROMPTS (id: {id(self)}): Called. Current cache size: {len(self.prompts)}.")
+        start = time.perf_counter()
+        current = self.prompts
         if not self.directories:
             logger.warning("No directories configured in PromptService. Cannot load any prompts.")
-            return 0
 
-        for directory in self.directories:
-            if directory.enabled:
-                logger.debug(f"Loading prompts from enabled directory: '{directory.name}' (Path: {directory.path})")
-                count = self.load_prompts_from_directory(directory)
-                total_prompts_loaded += count
+        scanned = self.loader.scan_files(self._enabled_directory_paths())
+        scan_done = time.perf_counter()
+
+        to_load: List[str] = []
+        for path, stat in scanned:
+            prompt_id = Prompt.generate_id(path)
+            if stat is None or current.signature(prompt_id) != self._file_signature(stat):
+                to_load.append(path)
+        loaded_by_path = {f.path: f for f in self.loader.load_files(to_load)}
+        load_stats = dict(self.loader.last_stats)
+        load_done = time.perf_counter()
+
+        # Merge in directory/path order so the result matches a from-scratch load
+        new_index = PromptIndex()
+        added = changed = unchanged = 0
+        for path, stat in scanned:
+            prompt_id = Prompt.generate_id(path)
+            loaded = loaded_by_path.get(path)
+            if loaded is None:
+                new_index[prompt_id] = current[prompt_id]
+                signature = current.signature(prompt_id)
+                if signature is not None:
+                    new_index.set_signature(prompt_id, signature)
+                unchanged += 1
+                continue
+            prompt = self._prompt_from_loaded(loaded)
+            if prompt is None:
+                continue
+            new_index[prompt.id] = self._resident(prompt)
+            new_index.set_signature(prompt.id, self._file_signature(loaded.stat))
+            if prompt_id in current:
+                changed += 1
             else:
-                logger.debug(f"Skipping disabled directory: '{directory.name}' (Path: {directory.path})")
-        
-        logger.info(f"Finished loading all prompts. Total loaded: {total_prompts_loaded}")
-        return total_prompts_loaded
+                added += 1
+        removed = sum(1 for prompt_id in current if prompt_id not in new_index)
+        self.prompts = new_index
+        end = time.perf_counter()
+
+        stats = {
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "unchanged": unchanged,
+            "total": len(new_index),
+            "elapsed_ms": round((end - start) * 1000, 2),
+        }
+        self.last_load_stats = dict(load_stats)
+        self.last_load_stats.update(stats)
+        self.last_load_stats["scan_ms"] = round((scan_done - start) * 1000, 2)
+        self.last_load_stats["merge_ms"] = round((end - load_done) * 1000, 2)
+        self.last_load_stats["total_ms"] = stats["elapsed_ms"]
+        self.last_load_stats["loaded"] = len(new_index)
+
+        if self.parse_cache is not None:
+            self.parse_cache.prune(path for path, _ in scanned)
+            self.parse_cache.save()
+            self.last_load_stats["parse_cache"] = self.parse_cache.stats()
+        if self.expansion_store is not None:
+            self.expansion_store.prune(new_index)
+        if not self.lazy_content:
+            # Index the new and changed prompts while their content is at hand
+            self.search_index.flush()
+
+        logger.info(f"Finished reloading prompts: {stats}. Timings: {self.last_load_stats}")
+        return stats
+
+    @staticmethod
+    def _file_signature(stat: os.stat_result) -> Tuple[int, int, int]:
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
         
     def load_prompts_from_directory(self, directory_obj: PromptDirectory) -> int:
         """
@@ -315,9 +501,6 @@ class PromptService:
         Returns:
             Number of prompts loaded
         """
-        count = 0
-        logger.debug(f"LOAD_FROM_DIR: Scanning directory '{directory_obj.path}'. Files found by os.listdir: {os.listdir(directory_obj.path)}")
-        
         directory_path = directory_obj.path # Use the .path attribute
 
         if not os.path.isdir(directory_path):
@@ -326,33 +509,60 @@ class PromptService:
         
         logger.debug(f"Scanning directory for .md files: {directory_path}")
         
-        # Track files found for better debugging
-        md_files_found = []
-        
-        # Walk through all markdown files
-        for root, _, files in os.walk(directory_path):
-            md_files = [f for f in files if f.endswith('.md')]
-            logger.debug(f"Found {len(md_files)} .md files in {root}")
-            md_files_found.extend([os.path.join(root, f) for f in md_files])
-            
-            for filename in md_files:
-                file_path = os.path.join(root, filename)
-                try:
-                    prompt = self.load_prompt(file_path)
-                    if prompt:
-                        # Store the prompt using its new unique ID
-                        self.prompts[prompt.id] = prompt
-                        count += 1
-                        logger.debug(f"Loaded prompt: {prompt.name} (ID: {prompt.id}) from {file_path}")
-                    else:
-                        logger.warning(f"Failed to load prompt from {file_path} (returned None)")
-                except Exception as e:
-                    logger.opt(exception=True).error(f"Error loading prompt {file_path}: {str(e)}")
+        loaded_files = self.loader.load_directories([directory_path])
+        count = self._add_loaded_files(loaded_files)
+        if self.parse_cache is not None:
+            self.parse_cache.save()
         
-        if count == 0 and md_files_found:
-            logger.warning(f"Found {len(md_files_found)} .md files but loaded 0 prompts. Files: {md_files_found}")
+        if count == 0 and loaded_files:
+            logger.warning(f"Found {len(loaded_files)} .md files but loaded 0 prompts. Files: {[f.path for f in loaded_files]}")
                     
         return count
+
+    def _add_loaded_files(self, loaded_files: List[LoadedPromptFile]) -> int:
+        """Build prompts from loaded files and merge them, in order, into self.prompts."""
+        count = 0
+        for loaded in loaded_files:
+            prompt = self._prompt_from_loaded(loaded)
+            if prompt is None:
+                continue
+            # Store the prompt using its new unique ID
+            self.prompts[prompt.id] = self._resident(prompt)
+            self.prompts.set_signature(prompt.id, self._file_signature(loaded.stat))
+            count += 1
+        return count
+
+    def _prompt_from_loaded(self, loaded: LoadedPromptFile) -> Optional[Prompt]:
+        """Build a Prompt from a loaded file, or return None if it could not be loaded."""
+        if loaded.error is not None:
+            return None  # Already logged by the loader
+        try:
+            return self._build_prompt(loaded.path, loaded.stat, loaded.description, loaded.tags, loaded.content)
+        except Exception as e:
+            logger.opt(exception=True).error(f"Error loading prompt {loaded.path}: {str(e)}")
+            return None
+
+    def _build_prompt(self, file_path: str, stat: os.stat_result, description: Optional[str],
+                      tags: List[str], content: str) -> Prompt:
+        """Create a Prompt from a file path, its stat result and its parsed content."""
+        path = Path(file_path)
+        filename = path.name
+        
+        # NEW ID SCHEMA: Generate proper ID and name
+        prompt_id = Prompt.generate_id(file_path)  # Full unique ID from file path
+        
+        return Prompt(
+            id=prompt_id,
+            name=path.stem,  # Display name (filename without extension)
+            filename=filename,
+            directory=str(path.parent),
+            content=content,
+            description=description,
+            tags=tags,
+            created_at=datetime.fromtimestamp(stat.st_ctime, tz=timezone.utc),
+            updated_at=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            unique_id=prompt_id,  # Set unique_id for backward compatibility
+        )
         
     def load_prompt(self, file_path: str) -> Optional[Prompt]:
         """
@@ -364,117 +574,88 @@ class PromptService:
         Returns:
             The loaded prompt, or None if there was an error
         """
-        logger.debug(f"Loading prompt from file: {file_path}")
+        logger.debug("Loading prompt from file: {}", file_path)
         
         if not os.path.isfile(file_path):
             logger.error(f"File not found or not a file: {file_path}")
             return None
             
         try:
-            # Get file stats
-            stat = os.stat(file_path)
-            created_at = datetime.fromtimestamp(stat.st_ctime, tz=timezone.utc)
-            updated_at = datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
-            
-            # Get relative path components
-            path = Path(file_path)
-            filename = path.name
-            directory = str(path.parent)
-            
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            loaded = self.loader.load_file(file_path)
+            if loaded.error is not None:
+                logger.error(f"Error loading prompt {file_path}: {loaded.error}")
+                return None
                 
-            # Log the content of the file for debugging (truncated for large files)
-            content_preview = content[:500] + "..." if len(content) > 500 else content
-            logger.debug(f"Read content from {file_path} ({len(content)} bytes): {content_preview}")
-                
-            # Extract front matter if present
-            description = None
-            tags = []
-            
-            if content.startswith('---'):
-                # Parse YAML front matter
-                end_idx = content.find('---', 3)
-                if end_idx > 0:
-                    front_matter = content[3:end_idx].strip()
-                    logger.debug(f"Found front matter in {file_path}: {front_matter}")
-                    
-                    try:
-                        # First try to use safe_load with special handling
-                        # to prevent yaml constructor errors
-                        # Replace any coordinator references with prompt_manager
-                        front_matter = front_matter.replace(
-                            '!!python/object/apply:coordinator.',
-                            '!python_object '
-                        )
-                        
-                        # Create a custom YAML loader
-                        class CustomLoader(yaml.SafeLoader):
-                            pass
-                            
-                        # Add a constructor for handling the old coordinator types
-                        def python_object_constructor(loader, node):
-                            # Just return the value as a string, we'll parse it later
-                            return str(node.value)
-                            
-                        # Register the constructor
-                        CustomLoader.add_constructor('!python_object', python_object_constructor)
-                        
-                        # Try to load with our custom loader
-                        try:
-                            meta = yaml.load(front_matter, Loader=CustomLoader)
-                        except Exception as yaml_err:
-                            # If that fails, try safe_load as fallback
-                            logger.warning(f"Custom YAML parsing failed: {str(yaml_err)}, trying safe_load")
-                            meta = yaml.safe_load(front_matter)
-                        if isinstance(meta, dict):
-                            description = meta.get('description')
-                            if 'tags' in meta and isinstance(meta['tags'], list):
-                                tags = meta['tags']
-
-                        
-                        # Remove front matter from content
-                        content = content[end_idx+3:].strip()
-                        logger.debug(f"Parsed front matter: description={description}, tags={tags}")
-                    except Exception as e:
-                        logger.opt(exception=True).warning(f"Error parsing front matter in {file_path}: {str(e)}")
-                        # Continue with empty metadata but still process the file
-                        meta = {}
-                        # We've removed the prompt type handling
-            
-            # NEW ID SCHEMA: Generate proper ID and name
-            prompt_name = Path(filename).stem  # Display name (filename without extension)
-            prompt_id = Prompt.generate_id(file_path)  # Full unique ID from file path
-            
-            # Create the prompt object with new schema
-            logger.debug(f"Creating prompt object with new schema: id={prompt_id}, name={prompt_name}, directory={directory}")
-            
-            prompt = Prompt(
-                id=prompt_id,
-                name=prompt_name,
-                filename=filename,
-                directory=directory,
-                content=content,
-                description=description,
-                tags=tags,
-                created_at=created_at,
-                updated_at=updated_at
+            content = loaded.content
+            # The preview is only built if a handler takes the record
+            logger.opt(lazy=True).debug(
+                "Loaded content from {} ({} bytes, cached parse: {}): {}",
+                lambda: file_path, lambda: len(content), lambda: loaded.from_cache,
+                lambda: content[:500] + "..." if len(content) > 500 else content,
             )
             
-            # Set unique_id for backward compatibility
-            prompt.unique_id = prompt_id
+            prompt = self._build_prompt(file_path, loaded.stat, loaded.description, loaded.tags, content)
             
-            logger.debug(f"Successfully loaded prompt: {prompt_name} (ID: {prompt_id}) from {file_path}")
+            logger.debug("Successfully loaded prompt: {} (ID: {}) from {}", prompt.name, prompt.id, file_path)
             return prompt
             
         except Exception as e:
             logger.opt(exception=True).error(f"Error loading prompt {file_path}: {str(e)}")
             return None
-            
+
+    def apply_file_changes(self, paths: List[str]) -> Dict[str, int]:
+        """
+        Bring the in-memory prompts in line with the current state of changed paths.
+
+        Used by the filesystem watcher. Each path (a prompt file or a directory)
+        is reconciled against what is on disk now, so it does not matter which
+        events led to it being reported: existing files are (re)loaded, vanished
+        files and directories are removed, and directories that appeared are
+        scanned. Paths outside the enabled prompt directories are ignored.
+
+        Args:
+            paths: File or directory paths reported as changed
+
+        Returns:
+            Counts of prompts upserted and removed
+        """
+        roots = [d.path for d in self.directories if d.enabled]
+        upserted = removed = 0
+        for path in dict.fromkeys(os.path.normpath(p) for p in paths):
+            if not any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in roots):
+                continue
+            if os.path.isdir(path):
+                loaded_files = self.loader.load_directories([path])
+                present = {Prompt.generate_id(f.path) for f in loaded_files if f.error is None}
+                for prompt_id in self.prompts.ids_under_directory(path):
+                    if prompt_id not in present:
+                        del self.prompts[prompt_id]
+                        removed += 1
+                upserted += self._add_loaded_files(loaded_files)
+            elif path.endswith('.md') and os.path.isfile(path):
+                # Records the file signature too, so the next reload skips this file
+                upserted += self._add_loaded_files([self.loader.load_file(path)])
+            else:
+                # Gone: either a single prompt file or a whole directory
+                prompt_id = Prompt.generate_id(path)
+                if path.endswith('.md') and prompt_id in self.prompts:
+                    del self.prompts[prompt_id]
+                    removed += 1
+                for prompt_id in self.prompts.ids_under_directory(path):
+                    del self.prompts[prompt_id]
+                    removed += 1
+        if self.parse_cache is not None:
+            self.parse_cache.save()
+        if upserted or removed:
+            logger.info(f"Applied filesystem changes: {upserted} prompts upserted, {removed} removed")
+        return {"upserted": upserted, "removed": removed}
+
     def save_prompt(self, prompt: Prompt) -> bool:
-        logger.debug(f"PromptService (id: {id(self)}): save_prompt CALLED for prompt.id='{prompt.id}', prompt.directory='{prompt.directory}', prompt.unique_id='{prompt.unique_id}'")
-        logger.debug(f"Prompt object details: {prompt!r}") # Log repr of prompt
+        logger.debug("PromptService (id: {}): save_prompt CALLED for prompt.id='{}', prompt.directory='{}', prompt.unique_id='{}'",
+                     id(self), prompt.id, prompt.directory, prompt.unique_id)
+        # The repr includes the whole content; only build it for sampled calls
+        if sampled("save_prompt.repr"):
+            logger.debug("Prompt object details: {!r}", prompt)
         try:
             # Ensure directory exists
             os.makedirs(prompt.directory, exist_ok=True)
@@ -506,7 +687,11 @@ class PromptService:
             prompt.updated_at = now
             
             # Update in-memory copy using the new ID
-            self.prompts[prompt.id] = prompt
+            resident = self._resident(prompt)
+            self.prompts[prompt.id] = resident
+            if not resident.content_loaded:
+                # Recently saved content is likely to be read again soon
+                self.content_cache.put(resident, prompt.content)
             
             logger.info(f"Saved prompt to {prompt.full_path} (ID: {prompt.id}, Name: {prompt.name})")
             return True
@@ -515,6 +700,44 @@ class PromptService:
             logger.error(f"Error saving prompt {prompt.id}: {e}")
             return False
             
+    def _resident(self, prompt: Prompt) -> PromptRecord:
+        """Return the record to keep in the index for ``prompt`` (metadata only in lazy content mode)."""
+        return PromptRecord.from_prompt(prompt, keep_content=not self.lazy_content)
+
+    def get_prompt_content(self, prompt: Any) -> str:
+        """
+        Return the content of a prompt, reading it from disk if the index only holds its metadata.
+
+        Content read on demand is kept in ``self.content_cache``. The record's
+        sections are dropped when the file changed since they were indexed.
+        """
+        if not isinstance(prompt, PromptRecord) or prompt.content_loaded:
+            return prompt.content
+        content = self.content_cache.get(prompt)
+        if content is None:
+            # Unchanged files hit the parse cache, so this is a read and a slice
+            loaded = self.loader.load_file(prompt.full_path)
+            if loaded.error is not None:
+                logger.error(f"Error loading content of prompt {prompt.id}: {loaded.error}")
+                return ""
+            content = loaded.content
+            signature = (loaded.stat.st_mtime_ns, loaded.stat.st_size)
+            if prompt.source_signature != signature:
+                # The file changed since the sections were indexed (or they came from saved content)
+                prompt.sections = None
+                prompt.source_signature = signature
+            self.content_cache.put(prompt, content)
+        return content
+
+    def _materialize(self, prompt: Any) -> Prompt:
+        """Return a pydantic Prompt, with content, for an index record.
+
+        The Prompt is detached from the index: changes to it take effect through save_prompt.
+        """
+        if not isinstance(prompt, PromptRecord):
+            return prompt
+        return prompt.to_prompt(None if prompt.content_loaded else self.get_prompt_content(prompt))
+
     def get_prompt(self, identifier: str, directory: Optional[str] = None) -> Optional[Prompt]:
         """Get prompt by ID (full path) or name (with optional directory context).
         
@@ -525,54 +748,76 @@ class PromptService:
         Returns:
             The matching prompt, or None if not found
         """
-        logger.debug(f"get_prompt CALLED for identifier: '{identifier}', directory: '{directory}'")
-        logger.debug(f"Current prompt cache keys: {list(self.prompts.keys())}")
+        if sampled("get_prompt"):
+            logger.debug("get_prompt CALLED for identifier: '{}', directory: '{}' ({} prompts cached)",
+                         identifier, directory, len(self.prompts))
         
+        prompt_id = self._lookup_id(identifier, directory)
+        if prompt_id is None:
+            logger.debug("Prompt '{}' not found", identifier)
+            return None
+        return self._materialize(self.prompts[prompt_id])
+
+    def _lookup_id(self, identifier: str, directory: Optional[str] = None, warn: bool = True) -> Optional[str]:
+        """
+        Resolve an identifier to a stored prompt ID with the rules of ``get_prompt``.
+
+        Tries the full ID, then (for simple names) the name index, then the
+        legacy unique_id. ``warn`` controls the warning about names that match
+        several prompts.
+        """
         # First try direct lookup by full ID
-        if identifier in self.prompts:
-            prompt = self.prompts[identifier]
-            logger.debug(f"Found prompt directly by full ID '{identifier}'")
-            
+        prompt = self.prompts.get(identifier)
+        if prompt is not None:
             # If directory specified, verify it matches
             if directory and prompt.directory != directory:
-                logger.debug(f"Directory mismatch: prompt directory '{prompt.directory}' != requested '{directory}'")
+                logger.debug("Directory mismatch: prompt directory '{}' != requested '{}'", prompt.directory, directory)
                 # Continue to search by name
             else:
-                return prompt
+                return identifier
         
         # If not found as full ID, try to find by name
         if '/' not in identifier:
-            # This is a simple name, search all prompts
-            matching_prompts = []
-            for prompt in self.prompts.values():
-                if hasattr(prompt, 'name') and prompt.name == identifier:
-                    # If directory specified, only match prompts in that directory
-                    if directory and prompt.directory != directory:
-                        continue
-                    matching_prompts.append(prompt)
-                elif not hasattr(prompt, 'name') and prompt.id == identifier:
-                    # Backward compatibility: handle old prompts without 'name' field
-                    if directory and prompt.directory != directory:
-                        continue
-                    matching_prompts.append(prompt)
+            # This is a simple name, use the name index
+            matching_prompts = self.prompts.prompts_for_name(identifier, directory)
             
             if len(matching_prompts) == 1:
-                logger.debug(f"Found 1 matching prompt by name '{identifier}'")
-                return matching_prompts[0]
+                logger.debug("Found 1 matching prompt by name '{}'", identifier)
+                return matching_prompts[0].id
             elif len(matching_prompts) > 1:
-                directories_found = [p.directory for p in matching_prompts]
-                logger.warning(f"Multiple prompts with name '{identifier}' found in directories: {directories_found}")
-                return matching_prompts[0]  # Return first match
+                if warn:
+                    directories_found = [p.directory for p in matching_prompts]
+                    logger.warning(f"Multiple prompts with name '{identifier}' found in directories: {directories_found}")
+                return matching_prompts[0].id  # Return first match
         
         # Check for legacy unique_id format (backward compatibility)
-        for prompt in self.prompts.values():
-            if hasattr(prompt, 'unique_id') and prompt.unique_id == identifier:
-                logger.debug(f"Found prompt by legacy unique_id '{identifier}'")
-                return prompt
-        
-        logger.debug(f"Prompt '{identifier}' not found")
-        return None
-        
+        legacy_id = self.prompts.id_for_unique_id(identifier)
+        if legacy_id is not None:
+            logger.debug("Found prompt by legacy unique_id '{}'", identifier)
+        return legacy_id
+
+    def _resolve_inclusion(self, reference: str, parent_directory: Optional[str],
+                           warn: bool = True) -> Tuple[Optional[str], bool]:
+        """
+        Resolve an inclusion reference the way expansion does.
+
+        Full-path references are looked up directly. Simple names are looked up
+        in the including prompt's directory first, then globally.
+
+        Returns:
+            (prompt ID or None, whether the global fallback was used)
+        """
+        if '/' in reference:
+            # Full path inclusion: [[general/restart]]
+            return self._lookup_id(reference, warn=warn), False
+        # Simple name inclusion: [[restart]]
+        # Use parent directory as context for resolution
+        prompt_id = self._lookup_id(reference, parent_directory, warn)
+        if prompt_id is not None:
+            return prompt_id, False
+        # If not found in parent directory, try global search
+        return self._lookup_id(reference, warn=warn), True
+
     def get_prompts_by_tag(self, tag: str, directory: Optional[str] = None) -> List[Prompt]:
         """
         Get all prompts with a specific tag.
@@ -584,11 +829,8 @@ class PromptService:
         Returns:
             List of matching prompts
         """
-        if directory:
-            return [p for p in self.prompts.values() 
-                   if tag in p.tags and p.directory == directory]
-        else:
-            return [p for p in self.prompts.values() if tag in p.tags]
+        query = TagQuery(all_tags=[tag], directories=[directory] if directory else ())
+        return [self._materialize(self.prompts[prompt_id]) for prompt_id in self.tag_index.query(query)]
         
     def get_composite_prompts(self, directory: Optional[str] = None) -> List[Prompt]:
         """
@@ -600,87 +842,171 @@ class PromptService:
         Returns:
             List of matching prompts
         """
-        if directory:
-            return [p for p in self.prompts.values() 
-                   if p.is_composite and p.directory == directory]
-        else:
-            return [p for p in self.prompts.values() if p.is_composite]
+        query = TagQuery(directories=[directory] if directory else (), is_composite=True)
+        return [self._materialize(self.prompts[prompt_id]) for prompt_id in self.tag_index.query(query)]
+
+    def query_prompts(self, query: TagQuery, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return the prompts matching a tag query, as summaries for API responses.
+
+        Args:
+            query: Tags (AND/OR/NOT), directories and composite flag to match
+            limit: Maximum number of prompts (all if None)
+
+        Returns:
+            List of dicts with id, name, directory, description, tags,
+            is_composite and display_name
+        """
+        prompt_ids = self.tag_index.query(query)
+        if limit is not None:
+            prompt_ids = prompt_ids[:limit]
+        results = []
+        for prompt_id in prompt_ids:
+            prompt = self.prompts[prompt_id]
+            results.append({
+                "id": prompt_id,
+                "name": prompt.name,
+                "directory": prompt.directory,
+                "description": prompt.description,
+                "tags": prompt.tags,
+                "is_composite": prompt.is_composite,
+                "display_name": self.display_names.get(prompt_id) or prompt.name,
+            })
+        return results
+
+    def tag_facets(self, query: Optional[TagQuery] = None) -> Dict[str, Any]:
+        """
+        Count prompts per tag and per directory.
+
+        Args:
+            query: Only count the prompts matching this query (all prompts if None)
+
+        Returns:
+            Dictionary with 'total', 'composite', 'tags' and 'directories'
+        """
+        if query is None or query.is_empty():
+            return self.tag_index.facets()
+        return self.tag_index.facets(self.tag_index.query(query))
         
     def get_references_to_prompt(self, target_prompt_id: str) -> List[Dict]:
         """
         Find prompts that include a specific prompt ID in their content,
         either directly or transitively, and return them as dictionaries.
 
+        References are resolved with the same directory-context rules as
+        expansion, so only prompts whose inclusions actually resolve to the
+        target are returned.
+
         Args:
             target_prompt_id: The ID of the prompt to search for as an inclusion.
 
         Returns:
-            A list of dictionaries, each representing a prompt that includes the target_prompt_id.
+            A list of dictionaries, each representing a prompt that includes the target_prompt_id
+            (``direct`` tells whether it includes it directly).
             Returns None if the target_prompt_id itself is not found (as a check).
         """
+        normalized_target_id = target_prompt_id
+        if normalized_target_id.endswith('.md'):
+            normalized_target_id = normalized_target_id[:-3]
+
         # Check if the target prompt itself exists. If not, it cannot be referenced.
-        target_prompt = self.get_prompt(target_prompt_id)
-        if not target_prompt:
+        target_id = self._lookup_id(normalized_target_id)
+        if target_id is None:
             logger.warning(f"Target prompt '{target_prompt_id}' not found. Cannot find references to a non-existent prompt.")
             return None # Indicate target prompt not found
 
-        logger.debug(f"Searching for prompts including '[[{target_prompt_id}]]' (transitively)")
         including_prompts_data = []
-        
-        normalized_target_id = target_prompt_id
-        if normalized_target_id.endswith('.md'):
-            normalized_target_id = normalized_target_id[:-3]
-            
-        # Extract the simple name from the target prompt for matching
-        target_simple_name = target_prompt.name if hasattr(target_prompt, 'name') else target_prompt_id.split('/')[-1]
-            
-        for prompt in self.prompts.values():
-            if prompt.id == normalized_target_id:
-                continue
-
-            if prompt.is_composite and prompt.content:
-                _expanded_content, transitive_dependencies, _expansion_warnings = self.expand_inclusions(
-                    prompt.content,
-                    parent_directory=prompt.directory,
-                    parent_id=prompt.id
-                )
-                
-                # Check if the target is included either by full ID or simple name
-                target_found = (normalized_target_id in transitive_dependencies or 
-                               target_simple_name in transitive_dependencies)
-                
-                if target_found:
-                    # Convert prompt object to dict for the API response
-                    # You might want a specific Pydantic model for this response item later
-                    including_prompts_data.append({
-                        "id": prompt.id,
-                        "description": prompt.description,
-                        "directory": prompt.directory,
-                        # Add other relevant fields as needed by the frontend
-                    })
+        for prompt_id, direct in self._referrers(target_id).items():
+            prompt = self.prompts[prompt_id]
+            including_prompts_data.append({
+                "id": prompt.id,
+                "description": prompt.description,
+                "directory": prompt.directory,
+                "direct": direct,
+            })
                         
-        logger.debug(f"Found {len(including_prompts_data)} prompts transitively including '{normalized_target_id}'")
+        logger.debug("Found {} prompts transitively including '{}'", len(including_prompts_data), target_id)
         return including_prompts_data
 
-    def find_prompts(self, search: str) -> List[Prompt]:
+    def _referrers(self, target_id: str) -> Dict[str, bool]:
+        """
+        Find the prompts whose expansion includes a prompt, using the inclusion graph.
+
+        Walks the graph backwards from ``target_id`` breadth-first, so the cost
+        is proportional to the number of referrers, not to the corpus size.
+
+        Returns:
+            Referring prompt ID -> whether it includes the target directly,
+            nearest referrers first
         """
-        Find prompts matching a search term.
+        found: Dict[str, bool] = {}
+        seen = {target_id}
+        frontier = [target_id]
+        while frontier:
+            next_frontier = []
+            for prompt_id in frontier:
+                for referrer_id in self._direct_referrers(prompt_id):
+                    if referrer_id not in seen:
+                        seen.add(referrer_id)
+                        found[referrer_id] = prompt_id == target_id
+                        next_frontier.append(referrer_id)
+            frontier = next_frontier
+        return found
+
+    def _direct_referrers(self, prompt_id: str) -> List[str]:
+        """Return the IDs of prompts with an inclusion that resolves to ``prompt_id``."""
+        prompt = self.prompts[prompt_id]
+        referrers: Dict[str, None] = {}
+        # A reference can only resolve to a prompt through its ID, unique_id or name
+        for reference in dict.fromkeys(key for key in (prompt_id, prompt.unique_id, prompt.name) if key):
+            for referrer_id in self.inclusion_graph.referrers(reference):
+                referrer = self.prompts.get(referrer_id)
+                if referrer is None or referrer_id in referrers:
+                    continue
+                if self._resolve_inclusion(reference, referrer.directory, warn=False)[0] == prompt_id:
+                    referrers[referrer_id] = None
+        # Pattern inclusions that match it
+        for reference, pattern in self.inclusion_graph.pattern_references():
+            if not pattern_matches(pattern, prompt_id, prompt.name):
+                continue
+            for referrer_id in self.inclusion_graph.referrers(reference):
+                if referrer_id in self.prompts and referrer_id != prompt_id:
+                    referrers[referrer_id] = None
+        return list(referrers)
+
+    def find_prompts(self, search: str, limit: Optional[int] = None) -> List[Prompt]:
+        """
+        Find prompts matching a search query, best matches first.
         
         Args:
-            search: Search term to match against ID, content, or description
+            search: Query matched against names, descriptions and content
+                    (words, "phrases" and prefix* terms; see ``search_index``)
+            limit: Maximum number of prompts to return (all if None)
             
         Returns:
             List of matching prompts
         """
-        search = search.lower()
+        return [self._materialize(self.prompts[prompt_id]) for prompt_id, _ in self.search_index.search(search, limit)]
+
+    def search_prompts(self, query: str, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """
+        Rank prompts against a full-text query without loading their content.
+
+        Returns:
+            One dictionary per match, best first, with the prompt's ID, name,
+            directory, description, display name and score
+        """
         results = []
-        
-        for prompt in self.prompts.values():
-            if (search in prompt.id.lower() or
-                (prompt.description and search in prompt.description.lower()) or
-                search in prompt.content.lower()):
-                results.append(prompt)
-                
+        for prompt_id, score in self.search_index.search(query, limit):
+            prompt = self.prompts[prompt_id]
+            results.append({
+                "id": prompt_id,
+                "name": prompt.name,
+                "directory": prompt.directory,
+                "description": prompt.description,
+                "display_name": self.display_names.get(prompt_id) or prompt.name,
+                "score": round(score, 4),
+            })
         return results
         
     def create_prompt(self, 
@@ -877,6 +1203,9 @@ class PromptService:
         """
         Expand inclusion markers in content with directory context.
         
+        When ``content`` is the stored content of prompt ``parent_id`` the
+        result is served from, and kept in, ``self.expansion_cache``.
+        
         Args:
             content: Content with inclusion markers
             parent_directory: Directory of the parent prompt for context resolution
@@ -890,83 +1219,317 @@ class PromptService:
             inclusions = set()
             if parent_id:
                 inclusions.add(parent_id)
-        
-        all_mentioned_ids = set() # Stores all IDs encountered in [[...]]
-        warnings = []
+                return self._expand_stored(content, parent_directory, inclusions, parent_id)
+        return self._expand_inclusions(content, parent_directory, inclusions, parent_id)
 
-        def replace_inclusion(match):
-            inclusion_text = match.group(1)
-            
-            # Clean up the inclusion text
-            normalized_inclusion = inclusion_text
-            if normalized_inclusion.endswith('.md'):
-                normalized_inclusion = normalized_inclusion[:-3]
+    def _expand_stored(self, content: str, parent_directory: Optional[str],
+                       inclusions: Set[str], parent_id: str,
+                       memo: Optional[Dict[str, SubExpansion]] = None) -> Tuple[str, Set[str], List[str]]:
+        """Expand the top level of a prompt through the expansion cache, if ``content`` is its stored content."""
+        record = self.prompts.get(parent_id)
+        if record is None or content != self.get_prompt_content(record):
+            # Unsaved editor content, or not a stored prompt
+            return self._expand_inclusions(content, parent_directory, inclusions, parent_id, memo=memo)
+        key = (parent_id, parent_directory, parent_id in inclusions)
+        cached = self._cached_expansion(key, record)
+        if cached is not None:
+            return cached
+        expanded, dependencies, warnings = self._expand_inclusions(content, parent_directory, inclusions, parent_id,
+                                                                   record.segments, memo)
+        self.expansion_cache.put(key, record, expanded, dependencies, warnings)
+        if self.expansion_store is not None:
+            closure = self._closure_digest(record, parent_directory)
+            if closure is not None:
+                self.expansion_store.put(key, closure, expanded, dependencies, warnings)
+        return expanded, dependencies, warnings
+
+    def _cached_expansion(self, key: Tuple[str, Optional[str], bool],
+                          record: PromptRecord) -> Optional[Tuple[str, Set[str], List[str]]]:
+        """Return the expansion for ``key`` from the expansion cache or, if valid, the expansion store."""
+        cached = self.expansion_cache.get(key, record)
+        if cached is not None or self.expansion_store is None:
+            return cached
+        closure = self._closure_digest(record, key[1])
+        if closure is None:
+            return None
+        stored = self.expansion_store.get(key, closure)
+        if stored is not None:
+            self.expansion_cache.put(key, record, *stored)
+        return stored
 
+    def _closure_digest(self, record: PromptRecord, parent_directory: Optional[str]) -> Optional[str]:
+        """
+        Return a digest of everything the expansion of ``record`` can read, or None if unversioned.
+
+        The prompts reachable through its references are resolved the way
+        expansion resolves them, from the index alone, and each contributes
+        its ID and file signature; each reference contributes what it
+        resolved to, and, when it fell back to a global search, every prompt
+        with that name (they decide the ambiguity warning). Prompts without a file signature (not loaded from or
+        saved to disk) have no version, and the expansion is not persisted.
+        """
+        digest = hashlib.sha256(repr((self.EXPANSION_MAX_DEPTH, self.EXPANSION_MAX_NODES,
+                                      self.EXPANSION_MAX_CHARS)).encode('utf-8'))
+        seen: Set[Tuple[str, Optional[str]]] = set()
+        stack = [(record, parent_directory)]
+        while stack:
+            prompt, directory = stack.pop()
+            if (prompt.id, directory) in seen:
+                continue
+            seen.add((prompt.id, directory))
+            signature = self.prompts.signature(prompt.id)
+            if signature is None:
+                try:
+                    signature = self._file_signature(os.stat(prompt.full_path))
+                except OSError:
+                    return None
+            digest.update(f"\0{prompt.id}\0{directory}\0{signature}".encode('utf-8'))
+            for reference in prompt.references:
+                targets: Tuple[str, ...] = ()
+                pattern = inclusion_pattern(reference)
+                if pattern is not None:
+                    try:
+                        targets = self.pattern_index.match(pattern)
+                    except re.error:
+                        pass
+                else:
+                    target_name = reference
+                    target_id, searched_globally = self._resolve_inclusion(reference, directory, warn=False)
+                    if target_id is None and '#' in reference:
+                        name = split_section_reference(reference)[0]
+                        section_target, section_global = self._resolve_inclusion(name, directory, warn=False)
+                        if section_target is not None:
+                            target_name, target_id, searched_globally = name, section_target, section_global
+                    if target_id is not None:
+                        targets = (target_id,)
+                    if searched_globally:
+                        # Expansion warns when the name is ambiguous, listing every candidate
+                        candidates = ','.join(p.id for p in self.prompts.prompts_for_name(target_name))
+                        digest.update(f"\0?{candidates}".encode('utf-8'))
+                digest.update(f"\0{reference}>{','.join(targets)}".encode('utf-8'))
+                for target in targets:
+                    target_prompt = self.prompts[target]
+                    stack.append((target_prompt, target_prompt.directory))
+        return digest.hexdigest()
+
+    def _expansion_walk(self, memoize: bool = True,
+                        memo: Optional[Dict[str, SubExpansion]] = None) -> ExpansionWalk:
+        """Return the state for one expansion call, with the configured budgets and an optional shared memo."""
+        budget = ExpansionBudget(self.EXPANSION_MAX_DEPTH, self.EXPANSION_MAX_NODES, self.EXPANSION_MAX_CHARS)
+        return ExpansionWalk(budget, memoize=memoize, memo=memo)
+
+    def _expand_inclusions(self, content: str, parent_directory: Optional[str],
+                           inclusions: Set[str], parent_id: Optional[str],
+                           segments: Optional[InclusionSpans] = None,
+                           memo: Optional[Dict[str, SubExpansion]] = None) -> Tuple[str, Set[str], List[str]]:
+        """
+        Expand content given its compiled inclusion markers.
+
+        ``segments`` are the markers of ``content`` (compiled here when not
+        given); the result is the literal text between markers joined with
+        the expansion of each marker. ``memo`` lets several calls share their
+        sub-expansions.
+        """
+        if segments is None:
+            segments = compile_inclusions(content)
+        if not segments:
+            return content, set(), []
+        walk = self._expansion_walk(memo=memo)
+        expanded = "".join(self._iter_expansion(content, parent_directory, inclusions, parent_id, segments, walk))
+        if walk.memo_hits:
+            logger.debug("Expansion of {} reused {} memoized sub-expansions", parent_id, walk.memo_hits)
+        return expanded, walk.dependencies, walk.warnings
+
+    def _iter_expansion(self, content: str, parent_directory: Optional[str],
+                        inclusions: Set[str], parent_id: Optional[str],
+                        segments: Optional[InclusionSpans],
+                        walk: ExpansionWalk, depth: int = 0) -> Iterator[str]:
+        """
+        Yield the expansion of ``content`` piece by piece, in document order.
+
+        Literal text is yielded as slices of the stored content and included
+        prompts are walked depth-first. ``inclusions`` is the chain of
+        references being expanded; it is extended and restored in place.
+        Dependencies, warnings and budget usage are recorded on ``walk``.
+        Without a memo nothing larger than a single prompt is built; with
+        one, each included composite prompt is joined so it can be reused.
+        """
+        if segments is None:
+            segments = compile_inclusions(content)
+        position = 0
+        for start, end, normalized_inclusion in segments:
+            if start > position:
+                yield walk.take(content[position:start])
+                if walk.stopped:
+                    return
+            position = end
+            
             # Only add non-empty IDs to dependencies
             if normalized_inclusion:
-                all_mentioned_ids.add(normalized_inclusion)
+                walk.dependencies.add(normalized_inclusion)
             else:
                 logger.warning(f"Empty inclusion marker '[[]]' found while expanding. Parent: {parent_id or 'Unknown'}")
-                return f"[[EMPTY INCLUSION]]"
+                yield walk.take("[[EMPTY INCLUSION]]")
+                if walk.stopped:
+                    return
+                continue
 
             if normalized_inclusion in inclusions:
                 warning = f"Circular dependency detected: '{normalized_inclusion}' has already been included in this expansion chain"
                 logger.warning(warning)
-                warnings.append(warning)
-                return f"[[CIRCULAR DEPENDENCY: {normalized_inclusion}]]"
-            
-            # Handle both full path and simple name inclusions
-            target_prompt = None
-            if '/' in normalized_inclusion:
-                # Full path inclusion: [[general/restart]]
-                target_prompt = self.get_prompt(normalized_inclusion)
-            else:
-                # Simple name inclusion: [[restart]]
-                # Use parent directory as context for resolution
-                target_prompt = self.get_prompt(normalized_inclusion, directory=parent_directory)
+                walk.warnings.append(warning)
+                yield walk.take(f"[[CIRCULAR DEPENDENCY: {normalized_inclusion}]]")
+                if walk.stopped:
+                    return
+                continue
+
+            pattern = inclusion_pattern(normalized_inclusion)
+            if pattern is not None:
+                yield from self._iter_pattern_inclusion(normalized_inclusion, pattern, inclusions, parent_id, walk,
+                                                        depth + 1)
+                if walk.stopped:
+                    return
+                continue
+            
+            target_name, heading = normalized_inclusion, None
+            target_id, searched_globally = self._resolve_inclusion(normalized_inclusion, parent_directory)
+            if target_id is None and '#' in normalized_inclusion:
+                # [[name#heading]]: a section of another prompt. Depend on the name even
+                # while it does not resolve, so creating that prompt invalidates this expansion
+                name, section_heading = split_section_reference(normalized_inclusion)
+                walk.dependencies.add(name)
+                section_target, section_global = self._resolve_inclusion(name, parent_directory)
+                if section_target is not None:
+                    target_name, heading = name, section_heading
+                    target_id, searched_globally = section_target, section_global
+            if searched_globally:
+                # If multiple matches exist, warn about ambiguity
+                matching_prompts = self.prompts.prompts_for_name(target_name)
                 
-                # If not found in parent directory, try global search
-                if not target_prompt:
-                    target_prompt = self.get_prompt(normalized_inclusion)
-                    
-                    # If multiple matches exist, warn about ambiguity
-                    matching_prompts = []
-                    for prompt in self.prompts.values():
-                        prompt_name = getattr(prompt, 'name', prompt.id)
-                        if prompt_name == normalized_inclusion:
-                            matching_prompts.append(prompt)
-                    
-                    if len(matching_prompts) > 1:
-                        directories = [p.directory for p in matching_prompts]
-                        warning = f"Ambiguous inclusion '{normalized_inclusion}' found in multiple directories: {directories}. Using first match."
-                        logger.warning(warning)
-                        warnings.append(warning)
+                if len(matching_prompts) > 1:
+                    directories = [p.directory for p in matching_prompts]
+                    warning = f"Ambiguous inclusion '{target_name}' found in multiple directories: {directories}. Using first match."
+                    logger.warning(warning)
+                    walk.warnings.append(warning)
                 
-            if not target_prompt:
+            if target_id is None:
                 warning = f"Prompt '{normalized_inclusion}' not found"
                 logger.warning(warning)
-                warnings.append(warning)
-                return f"[[PROMPT NOT FOUND: {normalized_inclusion}]]"
-                
-            new_inclusions_for_recursion = inclusions.copy()
-            new_inclusions_for_recursion.add(normalized_inclusion)
-            
+                walk.warnings.append(warning)
+                yield walk.take(f"[[PROMPT NOT FOUND: {normalized_inclusion}]]")
+                if walk.stopped:
+                    return
+                continue
+
+            target_prompt = self.prompts[target_id]
+            section = None
+            if heading is not None:
+                section = find_section(self._prompt_sections(target_prompt), heading)
+                if section is None:
+                    warning = f"Heading '{heading}' not found in prompt '{target_name}'"
+                    logger.warning(warning)
+                    walk.warnings.append(warning)
+                    yield walk.take(f"[[SECTION NOT FOUND: {normalized_inclusion}]]")
+                    if walk.stopped:
+                        return
+                    continue
+
+            inclusions.add(normalized_inclusion)
+            yield from self._iter_included(target_prompt, normalized_inclusion, inclusions, walk, depth + 1, section)
+            inclusions.discard(normalized_inclusion)
+            if walk.stopped:
+                return
+            
+        if position < len(content):
+            yield walk.take(content[position:])
+
+    def _iter_included(self, target_prompt: PromptRecord, reference: str, inclusions: Set[str],
+                       walk: ExpansionWalk, depth: int, section: Optional[Section] = None) -> Iterator[str]:
+        """
+        Yield the expansion of an included prompt, through the walk's budgets and memo.
+
+        With ``section``, only that Markdown section of the prompt is expanded.
+        """
+        target_id = target_prompt.id
+        composite = bool(target_prompt.references)
+        memo_key = target_id if section is None else f"{target_id}#{section.start}"
+        reused = walk.reuse(memo_key, inclusions, depth) if composite else None
+        if reused is not None:
+            yield reused
+            return
+        nodes_before = walk.budget.nodes
+        limit_marker = walk.enter(reference, depth)
+        if limit_marker is not None:
+            yield limit_marker
+            return
+        content = self.get_prompt_content(target_prompt)
+        segments = target_prompt.segments
+        if section is not None:
+            # A section is a slice of the content, with the markers inside it
+            segments = (segments or compile_inclusions(content)).window(section.start, section.end)
+            content = content[section.start:section.end]
+        if walk.memo is None or not composite:
             # Pass the target prompt's directory as context for nested inclusions
-            expanded_sub_content, sub_dependencies, sub_warnings = self.expand_inclusions(
-                target_prompt.content, 
-                parent_directory=target_prompt.directory,
-                inclusions=new_inclusions_for_recursion, 
-                parent_id=target_prompt.id
+            yield from self._iter_expansion(
+                content, 
+                target_prompt.directory,
+                inclusions, 
+                target_id,
+                segments,
+                walk,
+                depth,
             )
-            
-            all_mentioned_ids.update(sub_dependencies)
-            warnings.extend(sub_warnings)
-            
-            return expanded_sub_content
-            
-        expanded_content_str = self.inclusion_pattern.sub(replace_inclusion, content)
-        
-        return expanded_content_str, all_mentioned_ids, warnings
+        else:
+            sub_walk = walk.fork()
+            expanded_sub_content = "".join(self._iter_expansion(
+                content, target_prompt.directory, inclusions, target_id, segments, sub_walk, depth))
+            walk.merge(sub_walk)
+            walk.remember(memo_key, inclusions, depth, nodes_before, sub_walk, expanded_sub_content)
+            yield expanded_sub_content
+
+    def _prompt_sections(self, prompt: PromptRecord) -> Tuple[Section, ...]:
+        """Return the Markdown sections of a stored prompt, indexing them on first use."""
+        # Read the content first: a reread drops sections indexed from an older version of the file
+        content = self.get_prompt_content(prompt)
+        sections = prompt.sections
+        if sections is None:
+            sections = prompt.sections = compile_sections(content)
+        return sections
+
+    def _iter_pattern_inclusion(self, reference: str, pattern: str, inclusions: Set[str], parent_id: Optional[str],
+                                walk: ExpansionWalk, depth: int) -> Iterator[str]:
+        """
+        Yield the expansion of a ``[[regex:pattern]]`` inclusion.
+
+        Every matching prompt except the including one is expanded, in ID
+        order, separated by newlines. The matched IDs are added to the
+        dependencies.
+        """
+        try:
+            matched = self.pattern_index.match(pattern)
+        except re.error as e:
+            warning = f"Invalid inclusion pattern '{pattern}': {e}"
+            logger.warning(warning)
+            walk.warnings.append(warning)
+            yield walk.take(f"[[INVALID PATTERN: {pattern}]]")
+            return
+        matched = tuple(prompt_id for prompt_id in matched if prompt_id != parent_id)
+        if not matched:
+            warning = f"Pattern '{pattern}' matched no prompts"
+            logger.warning(warning)
+            walk.warnings.append(warning)
+            return
+        walk.dependencies.update(matched)
+        inclusions.add(reference)
+        for position, prompt_id in enumerate(matched):
+            if position:
+                yield walk.take("\n")
+                if walk.stopped:
+                    break
+            yield from self._iter_included(self.prompts[prompt_id], prompt_id, inclusions, walk, depth)
+            if walk.stopped:
+                break
+        inclusions.discard(reference)
 
     def expand_prompt_content(self, prompt_id: str) -> Tuple[str, List[str], List[str]]:
         """
@@ -978,20 +1541,20 @@ class PromptService:
         Returns:
             Tuple of (expanded_content, dependencies_list, warnings_list)
         """
-        logger.debug(f"Expanding prompt content for: {prompt_id}")
-        prompt = self.prompts.get(prompt_id)
+        logger.debug("Expanding prompt content for: {}", prompt_id)
+        prompt: Union[Prompt, PromptRecord, None] = self.prompts.get(prompt_id)
         if not prompt:
             # Try to find by name or legacy ID
             prompt = self.get_prompt(prompt_id)
             if not prompt:
                 raise ValueError(f"Prompt not found: {prompt_id}")
             
-        # Use the existing expand_inclusions method with directory context
-        expanded_content, dependencies_set, warnings_list = self.expand_inclusions(
-            content=prompt.content,
-            parent_directory=prompt.directory,
-            inclusions=set(),  # Start with an empty set
-            parent_id=prompt.id
+        # Expand with directory context, starting with an empty inclusion chain
+        expanded_content, dependencies_set, warnings_list = self._expand_stored(
+            self.get_prompt_content(prompt),
+            prompt.directory,
+            set(),
+            prompt.id
         )
         
         # Convert the dependencies set to a list for the API response
@@ -999,28 +1562,108 @@ class PromptService:
         
         return expanded_content, dependencies_list, warnings_list
     
-    def calculate_and_cache_display_names(self) -> None:
-        """Calculate and cache display names for all prompts."""
-        if not self.prompts:
-            return
-            
-        # Prepare data for display name calculation
-        prompt_data = [{"id": prompt.id, "name": prompt.name} for prompt in self.prompts.values()]
+    def expand_prompts(self, prompt_ids: List[str], directory: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Expand several prompts, sharing sub-expansions between them.
+
+        Each prompt is expanded as by ``expand_prompt_content`` (and goes
+        through the expansion cache), but all of them share one memo, so a
+        prompt included by many of them is expanded once for the batch.
+        Repeated IDs are expanded once.
         
-        # Calculate all display names efficiently
-        display_names = Prompt.calculate_all_display_names(prompt_data)
+        Args:
+            prompt_ids: IDs, names or legacy unique_ids of the prompts
+            directory: Optional directory to disambiguate names
+            
+        Yields:
+            One dict per distinct requested ID, in request order: prompt_id
+            (as requested) and either id, expanded_content, dependencies and
+            warnings, or error (with id when the prompt exists but its
+            expansion failed)
+        """
+        memo: Dict[str, SubExpansion] = {}
+        for requested_id in dict.fromkeys(prompt_ids):
+            resolved_id = requested_id if requested_id in self.prompts else self._lookup_id(requested_id, directory)
+            if resolved_id is None:
+                yield {"prompt_id": requested_id, "error": f"Prompt not found: {requested_id}"}
+                continue
+            record = self.prompts[resolved_id]
+            try:
+                expanded_content, dependencies, warnings = self._expand_stored(
+                    self.get_prompt_content(record), record.directory, set(), record.id, memo)
+            except Exception as e:
+                # One broken prompt must not take down the rest of the batch
+                logger.opt(exception=True).error(f"Error expanding prompt {record.id} in batch: {e}")
+                yield {"prompt_id": requested_id, "id": record.id, "error": f"Error expanding prompt: {requested_id}"}
+                continue
+            yield {
+                "prompt_id": requested_id,
+                "id": record.id,
+                "expanded_content": expanded_content,
+                "dependencies": list(dependencies),
+                "warnings": warnings,
+            }
+
+    def stream_prompt_expansion(self, prompt_id: str, directory: Optional[str] = None,
+                                chunk_chars: int = DEFAULT_CHUNK_CHARS) -> ExpansionStream:
+        """
+        Expand a prompt lazily, as a stream of text chunks.
+
+        Produces the same text, dependencies and warnings as
+        ``expand_prompt_content`` without building the expanded string. A
+        cached expansion is streamed from the cache; a fresh one is not added
+        to it.
         
-        # Cache the display names in the prompt objects
-        for prompt in self.prompts.values():
-            if prompt.id in display_names:
-                prompt.set_display_name_cache(display_names[prompt.id])
+        Args:
+            prompt_id: ID, name or legacy unique_id of the prompt to expand
+            directory: Optional directory to disambiguate a name
+            chunk_chars: Target size of the chunks
+            
+        Returns:
+            ExpansionStream whose dependencies and warnings are complete once
+            it has been consumed
+            
+        Raises:
+            ValueError: If the prompt does not exist
+        """
+        resolved_id = prompt_id if prompt_id in self.prompts else self._lookup_id(prompt_id, directory)
+        if resolved_id is None:
+            raise ValueError(f"Prompt not found: {prompt_id}")
+        record = self.prompts[resolved_id]
+        cached = self._cached_expansion((record.id, record.directory, False), record)
+        if cached is not None:
+            expanded, dependencies, warnings = cached
+            return ExpansionStream(record.id, (expanded,), dependencies, warnings, chunk_chars)
+        # No memo: it would hold on to every included composite prompt's expansion
+        walk = self._expansion_walk(memoize=False)
+        pieces = self._iter_expansion(self.get_prompt_content(record), record.directory, set(), record.id,
+                                      record.segments, walk)
+        return ExpansionStream(record.id, pieces, walk.dependencies, walk.warnings, chunk_chars)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return the counters of the content, expansion and pattern caches."""
+        return {
+            "content": self.content_cache.stats(),
+            "expansion": self.expansion_cache.stats(),
+            "patterns": self.pattern_index.stats(),
+            "store": self.expansion_store.stats() if self.expansion_store is not None else None,
+            "listings": self.listing_snapshots.stats(),
+        }
+
+    def calculate_and_cache_display_names(self) -> None:
+        """Bring cached display names up to date.
+
+        Display names are maintained incrementally by ``self.display_names``;
+        only the name-collision groups touched since the last call are recomputed.
+        """
+        self.display_names.flush()
     
     def get_all_prompts(self, force_reload: bool = False, include_content: bool = False, include_display_names: bool = True) -> List[Dict]:
         """
         Get a list of all prompts, optionally reloading from disk.
         Returns a list of dictionaries suitable for API responses (minimal data).
         """
-        logger.debug(f"GET_ALL_PROMPTS (id: {id(self)}): Called. force_reload={force_reload}. Cache empty? {not self.prompts}. Cache size: {len(self.prompts)}")
+        logger.debug("GET_ALL_PROMPTS (id: {}): Called. force_reload={}. Cache size: {}", id(self), force_reload, len(self.prompts))
         if force_reload or not self.prompts:
             logger.info("get_all_prompts: force_reload is True or no prompts in cache. Calling load_all_prompts().")
             self.load_all_prompts()
@@ -1049,65 +1692,102 @@ class PromptService:
                 prompt_dict["display_name"] = prompt_obj.display_name
             
             if include_content:
-                prompt_dict["content"] = prompt_obj.content
+                prompt_dict["content"] = self.get_prompt_content(prompt_obj)
             prompts_list.append(prompt_dict)
             
         return prompts_list
 
-    def search_prompt_suggestions(self, query: str, exclude_id: Optional[str] = None) -> List[Dict[str, str]]:
+    # Fields of list_prompts: the record fields, the display name and the content
+    LISTING_FIELDS = tuple(RECORD_FIELDS) + ("display_name", "content")
+
+    def list_prompts(self, fields: Optional[List[str]] = None, sort: str = "id", descending: bool = False,
+                     query: Optional[TagQuery] = None, search: Optional[str] = None,
+                     cursor: Optional[str] = None, limit: Optional[int] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of prompt summaries, sorted and filtered.
+
+        Args:
+            fields: Fields of each summary (``LISTING_FIELDS``); all but content if None
+            sort: Field to sort by (id, name, display_name, directory, updated_at, created_at)
+            descending: Sort in descending order
+            query: Only list the prompts matching this tag/directory/composite query
+            search: Only list the prompts whose ID, name or description contains this text
+            cursor: Cursor returned with the previous page; the first page if None
+            limit: Page size; the whole listing if None
+
+        Returns:
+            (summaries, cursor of the next page or None on the last page)
+
+        Raises:
+            ValueError: On an unknown field or sort, or an invalid cursor
+        """
+        if fields is None:
+            fields = [field for field in self.LISTING_FIELDS if field != "content"]
+        unknown = [field for field in fields if field not in self.LISTING_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        candidates = None
+        if query is not None and not query.is_empty():
+            candidates = set(self.tag_index.query(query))
+        accept = None
+        if search:
+            text = search.lower()
+            prompts = self.prompts
+
+            def accept(prompt_id: str) -> bool:
+                record = prompts[prompt_id]
+                return (text in prompt_id.lower() or text in record.name.lower()
+                        or bool(record.description and text in record.description.lower()))
+
+        prompt_ids, next_cursor = self.listing.page(self.prompts, sort, descending, candidates, accept, cursor, limit)
+        return [self._listing_entry(self.prompts[prompt_id], fields) for prompt_id in prompt_ids], next_cursor
+
+    def listing_version(self) -> Tuple[int, Tuple[Tuple[str, str], ...]]:
+        """
+        Return the version of everything a prompt listing is built from.
+
+        It changes whenever a prompt is added, changed or removed (the
+        generation of ``self.listing_snapshots``, which never repeats) or a
+        directory is added, removed or renamed. Computing it does not touch
+        the prompt index.
+        """
+        return self.listing_snapshots.generation, tuple((d.path, d.name) for d in self.directories)
+
+    def _listing_entry(self, record: PromptRecord, fields: List[str]) -> Dict[str, Any]:
+        entry = {}
+        for field in fields:
+            if field == "content":
+                entry[field] = self.get_prompt_content(record)
+            elif field == "display_name":
+                entry[field] = self.display_names.get(record.id) or record.name
+            else:
+                entry[field] = RECORD_FIELDS[field](record)
+        return entry
+
+    def search_prompt_suggestions(self, query: str, exclude_id: Optional[str] = None,
+                                  limit: int = 50) -> List[Dict[str, str]]:
         """
         Search for prompt suggestions based on a query string.
         Used for autocompletion in the editor, e.g., for [[prompt_name]].
 
+        Prompts whose ID or display name contains the query are suggested,
+        prefix matches first, and within each group the prompts in the same
+        directory as ``exclude_id``. Answered by ``self.suggestion_index``.
+
         Args:
             query: The partial string to search for in prompt IDs and display names.
             exclude_id: An optional prompt ID to exclude from suggestions (e.g., the current prompt being edited).
+            limit: Maximum number of suggestions.
 
         Returns:
             A list of dictionaries with 'id' and 'display_name' keys.
         """
-        suggestions: List[Dict[str, str]] = []
-        
-        # Calculate display names for all prompts
-        self.calculate_and_cache_display_names()
-        
-        # Process all prompts for empty query (when just '[[' is typed)
-        # Or filter by the query string
-        query_lower = query.lower() if query else ""
-
-        for prompt in self.prompts.values():
-            # Exclude the current prompt being edited if its ID is provided
-            if exclude_id and prompt.id == exclude_id:
-                continue
-            
-            # For empty queries, include all prompts
-            # For non-empty queries, filter by query string in both ID and display name
-            match = False
-            if not query:
-                match = True
-            else:
-                # Check if query matches ID or display name
-                if (query_lower in prompt.id.lower() or 
-                    query_lower in prompt.display_name.lower()):
-                    match = True
-            
-            if match:
-                suggestions.append({
-                    "id": prompt.id,
-                    "display_name": prompt.display_name
-                })
-        
-        # Sort suggestions by display name for better UX
-        suggestions.sort(key=lambda x: x["display_name"].lower())
-        
-        # Limit the number of results to prevent overwhelming the UI
-        max_results = 50
-        if len(suggestions) > max_results:
-            suggestions = suggestions[:max_results]
-        
-        logger.debug(f"Found {len(suggestions)} suggestions for query '{query}' (excluding '{exclude_id}')")
+        directory = os.path.dirname(exclude_id) if exclude_id else None
+        suggestions = [{"id": prompt_id, "display_name": display_name}
+                       for prompt_id, display_name in self.suggestion_index.suggest(query, limit, exclude_id, directory)]
+        logger.debug("Found {} suggestions for query '{}' (excluding '{}')", len(suggestions), query, exclude_id)
         return suggestions
-        
+
     def find_prompts_by_inclusion(self, prompt_id: str) -> List[Prompt]:
         """
         Find all prompts that include (directly or indirectly) a specific prompt.
@@ -1118,8 +1798,7 @@ class PromptService:
         Returns:
             A list of Prompt objects that include the specified prompt.
         """
-        logger.debug(f"Finding prompts that include '{prompt_id}' (directly or indirectly)")
-        result = []
+        logger.debug("Finding prompts that include '{}' (directly or indirectly)", prompt_id)
         
         # Normalize prompt ID to handle extensions
         normalized_target_id = prompt_id
@@ -1127,27 +1806,13 @@ class PromptService:
             normalized_target_id = normalized_target_id[:-3]
             
         # First check if the target prompt exists
-        if not self.get_prompt(normalized_target_id):
+        target_id = self._lookup_id(normalized_target_id)
+        if target_id is None:
             logger.warning(f"Target prompt '{normalized_target_id}' not found. Cannot find prompts including it.")
             return []
             
-        # For each prompt, check if it includes the target
-        for prompt in self.prompts.values():
-            if prompt.id == normalized_target_id:
-                continue  # Skip the target itself
-                
-            if prompt.is_composite:
-                # Get all transitive dependencies through expand_inclusions
-                _, transitive_dependencies, _ = self.expand_inclusions(
-                    prompt.content,
-                    parent_directory=prompt.directory,
-                    parent_id=prompt.id
-                )
-                
-                if normalized_target_id in transitive_dependencies:
-                    result.append(prompt)
-                    
-        logger.debug(f"Found {len(result)} prompts including '{normalized_target_id}'")
+        result = [self._materialize(self.prompts[referrer_id]) for referrer_id in self._referrers(target_id)]
+        logger.debug("Found {} prompts including '{}'", len(result), target_id)
         return result
 
     def get_all_prompts_including_disabled(self, include_content: bool = False) -> List[Dict]:
@@ -1155,32 +1820,32 @@ class PromptService:
         Get a list of all prompts, including those from disabled directories.
         Returns a list of dictionaries suitable for API responses (minimal data).
         """
-        logger.debug(f"GET_ALL_PROMPTS_INCLUDING_DISABLED (id: {id(self)}): Called. Cache size: {len(self.prompts)}")
+        logger.debug("GET_ALL_PROMPTS_INCLUDING_DISABLED (id: {}): Called. Cache size: {}", id(self), len(self.prompts))
         prompts_list = []
+        directory_paths = []
         for directory in self.directories:
             # Load prompts from this directory regardless of enabled status
             if not os.path.isdir(directory.path):
                 logger.warning(f"Directory not found or not a directory: {directory.path}")
                 continue
-            for root, _, files in os.walk(directory.path):
-                md_files = [f for f in files if f.endswith('.md')]
-                for filename in md_files:
-                    file_path = os.path.join(root, filename)
-                    prompt = self.load_prompt(file_path)
-                    if prompt:
-                        prompt_dict = {
-                            "id": prompt.id,
-                            "name": getattr(prompt, 'name', prompt.id),
-                            "description": prompt.description,
-                            "tags": prompt.tags,
-                            "directory": prompt.directory,
-                            "filename": prompt.filename,
-                            "unique_id": prompt.unique_id,
-                            "is_composite": getattr(prompt, 'is_composite', False),
-                            "updated_at": prompt.updated_at.isoformat() if prompt.updated_at else None,
-                            "created_at": prompt.created_at.isoformat() if prompt.created_at else None,
-                        }
-                        if include_content:
-                            prompt_dict["content"] = prompt.content
-                        prompts_list.append(prompt_dict)
-        return prompts_list
\ No newline at end of file
+            directory_paths.append(directory.path)
+        for loaded in self.loader.load_directories(directory_paths):
+            if loaded.error is not None:
+                continue
+            prompt = self._build_prompt(loaded.path, loaded.stat, loaded.description, loaded.tags, loaded.content)
+            prompt_dict = {
+                "id": prompt.id,
+                "name": getattr(prompt, 'name', prompt.id),
+                "description": prompt.description,
+                "tags": prompt.tags,
+                "directory": prompt.directory,
+                "filename": prompt.filename,
+                "unique_id": prompt.unique_id,
+                "is_composite": getattr(prompt, 'is_composite', False),
+                "updated_at": prompt.updated_at.isoformat() if prompt.updated_at else None,
+                "created_at": prompt.created_at.isoformat() if prompt.created_at else None,
+            }
+            if include_content:
+                prompt_dict["content"] = prompt.content
+            prompts_list.append(prompt_dict)
+        return prompts_list
@@ -0,0 +1,315 @@
+"""
+Filesystem watcher for prompt directories.
+
+Keeps ``PromptService`` in sync with prompt files edited outside the UI
+without a full reload. Changes are picked up with inotify on Linux (through
+ctypes, no extra dependency) or, where inotify is unavailable, by polling
+directory trees with ``os.scandir`` and comparing mtimes and sizes.
+
+Raw events are debounced and coalesced per path: a burst of events (for example
+a ``git checkout`` in a prompt repository) is applied as a single batch once
+the tree has been quiet for ``debounce`` seconds, and each touched path is
+reconciled once against its final state on disk. The cost of a batch is
+therefore proportional to the number of changed paths.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+
+class _PollingBackend:
+    """Detects changes by periodically re-scanning the watched trees."""
+
+    name = "polling"
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._roots: Set[str] = set()
+        self._snapshot: Dict[str, Tuple[int, int]] = {}
+        self._last_scan = 0.0
+
+    @staticmethod
+    def _scan(root: str) -> Dict[str, Tuple[int, int]]:
+        found: Dict[str, Tuple[int, int]] = {}
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                pending.append(entry.path)
+                            elif entry.name.endswith('.md'):
+                                stat = entry.stat()
+                                found[entry.path] = (stat.st_mtime_ns, stat.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return found
+
+    def set_roots(self, roots: Set[str]) -> None:
+        for root in roots - self._roots:
+            self._snapshot.update(self._scan(root))
+        for root in self._roots - roots:
+            prefix = root.rstrip(os.sep) + os.sep
+            for path in [p for p in self._snapshot if p.startswith(prefix)]:
+                del self._snapshot[path]
+        self._roots = set(roots)
+
+    def wait(self, timeout: float, stop: threading.Event) -> List[str]:
+        delay = max(0.0, self._last_scan + self.interval - time.monotonic())
+        if stop.wait(min(delay, timeout)) or delay > timeout:
+            return []
+        self._last_scan = time.monotonic()
+        current: Dict[str, Tuple[int, int]] = {}
+        for root in self._roots:
+            current.update(self._scan(root))
+        changed = [p for p, sig in current.items() if self._snapshot.get(p) != sig]
+        changed.extend(p for p in self._snapshot if p not in current)
+        self._snapshot = current
+        return changed
+
+    def close(self) -> None:
+        self._snapshot.clear()
+
+
+class _InotifyBackend:
+    """Receives change events from the Linux kernel via inotify."""
+
+    name = "inotify"
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+
+    WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+                  IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+    _EVENT_HEADER = struct.Struct('iIII')
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library('c')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._roots: Set[str] = set()
+        self._wd_to_dir: Dict[int, str] = {}
+        self._dir_to_wd: Dict[str, int] = {}
+
+    @classmethod
+    def available(cls) -> bool:
+        if not hasattr(os, 'O_CLOEXEC'):
+            return False
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            return False
+        try:
+            return hasattr(ctypes.CDLL(libc_name), 'inotify_init1')
+        except OSError:
+            return False
+
+    def _add_tree(self, root: str) -> None:
+        pending = [root]
+        while pending:
+            directory = pending.pop()
+            if directory in self._dir_to_wd:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+            if wd < 0:
+                logger.warning(f"inotify could not watch {directory} (errno {ctypes.get_errno()})")
+                continue
+            self._wd_to_dir[wd] = directory
+            self._dir_to_wd[directory] = wd
+            try:
+                with os.scandir(directory) as entries:
+                    pending.extend(e.path for e in entries if e.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _remove_tree(self, root: str) -> None:
+        prefix = root.rstrip(os.sep) + os.sep
+        for directory in [d for d in self._dir_to_wd if d == root or d.startswith(prefix)]:
+            wd = self._dir_to_wd.pop(directory)
+            self._wd_to_dir.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def set_roots(self, roots: Set[str]) -> None:
+        for root in roots - self._roots:
+            self._add_tree(root)
+        for root in self._roots - roots:
+            self._remove_tree(root)
+        self._roots = set(roots)
+
+    def wait(self, timeout: float, stop: threading.Event) -> List[str]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changed: List[str] = []
+        offset = 0
+        header_size = self._EVENT_HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, _cookie, name_len = self._EVENT_HEADER.unpack_from(data, offset)
+            raw_name = data[offset + header_size: offset + header_size + name_len]
+            offset += header_size + name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were lost: reconcile every watched tree
+                logger.warning("inotify queue overflowed; rescanning watched directories")
+                changed.extend(self._roots)
+                continue
+            directory = self._wd_to_dir.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                self._wd_to_dir.pop(wd, None)
+                if self._dir_to_wd.get(directory) == wd:
+                    del self._dir_to_wd[directory]
+                continue
+            name = os.fsdecode(raw_name.rstrip(b'\0'))
+            if not name:
+                # Event on the watched directory itself (deleted or moved away)
+                changed.append(directory)
+                continue
+            path = os.path.join(directory, name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._add_tree(path)
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    self._remove_tree(path)
+                changed.append(path)
+            elif name.endswith('.md'):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self._wd_to_dir.clear()
+        self._dir_to_wd.clear()
+
+
+class PromptWatcher:
+    """Watches enabled prompt directories and applies changes to a PromptService."""
+
+    def __init__(self, prompt_service, debounce: float = 0.25, max_delay: float = 2.0,
+                 poll_interval: float = 1.0, backend: str = "auto",
+                 dispatch: Optional[Callable[[Callable[[], None]], Any]] = None):
+        """
+        Initialize the watcher.
+
+        Args:
+            prompt_service: The PromptService to keep in sync
+            debounce: Quiet period (seconds) before a batch of events is applied
+            max_delay: Upper bound (seconds) on how long a continuous stream of
+                       events can postpone applying a batch
+            poll_interval: Rescan interval for the polling backend
+            backend: "auto" (inotify if available, else polling), "inotify" or "polling"
+            dispatch: Optional function that runs a callable on the thread owning
+                      the service (e.g. ``loop.call_soon_threadsafe``). By default
+                      batches are applied on the watcher thread.
+        """
+        self.prompt_service = prompt_service
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend_name = backend
+        self.dispatch = dispatch
+        self.backend: Any = None
+        self.batches_applied = 0
+        self.last_batch: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _create_backend(self):
+        if self.backend_name in ("auto", "inotify") and _InotifyBackend.available():
+            try:
+                return _InotifyBackend()
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}); falling back to polling")
+        elif self.backend_name == "inotify":
+            logger.warning("inotify not supported on this platform; falling back to polling")
+        return _PollingBackend(self.poll_interval)
+
+    def _enabled_roots(self) -> Set[str]:
+        return {d.path for d in self.prompt_service.directories if d.enabled and os.path.isdir(d.path)}
+
+    def start(self) -> None:
+        """Start watching in a background thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.backend = self._create_backend()
+        self.backend.set_roots(self._enabled_roots())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="prompt-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Prompt watcher started using {self.backend.name} backend")
+
+    def stop(self) -> None:
+        """Stop the watcher thread and release the backend."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self.backend is not None:
+            self.backend.close()
+        logger.info("Prompt watcher stopped")
+
+    def _run(self) -> None:
+        pending: Dict[str, None] = {}
+        first_event = last_event = 0.0
+        while not self._stop.is_set():
+            try:
+                # Pick up directories added, removed or toggled since the last pass
+                self.backend.set_roots(self._enabled_roots())
+                timeout = self.debounce if pending else 0.5
+                paths = self.backend.wait(timeout, self._stop)
+                now = time.monotonic()
+                if paths:
+                    if not pending:
+                        first_event = now
+                    last_event = now
+                    pending.update(dict.fromkeys(paths))
+                if pending and (now - last_event >= self.debounce or now - first_event >= self.max_delay):
+                    batch = list(pending)
+                    pending.clear()
+                    self._apply(batch)
+            except Exception as e:
+                logger.opt(exception=True).error(f"Prompt watcher error: {e}")
+                self._stop.wait(1.0)
+
+    def _apply(self, paths: List[str]) -> None:
+        def apply_batch():
+            self.last_batch = self.prompt_service.apply_file_changes(paths)
+            self.batches_applied += 1
+
+        if self.dispatch is not None:
+            self.dispatch(apply_batch)
+        else:
+            apply_batch()
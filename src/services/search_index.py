@@ -0,0 +1,321 @@
+"""
+Full-text search over prompts.
+
+``SearchIndex`` is an inverted index from lowercase word tokens to the prompts
+containing them. Three fields are indexed, name, description and content, and
+a search ranks the prompts with BM25F: per-field term frequencies are
+normalized by field length, weighted (name > description > content,
+``FIELD_WEIGHTS``) and combined before the BM25 saturation.
+
+Query syntax:
+
+    alpha beta        prompts containing both words (AND)
+    "exact phrase"    the words next to each other, in one field
+    alph*             any word starting with "alph"
+    search_test       text that splits into several words is a phrase
+
+A posting holds the three field frequencies of a term in a prompt, packed in
+one int, so indexing a prompt only loops over its distinct terms. Word order
+is kept once per prompt, as its sequence of term numbers (fields separated by
+0) in an unsigned int array; a phrase is found by searching the bytes of that
+array, only in the prompts that contain all of its words.
+
+The index follows the ``PromptIndex`` listener protocol. Prompts added or
+replaced are queued and tokenized by ``flush`` (called before each search),
+so a burst of writes or a reload only costs the prompts that changed, and in
+lazy content mode content is read on the first search rather than at load.
+"""
+
+import math
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from src.services.prompt_record import PromptRecord
+
+_TOKEN = re.compile(r'[^\W_]+')
+_QUERY_PART = re.compile(r'"([^"]*)"?|(\S+)')
+
+NAME, DESCRIPTION, CONTENT = range(3)
+
+# Packed postings: content frequency in the low bits, then description, then name
+_SLOT_BITS = 20
+_SLOT_MAX = (1 << _SLOT_BITS) - 1
+# Term number separating the fields of a sequence
+_SEPARATOR = 0
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _unpack(packed: int) -> Tuple[int, int, int]:
+    return packed >> (2 * _SLOT_BITS), (packed >> _SLOT_BITS) & _SLOT_MAX, packed & _SLOT_MAX
+
+
+class _Document(NamedTuple):
+    record: PromptRecord
+    terms: Tuple[str, ...]         # distinct terms, to unindex the prompt
+    lengths: Tuple[int, int, int]  # tokens per field
+    sequence: array                # term numbers of name, description and content
+
+
+class _Clause(NamedTuple):
+    terms: Tuple[str, ...]
+    prefix: bool  # the single term is a prefix
+
+
+def parse_query(query: str) -> List[_Clause]:
+    """Parse a search query into its clauses (see the module docstring)."""
+    clauses = []
+    for phrase, word in _QUERY_PART.findall(query):
+        prefix = not phrase and word.endswith('*')
+        terms = tuple(tokenize(phrase or word))
+        if terms:
+            clauses.append(_Clause(terms, prefix and len(terms) == 1))
+    return clauses
+
+
+class SearchIndex:
+    """Inverted index of prompt names, descriptions and contents, ranked with BM25F."""
+
+    FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+    K1 = 1.2
+    B = 0.75
+    # A prefix matching more terms than this only uses the most frequent ones
+    MAX_PREFIX_TERMS = 128
+
+    def __init__(self, content_of: Callable[[PromptRecord], str]):
+        """
+        Initialize the index.
+
+        Args:
+            content_of: Returns the content of an index record (reading it if
+                        the record holds metadata only)
+        """
+        self._content_of = content_of
+        # term -> prompt ID -> packed field frequencies
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._terms: List[str] = []  # sorted vocabulary, for prefix queries
+        # term -> number in sequences; numbers are never reused, so sequences stay valid
+        self._numbers: Dict[str, int] = {'': _SEPARATOR}
+        self._documents: Dict[str, _Document] = {}
+        self._field_totals = [0, 0, 0]
+        self._pending: Dict[str, PromptRecord] = {}
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self._documents) + len(self._pending)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def flush(self) -> int:
+        """Index the prompts added or replaced since the last flush. Returns their number."""
+        pending, self._pending = self._pending, {}
+        for prompt_id, record in pending.items():
+            self._add(prompt_id, record)
+        return len(pending)
+
+    def _add(self, prompt_id: str, record: PromptRecord) -> None:
+        fields = (tokenize(record.name), tokenize(record.description), tokenize(self._content_of(record)))
+        # Content frequencies are the low slot; a term can only overflow it in
+        # over a million tokens of content
+        packed = Counter(fields[CONTENT])
+        if len(fields[CONTENT]) > _SLOT_MAX:
+            packed = Counter({term: min(count, _SLOT_MAX) for term, count in packed.items()})
+        for field in (NAME, DESCRIPTION):
+            shift = (CONTENT - field) * _SLOT_BITS
+            for term, count in Counter(fields[field]).items():
+                packed[term] += min(count, _SLOT_MAX) << shift
+
+        all_postings = self._postings
+        numbers = self._numbers
+        for term, frequencies in packed.items():
+            postings = all_postings.get(term)
+            if postings is None:
+                postings = all_postings[term] = {}
+                insort(self._terms, term)
+                if term not in numbers:
+                    numbers[term] = len(numbers)
+            postings[prompt_id] = frequencies
+        sequence = array('I')
+        for field, tokens in enumerate(fields):
+            if field:
+                sequence.append(_SEPARATOR)
+            sequence.extend(map(numbers.__getitem__, tokens))
+        lengths = (len(fields[NAME]), len(fields[DESCRIPTION]), len(fields[CONTENT]))
+        for field, length in enumerate(lengths):
+            self._field_totals[field] += length
+        self._documents[prompt_id] = _Document(record, tuple(packed), lengths, sequence)
+
+    def _remove(self, prompt_id: str) -> None:
+        self._pending.pop(prompt_id, None)
+        document = self._documents.pop(prompt_id, None)
+        if document is None:
+            return
+        for field, length in enumerate(document.lengths):
+            self._field_totals[field] -= length
+        for term in document.terms:
+            postings = self._postings[term]
+            del postings[prompt_id]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+    def rebuild(self, index) -> None:
+        previous, self._index = self._index, index
+        if previous is None or previous is index:
+            # First attach, or the index was cleared: start over
+            self._postings.clear()
+            self._terms.clear()
+            self._numbers = {'': _SEPARATOR}
+            self._documents.clear()
+            self._field_totals = [0, 0, 0]
+            self._pending = dict(index)
+            return
+        # A reload swapped in a new index; unchanged prompts keep their records
+        for prompt_id in [pid for pid, doc in self._documents.items() if index.get(pid) is not doc.record]:
+            self._remove(prompt_id)
+        self._pending = {pid: record for pid, record in self._pending.items() if index.get(pid) is record}
+        for prompt_id, record in index.items():
+            document = self._documents.get(prompt_id)
+            if document is None or document.record is not record:
+                self._pending[prompt_id] = record
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._pending[prompt_id] = prompt
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._remove(prompt_id)
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Tuple[str, float]]:
+        """
+        Return ``(prompt ID, score)`` of the prompts matching ``query``, best first.
+
+        Args:
+            query: Search query (see the module docstring)
+            limit: Maximum number of results (all if None)
+        """
+        self.flush()
+        if not self._documents:
+            return []
+        # Most selective clauses first: later ones only score the remaining candidates
+        clauses = sorted(parse_query(query), key=self._clause_size)
+        if not clauses:
+            return []
+        scores = self._clause_scores(clauses[0], None)
+        for clause in clauses[1:]:
+            if not scores:
+                return []
+            scores = {pid: scores[pid] + score for pid, score in self._clause_scores(clause, scores).items()}
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked if limit is None else ranked[:max(limit, 0)]
+
+    def _clause_size(self, clause: _Clause) -> int:
+        if clause.prefix:
+            return len(self._documents)
+        return min(len(self._postings.get(term, ())) for term in clause.terms)
+
+    def _clause_scores(self, clause: _Clause, candidates: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """Score the prompts matching ``clause``, among ``candidates`` if given."""
+        if clause.prefix:
+            prefix = clause.terms[0]
+            start = bisect_left(self._terms, prefix)
+            end = bisect_left(self._terms, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+            terms = self._terms[start:end]
+            if len(terms) > self.MAX_PREFIX_TERMS:
+                terms = sorted(terms, key=lambda t: -len(self._postings[t]))[:self.MAX_PREFIX_TERMS]
+            scores: Dict[str, float] = {}
+            for term in terms:
+                for prompt_id, score in self._term_scores(term, candidates).items():
+                    scores[prompt_id] = scores.get(prompt_id, 0.0) + score
+            return scores
+        if len(clause.terms) == 1:
+            return self._term_scores(clause.terms[0], candidates)
+        return self._phrase_scores(clause.terms, candidates)
+
+    @staticmethod
+    def _restrict(postings: Dict[str, int], candidates: Optional[Dict[str, float]]) -> Iterable[Tuple[str, int]]:
+        """Iterate the postings of the candidates (all postings without candidates)."""
+        if candidates is None:
+            return postings.items()
+        if len(candidates) < len(postings):
+            return ((pid, postings[pid]) for pid in candidates if pid in postings)
+        return ((pid, packed) for pid, packed in postings.items() if pid in candidates)
+
+    def _term_scores(self, term: str, candidates: Optional[Dict[str, float]]) -> Dict[str, float]:
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+        idf = self._idf(len(postings))
+        return {prompt_id: self._score(idf, prompt_id, _unpack(packed))
+                for prompt_id, packed in self._restrict(postings, candidates)}
+
+    def _phrase_scores(self, terms: Sequence[str], candidates: Optional[Dict[str, float]]) -> Dict[str, float]:
+        postings = [self._postings.get(term, {}) for term in terms]
+        if not all(postings):
+            return {}
+        needle = array('I', (self._numbers[term] for term in terms)).tobytes()
+        # Walk the rarest term's postings, check the others, then the word order
+        rarest = min(postings, key=len)
+        others = [p for p in postings if p is not rarest]
+        occurrences: Dict[str, Tuple[int, int, int]] = {}
+        for prompt_id, _ in self._restrict(rarest, candidates):
+            if all(prompt_id in p for p in others):
+                frequencies = self._phrase_frequencies(self._documents[prompt_id], needle)
+                if frequencies is not None:
+                    occurrences[prompt_id] = frequencies
+        if not occurrences:
+            return {}
+        # Phrase frequency within the candidates only; good enough for ranking
+        idf = self._idf(len(occurrences))
+        return {prompt_id: self._score(idf, prompt_id, frequencies)
+                for prompt_id, frequencies in occurrences.items()}
+
+    @staticmethod
+    def _phrase_frequencies(document: _Document, needle: bytes) -> Optional[Tuple[int, int, int]]:
+        """Count the occurrences of a phrase (as sequence bytes) in each field of a prompt."""
+        haystack = document.sequence.tobytes()
+        size = document.sequence.itemsize
+        description_start = (document.lengths[NAME] + 1) * size
+        content_start = description_start + (document.lengths[DESCRIPTION] + 1) * size
+        frequencies = [0, 0, 0]
+        position = haystack.find(needle)
+        while position >= 0:
+            if position % size:
+                # Straddles two term numbers
+                position = haystack.find(needle, position + 1)
+                continue
+            if position < description_start:
+                frequencies[NAME] += 1
+            elif position < content_start:
+                frequencies[DESCRIPTION] += 1
+            else:
+                frequencies[CONTENT] += 1
+            position = haystack.find(needle, position + size)
+        return (frequencies[0], frequencies[1], frequencies[2]) if any(frequencies) else None
+
+    def _score(self, idf: float, prompt_id: str, frequencies: Sequence[int]) -> float:
+        """BM25F score of a term (or phrase) with the given frequency in each field of a prompt."""
+        lengths = self._documents[prompt_id].lengths
+        count = len(self._documents)
+        weighted = 0.0
+        for field, frequency in enumerate(frequencies):
+            if frequency:
+                average = self._field_totals[field] / count or 1.0
+                norm = 1.0 - self.B + self.B * lengths[field] / average
+                weighted += self.FIELD_WEIGHTS[field] * frequency / norm
+        return idf * weighted * (self.K1 + 1.0) / (weighted + self.K1)
+
+    def _idf(self, document_frequency: int) -> float:
+        count = len(self._documents)
+        return math.log(1.0 + (count - document_frequency + 0.5) / (document_frequency + 0.5))
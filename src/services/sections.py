@@ -0,0 +1,83 @@
+"""
+Markdown sections of prompts, for ``[[name#heading]]`` inclusions.
+
+``compile_sections`` scans a prompt's content once for ATX headings (``#`` to
+``######``, ignoring fenced code blocks) and returns every heading with the
+character range of its section: from the heading line up to the next heading
+of the same or a higher level, without trailing blank lines. Including a
+section is then a slice of the content. The result is kept on the prompt's
+index record and goes away with it when the prompt is saved or reloaded.
+
+A heading is referred to by its text (case-insensitive) or by its GitHub-style
+anchor slug, so ``[[guide#Getting Started]]`` and ``[[guide#getting-started]]``
+both work.
+"""
+
+import re
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+_HEADING_OR_FENCE = re.compile(r'^(?:(`{3,}|~{3,})|(#{1,6})[ \t]+(.+?)(?:[ \t]+#+)?[ \t]*$)', re.MULTILINE)
+_SLUG_DROP = re.compile(r'[^\w\- ]')
+
+
+class Section(NamedTuple):
+    level: int
+    title: str
+    slug: str
+    start: int
+    end: int
+
+
+NO_SECTIONS: Tuple[Section, ...] = ()
+
+
+def heading_slug(title: str) -> str:
+    """Return the anchor slug of a heading ("Getting Started!" -> "getting-started")."""
+    return _SLUG_DROP.sub('', title.strip().lower()).replace(' ', '-')
+
+
+def compile_sections(content: str) -> Tuple[Section, ...]:
+    """Return the headings of ``content`` with the range of their sections."""
+    headings = []
+    fence = None
+    for match in _HEADING_OR_FENCE.finditer(content):
+        marker = match.group(1)
+        if marker is not None:
+            if fence is None:
+                fence = marker[0]
+            elif marker[0] == fence:
+                fence = None
+            continue
+        if fence is None:
+            headings.append((len(match.group(2)), match.group(3).strip(), match.start()))
+    if not headings:
+        return NO_SECTIONS
+
+    sections = []
+    for position, (level, title, start) in enumerate(headings):
+        end = len(content)
+        for next_level, _, next_start in headings[position + 1:]:
+            if next_level <= level:
+                end = next_start
+                break
+        # Leave out the blank lines that separate the section from the next one
+        while end > start and content[end - 1] in '\r\n \t':
+            end -= 1
+        sections.append(Section(level, title, heading_slug(title), start, end))
+    return tuple(sections)
+
+
+def find_section(sections: Sequence[Section], heading: str) -> Optional[Section]:
+    """Return the first section whose title or slug is ``heading``."""
+    wanted = heading.strip().lower()
+    slug = heading_slug(heading)
+    for section in sections:
+        if section.title.lower() == wanted or section.slug == slug:
+            return section
+    return None
+
+
+def split_section_reference(reference: str) -> Tuple[str, Optional[str]]:
+    """Split ``name#heading`` into the prompt reference and the heading (None without ``#``)."""
+    base, separator, heading = reference.partition('#')
+    return (base, heading) if separator else (reference, None)
@@ -0,0 +1,251 @@
+"""
+Index behind ``[[`` autocompletion in the editor.
+
+Suggestions used to be found by substring-testing the ID and display name of
+every prompt, then sorting every match, on each keystroke. ``SuggestionIndex``
+answers them from:
+
+- a sorted list of (key, display name, ID) where the keys of a prompt are its
+  lowercase display name and file name; a bisect finds the first key starting
+  with the query and the prefix matches follow it in order, so it plays the
+  part of a prefix trie without a node per character;
+- a trigram index over the same keys, whose posting intersection gives the
+  few prompts that can contain a longer query;
+- every prompt sorted by display name, walked for short queries (under three
+  characters, or containing a ``/``) and for matches too many to select
+  from: these are dense, so the walk stops after about ``limit`` prompts;
+- both sorted lists again led by the directory, so the matches next to the
+  prompt being edited are found the same way and come first, and the prompts
+  of each directory, selected whole when the query is in the directory path.
+
+Ranking: prefix matches before other substring matches, and within each, the
+prompts of the current directory first. Prefix matches are then ordered by the
+key that matched, substring matches by display name. Top-k selections over
+candidate sets use a bounded heap (``heapq.nsmallest``).
+
+Display names change when a prompt with the same file name is added or
+removed, so the index follows the ``PromptIndex`` listener protocol by stem
+group, like ``DisplayNameIndex``: touched groups are re-keyed on the next
+query.
+"""
+
+import heapq
+import itertools
+import os
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from src.services.display_names import group_key
+
+
+class _Entry(NamedTuple):
+    display_name: str
+    display_lower: str
+    id_lower: str
+    keys: Tuple[str, ...]  # prefix keys: display name, file name (lowercase, distinct)
+    directory: str
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SuggestionIndex:
+    """Prefix and trigram index of prompt IDs and display names, for autocompletion."""
+
+    # Above this many substring candidates, walk the display name order instead
+    # of selecting from the candidates
+    MAX_HEAP_CANDIDATES = 2048
+
+    def __init__(self, display_name_of: Callable[[str], Optional[str]]):
+        """
+        Initialize the index.
+
+        Args:
+            display_name_of: Returns the current display name of a prompt ID
+        """
+        self._display_name_of = display_name_of
+        self._entries: Dict[str, _Entry] = {}
+        self._ordered: List[Tuple[str, str]] = []           # (display lower, ID)
+        self._prefixes: List[Tuple[str, str, str]] = []     # (key, display lower, ID)
+        # The same two lists again, led by the directory, for the current directory's matches
+        self._directory_ordered: List[Tuple[str, str, str]] = []
+        self._directory_prefixes: List[Tuple[str, str, str, str]] = []
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._directories: Dict[str, Set[str]] = {}
+        self._stems: Dict[str, Set[str]] = {}
+        self._dirty: Set[str] = set()
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._stems.values())
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener interface
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        # Entries only depend on IDs, so a reload only touches the IDs that came or went
+        known = {prompt_id for ids in self._stems.values() for prompt_id in ids}
+        for prompt_id in known - index.keys():
+            self.prompt_removed(prompt_id, None)
+        for prompt_id in index.keys() - known:
+            self.prompt_added(prompt_id, None)
+
+    def prompt_added(self, prompt_id: str, prompt) -> None:
+        stem = group_key(prompt_id)
+        self._stems.setdefault(stem, set()).add(prompt_id)
+        self._dirty.add(stem)
+
+    def prompt_removed(self, prompt_id: str, prompt) -> None:
+        stem = group_key(prompt_id)
+        ids = self._stems.get(stem)
+        if ids is not None:
+            ids.discard(prompt_id)
+            if not ids:
+                del self._stems[stem]
+        self._unindex(prompt_id)
+        self._dirty.add(stem)
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def flush(self) -> None:
+        """Re-key the prompts of the stem groups changed since the last flush."""
+        while self._dirty:
+            for prompt_id in self._stems.get(self._dirty.pop(), ()):
+                display_name = self._display_name_of(prompt_id) or group_key(prompt_id)
+                entry = self._entries.get(prompt_id)
+                if entry is None or entry.display_name != display_name:
+                    self._unindex(prompt_id)
+                    self._index(prompt_id, display_name)
+
+    def _index(self, prompt_id: str, display_name: str) -> None:
+        display_lower = display_name.lower()
+        keys = tuple(dict.fromkeys((display_lower, group_key(prompt_id).lower())))
+        directory = os.path.dirname(prompt_id)
+        self._entries[prompt_id] = _Entry(display_name, display_lower, prompt_id.lower(), keys, directory)
+        insort(self._ordered, (display_lower, prompt_id))
+        insort(self._directory_ordered, (directory, display_lower, prompt_id))
+        for key in keys:
+            insort(self._prefixes, (key, display_lower, prompt_id))
+            insort(self._directory_prefixes, (directory, key, display_lower, prompt_id))
+            for gram in _trigrams(key):
+                self._trigrams.setdefault(gram, set()).add(prompt_id)
+        self._directories.setdefault(directory, set()).add(prompt_id)
+
+    def _unindex(self, prompt_id: str) -> None:
+        entry = self._entries.pop(prompt_id, None)
+        if entry is None:
+            return
+        del self._ordered[bisect_left(self._ordered, (entry.display_lower, prompt_id))]
+        del self._directory_ordered[bisect_left(self._directory_ordered,
+                                                (entry.directory, entry.display_lower, prompt_id))]
+        for key in entry.keys:
+            del self._prefixes[bisect_left(self._prefixes, (key, entry.display_lower, prompt_id))]
+            del self._directory_prefixes[bisect_left(self._directory_prefixes,
+                                                     (entry.directory, key, entry.display_lower, prompt_id))]
+        for gram in set().union(*map(_trigrams, entry.keys)):
+            ids = self._trigrams[gram]
+            ids.discard(prompt_id)
+            if not ids:
+                del self._trigrams[gram]
+        ids = self._directories[entry.directory]
+        ids.discard(prompt_id)
+        if not ids:
+            del self._directories[entry.directory]
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def suggest(self, query: str, limit: int = 50, exclude_id: Optional[str] = None,
+                directory: Optional[str] = None) -> List[Tuple[str, str]]:
+        """
+        Return ``(prompt ID, display name)`` of the best matches for ``query``.
+
+        A prompt matches when ``query`` (case-insensitive) is a substring of
+        its ID or display name; an empty query matches every prompt.
+
+        Args:
+            query: What was typed after ``[[``
+            limit: Maximum number of suggestions
+            exclude_id: Prompt left out of the suggestions (the one being edited)
+            directory: Directory whose prompts are ranked first
+        """
+        self.flush()
+        query = (query or "").lower()
+        if limit <= 0:
+            return []
+        results: Dict[str, str] = {}
+
+        def take(prompt_ids: Iterable[str]) -> bool:
+            for prompt_id in prompt_ids:
+                if prompt_id != exclude_id and prompt_id not in results:
+                    results[prompt_id] = self._entries[prompt_id].display_name
+                    if len(results) >= limit:
+                        return True
+            return False
+
+        # The current directory first, then everywhere
+        scopes = [directory, None] if directory in self._directories else [None]
+        for scope in scopes:
+            if take(self._prefix_matches(query, scope)):
+                return list(results.items())
+        if query:
+            candidates = self._candidates(query) if len(query) >= 3 and '/' not in query else None
+            for scope in scopes:
+                # An extra slot in the heap selections makes up for an excluded prompt
+                if take(self._substring_matches(query, candidates, scope, results, limit + 1)):
+                    break
+        return list(results.items())
+
+    def _prefix_matches(self, query: str, directory: Optional[str]) -> Iterable[str]:
+        """Prompts with a key starting with ``query``, in key order (only those of ``directory`` if set)."""
+        prefixes, head = (self._prefixes, ()) if directory is None else (self._directory_prefixes, (directory,))
+        size = len(head)
+        for position in range(bisect_left(prefixes, head + (query,)), len(prefixes)):
+            item = prefixes[position]
+            if item[:size] != head or not item[size].startswith(query):
+                break
+            yield item[-1]
+
+    def _in_display_order(self, directory: Optional[str]) -> Iterable[str]:
+        """All prompts by display name (only those of ``directory`` if set)."""
+        if directory is None:
+            return (prompt_id for _, prompt_id in self._ordered)
+        ordered = self._directory_ordered
+        position = bisect_left(ordered, (directory,))
+        return (prompt_id for _, _, prompt_id in itertools.takewhile(lambda item: item[0] == directory,
+                                                                    itertools.islice(ordered, position, None)))
+
+    def _contains(self, prompt_id: str, query: str) -> bool:
+        entry = self._entries[prompt_id]
+        return query in entry.display_lower or query in entry.id_lower
+
+    def _substring_matches(self, query: str, candidates: Optional[Set[str]], directory: Optional[str],
+                           taken: Dict[str, str], limit: int) -> Iterable[str]:
+        """Prompts containing ``query`` by display name (only those of ``directory`` if set)."""
+        entries = self._entries
+        if candidates is not None and len(candidates) <= self.MAX_HEAP_CANDIDATES:
+            pool = (pid for pid in candidates
+                    if pid not in taken and (directory is None or entries[pid].directory == directory))
+            return heapq.nsmallest(limit, pool, key=lambda pid: (entries[pid].display_lower, pid))
+        # Dense matches: walk in display name order until enough are found
+        if candidates is None:
+            return (pid for pid in self._in_display_order(directory)
+                    if pid not in taken and self._contains(pid, query))
+        return (pid for pid in self._in_display_order(directory) if pid not in taken and pid in candidates)
+
+    def _candidates(self, query: str) -> Set[str]:
+        """The prompts containing ``query`` (three characters or more, no ``/``)."""
+        # Without a "/" the query lies within the directory path or the file name
+        matches: Set[str] = set()
+        for directory, ids in self._directories.items():
+            if query in directory.lower():
+                matches |= ids
+        postings = sorted((self._trigrams.get(gram, ()) for gram in _trigrams(query)), key=len)
+        if postings and postings[0]:
+            found = set(postings[0]).intersection(*postings[1:])
+            matches.update(pid for pid in found if any(query in key for key in self._entries[pid].keys))
+        return matches
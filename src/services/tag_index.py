@@ -0,0 +1,175 @@
+"""
+Inverted index of prompt tags, directories and the composite flag.
+
+``get_prompts_by_tag`` used to test every prompt's tag list, and there was no
+way to combine tags, or to count prompts per tag, short of listing every
+prompt. ``TagIndex`` keeps, for every tag and every directory, the IDs of its
+prompts (as insertion-ordered dicts, like ``InclusionGraph``), and the IDs of
+the composite prompts. It is maintained through the ``PromptIndex`` listener
+protocol, so it follows loads, saves, renames, deletes and reloads.
+
+A ``TagQuery`` combines tags with AND (``all_tags``), OR (``any_tags``) and
+NOT (``no_tags``), restricts to directories (any of ``directories``, none of
+``exclude_directories``) and to composite or plain prompts. It is answered
+by intersecting the smallest included set with the others, then dropping the
+excluded ones. ``facets`` counts prompts per tag and per directory: straight
+from the set sizes for the whole library, or over the matches of a query.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from src.services.prompt_record import PromptRecord
+
+_EMPTY: Dict[str, None] = {}
+
+
+class TagQuery(NamedTuple):
+    """Filter on tags, directory and the composite flag; empty fields do not filter."""
+    all_tags: Sequence[Any] = ()
+    any_tags: Sequence[Any] = ()
+    no_tags: Sequence[Any] = ()
+    directories: Sequence[str] = ()
+    exclude_directories: Sequence[str] = ()
+    is_composite: Optional[bool] = None
+
+    def is_empty(self) -> bool:
+        return not any(self[:5]) and self.is_composite is None
+
+
+class _Entry(NamedTuple):
+    directory: str
+    tags: Tuple[Any, ...]
+    is_composite: bool
+
+
+class TagIndex:
+    """Tag -> prompt IDs, directory -> prompt IDs and the composite prompt IDs."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._tags: Dict[Any, Dict[str, None]] = {}
+        self._directories: Dict[str, Dict[str, None]] = {}
+        self._composite: Dict[str, None] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, prompt_id: str, prompt: PromptRecord) -> None:
+        tags = tuple(dict.fromkeys(prompt.tags))
+        self._entries[prompt_id] = _Entry(prompt.directory, tags, prompt.is_composite)
+        for tag in tags:
+            self._tags.setdefault(tag, {})[prompt_id] = None
+        self._directories.setdefault(prompt.directory, {})[prompt_id] = None
+        if prompt.is_composite:
+            self._composite[prompt_id] = None
+
+    def _remove(self, prompt_id: str) -> None:
+        entry = self._entries.pop(prompt_id, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            self._discard(self._tags, tag, prompt_id)
+        self._discard(self._directories, entry.directory, prompt_id)
+        self._composite.pop(prompt_id, None)
+
+    @staticmethod
+    def _discard(buckets: Dict[Any, Dict[str, None]], key: Any, prompt_id: str) -> None:
+        bucket = buckets[key]
+        del bucket[prompt_id]
+        if not bucket:
+            del buckets[key]
+
+    # ------------------------------------------------------------------
+    # PromptIndex listener protocol
+    # ------------------------------------------------------------------
+
+    def rebuild(self, index) -> None:
+        self._entries.clear()
+        self._tags.clear()
+        self._directories.clear()
+        self._composite.clear()
+        for prompt_id, prompt in index.items():
+            self._add(prompt_id, prompt)
+
+    def prompt_added(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._add(prompt_id, prompt)
+
+    def prompt_removed(self, prompt_id: str, prompt: PromptRecord) -> None:
+        self._remove(prompt_id)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def tagged(self, tag: Any) -> List[str]:
+        """Return the IDs of the prompts with ``tag``."""
+        return list(self._tags.get(tag, ()))
+
+    def query(self, query: TagQuery) -> List[str]:
+        """Return the IDs of the prompts matching ``query``, in the order of its most selective part."""
+        included: List[Mapping[str, Any]] = [self._tags.get(tag, _EMPTY) for tag in query.all_tags]
+        if query.any_tags:
+            included.append(self._union(self._tags, query.any_tags))
+        if query.directories:
+            included.append(self._union(self._directories, query.directories))
+        if query.is_composite:
+            included.append(self._composite)
+        excluded = [self._tags.get(tag, _EMPTY) for tag in query.no_tags]
+        excluded += [self._directories.get(directory, _EMPTY) for directory in query.exclude_directories]
+        if query.is_composite is False:
+            excluded.append(self._composite)
+
+        if not included:
+            included.append(self._entries)
+        included.sort(key=len)
+        matches = list(included[0])
+        for bucket in included[1:]:
+            matches = [prompt_id for prompt_id in matches if prompt_id in bucket]
+        for bucket in excluded:
+            if bucket:
+                matches = [prompt_id for prompt_id in matches if prompt_id not in bucket]
+        return matches
+
+    def facets(self, prompt_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Count prompts per tag and per directory, most frequent first.
+
+        Args:
+            prompt_ids: Count over these prompts only (all prompts if None)
+
+        Returns:
+            Dictionary with 'total', 'composite', 'tags' and 'directories'
+        """
+        if prompt_ids is None:
+            total, composite = len(self._entries), len(self._composite)
+            tags = {tag: len(ids) for tag, ids in self._tags.items()}
+            directories = {directory: len(ids) for directory, ids in self._directories.items()}
+        else:
+            total = composite = 0
+            tags, directories = {}, {}
+            for prompt_id in prompt_ids:
+                entry = self._entries.get(prompt_id)
+                if entry is None:
+                    continue
+                total += 1
+                composite += entry.is_composite
+                directories[entry.directory] = directories.get(entry.directory, 0) + 1
+                for tag in entry.tags:
+                    tags[tag] = tags.get(tag, 0) + 1
+        return {
+            "total": total,
+            "composite": composite,
+            "tags": dict(sorted(tags.items(), key=lambda item: (-item[1], str(item[0])))),
+            "directories": dict(sorted(directories.items(), key=lambda item: (-item[1], item[0]))),
+        }
+
+    @staticmethod
+    def _union(buckets: Dict[Any, Dict[str, None]], keys: Iterable[Any]) -> Dict[str, None]:
+        selected = [buckets[key] for key in keys if key in buckets]
+        if len(selected) == 1:
+            return selected[0]
+        union: Dict[str, None] = {}
+        for bucket in selected:
+            union.update(bucket)
+        return union
+
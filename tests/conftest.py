@@ -5,11 +5,14 @@ import pytest
 import nest_asyncio
 import json
 import tempfile
+from datetime import datetime, timezone
 from pathlib import Path
 
 # Ensure src/ is on sys.path for all tests
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
 
+from src.models.unified_prompt import Prompt
+
 # Apply nest_asyncio to allow nested event loops
 nest_asyncio.apply()
 
@@ -75,5 +78,23 @@ def setup_test_environment():
         # Not running tests, no setup needed
         yield None
 
+@pytest.fixture
+def make_prompt():
+    """
+    Factory for in-memory Prompt objects, as a prompt loaded from disk would be.
+
+    The directory and name are taken from the prompt ID; any other Prompt
+    field can be passed as a keyword argument.
+    """
+    def factory(prompt_id, content="", **fields):
+        directory, name = os.path.split(prompt_id)
+        now = datetime.now(timezone.utc)
+        values = dict(id=prompt_id, name=name, filename=f"{name}.md", directory=directory, content=content,
+                      created_at=now, updated_at=now, unique_id=prompt_id)
+        values.update(fields)
+        return Prompt(**values)
+
+    return factory
+
 # Import integration test fixtures
 pytest_plugins = ["tests.integration.test_fixtures"] 
\ No newline at end of file
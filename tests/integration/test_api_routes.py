@@ -36,6 +36,10 @@ class TestPromptAPIRoutes:
             "/api/prompts/{prompt_id}/referenced_by",  # GET references
             "/api/prompts/all",  # GET all prompts
             "/api/prompts/expand",  # POST expand content
+            "/api/prompts/expand/batch",  # POST expand several prompts
+            "/api/prompts/search",  # GET full-text search
+            "/api/prompts/tags/query",  # GET tag query
+            "/api/prompts/tags/facets",  # GET tag counts
         ]
         
         for route in expected_routes:
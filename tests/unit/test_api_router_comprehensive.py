@@ -4,10 +4,11 @@ Tests all router functionality including directories, filesystem, and error hand
 """
 
 import pytest
+import json
 import os
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timezone
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from typing import List, Dict
 
 from src.api.router import (
@@ -25,7 +26,9 @@ from src.api.router import (
 )
 from src.models.unified_prompt import Prompt
 from src.models.prompt import PromptDirectory
+from src.services.listing_snapshots import ListingSnapshots
 from src.services.prompt_service import PromptService
+from src.services.tag_index import TagQuery
 
 
 class TestRouterHelperFunctions:
@@ -145,6 +148,9 @@ class TestRouterEndpoints:
     def setup_method(self):
         """Set up test fixtures"""
         self.mock_prompt_service = Mock(spec=PromptService)
+        self.mock_prompt_service.listing_snapshots = ListingSnapshots(1024 * 1024)
+        self.mock_prompt_service.listing_version.return_value = 1
+        self.listing_request = Request({"type": "http", "method": "GET", "path": "/api/prompts/all", "headers": []})
         self.mock_prompt = Mock(spec=Prompt)
         self.mock_prompt.id = "test_prompt"
         self.mock_prompt.name = "Test Prompt"
@@ -171,14 +177,14 @@ class TestRouterEndpoints:
     async def test_get_all_prompts_empty(self):
         """Test get_all_prompts when no prompts exist"""
         # Mock the get_all_prompts method to return an empty list
-        self.mock_prompt_service.get_all_prompts.return_value = []
+        self.mock_prompt_service.list_prompts.return_value = ([], None)
         
         with patch('src.api.router.get_directory_name', return_value="Test Dir"):
             from src.api.router import get_all_prompts
-            result = await get_all_prompts(self.mock_prompt_service)
+            response = await get_all_prompts(self.listing_request, self.mock_prompt_service)
         
-        assert result == []
-        self.mock_prompt_service.get_all_prompts.assert_called_once_with(include_content=True, include_display_names=True)
+        assert json.loads(response.body) == []
+        self.mock_prompt_service.list_prompts.assert_called_once_with(None, "id", False, TagQuery(), None, None, None)
     
     @pytest.mark.asyncio
     async def test_get_all_prompts_with_data(self):
@@ -192,17 +198,18 @@ class TestRouterEndpoints:
             "tags": ["test"],
             "directory": "/test/dir"
         }
-        self.mock_prompt_service.get_all_prompts.return_value = [mock_prompt_data]
+        self.mock_prompt_service.list_prompts.return_value = ([mock_prompt_data], None)
         
         with patch('src.api.router.get_directory_name', return_value="Test Dir"):
             from src.api.router import get_all_prompts
-            result = await get_all_prompts(self.mock_prompt_service)
+            response = await get_all_prompts(self.listing_request, self.mock_prompt_service)
         
+        result = json.loads(response.body)
         assert len(result) == 1
         assert result[0]["id"] == "test_prompt"
         assert result[0]["name"] == "Test Prompt"
         assert result[0]["directory_name"] == "Test Dir"
-        self.mock_prompt_service.get_all_prompts.assert_called_once_with(include_content=True, include_display_names=True)
+        self.mock_prompt_service.list_prompts.assert_called_once_with(None, "id", False, TagQuery(), None, None, None)
     
     @pytest.mark.asyncio
     async def test_get_prompt_suggestions_success(self):
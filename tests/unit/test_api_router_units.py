@@ -3,15 +3,18 @@ Unit tests for API router functionality.
 Tests individual route functions in isolation with mocked dependencies.
 """
 
+import json
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from datetime import datetime, timezone
 
 # Import the router and models
 from src.api.router import router, get_all_prompts, create_new_prompt, get_prompt_by_id, update_existing_prompt, delete_existing_prompt, rename_prompt_endpoint
 from src.models.unified_prompt import Prompt
+from src.services.listing_snapshots import ListingSnapshots
 from src.services.prompt_service import PromptService
+from src.services.tag_index import TagQuery
 
 
 class TestAPIRouterUnits:
@@ -21,7 +24,14 @@ class TestAPIRouterUnits:
     def mock_prompt_service(self):
         """Create a mock PromptService for testing."""
         service = Mock(spec=PromptService)
+        service.listing_snapshots = ListingSnapshots(1024 * 1024)
+        service.listing_version.return_value = 1
         return service
+
+    @pytest.fixture
+    def listing_request(self):
+        """Create a GET request without conditional or encoding headers."""
+        return Request({"type": "http", "method": "GET", "path": "/api/prompts/all", "headers": []})
     
     @pytest.fixture
     def sample_prompt(self):
@@ -39,7 +49,7 @@ class TestAPIRouterUnits:
         )
 
     @pytest.mark.asyncio
-    async def test_get_all_prompts_success(self, mock_prompt_service, sample_prompt):
+    async def test_get_all_prompts_success(self, mock_prompt_service, listing_request, sample_prompt):
         """Test successful retrieval of all prompts."""
         # Setup - mock the get_all_prompts method to return prompt data
         mock_prompt_data = {
@@ -50,14 +60,16 @@ class TestAPIRouterUnits:
             "tags": ["test", "sample"],
             "directory": "/tmp/test"
         }
-        mock_prompt_service.get_all_prompts.return_value = [mock_prompt_data]
+        mock_prompt_service.list_prompts.return_value = ([mock_prompt_data], None)
         
         with patch('src.api.router.get_directory_name', return_value="Test Directory"):
             # Execute
-            result = await get_all_prompts(mock_prompt_service)
+            response = await get_all_prompts(listing_request, mock_prompt_service)
             
             # Verify
-            mock_prompt_service.get_all_prompts.assert_called_once_with(include_content=True, include_display_names=True)
+            mock_prompt_service.list_prompts.assert_called_once_with(None, "id", False, TagQuery(), None, None, None)
+            assert response.status_code == 200 and "ETag" in response.headers
+            result = json.loads(response.body)
             assert len(result) == 1
             assert result[0]["id"] == "test/sample_prompt"
             assert result[0]["name"] == "sample_prompt"
@@ -66,17 +78,17 @@ class TestAPIRouterUnits:
             assert result[0]["directory_name"] == "Test Directory"
 
     @pytest.mark.asyncio
-    async def test_get_all_prompts_empty(self, mock_prompt_service):
+    async def test_get_all_prompts_empty(self, mock_prompt_service, listing_request):
         """Test retrieval when no prompts exist."""
         # Setup - mock the get_all_prompts method to return empty list
-        mock_prompt_service.get_all_prompts.return_value = []
+        mock_prompt_service.list_prompts.return_value = ([], None)
         
         # Execute
-        result = await get_all_prompts(mock_prompt_service)
+        response = await get_all_prompts(listing_request, mock_prompt_service)
         
         # Verify
-        mock_prompt_service.get_all_prompts.assert_called_once_with(include_content=True, include_display_names=True)
-        assert result == []
+        mock_prompt_service.list_prompts.assert_called_once_with(None, "id", False, TagQuery(), None, None, None)
+        assert json.loads(response.body) == []
 
     @pytest.mark.asyncio
     async def test_create_new_prompt_success(self, mock_prompt_service, sample_prompt):
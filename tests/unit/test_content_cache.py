@@ -0,0 +1,122 @@
+"""
+Unit tests for lazy content loading.
+
+Modules/Classes Tested:
+- src.services.content_cache.ContentCache
+- src.services.prompt_service.PromptService (metadata-only mode)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.content_cache import ContentCache
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "base.md": "---\ndescription: Base\ntags: [core]\n---\nbase text",
+        "composite.md": "intro [[base]] outro",
+        "other.md": "needle in here",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True,
+                         create_default_directory_if_empty=False, lazy_content=True)
+
+
+class TestContentCache:
+    def test_evicts_least_recently_used_by_bytes(self, make_prompt):
+        cache = ContentCache(max_bytes=10)
+        a, b, c = make_prompt("/p/a"), make_prompt("/p/b"), make_prompt("/p/c")
+        cache.put(a, "aaaa")
+        cache.put(b, "bbbb")
+        assert cache.get(a) == "aaaa"  # a is now most recently used
+        cache.put(c, "cccc")
+
+        assert cache.get(b) is None
+        assert cache.get(a) == "aaaa" and cache.get(c) == "cccc"
+        assert cache.bytes == 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_size_counts_utf8_bytes(self, make_prompt):
+        cache = ContentCache(max_bytes=100)
+        cache.put(make_prompt("/p/a"), "é" * 10)
+        assert cache.bytes == 20
+
+    def test_oversized_content_is_not_cached(self, make_prompt):
+        cache = ContentCache(max_bytes=3)
+        prompt = make_prompt("/p/a")
+        cache.put(prompt, "too long")
+        assert len(cache) == 0 and cache.get(prompt) is None
+
+    def test_entry_is_only_valid_for_the_prompt_it_was_loaded_for(self, make_prompt):
+        cache = ContentCache(max_bytes=100)
+        old, new = make_prompt("/p/a"), make_prompt("/p/a")
+        cache.put(old, "old")
+        assert cache.get(new) is None
+        assert cache.stats()["misses"] == 1
+
+
+class TestLazyContentService:
+    def test_index_holds_metadata_only(self, service, prompt_dir):
+        stored = service.prompts[os.path.join(prompt_dir, "composite")]
+        assert stored.content == "" and not stored.content_loaded
+        assert stored.is_composite
+        assert not service.prompts[os.path.join(prompt_dir, "base")].is_composite
+        assert service.prompts[os.path.join(prompt_dir, "base")].tags == ["core"]
+
+    def test_get_prompt_faults_content_in(self, service, prompt_dir):
+        prompt = service.get_prompt("base")
+        assert prompt.content == "base text"
+        service.get_prompt("base")
+        stats = service.content_cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 1)
+        assert not service.prompts[prompt.id].content_loaded
+
+    def test_expansion_reads_included_content(self, service, prompt_dir):
+        expanded, dependencies, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "composite"))
+        assert expanded == "intro base text outro"
+        assert "base" in dependencies and not warnings
+
+    def test_search_listing_and_references_see_content(self, service, prompt_dir):
+        assert [p.name for p in service.find_prompts("needle")] == ["other"]
+        listing = {p["name"]: p for p in service.get_all_prompts(include_content=True)}
+        assert listing["composite"]["content"] == "intro [[base]] outro"
+        assert [p.name for p in service.find_prompts_by_inclusion("base")] == ["composite"]
+
+    def test_save_keeps_index_metadata_only(self, service, prompt_dir):
+        prompt = service.get_prompt("other")
+        prompt.content = "edited [[base]]"
+        assert service.save_prompt(prompt)
+
+        stored = service.prompts[prompt.id]
+        assert not stored.content_loaded and stored.is_composite
+        assert service.get_prompt("other").content == "edited [[base]]"
+
+    def test_reload_drops_stale_content(self, service, prompt_dir):
+        assert service.get_prompt("base").content == "base text"
+        with open(os.path.join(prompt_dir, "base.md"), "w", encoding="utf-8") as f:
+            f.write("changed base text")
+        service.reload_prompts()
+        assert service.get_prompt("base").content == "changed base text"
+
+    def test_eager_mode_is_unchanged(self, prompt_dir):
+        eager = PromptService(base_directories=[prompt_dir], auto_load=True,
+                              create_default_directory_if_empty=False, lazy_content=False)
+        stored = eager.prompts[os.path.join(prompt_dir, "base")]
+        assert stored.content == "base text"
+        assert stored.content_loaded
+        assert eager.get_prompt("base").content == "base text"
@@ -0,0 +1,98 @@
+"""
+Unit tests for the incremental display name engine.
+
+Modules/Classes Tested:
+- src.services.display_names.compute_group_display_names
+- src.services.display_names.DisplayNameIndex
+- src.services.prompt_service.PromptService.calculate_and_cache_display_names
+"""
+
+import random
+
+from src.models.unified_prompt import Prompt
+from src.services.display_names import DisplayNameIndex, compute_group_display_names
+from src.services.prompt_index import PromptIndex
+
+
+def reference_names(prompt_ids):
+    """Display names as computed by the original all-pairs algorithm."""
+    return {pid: Prompt.calculate_display_name(pid, prompt_ids) for pid in prompt_ids}
+
+
+class TestComputeGroupDisplayNames:
+    def test_examples_match_reference(self):
+        groups = [
+            ["/home/user/prompts/restart"],
+            ["/home/user/prompts/general/restart", "/home/user/prompts/project/restart"],
+            ["/a/x/b/n", "/a/y/b/n", "/c/x/b/n"],
+            ["/a/b/n", "/a/b/c/n", "/a/n"],
+            ["rel/n", "n"],
+        ]
+        for group in groups:
+            assert compute_group_display_names(group) == reference_names(group)
+
+    def test_randomised_groups_match_reference(self):
+        rng = random.Random(1234)
+        segments = ["a", "b", "c", "d"]
+        for _ in range(300):
+            ids = set()
+            for _ in range(rng.randint(1, 8)):
+                depth = rng.randint(0, 4)
+                parts = [rng.choice(segments) for _ in range(depth)]
+                prefix = "/" if rng.random() < 0.8 else ""
+                ids.add(prefix + "/".join(parts + ["stem"]))
+            group = sorted(ids)
+            assert compute_group_display_names(group) == reference_names(group), group
+
+
+class TestDisplayNameIndex:
+    def test_tracks_additions_and_removals(self, make_prompt):
+        index = PromptIndex()
+        names = DisplayNameIndex()
+        index.add_listener(names)
+
+        first = make_prompt("/p/general/restart")
+        index[first.id] = first
+        assert names.get(first.id) == "restart"
+
+        second = make_prompt("/p/project/restart")
+        index[second.id] = second
+        assert names.get(first.id) == "general:restart"
+        assert names.get(second.id) == "project:restart"
+        assert index[first.id].display_name == "general:restart"
+
+        del index[second.id]
+        assert names.get(first.id) == "restart"
+        assert names.get(second.id) is None
+
+    def test_only_affected_group_is_recomputed(self, make_prompt):
+        index = PromptIndex()
+        names = DisplayNameIndex()
+        index.add_listener(names)
+        for i in range(20):
+            prompt = make_prompt(f"/p/dir{i}/unique{i}")
+            index[prompt.id] = prompt
+        names.flush()
+
+        before = names.groups_recomputed
+        extra = make_prompt("/p/other/unique3")
+        index[extra.id] = extra
+        names.flush()
+
+        assert names.groups_recomputed == before + 1
+        assert names.get(extra.id) == "other:unique3"
+
+    def test_matches_calculate_all_display_names(self, make_prompt):
+        rng = random.Random(99)
+        index = PromptIndex()
+        names = DisplayNameIndex()
+        index.add_listener(names)
+        ids = set()
+        for _ in range(200):
+            parts = [rng.choice("abc") for _ in range(rng.randint(1, 3))]
+            ids.add("/root/" + "/".join(parts) + "/" + rng.choice(["x", "y", "z"]))
+        for prompt_id in ids:
+            index[prompt_id] = make_prompt(prompt_id)
+
+        expected = Prompt.calculate_all_display_names([{"id": pid, "name": ""} for pid in ids])
+        assert {pid: names.get(pid) for pid in ids} == expected
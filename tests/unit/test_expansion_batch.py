@@ -0,0 +1,134 @@
+"""
+Unit tests for batch prompt expansion.
+
+Modules/Classes Tested:
+- src.services.prompt_service.PromptService (expand_prompts)
+- src.api.router (POST /api/prompts/expand/batch)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "shared.md": "shared [[leaf]]",
+        "leaf.md": "leaf",
+        "first.md": "first [[shared]]",
+        "second.md": "second [[shared]] [[missing]]",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False)
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+    return TestClient(app)
+
+
+def pid(directory, name):
+    return os.path.join(directory, name)
+
+
+class TestExpandPrompts:
+    def test_results_match_single_expansion(self, service, prompt_dir):
+        ids = [pid(prompt_dir, "first"), "second"]
+        results = list(service.expand_prompts(ids))
+        assert [r["prompt_id"] for r in results] == ids
+        for result in results:
+            expanded, dependencies, warnings = service.expand_prompt_content(result["id"])
+            assert result["expanded_content"] == expanded
+            assert sorted(result["dependencies"]) == sorted(dependencies)
+            assert result["warnings"] == warnings
+
+    def test_shared_dependencies_are_expanded_once(self, service, prompt_dir):
+        calls = []
+        original = service._iter_expansion
+
+        def counting(content, parent_directory, inclusions, parent_id, *args, **kwargs):
+            calls.append(parent_id)
+            return original(content, parent_directory, inclusions, parent_id, *args, **kwargs)
+
+        service._iter_expansion = counting
+        list(service.expand_prompts([pid(prompt_dir, "first"), pid(prompt_dir, "second")]))
+        assert calls.count(pid(prompt_dir, "shared")) == 1
+
+    def test_missing_and_repeated_ids(self, service, prompt_dir):
+        results = list(service.expand_prompts(["first", "nothing", "first"]))
+        assert [r["prompt_id"] for r in results] == ["first", "nothing"]
+        assert results[1] == {"prompt_id": "nothing", "error": "Prompt not found: nothing"}
+
+
+@pytest.fixture
+def failing_second(service, prompt_dir):
+    """Make the expansion of "second" raise."""
+    original = service._expand_stored
+
+    def expand_stored(content, parent_directory, inclusions, parent_id, *args, **kwargs):
+        if parent_id == pid(prompt_dir, "second"):
+            raise RuntimeError("broken")
+        return original(content, parent_directory, inclusions, parent_id, *args, **kwargs)
+
+    service._expand_stored = expand_stored
+
+
+class TestExpandPromptsFailures:
+    def test_failing_prompt_gets_an_error_entry(self, service, prompt_dir, failing_second):
+        results = list(service.expand_prompts(["second", "first"]))
+        assert results[0] == {"prompt_id": "second", "id": pid(prompt_dir, "second"),
+                              "error": "Error expanding prompt: second"}
+        assert results[1]["expanded_content"] == "first shared leaf"
+
+
+class TestBatchEndpoint:
+    def test_json_response(self, client, prompt_dir):
+        response = client.post("/api/prompts/expand/batch",
+                               json={"prompt_ids": [pid(prompt_dir, "first"), "nothing"]})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 2
+        assert body["results"][0]["expanded_content"] == "first shared leaf"
+        assert "error" in body["results"][1]
+
+    def test_ndjson_stream(self, client, prompt_dir):
+        ids = [pid(prompt_dir, "first"), pid(prompt_dir, "second")]
+        response = client.post("/api/prompts/expand/batch", json={"prompt_ids": ids, "stream": True})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["id"] for r in results] == ids
+        assert results[1]["expanded_content"] == "second shared leaf [[PROMPT NOT FOUND: missing]]"
+
+    def test_ndjson_stream_continues_after_a_failing_prompt(self, client, prompt_dir, failing_second):
+        ids = [pid(prompt_dir, "second"), pid(prompt_dir, "first")]
+        response = client.post("/api/prompts/expand/batch", json={"prompt_ids": ids, "stream": True})
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["id"] for r in results] == ids
+        assert "error" in results[0]
+        assert results[1]["expanded_content"] == "first shared leaf"
+
+    def test_batch_route_is_not_taken_by_catch_all(self, client):
+        response = client.post("/api/prompts/expand/batch", json={"prompt_ids": []})
+        assert response.status_code == 200 and response.json() == {"results": [], "count": 0}
@@ -0,0 +1,148 @@
+"""
+Unit tests for the expansion cache.
+
+Modules/Classes Tested:
+- src.services.expansion_cache.ExpansionCache
+- src.services.prompt_service.PromptService (cached expansion and invalidation)
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+import pytest
+
+from src.models.unified_prompt import Prompt
+from src.services.expansion_cache import ExpansionCache
+from src.services.prompt_record import PromptRecord
+from src.services.prompt_service import PromptService
+
+
+def make_record(prompt_id, content=""):
+    now = datetime.now(timezone.utc)
+    return PromptRecord.from_prompt(Prompt(
+        id=prompt_id, name=os.path.basename(prompt_id), filename=f"{os.path.basename(prompt_id)}.md",
+        directory=os.path.dirname(prompt_id), content=content, created_at=now, updated_at=now))
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "leaf.md": "leaf text",
+        "middle.md": "middle [[leaf]]",
+        "top.md": "top [[middle]]",
+        "unrelated.md": "nothing to include",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False)
+
+
+def pid(directory, name):
+    return os.path.join(directory, name)
+
+
+class TestExpansionCache:
+    def test_hit_returns_copies(self):
+        cache = ExpansionCache(max_bytes=1000)
+        record = make_record("/p/a", "[[b]]")
+        key = (record.id, None, True)
+        cache.put(key, record, "expanded", {"b"}, ["w"])
+
+        expanded, dependencies, warnings = cache.get(key, record)
+        dependencies.add("mutated")
+        warnings.append("mutated")
+        assert cache.get(key, record) == ("expanded", {"b"}, ["w"])
+        assert cache.stats()["hits"] == 2
+
+    def test_entry_for_another_record_is_a_miss(self):
+        cache = ExpansionCache(max_bytes=1000)
+        record = make_record("/p/a")
+        cache.put((record.id, None, True), record, "x", (), ())
+        assert cache.get((record.id, None, True), make_record("/p/a")) is None
+
+    def test_invalidation_by_reference(self):
+        cache = ExpansionCache(max_bytes=1000)
+        a, c = make_record("/p/a"), make_record("/p/c")
+        cache.put((a.id, None, True), a, "x", {"b"}, ())
+        cache.put((c.id, None, True), c, "y", {"other"}, ())
+
+        assert cache.invalidate_prompt("/q/b", make_record("/q/b")) == 1
+        assert len(cache) == 1 and cache.dependents("b") == set()
+        assert cache.stats()["invalidations"] == 1
+
+    def test_evicts_by_bytes(self):
+        cache = ExpansionCache(max_bytes=6)
+        a, b = make_record("/p/a"), make_record("/p/b")
+        cache.put((a.id, None, True), a, "aaaa", (), ())
+        cache.put((b.id, None, True), b, "bbbb", (), ())
+        assert cache.get((a.id, None, True), a) is None
+        assert cache.stats()["evictions"] == 1 and cache.bytes == 4
+
+
+class TestServiceExpansionCache:
+    def test_repeated_expansion_is_served_from_cache(self, service, prompt_dir):
+        first = service.expand_prompt_content(pid(prompt_dir, "top"))
+        second = service.expand_prompt_content(pid(prompt_dir, "top"))
+
+        assert first == second
+        assert first[0] == "top middle leaf text"
+        stats = service.cache_stats()["expansion"]
+        assert stats["hits"] == 1 and stats["misses"] == 1
+
+    def test_transitive_change_invalidates(self, service, prompt_dir):
+        top_id = pid(prompt_dir, "top")
+        service.expand_prompt_content(top_id)
+        service.expand_prompt_content(pid(prompt_dir, "unrelated"))
+
+        leaf = service.get_prompt(pid(prompt_dir, "leaf"))
+        leaf.content = "new leaf"
+        service.save_prompt(leaf)
+
+        assert service.expand_prompt_content(top_id)[0] == "top middle new leaf"
+        # The unrelated prompt's expansion survived
+        assert service.expansion_cache.stats()["entries"] == 2
+        assert service.expansion_cache.stats()["invalidations"] == 1
+
+    def test_new_prompt_resolves_missing_reference(self, service, prompt_dir):
+        service.create_prompt(name="needs", content="[[later]]", directory=prompt_dir)
+        needs_id = pid(prompt_dir, "needs")
+        assert "PROMPT NOT FOUND" in service.expand_prompt_content(needs_id)[0]
+
+        service.create_prompt(name="later", content="found", directory=prompt_dir)
+        assert service.expand_prompt_content(needs_id)[0] == "found"
+
+    def test_unsaved_content_is_not_cached(self, service, prompt_dir):
+        top_id = pid(prompt_dir, "top")
+        expanded, _, _ = service.expand_inclusions("draft [[leaf]]", parent_id=top_id)
+        assert expanded == "draft leaf text"
+        assert len(service.expansion_cache) == 0
+
+    def test_directory_context_is_part_of_the_key(self, service, prompt_dir):
+        top = service.get_prompt(pid(prompt_dir, "top"))
+        with_dir = service.expand_inclusions(top.content, parent_directory=prompt_dir, parent_id=top.id)
+        without_dir = service.expand_inclusions(top.content, parent_id=top.id)
+        assert with_dir == without_dir
+        assert len(service.expansion_cache) == 2
+
+    def test_reload_invalidates_changed_files_only(self, service, prompt_dir):
+        service.expand_prompt_content(pid(prompt_dir, "top"))
+        service.expand_prompt_content(pid(prompt_dir, "unrelated"))
+
+        path = os.path.join(prompt_dir, "leaf.md")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("edited on disk")
+        os.utime(path, ns=(1, 1))
+        service.reload_prompts()
+
+        assert len(service.expansion_cache) == 1
+        assert service.expand_prompt_content(pid(prompt_dir, "top"))[0] == "top middle edited on disk"
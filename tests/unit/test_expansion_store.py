@@ -0,0 +1,145 @@
+"""
+Unit tests for the persistent expansion store.
+
+Modules/Classes Tested:
+- src.services.expansion_store.ExpansionStore
+- src.services.prompt_service.PromptService (serving expansions from the store after a restart)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.expansion_store import ExpansionStore
+from src.services.prompt_service import PromptService
+
+KEY = ("/p/a", "/p", False)
+
+
+@pytest.fixture
+def store_dir():
+    directory = tempfile.mkdtemp()
+    yield directory
+    shutil.rmtree(directory)
+
+
+class TestExpansionStore:
+    @pytest.mark.parametrize("background", [False, True])
+    def test_round_trip(self, store_dir, background):
+        store = ExpansionStore(store_dir, background=background)
+        store.put(KEY, "c1", "ex\r\npanded \u00e9", {"b", "c"}, ["w"])
+        store.flush()
+        fresh = ExpansionStore(store_dir)
+        assert fresh.get(KEY, "c1") == ("ex\r\npanded \u00e9", {"b", "c"}, ["w"])
+        assert fresh.stats()["hits"] == 1
+
+    def test_pending_write_is_readable(self, store_dir):
+        store = ExpansionStore(store_dir)
+        store.put(KEY, "c1", "expanded", set(), [])
+        assert store.get(KEY, "c1") == ("expanded", set(), [])
+        store.flush()
+
+    def test_other_closure_is_stale(self, store_dir):
+        store = ExpansionStore(store_dir, background=False)
+        store.put(KEY, "c1", "expanded", set(), [])
+        assert store.get(KEY, "c2") is None
+        assert store.get(("/p/a", None, False), "c1") is None
+        assert store.stats()["stale"] == 1
+
+    def test_corrupt_artifact_is_a_miss(self, store_dir):
+        store = ExpansionStore(store_dir, background=False)
+        store.put(KEY, "c1", "expanded", set(), [])
+        (name,) = os.listdir(store_dir)
+        with open(os.path.join(store_dir, name), "w") as f:
+            f.write("{not json")
+        assert store.get(KEY, "c1") is None
+
+    def test_prune(self, store_dir):
+        store = ExpansionStore(store_dir, background=False)
+        store.put(KEY, "c1", "a", set(), [])
+        store.put(("/p/b", "/p", False), "c1", "b", set(), [])
+        store.prune(["/p/b"])
+        assert store.get(KEY, "c1") is None
+        assert store.get(("/p/b", "/p", False), "c1") is not None
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "top.md": "Top [[middle]] [[regex:leaf_.*]]",
+        "middle.md": "Middle [[leaf_1]]",
+        "leaf_1.md": "L1",
+        "leaf_2.md": "L2",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+def start_service(prompt_dir, store_dir):
+    service = PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False)
+    service.expansion_store = ExpansionStore(store_dir, background=False)
+    return service
+
+
+class TestStoredExpansions:
+    def test_restart_serves_from_store(self, prompt_dir, store_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        first = start_service(prompt_dir, store_dir).expand_prompt_content(top_id)
+        assert first[0] == "Top Middle L1 L1\nL2"
+
+        restarted = start_service(prompt_dir, store_dir)
+        expanded, dependencies, warnings = restarted.expand_prompt_content(top_id)
+        assert (expanded, set(dependencies), warnings) == (first[0], set(first[1]), first[2])
+        assert restarted.expansion_store.stats()["hits"] == 1
+        assert restarted.expansion_cache.stats()["entries"] == 1
+
+    def test_changed_dependency_is_not_served(self, prompt_dir, store_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        start_service(prompt_dir, store_dir).expand_prompt_content(top_id)
+
+        with open(os.path.join(prompt_dir, "leaf_1.md"), "w", encoding="utf-8") as f:
+            f.write("L1 changed")
+        restarted = start_service(prompt_dir, store_dir)
+        assert restarted.expand_prompt_content(top_id)[0] == "Top Middle L1 changed L1 changed\nL2"
+        assert restarted.expansion_store.stats()["stale"] == 1
+
+    def test_new_pattern_match_is_not_served(self, prompt_dir, store_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        start_service(prompt_dir, store_dir).expand_prompt_content(top_id)
+
+        with open(os.path.join(prompt_dir, "leaf_3.md"), "w", encoding="utf-8") as f:
+            f.write("L3")
+        restarted = start_service(prompt_dir, store_dir)
+        assert restarted.expand_prompt_content(top_id)[0] == "Top Middle L1 L1\nL2\nL3"
+
+    def test_new_ambiguity_is_not_served(self, store_dir, tmp_path):
+        for name, text in {"a/top.md": "[[shared]]", "b/shared.md": "S"}.items():
+            (tmp_path / name).parent.mkdir(exist_ok=True)
+            (tmp_path / name).write_text(text)
+        top_id = str(tmp_path / "a" / "top")
+        assert start_service(str(tmp_path), store_dir).expand_prompt_content(top_id)[2] == []
+
+        (tmp_path / "c").mkdir()
+        (tmp_path / "c" / "shared.md").write_text("S2")
+        restarted = start_service(str(tmp_path), store_dir)
+        expanded, _, warnings = restarted.expand_prompt_content(top_id)
+        assert expanded in ("S", "S2")
+        assert warnings and warnings[0].startswith("Ambiguous inclusion 'shared'")
+
+    def test_stream_serves_from_store(self, prompt_dir, store_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        start_service(prompt_dir, store_dir).expand_prompt_content(top_id)
+        restarted = start_service(prompt_dir, store_dir)
+        assert "".join(restarted.stream_prompt_expansion(top_id)) == "Top Middle L1 L1\nL2"
+        assert restarted.expansion_store.stats()["hits"] == 1
+
+    def test_disabled_under_tests_by_default(self, prompt_dir):
+        service = PromptService(base_directories=[prompt_dir], auto_load=True,
+                                create_default_directory_if_empty=False)
+        assert service.expansion_store is None
@@ -0,0 +1,147 @@
+"""
+Unit tests for streamed prompt expansion.
+
+Modules/Classes Tested:
+- src.services.expansion_stream.ExpansionStream
+- src.services.prompt_service.PromptService (stream_prompt_expansion)
+- src.api.router (POST /api/prompts/expand with stream=text|ndjson)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.expansion_stream import ExpansionStream
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "leaf.md": "leaf " * 50,
+        "middle.md": "middle [[leaf]] and [[leaf]]",
+        "top.md": "top [[middle]] [[missing]] end",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture(params=[False, True], ids=["content", "metadata-only"])
+def service(request, prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False,
+                         lazy_content=request.param)
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+    return TestClient(app)
+
+
+class TestExpansionStream:
+    @pytest.mark.parametrize("pieces", [["abc", "de", "", "fghij", "k"], ["abcdefghijk"], list("abcdefghijk")])
+    def test_chunks_are_regrouped_to_the_target_size(self, pieces):
+        stream = ExpansionStream("p", iter(pieces), set(), [], chunk_chars=4)
+        chunks = list(stream)
+        assert "".join(chunks) == "abcdefghijk"
+        assert [len(c) for c in chunks] == [4, 4, 3]
+        assert stream.finished
+
+    def test_empty_expansion(self):
+        stream = ExpansionStream("p", iter(["", ""]), set(), [])
+        assert list(stream) == [] and stream.finished
+
+
+class TestServiceStreaming:
+    def test_stream_matches_full_expansion(self, service, prompt_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        stream = service.stream_prompt_expansion(top_id, chunk_chars=64)
+        assert not stream.finished
+        chunks = list(stream)
+
+        expanded, dependencies, warnings = service.expand_prompt_content(top_id)
+        assert len(chunks) > 1 and max(len(c) for c in chunks) <= 64
+        assert "".join(chunks) == expanded
+        assert sorted(stream.dependencies) == sorted(dependencies)
+        assert stream.warnings == warnings
+
+    def test_stream_uses_but_does_not_fill_the_cache(self, service, prompt_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        list(service.stream_prompt_expansion(top_id))
+        assert len(service.expansion_cache) == 0
+
+        expanded, _, _ = service.expand_prompt_content(top_id)
+        hits = service.expansion_cache.stats()["hits"]
+        assert "".join(service.stream_prompt_expansion("top")) == expanded
+        assert service.expansion_cache.stats()["hits"] == hits + 1
+
+    def test_missing_prompt(self, service):
+        with pytest.raises(ValueError):
+            service.stream_prompt_expansion("nothing")
+
+
+class TestStreamingEndpoint:
+    def test_text_stream(self, client, service, prompt_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        response = client.post("/api/prompts/expand", json={"prompt_id": top_id, "stream": "text"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert response.text == service.expand_prompt_content(top_id)[0]
+
+    def test_ndjson_stream(self, client, service, prompt_dir):
+        top_id = os.path.join(prompt_dir, "top")
+        response = client.post("/api/prompts/expand", json={"prompt_id": top_id, "stream": "ndjson"})
+        assert response.status_code == 200
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert records[0] == {"type": "start", "prompt_id": top_id}
+        assert records[-1]["type"] == "end"
+        expanded, dependencies, warnings = service.expand_prompt_content(top_id)
+        assert "".join(r["content"] for r in records[1:-1]) == expanded
+        assert sorted(records[-1]["dependencies"]) == sorted(dependencies)
+        assert records[-1]["warnings"] == warnings
+
+    @pytest.fixture
+    def failing_stream(self, service, monkeypatch):
+        def stream_prompt_expansion(prompt_id, directory=None):
+            def pieces():
+                yield "partial"
+                raise RuntimeError("disk gone")
+            return ExpansionStream(prompt_id, pieces(), set(), [], chunk_chars=4)
+
+        monkeypatch.setattr(service, "stream_prompt_expansion", stream_prompt_expansion)
+
+    def test_text_stream_failure_ends_with_a_marker(self, client, prompt_dir, failing_stream):
+        response = client.post("/api/prompts/expand",
+                               json={"prompt_id": os.path.join(prompt_dir, "top"), "stream": "text"})
+        assert response.status_code == 200
+        assert response.text.startswith("part\n")
+        assert response.text.endswith("[[EXPANSION ERROR: Internal server error during prompt expansion]]")
+
+    def test_ndjson_stream_failure_ends_with_an_error_record(self, client, prompt_dir, failing_stream):
+        top_id = os.path.join(prompt_dir, "top")
+        response = client.post("/api/prompts/expand", json={"prompt_id": top_id, "stream": "ndjson"})
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["type"] for r in records] == ["start", "chunk", "error"]
+        assert records[-1]["prompt_id"] == top_id
+
+    def test_unknown_prompt_is_404_before_streaming(self, client):
+        response = client.post("/api/prompts/expand", json={"prompt_id": "nothing", "stream": "ndjson"})
+        assert response.status_code == 404
+
+    def test_json_response_unchanged(self, client, prompt_dir):
+        response = client.post("/api/prompts/expand", json={"prompt_id": os.path.join(prompt_dir, "middle")})
+        assert response.status_code == 200
+        assert set(response.json()) == {"prompt_id", "original_content", "expanded_content", "dependencies",
+                                        "warnings"}
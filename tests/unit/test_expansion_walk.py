@@ -0,0 +1,131 @@
+"""
+Unit tests for per-call expansion state: memoization and budgets.
+
+Modules/Classes Tested:
+- src.services.expansion_walk.ExpansionWalk
+- src.services.expansion_walk.ExpansionBudget
+- src.services.prompt_service.PromptService (memoized, budgeted expansion)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.expansion_walk import ExpansionBudget, ExpansionWalk
+from src.services.prompt_service import PromptService
+
+
+def write_prompts(directory, files):
+    for name, text in files.items():
+        with open(os.path.join(directory, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    yield directory
+    shutil.rmtree(directory)
+
+
+def make_service(directory, files, **budgets):
+    write_prompts(directory, files)
+    service = PromptService(base_directories=[directory], auto_load=True, create_default_directory_if_empty=False)
+    for name, value in budgets.items():
+        setattr(service, name, value)
+    return service
+
+
+def expand_both_ways(service, prompt_id):
+    """Expand without the memo (streaming) and with it; return both results."""
+    stream = service.stream_prompt_expansion(prompt_id)
+    unmemoized = ("".join(stream), sorted(stream.dependencies), stream.warnings)
+    expanded, dependencies, warnings = service.expand_prompt_content(prompt_id)
+    return unmemoized, (expanded, sorted(dependencies), warnings)
+
+
+GRAPHS = {
+    "diamond": {"a": "A [[b]] [[c]]", "b": "B [[d]]", "c": "C [[d]]", "d": "D [[e]] [[missing]]", "e": "E"},
+    "cycle": {"a": "[[b]] [[c]] [[b]]", "b": "B [[c]]", "c": "C [[b]] [[d]]", "d": "D"},
+    "self": {"a": "[[b]] [[b]]", "b": "B [[a]] [[c]]", "c": "C [[a]]"},
+}
+
+
+class TestExpansionWalk:
+    def test_depth_limit_marks_and_continues(self):
+        walk = ExpansionWalk(ExpansionBudget(max_depth=2))
+        assert walk.enter("x", 2) is None
+        assert walk.enter("y", 3) == "[[EXPANSION LIMIT: max_depth at y]]"
+        assert not walk.stopped and walk.truncated
+        assert walk.warnings[0].startswith("Expansion limit reached: max_depth=2")
+
+    def test_char_limit_truncates_and_stops(self):
+        walk = ExpansionWalk(ExpansionBudget(max_chars=5))
+        assert walk.take("abc") == "abc"
+        assert walk.take("defg") == "de[[EXPANSION LIMIT: max_chars]]"
+        assert walk.stopped and walk.budget.stopped == "max_chars"
+
+    def test_forks_share_budget_and_memo(self):
+        walk = ExpansionWalk(ExpansionBudget(max_nodes=1))
+        child = walk.fork()
+        child.enter("x", 1)
+        assert child.budget is walk.budget and child.memo is walk.memo
+        assert walk.enter("y", 1) == "[[EXPANSION LIMIT: max_nodes]]"
+
+
+class TestMemoizedExpansion:
+    @pytest.mark.parametrize("graph", sorted(GRAPHS))
+    def test_memo_does_not_change_the_result(self, prompt_dir, graph):
+        service = make_service(prompt_dir, GRAPHS[graph])
+        unmemoized, memoized = expand_both_ways(service, os.path.join(prompt_dir, "a"))
+        assert memoized == unmemoized
+
+    def test_shared_subtree_is_expanded_once(self, prompt_dir):
+        service = make_service(prompt_dir, GRAPHS["diamond"])
+        walk = service._expansion_walk()
+        pieces = service._iter_expansion("[[a]]", prompt_dir, set(), None, None, walk)
+        assert "".join(pieces) == "A B D E [[PROMPT NOT FOUND: missing]] C D E [[PROMPT NOT FOUND: missing]]"
+        # The reused subtree still counts its two inclusions against the node budget
+        assert walk.memo_hits == 1 and walk.budget.nodes == 7
+
+    def test_layered_library_stays_linear(self, prompt_dir):
+        files = {f"l{i}": f"[[l{i + 1}]][[l{i + 1}]]" for i in range(30)}
+        files["l30"] = "x"
+        service = make_service(prompt_dir, files, EXPANSION_MAX_CHARS=0, EXPANSION_MAX_NODES=0)
+        walk = service._expansion_walk()
+        # Each layer is expanded once; its second occurrence is reused
+        expanded = "".join(service._iter_expansion("[[l20]]", prompt_dir, set(), None, None, walk))
+        assert expanded == "x" * 2 ** 10
+        assert walk.budget.nodes == 2 ** 11 - 1 and walk.memo_hits == 9
+
+
+class TestBudgets:
+    def test_depth_budget(self, prompt_dir):
+        files = {f"n{i}": f"{i} [[n{i + 1}]] [[leaf]]" for i in range(5)}
+        files["n5"] = "5"
+        files["leaf"] = "L"
+        service = make_service(prompt_dir, files, EXPANSION_MAX_DEPTH=3)
+        expanded, _, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "n0"))
+        assert expanded == "0 1 2 3 [[EXPANSION LIMIT: max_depth at n4]] [[EXPANSION LIMIT: max_depth at leaf]] L L L"
+        assert warnings == ["Expansion limit reached: max_depth=3 exceeded at 'n4'",
+                            "Expansion limit reached: max_depth=3 exceeded at 'leaf'"]
+
+    def test_node_budget_stops_runaway_expansion(self, prompt_dir):
+        files = {f"l{i}": f"[[l{i + 1}]][[l{i + 1}]]" for i in range(40)}
+        files["l40"] = "x"
+        service = make_service(prompt_dir, files, EXPANSION_MAX_NODES=1000)
+        stream = service.stream_prompt_expansion(os.path.join(prompt_dir, "l0"))
+        expanded = "".join(stream)
+        assert expanded.endswith("[[EXPANSION LIMIT: max_nodes]]")
+        assert [w for w in stream.warnings if w.startswith("Expansion limit reached: max_nodes=1000")]
+
+    @pytest.mark.parametrize("limit", [1, 7, 12, 20, 1000])
+    def test_char_budget_matches_with_and_without_memo(self, prompt_dir, limit):
+        service = make_service(prompt_dir, GRAPHS["diamond"], EXPANSION_MAX_CHARS=limit)
+        unmemoized, memoized = expand_both_ways(service, os.path.join(prompt_dir, "a"))
+        assert memoized == unmemoized
+        expanded = memoized[0]
+        if limit < 1000:
+            assert expanded == unmemoized[0][:limit] + "[[EXPANSION LIMIT: max_chars]]"
@@ -0,0 +1,99 @@
+"""
+Unit tests for front matter parsing.
+
+Modules/Classes Tested:
+- src.services.front_matter (parse_flat_front_matter, parse_front_matter,
+  split_front_matter, extract_front_matter)
+- src.services.base.base_service.BaseResourceService.extract_front_matter
+"""
+
+import pytest
+import yaml  # type: ignore[import-untyped]
+
+from src.services.front_matter import (
+    extract_front_matter,
+    parse_flat_front_matter,
+    parse_front_matter,
+    split_front_matter,
+)
+
+
+FAST_PATH_BLOCKS = [
+    "description: Restart the service\ntags:\n- ops\n- restart",
+    "description: Restart the service\ntags:\n  - ops\n  - restart",
+    "description: 'It''s quoted'\ntags: [a, b, c]",
+    'description: "double quoted"\ntags: []',
+    "description:\ntags:\n- only",
+    "# a comment\ndescription: with, comma and-dash\ntags: ['x y', \"z\"]",
+    "description: url http://example.com/a\ntags:\n- a",
+    "title: Something\nauthor: someone_else",
+]
+
+FALLBACK_BLOCKS = [
+    "description: 42\ntags: [1, 2]",
+    "description: yes\ntags: []",
+    "description: >\n  folded\n  text\ntags: []",
+    "description: &anchor value\nother: *anchor",
+    "description: multi-line\n  plain scalar",
+    "nested:\n  key: value",
+    "description: value # trailing comment",
+    "tags:\n- a\n- {b: c}",
+    "on: something",
+]
+
+
+class TestFastPath:
+    @pytest.mark.parametrize("block", FAST_PATH_BLOCKS)
+    def test_fast_path_matches_pyyaml(self, block):
+        parsed = parse_flat_front_matter(block)
+        assert parsed is not None
+        assert parsed == yaml.safe_load(block)
+
+    @pytest.mark.parametrize("block", FALLBACK_BLOCKS)
+    def test_ambiguous_blocks_fall_back(self, block):
+        assert parse_flat_front_matter(block) is None
+        assert parse_front_matter(block) == yaml.safe_load(block)
+
+    def test_fast_path_can_be_disabled(self):
+        block = FAST_PATH_BLOCKS[0]
+        assert parse_front_matter(block, fast=False) == parse_front_matter(block)
+
+
+class TestParseFrontMatter:
+    def test_legacy_python_object_tags_are_read_as_strings(self):
+        block = "description: legacy\nkind: !!python/object/apply:coordinator.Kind [x]"
+        meta = parse_front_matter(block)
+        assert meta["description"] == "legacy"
+        assert isinstance(meta["kind"], str)
+
+    def test_invalid_yaml_raises(self):
+        with pytest.raises(yaml.YAMLError):
+            parse_front_matter("description: [unclosed")
+
+
+class TestSplitAndExtract:
+    def test_split_returns_block_and_body_offset(self):
+        text = "---\ndescription: d\n---\n\nBody"
+        block, offset = split_front_matter(text)
+        assert block == "description: d"
+        assert text[offset:].strip() == "Body"
+
+    def test_split_without_front_matter(self):
+        assert split_front_matter("Just text") == (None, 0)
+        assert split_front_matter("--- never closed") == (None, 0)
+
+    def test_extract_front_matter(self):
+        meta, body = extract_front_matter("---\ndescription: d\ntags:\n- a\n---\n\nBody\n")
+        assert meta == {"description": "d", "tags": ["a"]}
+        assert body == "Body"
+
+    def test_extract_keeps_text_when_front_matter_is_invalid(self):
+        text = "---\ndescription: [unclosed\n---\nBody"
+        assert extract_front_matter(text) == ({}, text)
+
+    def test_base_service_delegates(self):
+        from src.services.base.base_service import BaseResourceService
+
+        # The method does not use instance state, so skip directory setup
+        service = BaseResourceService.__new__(BaseResourceService)
+        assert service.extract_front_matter("---\ndescription: d\n---\nBody") == ({"description": "d"}, "Body")
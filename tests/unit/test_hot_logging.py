@@ -0,0 +1,77 @@
+"""
+Unit tests for hot-path logging helpers.
+
+Modules/Classes Tested:
+- src.services.hot_logging (configure_handlers, level_enabled, debug_enabled, sample, sampled)
+- src.services.prompt_service.PromptService.get_prompt (logging cost)
+"""
+
+import sys
+
+import pytest
+from loguru import logger
+
+from src.services import hot_logging
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def sink_level():
+    """Replace loguru handlers with a collecting sink at a chosen level."""
+    records = []
+
+    def configure(level):
+        hot_logging.configure_handlers({"sink": records.append, "level": level, "format": "{message}"})
+        return records
+
+    yield configure
+    hot_logging.configure_handlers({"sink": sys.stderr})
+
+
+class TestLevelGuards:
+    def test_debug_disabled_at_info(self, sink_level):
+        sink_level("INFO")
+        assert not hot_logging.debug_enabled()
+        assert hot_logging.level_enabled("WARNING")
+
+    def test_debug_enabled_at_debug(self, sink_level):
+        sink_level("DEBUG")
+        assert hot_logging.debug_enabled()
+
+    def test_nothing_enabled_without_handlers(self, sink_level):
+        sink_level("DEBUG")
+        hot_logging.configure_handlers()
+        assert not hot_logging.level_enabled("CRITICAL")
+
+
+class TestSampling:
+    def test_sample_lets_one_in_n_through(self):
+        hits = [hot_logging.sample("test.sample", every=5) for _ in range(20)]
+        assert hits.count(True) == 4
+        assert hits[0]
+
+    def test_sampled_is_false_when_debug_is_off(self, sink_level):
+        sink_level("INFO")
+        assert not any(hot_logging.sampled("test.sampled_off", every=1) for _ in range(3))
+
+    def test_sampled_counts_per_key(self, sink_level):
+        sink_level("DEBUG")
+        assert hot_logging.sampled("test.key_a", every=2)
+        assert hot_logging.sampled("test.key_b", every=2)
+        assert not hot_logging.sampled("test.key_a", every=2)
+
+
+class TestServiceLogging:
+    def test_get_prompt_does_not_format_when_debug_is_off(self, sink_level, tmp_path, monkeypatch):
+        (tmp_path / "a.md").write_text("body")
+        service = PromptService(base_directories=[str(tmp_path)], create_default_directory_if_empty=False)
+        records = sink_level("INFO")
+
+        # Any attempt to list the whole index for a log line would show up here
+        monkeypatch.setattr(type(service.prompts), "keys", lambda self: pytest.fail("index keys listed"))
+        assert service.get_prompt("a") is not None
+        assert records == []
+
+    def test_lazy_arguments_are_not_evaluated_when_filtered(self, sink_level):
+        sink_level("INFO")
+        logger.opt(lazy=True).debug("{}", lambda: pytest.fail("evaluated"))
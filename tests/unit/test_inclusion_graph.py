@@ -0,0 +1,112 @@
+"""
+Unit tests for the reverse inclusion index.
+
+Modules/Classes Tested:
+- src.services.inclusion_graph.InclusionGraph
+- src.services.prompt_record.inclusion_references
+- src.services.prompt_service.PromptService (get_references_to_prompt,
+  find_prompts_by_inclusion)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.prompt_record import inclusion_references
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_root():
+    root = tempfile.mkdtemp()
+    files = {
+        "one/base.md": "base in one",
+        "one/user.md": "uses [[base]]",
+        "one/outer.md": "wraps [[user.md]]",
+        "two/base.md": "base in two",
+        "two/user.md": "uses [[base]] too",
+        "two/cycle_a.md": "[[cycle_b]]",
+        "two/cycle_b.md": "[[cycle_a]]",
+    }
+    for name, text in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    yield root
+    shutil.rmtree(root)
+
+
+@pytest.fixture(params=[False, True], ids=["content", "metadata-only"])
+def service(request, prompt_root):
+    return PromptService(base_directories=[os.path.join(prompt_root, "one"), os.path.join(prompt_root, "two")],
+                         auto_load=True, create_default_directory_if_empty=False, lazy_content=request.param)
+
+
+def pid(root, name):
+    return os.path.join(root, name)
+
+
+class TestInclusionReferences:
+    def test_references_are_normalized_and_deduplicated(self):
+        assert inclusion_references("[[a]] [[b.md]] [[a]] [[.md]] text") == ("a", "b")
+        assert inclusion_references("plain") == ()
+
+
+class TestReferencedBy:
+    def test_direct_and_transitive_referrers(self, service, prompt_root):
+        references = service.get_references_to_prompt(pid(prompt_root, "one/base"))
+        assert [(r["id"], r["direct"]) for r in references] == [
+            (pid(prompt_root, "one/user"), True),
+            (pid(prompt_root, "one/outer"), False),
+        ]
+
+    def test_names_resolve_in_the_referrers_directory(self, service, prompt_root):
+        references = service.get_references_to_prompt(pid(prompt_root, "two/base"))
+        assert [r["id"] for r in references] == [pid(prompt_root, "two/user")]
+
+    def test_cycles_terminate(self, service, prompt_root):
+        references = service.get_references_to_prompt(pid(prompt_root, "two/cycle_a"))
+        assert [r["id"] for r in references] == [pid(prompt_root, "two/cycle_b")]
+
+    def test_missing_target(self, service):
+        assert service.get_references_to_prompt("/nowhere/nothing") is None
+        assert service.find_prompts_by_inclusion("nothing") == []
+
+    def test_find_prompts_by_inclusion_accepts_names_and_ids(self, service, prompt_root):
+        by_id = {p.id for p in service.find_prompts_by_inclusion(pid(prompt_root, "one/user"))}
+        by_name_md = {p.id for p in service.find_prompts_by_inclusion(pid(prompt_root, "one/user") + ".md")}
+        assert by_id == by_name_md == {pid(prompt_root, "one/outer")}
+
+    def test_graph_does_not_load_content(self, service, prompt_root):
+        if not service.lazy_content:
+            pytest.skip("only meaningful in metadata-only mode")
+        service.get_references_to_prompt(pid(prompt_root, "one/base"))
+        assert len(service.content_cache) == 0
+
+
+class TestGraphMaintenance:
+    def test_save_updates_the_graph(self, service, prompt_root):
+        user = service.get_prompt(pid(prompt_root, "one/user"))
+        user.content = "no longer includes anything"
+        service.save_prompt(user)
+        assert service.get_references_to_prompt(pid(prompt_root, "one/base")) == []
+
+    def test_delete_updates_the_graph(self, service, prompt_root):
+        service.delete_prompt(pid(prompt_root, "one/user"))
+        assert service.get_references_to_prompt(pid(prompt_root, "one/base")) == []
+        assert service.inclusion_graph.referrers("user") == [pid(prompt_root, "one/outer")]
+
+    def test_rename_updates_the_graph(self, service, prompt_root):
+        assert service.rename_prompt(pid(prompt_root, "one/outer"), "renamed")
+        references = service.get_references_to_prompt(pid(prompt_root, "one/user"))
+        assert [r["id"] for r in references] == [pid(prompt_root, "one/renamed")]
+
+    def test_references_fall_back_to_global_resolution(self, service, prompt_root):
+        # Without a base in its own directory, one/user's [[base]] resolves to two/base
+        service.delete_prompt(pid(prompt_root, "one/base"))
+        references = service.get_references_to_prompt(pid(prompt_root, "two/base"))
+        assert {r["id"] for r in references} == {pid(prompt_root, "two/user"), pid(prompt_root, "one/user"),
+                                                 pid(prompt_root, "one/outer")}
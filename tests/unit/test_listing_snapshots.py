@@ -0,0 +1,119 @@
+"""
+Unit tests for pre-serialized prompt listings.
+
+Modules/Classes Tested:
+- src.services.listing_snapshots (ListingSnapshots, ListingSnapshot)
+- src.services.prompt_service.PromptService.listing_version
+- src.api.router (ETag and 304 on GET /api/prompts/all and /directories/{path}/prompts)
+"""
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.listing_snapshots import ListingSnapshot, ListingSnapshots
+from src.services.prompt_service import PromptService
+
+
+class TestListingSnapshots:
+    def test_snapshots_belong_to_a_version(self):
+        snapshots = ListingSnapshots(1024 * 1024)
+        snapshot = snapshots.put("all", 1, [{"id": "a"}], {"X-Next-Cursor": "c"})
+        assert json.loads(snapshot.body) == [{"id": "a"}] and snapshot.headers == {"X-Next-Cursor": "c"}
+        assert snapshots.get("all", 1) is snapshot
+        assert snapshots.get("all", 2) is None and len(snapshots) == 0
+
+    def test_etag(self):
+        snapshot = ListingSnapshot(b'[{"id":"a"}]')
+        assert snapshot.etag == ListingSnapshot(b'[{"id":"a"}]').etag != ListingSnapshot(b'[]').etag
+        assert snapshot.matches(snapshot.etag) and snapshot.matches(f'"other", W/{snapshot.gzip_etag}')
+        assert snapshot.matches("*") and not snapshot.matches('"other"') and not snapshot.matches(None)
+
+    def test_gzip_and_eviction(self):
+        snapshots = ListingSnapshots(6000)
+        assert snapshots.put("small", 1, []).gzipped() is None
+        snapshots.discard("small")
+        payload = [{"id": f"prompt_{i}"} for i in range(100)]
+        big = snapshots.put("big", 1, payload)
+        assert json.loads(gzip.decompress(snapshots.compress("big", big))) == payload
+        assert snapshots.bytes == big.size
+        for i in range(3):
+            snapshots.put(i, 1, payload)
+        assert snapshots.get("big", 1) is None and snapshots.bytes <= snapshots.max_bytes
+        assert snapshots.stats()["evictions"] > 0
+
+    def test_generation_follows_the_index(self):
+        service = PromptService(base_directories=[], auto_load=False, create_default_directory_if_empty=False)
+        version = service.listing_version()
+        service.prompts = {}
+        assert service.listing_version() > version
+        version = service.listing_version()
+        service.prompts.clear()
+        assert service.listing_version() > version
+
+
+@pytest.fixture
+def service():
+    directory = tempfile.mkdtemp()
+    for name in ("alpha", "beta"):
+        with open(os.path.join(directory, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(f"{name} " * 200)
+    yield PromptService(base_directories=[directory], auto_load=True, create_default_directory_if_empty=False)
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def client(service):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+    return TestClient(app)
+
+
+class TestListingEndpoints:
+    def test_not_modified_until_a_change(self, service, client):
+        response = client.get("/api/prompts/all")
+        etag = response.headers["ETag"]
+        assert [p["name"] for p in response.json()] == ["alpha", "beta"]
+
+        with patch.object(service, "list_prompts", side_effect=AssertionError("index touched")):
+            response = client.get("/api/prompts/all", headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.headers["ETag"] == etag
+
+        prompt = service.get_prompt("beta")
+        prompt.description = "Changed"
+        assert service.save_prompt(prompt)
+        response = client.get("/api/prompts/all", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["ETag"] != etag
+        assert response.json()[1]["description"] == "Changed"
+
+    def test_directory_rename_changes_the_listing(self, service, client):
+        etag = client.get("/api/prompts/all").headers["ETag"]
+        service.directories[0].name = "Renamed"
+        response = client.get("/api/prompts/all", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.json()[0]["directory_name"] == "Renamed"
+
+    def test_variants_and_gzip(self, service, client):
+        params = {"limit": 1, "fields": "name,content"}
+        response = client.get("/api/prompts/all", params=params, headers={"Accept-Encoding": "gzip"})
+        assert response.json() == [{"name": "alpha", "content": "alpha " * 200}]
+        assert response.headers["Content-Encoding"] == "gzip" and response.headers["ETag"].endswith('-gzip"')
+        assert "X-Next-Cursor" in response.headers
+        response = client.get("/api/prompts/all", params=params, headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304 and "X-Next-Cursor" in response.headers
+
+        directory = service.directories[0].path
+        response = client.get(f"/api/prompts/directories/{directory}/prompts")
+        assert [p["display_name"] for p in response.json()] == ["alpha", "beta"]
+        response = client.get(f"/api/prompts/directories/{directory}/prompts",
+                              headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+        assert service.cache_stats()["listings"]["not_modified"] == 2
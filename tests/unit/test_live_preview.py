@@ -0,0 +1,127 @@
+"""
+Unit tests for incremental live-preview expansion.
+
+Modules/Classes Tested:
+- src.services.live_preview (LivePreview, diff_pieces, common prefix/suffix)
+- src.services.prompt_index.PromptIndex (generation)
+- src.api.websocket_routes.websocket_endpoint (incremental "expand" action)
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from fastapi import WebSocket, WebSocketDisconnect
+
+from src.api.websocket_routes import websocket_endpoint
+from src.services.live_preview import LivePreview, common_prefix_length, common_suffix_length, diff_pieces
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {"greeting.md": "Hello [[name]]", "name.md": "World", "editing.md": "draft"}
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False)
+
+
+def apply(text, delta):
+    result = text[:delta["start"]] + delta["text"] + text[delta["end"]:]
+    assert len(result) == delta["length"]
+    return result
+
+
+class TestDiff:
+    @pytest.mark.parametrize("a, b, prefix, suffix", [
+        ("abcdef", "abcxef", 3, 2), ("", "abc", 0, 0), ("same", "same", 4, 4), ("xabc", "yabc", 0, 3),
+    ])
+    def test_common_prefix_and_suffix(self, a, b, prefix, suffix):
+        assert common_prefix_length(a, b) == prefix
+        assert common_suffix_length(a, b) == suffix
+
+    def test_random_edits_round_trip(self):
+        rng = random.Random(7)
+        alphabet = "ab[]x"
+        for _ in range(300):
+            old = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))) for _ in range(rng.randint(0, 5))]
+            new = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 6))) for _ in range(rng.randint(0, 5))]
+            start, old_end, new_end, length = diff_pieces(old, new)
+            old_text, new_text = "".join(old), "".join(new)
+            assert old_text[:start] + new_text[start:new_end] + old_text[old_end:] == new_text
+            assert length == len(new_text)
+
+
+class TestLivePreview:
+    def test_updates_match_full_expansion(self, service, prompt_dir):
+        editing_id = os.path.join(prompt_dir, "editing")
+        preview = LivePreview(service, editing_id)
+        shown = ""
+        for buffer in ["Intro", "Intro [[greeting]]", "Intro [[greeting]] and [[name]]",
+                       "Intro! [[greeting]] and [[name]]", "Intro! [[missing]] and [[name]]", ""]:
+            shown = apply(shown, preview.update(buffer))
+            assert shown == service.expand_inclusions(buffer, parent_id=editing_id)[0]
+
+    def test_only_changed_markers_are_expanded(self, service, prompt_dir):
+        preview = LivePreview(service, os.path.join(prompt_dir, "editing"))
+        first = preview.update("A [[greeting]] B [[name]]")
+        assert (first["expanded"], first["reused"]) == (2, 0)
+
+        delta = preview.update("A [[greeting]] B! [[name]] [[name]]")
+        assert (delta["expanded"], delta["reused"]) == (0, 3)
+        # Only the edited literal and the new marker are sent
+        assert delta["text"] == "! World"
+
+    def test_index_changes_drop_saved_expansions(self, service, prompt_dir):
+        preview = LivePreview(service, os.path.join(prompt_dir, "editing"))
+        preview.update("[[name]]")
+        name = service.get_prompt(os.path.join(prompt_dir, "name"))
+        name.content = "Everyone"
+        service.save_prompt(name)
+
+        delta = preview.update("[[name]]")
+        assert delta["expanded"] == 1 and delta["text"] == "Everyone"
+
+    def test_reset_sends_everything(self, service, prompt_dir):
+        preview = LivePreview(service, os.path.join(prompt_dir, "editing"))
+        preview.update("x [[name]]")
+        preview.reset()
+        delta = preview.update("x [[name]]")
+        assert (delta["start"], delta["end"], delta["text"]) == (0, 0, "x World")
+
+    def test_generation_counts_index_changes(self, service, prompt_dir):
+        generation = service.prompts.generation
+        service.delete_prompt(os.path.join(prompt_dir, "name"))
+        assert service.prompts.generation > generation
+
+
+class TestWebSocketIncrementalExpand:
+    @pytest.mark.asyncio
+    async def test_incremental_expand_sends_deltas(self, service, prompt_dir):
+        editing_id = os.path.join(prompt_dir, "editing")
+        websocket = Mock(spec=WebSocket)
+        websocket.accept = AsyncMock()
+        websocket.send_json = AsyncMock()
+        websocket.receive_json = AsyncMock(side_effect=[
+            {"action": "expand", "incremental": True, "content": "Say [[greeting]]"},
+            {"action": "expand", "incremental": True, "content": "Say [[greeting]]!"},
+            WebSocketDisconnect(code=1000),
+        ])
+        with patch('src.api.websocket_routes.get_ws_prompt_service', AsyncMock(return_value=service)):
+            await websocket_endpoint(websocket, editing_id)
+
+        first, second = [call[0][0] for call in websocket.send_json.call_args_list[1:]]
+        assert first["action"] == second["action"] == "expanded_delta"
+        assert apply(apply("", first), second) == "Say Hello World!"
+        assert second["text"] == "!" and second["version"] == 2
@@ -0,0 +1,57 @@
+"""
+Unit tests for the MCP server prompt tools.
+
+Modules/Classes Tested:
+- src.mcp_server.server.PromptManagerMCPServer (list_prompts, get_prompt, search_prompts tools)
+"""
+
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from src.mcp_server.server import MCPRequest, PromptManagerMCPServer
+from src.services.prompt_service import PromptService
+
+
+class TestMCPPromptTools:
+    """Tests for the prompt tools called through tools/call"""
+
+    @pytest.fixture
+    def server(self):
+        directory = tempfile.mkdtemp()
+        with open(os.path.join(directory, "greeting.md"), "w", encoding="utf-8") as f:
+            f.write("---\ndescription: Says hello\n---\nHello there")
+        service = PromptService(base_directories=[directory], auto_load=True, create_default_directory_if_empty=False)
+        with patch("src.mcp_server.server.PromptService", return_value=service):
+            yield PromptManagerMCPServer(), directory
+        shutil.rmtree(directory)
+
+    async def call(self, server, name, **arguments):
+        response = await server.handle_request(
+            MCPRequest(id="1", method="tools/call", params={"name": name, "arguments": arguments}))
+        assert response.error is None, response.error
+        return response.result
+
+    @pytest.mark.asyncio
+    async def test_list_prompts(self, server):
+        server, directory = server
+        result = await self.call(server, "list_prompts")
+        assert result["total_count"] == 1
+        assert result["prompts"][0] == {
+            "id": os.path.join(directory, "greeting"),
+            "unique_id": os.path.join(directory, "greeting"),
+            "directory": directory,
+            "path": os.path.join(directory, "greeting.md"),
+            "content_preview": "Hello there",
+        }
+
+    @pytest.mark.asyncio
+    async def test_get_and_search_prompts(self, server):
+        server, directory = server
+        prompt = await self.call(server, "get_prompt", prompt_id="greeting")
+        assert prompt["path"] == os.path.join(directory, "greeting.md") and prompt["content"] == "Hello there"
+        result = await self.call(server, "search_prompts", query="hello")
+        assert [p["path"] for p in result["prompts"]] == [os.path.join(directory, "greeting.md")]
@@ -0,0 +1,129 @@
+"""
+Unit tests for the persistent parse cache.
+
+Modules/Classes Tested:
+- src.services.parse_cache.ParseCache
+- src.services.prompt_loader.PromptLoader (cache hits and misses)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.parse_cache import ParseCache
+from src.services.prompt_loader import PromptLoader, parse_prompt_source
+
+
+@pytest.fixture
+def workdir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class TestParseCache:
+    def test_roundtrip_through_disk(self, workdir):
+        cache_path = os.path.join(workdir, "cache.json")
+        cache = ParseCache(cache_path)
+        cache.store("/p/a.md", 10, 20, "desc", ["t"], 5, 15)
+        assert cache.save()
+
+        reloaded = ParseCache(cache_path)
+        entry = reloaded.lookup("/p/a.md", 10, 20)
+        assert entry.description == "desc"
+        assert (entry.body_start, entry.body_end) == (5, 15)
+        assert reloaded.lookup("/p/a.md", 11, 20) is None
+        assert reloaded.stats()["hit_rate"] == 0.5
+
+    def test_corrupt_or_outdated_file_is_ignored(self, workdir):
+        cache_path = os.path.join(workdir, "cache.json")
+        write(cache_path, "{not json")
+        assert len(ParseCache(cache_path)) == 0
+
+        write(cache_path, json.dumps({"version": ParseCache.FORMAT_VERSION + 1,
+                                      "entries": {"/p/a.md": [1, 2, None, [], 0, 0]}}))
+        assert len(ParseCache(cache_path)) == 0
+
+    @pytest.mark.parametrize("entry", [
+        [1, 2, "only-three"],
+        [1, 2, None, [], "0", 4],
+        [1, 2, None, "tags", 0, 4],
+        [1, 2, ["desc"], [], 0, 4],
+        [1, 2, None, [], 0, True],
+        {"mtime": 1},
+    ])
+    def test_malformed_entry_is_a_miss(self, workdir, entry):
+        cache_path = os.path.join(workdir, "cache.json")
+        write(cache_path, json.dumps({"version": ParseCache.FORMAT_VERSION, "entries": {"/p/a.md": entry}}))
+        cache = ParseCache(cache_path)
+        assert cache.lookup("/p/a.md", 1, 2) is None
+        assert len(cache) == 0
+
+    def test_non_json_metadata_is_not_cached(self):
+        import datetime
+        cache = ParseCache(None)
+        cache.store("/p/a.md", 1, 2, datetime.date(2024, 1, 1), [], 0, 0)
+        assert cache.lookup("/p/a.md", 1, 2) is None
+
+    def test_non_persistent_cache_never_writes(self, workdir):
+        cache_path = os.path.join(workdir, "cache.json")
+        cache = ParseCache(cache_path, persistent=False)
+        cache.store("/p/a.md", 1, 2, None, [], 0, 0)
+        assert not cache.save()
+        assert not os.path.exists(cache_path)
+
+    def test_prune_drops_vanished_paths(self):
+        cache = ParseCache(None)
+        cache.store("/p/a.md", 1, 2, None, [], 0, 0)
+        cache.store("/p/b.md", 1, 2, None, [], 0, 0)
+        assert cache.prune(["/p/a.md"]) == 1
+        assert cache.lookup("/p/b.md", 1, 2) is None
+
+
+class TestLoaderWithParseCache:
+    def test_second_load_skips_parsing_with_identical_results(self, workdir):
+        prompts_dir = os.path.join(workdir, "prompts")
+        os.makedirs(prompts_dir)
+        write(os.path.join(prompts_dir, "a.md"), "---\ndescription: A\ntags: [x]\n---\n\n  Body [[b]] \n\n")
+        write(os.path.join(prompts_dir, "b.md"), "no front matter\n")
+
+        cache = ParseCache(os.path.join(workdir, "cache.json"))
+        first = PromptLoader(parse_cache=cache).load_directories([prompts_dir])
+        cache.save()
+
+        loader = PromptLoader(parse_cache=ParseCache(os.path.join(workdir, "cache.json")))
+        second = loader.load_directories([prompts_dir])
+
+        assert loader.last_stats["cache_hits"] == 2
+        assert loader.last_stats["parsed"] == 0
+        assert [(f.content, f.description, f.tags) for f in first] == \
+               [(f.content, f.description, f.tags) for f in second]
+        assert second[0].content == "Body [[b]]"
+
+    def test_modified_file_is_reparsed(self, workdir):
+        path = os.path.join(workdir, "a.md")
+        write(path, "---\ndescription: old\n---\nold body")
+        cache = ParseCache(None)
+        loader = PromptLoader(parse_cache=cache)
+        loader.load_file(path)
+
+        write(path, "---\ndescription: new\n---\nnew, longer body")
+        loaded = loader.load_file(path)
+        assert not loaded.from_cache
+        assert loaded.description == "new"
+        assert loaded.content == "new, longer body"
+
+    def test_body_span_matches_stripped_body(self):
+        text = "---\ndescription: d\n---\n\n\t body \n"
+        _, _, start, end = parse_prompt_source(text)
+        assert text[start:end] == "body"
+        _, _, start, end = parse_prompt_source("---\ndescription: d\n---\n   \n")
+        assert start == end
@@ -0,0 +1,134 @@
+"""
+Unit tests for pattern inclusions.
+
+Modules/Classes Tested:
+- src.services.pattern_index (inclusion_pattern, literal_prefix, PatternIndex)
+- src.services.expansion_cache.ExpansionCache (pattern invalidation)
+- src.services.prompt_service.PromptService (expanding [[regex:pattern]] inclusions)
+"""
+
+import os
+import re
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.pattern_index import PatternIndex, inclusion_pattern, literal_prefix
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def index(make_prompt):
+    prompts = PromptIndex()
+    patterns = PatternIndex()
+    prompts.add_listener(patterns)
+    for prompt_id in ("/a/feature_login", "/a/feature_logout", "/b/feature_search", "/b/issue_crash",
+                      "/b/featurette"):
+        prompts[prompt_id] = make_prompt(prompt_id)
+    return prompts, patterns
+
+
+class TestPatternSyntax:
+    @pytest.mark.parametrize("reference, expected", [
+        ("regex:feature_.*", "feature_.*"), ("regex: (a|b)", "(a|b)"), ("feature_.*", None), ("C++ notes", None),
+        ("name.v2", None), ("dir/name", None),
+    ])
+    def test_inclusion_pattern(self, reference, expected):
+        assert inclusion_pattern(reference) == expected
+
+    @pytest.mark.parametrize("pattern, prefix", [
+        ("feature_.*", "feature_"), ("^issue_.+", "issue_"), ("features?", "feature"), (r"v1\.2.*", "v1.2"),
+        ("a.*|b.*", ""), ("(?i)x.*", ""), (r"\d+", ""), ("/a/feat.*", "/a/feat"),
+    ])
+    def test_literal_prefix(self, pattern, prefix):
+        assert literal_prefix(pattern) == prefix
+
+
+class TestPatternIndex:
+    def test_names_and_full_ids(self, index):
+        _, patterns = index
+        assert patterns.match("feature_.*") == ("/a/feature_login", "/a/feature_logout", "/b/feature_search")
+        assert patterns.match("/b/feature.*") == ("/b/feature_search", "/b/featurette")
+        assert patterns.match(".*_log(in|out)") == ("/a/feature_login", "/a/feature_logout")
+        assert patterns.match("nothing.*") == ()
+
+    def test_invalid_pattern_raises(self, index):
+        with pytest.raises(re.error):
+            index[1].match("bad(.*")
+
+    def test_results_follow_the_id_set(self, index, make_prompt):
+        prompts, patterns = index
+        assert len(patterns.match("feature_.*")) == 3
+        prompts["/c/feature_new"] = make_prompt("/c/feature_new")
+        assert "/c/feature_new" in patterns.match("feature_.*")
+        del prompts["/a/feature_login"]
+        assert "/a/feature_login" not in patterns.match("feature_.*")
+
+    def test_replacing_a_prompt_keeps_cached_results(self, index, make_prompt):
+        prompts, patterns = index
+        patterns.match("feature_.*")
+        prompts["/a/feature_login"] = make_prompt("/a/feature_login", "edited")
+        patterns.match("feature_.*")
+        assert patterns.stats()["hits"] == 1
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "feature_a.md": "A [[shared]]",
+        "feature_b.md": "B",
+        "shared.md": "S",
+        "all_features.md": "Features:\n[[regex:feature_.*]]\nend",
+        "bad.md": "[[regex:broken(.*]] [[regex:zzz.*]]",
+        "notes.md": "[[C++ notes]]",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False)
+
+
+class TestPatternExpansion:
+    def test_matches_are_expanded_in_id_order(self, service, prompt_dir):
+        expanded, dependencies, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "all_features"))
+        assert expanded == "Features:\nA S\nB\nend"
+        assert {"regex:feature_.*", os.path.join(prompt_dir, "feature_a"), os.path.join(prompt_dir, "feature_b"),
+                "shared"} == set(dependencies)
+        assert warnings == []
+
+    def test_invalid_and_empty_patterns(self, service, prompt_dir):
+        expanded, _, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "bad"))
+        assert expanded == "[[INVALID PATTERN: broken(.*]] "
+        assert warnings[0].startswith("Invalid inclusion pattern 'broken(.*'")
+        assert warnings[1] == "Pattern 'zzz.*' matched no prompts"
+
+    def test_unmarked_reference_is_not_a_pattern(self, service, prompt_dir):
+        expanded, _, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "notes"))
+        assert expanded == "[[PROMPT NOT FOUND: C++ notes]]"
+        assert warnings == ["Prompt 'C++ notes' not found"]
+
+    def test_pattern_does_not_include_its_own_prompt(self, service, prompt_dir):
+        service.create_prompt(name="feature_index", content="[[regex:feature_.*]]", directory=prompt_dir)
+        expanded, _, _ = service.expand_prompt_content(os.path.join(prompt_dir, "feature_index"))
+        assert expanded == "A S\nB"
+
+    def test_new_matching_prompt_invalidates_cached_expansion(self, service, prompt_dir):
+        all_id = os.path.join(prompt_dir, "all_features")
+        service.expand_prompt_content(all_id)
+        service.create_prompt(name="feature_c", content="C", directory=prompt_dir)
+        assert service.expand_prompt_content(all_id)[0] == "Features:\nA S\nB\nC\nend"
+        service.delete_prompt(os.path.join(prompt_dir, "feature_a"))
+        assert service.expand_prompt_content(all_id)[0] == "Features:\nB\nC\nend"
+
+    def test_pattern_referrers(self, service, prompt_dir):
+        references = service.get_references_to_prompt(os.path.join(prompt_dir, "feature_b"))
+        assert [r["id"] for r in references] == [os.path.join(prompt_dir, "all_features")]
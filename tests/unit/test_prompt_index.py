@@ -0,0 +1,159 @@
+"""
+Unit tests for the PromptIndex store and its use by PromptService lookups.
+
+Modules/Classes Tested:
+- src.services.prompt_index.PromptIndex
+- src.services.prompt_service.PromptService (name / unique_id / directory lookups)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.models.unified_prompt import Prompt
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_service import PromptService
+
+
+class TestPromptIndex:
+    def test_setitem_indexes_name_unique_id_and_directory(self, make_prompt):
+        index = PromptIndex()
+        prompt = make_prompt("/p/general/restart")
+        index[prompt.id] = prompt
+
+        assert index.ids_for_name("restart") == [prompt.id]
+        assert index.id_for_unique_id(prompt.id) == prompt.id
+        assert index.ids_in_directory("/p/general") == [prompt.id]
+
+    def test_name_bucket_keeps_insertion_order(self, make_prompt):
+        index = PromptIndex()
+        first = make_prompt("/p/a/dup")
+        second = make_prompt("/p/b/dup")
+        index[first.id] = first
+        index[second.id] = second
+
+        assert index.ids_for_name("dup") == [first.id, second.id]
+        assert [p.id for p in index.prompts_for_name("dup", directory="/p/b")] == [second.id]
+
+    def test_delete_pop_and_clear_remove_index_entries(self, make_prompt):
+        index = PromptIndex()
+        prompts = [make_prompt(f"/p/a/n{i}") for i in range(3)]
+        for prompt in prompts:
+            index[prompt.id] = prompt
+
+        del index[prompts[0].id]
+        assert index.ids_for_name("n0") == []
+        assert index.pop(prompts[1].id).id == prompts[1].id
+        assert index.pop("missing", None) is None
+        with pytest.raises(KeyError):
+            index.pop("missing")
+        assert index.ids_in_directory("/p/a") == [prompts[2].id]
+
+        index.clear()
+        assert index.ids_in_directory("/p/a") == []
+        assert index.id_for_unique_id(prompts[2].id) is None
+
+    def test_reinsert_after_in_place_rename_drops_stale_keys(self, make_prompt):
+        index = PromptIndex()
+        prompt = make_prompt("/p/a/old")
+        old_id = prompt.id
+        index[old_id] = prompt
+
+        # Mirror PromptService.rename_prompt: mutate, insert under new ID, delete old
+        prompt.name = "new"
+        prompt.id = Prompt.generate_id_from_directory_and_name("/p/a", "new")
+        prompt.unique_id = prompt.id
+        index[prompt.id] = prompt
+        del index[old_id]
+
+        assert index.ids_for_name("old") == []
+        assert index.ids_for_name("new") == [prompt.id]
+        assert index.id_for_unique_id(old_id) is None
+        assert index.ids_in_directory("/p/a") == [prompt.id]
+
+    def test_constructor_and_update_index_plain_dict(self, make_prompt):
+        prompt = make_prompt("/p/a/x")
+        index = PromptIndex({prompt.id: prompt})
+        assert index.ids_for_name("x") == [prompt.id]
+
+        other = make_prompt("/p/b/x")
+        index.update({other.id: other})
+        assert index.ids_for_name("x") == [prompt.id, other.id]
+
+    def test_replacing_keeps_bucket_order_of_the_dict(self, make_prompt):
+        first, second = make_prompt("/p/a/x"), make_prompt("/p/b/x")
+        index = PromptIndex({first.id: first, second.id: second})
+        index[first.id] = make_prompt("/p/a/x", content="saved again")
+        assert index.ids_for_name("x") == list(index) == [first.id, second.id]
+
+        # Changed keys and back: the ID returns to its dict position, not the end
+        index[first.id] = make_prompt("/p/a/y")
+        index[first.id] = make_prompt("/p/a/x")
+        assert index.ids_for_name("x") == [first.id, second.id]
+
+    def test_unique_id_resolves_to_the_first_prompt(self, make_prompt):
+        first, second = make_prompt("/p/a/x"), make_prompt("/p/b/x")
+        second.unique_id = first.unique_id
+        index = PromptIndex({first.id: first, second.id: second})
+        assert index.id_for_unique_id(first.unique_id) == first.id
+        index[first.id] = make_prompt("/p/a/x", content="saved again")
+        assert index.id_for_unique_id(first.unique_id) == first.id
+        del index[first.id]
+        assert index.id_for_unique_id(first.unique_id) == second.id
+
+
+class TestPromptServiceIndexedLookups:
+    def setup_method(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.dirs = [os.path.join(self.test_dir, "one"), os.path.join(self.test_dir, "two")]
+        for directory in self.dirs:
+            os.makedirs(directory)
+        self.service = PromptService(base_directories=self.dirs, auto_load=False,
+                                     create_default_directory_if_empty=False)
+
+    def teardown_method(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_assigning_plain_dict_keeps_index(self):
+        self.service.prompts = {}
+        assert isinstance(self.service.prompts, PromptIndex)
+
+    def test_name_lookup_with_and_without_directory(self):
+        first = self.service.create_prompt(name="shared", content="one", directory=self.dirs[0])
+        second = self.service.create_prompt(name="shared", content="two", directory=self.dirs[1])
+
+        assert self.service.get_prompt("shared").id == first.id
+        assert self.service.get_prompt("shared", directory=self.dirs[1]).id == second.id
+
+    def test_saving_an_ambiguous_prompt_keeps_resolution(self):
+        first = self.service.create_prompt(name="shared", content="one", directory=self.dirs[0])
+        self.service.create_prompt(name="shared", content="two", directory=self.dirs[1])
+        first.content = "one, edited"
+        assert self.service.save_prompt(first)
+
+        assert self.service.get_prompt("shared").id == first.id
+        parent = self.service.create_prompt(name="parent", content="[[shared]]", directory=self.test_dir)
+        assert self.service.expand_inclusions(parent.content, parent_id=parent.id)[0] == "one, edited"
+
+    def test_rename_and_delete_update_indexes(self):
+        prompt = self.service.create_prompt(name="before", content="x", directory=self.dirs[0])
+        assert self.service.rename_prompt(prompt.id, "after")
+
+        assert self.service.get_prompt("before") is None
+        renamed = self.service.get_prompt("after")
+        assert renamed is not None
+        assert self.service.prompts.ids_in_directory(self.dirs[0]) == [renamed.id]
+
+        assert self.service.delete_prompt(renamed.id)
+        assert self.service.get_prompt("after") is None
+        assert self.service.prompts.ids_in_directory(self.dirs[0]) == []
+
+    def test_remove_directory_drops_prompts_via_index(self):
+        self.service.create_prompt(name="a", content="x", directory=self.dirs[0])
+        kept = self.service.create_prompt(name="b", content="x", directory=self.dirs[1])
+
+        assert self.service.remove_directory(self.dirs[0])
+        assert list(self.service.prompts) == [kept.id]
+        assert self.service.get_prompt("a") is None
@@ -0,0 +1,159 @@
+"""
+Unit tests for paginated prompt listings.
+
+Modules/Classes Tested:
+- src.services.prompt_listing (PromptListing, encode_cursor, decode_cursor)
+- src.services.prompt_service.PromptService.list_prompts
+- src.api.router (GET /api/prompts/all)
+"""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_listing import PromptListing, decode_cursor, encode_cursor
+from src.services.prompt_service import PromptService
+from src.services.tag_index import TagQuery
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def index(make_prompt):
+    prompts = PromptIndex()
+    for i in range(10):
+        updated = EPOCH - timedelta(days=i)
+        prompts[f"/d{i % 2}/p{i}"] = make_prompt(f"/d{i % 2}/p{i}", created_at=updated, updated_at=updated)
+    return prompts
+
+
+def all_pages(listing, index, limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        ids, cursor = listing.page(index, cursor=cursor, limit=limit, **kwargs)
+        pages.append(ids)
+        if cursor is None:
+            return pages
+
+
+class TestPromptListing:
+    def test_pages_cover_the_listing_once(self, index):
+        listing = PromptListing(lambda prompt_id: None)
+        pages = all_pages(listing, index, 3)
+        assert [len(page) for page in pages] == [3, 3, 3, 1]
+        assert sum(pages, []) == sorted(index)
+
+    def test_sorts(self, index):
+        listing = PromptListing(lambda prompt_id: None)
+        assert listing.page(index, sort="updated_at", limit=2)[0] == ["/d1/p9", "/d0/p8"]
+        assert sum(all_pages(listing, index, 4, sort="updated_at", descending=True), []) == [
+            f"/d{i % 2}/p{i}" for i in range(10)]
+        with pytest.raises(ValueError):
+            listing.page(index, sort="size")
+
+    def test_cursor_is_stable_across_changes(self, index, make_prompt):
+        listing = PromptListing(lambda prompt_id: None)
+        first, cursor = listing.page(index, limit=5)
+        del index[first[0]]
+        index["/a/new"] = make_prompt("/a/new")
+        second, _ = listing.page(index, cursor=cursor)
+        assert second == sorted(set(index) - set(first) - {"/a/new"})
+
+    def test_filters(self, index):
+        listing = PromptListing(lambda prompt_id: None)
+        assert sum(all_pages(listing, index, 2, candidates={"/d0/p2", "/d1/p7"}), []) == ["/d0/p2", "/d1/p7"]
+        accept = lambda prompt_id: prompt_id.endswith(("3", "4", "5"))  # noqa: E731
+        assert sum(all_pages(listing, index, 2, accept=accept), []) == ["/d0/p4", "/d1/p3", "/d1/p5"]
+
+    def test_cursor_checks(self):
+        cursor = encode_cursor("name", True, ("key", "/id"))
+        assert decode_cursor(cursor, "name", True) == ("key", "/id")
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, "name", False)
+        with pytest.raises(ValueError):
+            decode_cursor("not a cursor!", "name", True)
+
+
+@pytest.fixture
+def service():
+    directory = tempfile.mkdtemp()
+    files = {
+        "alpha.md": "---\ntags: [keep]\ndescription: First\n---\nAlpha",
+        "beta.md": "Beta [[alpha]]",
+        "gamma.md": "---\ntags: [keep]\n---\nGamma",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield PromptService(base_directories=[directory], auto_load=True, create_default_directory_if_empty=False)
+    shutil.rmtree(directory)
+
+
+class TestListPrompts:
+    def test_fields(self, service):
+        prompts, cursor = service.list_prompts()
+        assert cursor is None and [p["name"] for p in prompts] == ["alpha", "beta", "gamma"]
+        assert "content" not in prompts[0] and prompts[0]["display_name"] == "alpha"
+        prompts, _ = service.list_prompts(fields=["name", "content"], limit=1)
+        assert prompts == [{"name": "alpha", "content": "Alpha"}]
+        with pytest.raises(ValueError):
+            service.list_prompts(fields=["size"])
+
+    def test_filters(self, service):
+        keep = TagQuery(all_tags=["keep"])
+        assert [p["name"] for p in service.list_prompts(query=keep, descending=True)[0]] == ["gamma", "alpha"]
+        assert [p["name"] for p in service.list_prompts(query=TagQuery(is_composite=True))[0]] == ["beta"]
+        assert [p["name"] for p in service.list_prompts(search="first")[0]] == ["alpha"]
+
+    def test_endpoint(self, service):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+        client = TestClient(app)
+
+        response = client.get("/api/prompts/all", params={"limit": 2, "fields": "name,directory_name"})
+        assert response.status_code == 200
+        assert [set(p) for p in response.json()] == [{"name", "directory_name"}] * 2
+        response = client.get("/api/prompts/all", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"],
+                                                          "fields": "name"})
+        assert response.json() == [{"name": "gamma"}] and "X-Next-Cursor" not in response.headers
+
+        response = client.get("/api/prompts/all", params={"tag": "keep", "sort": "name", "order": "desc"})
+        assert [p["name"] for p in response.json()] == ["gamma", "alpha"]
+        assert "content" not in response.json()[0] and "directory_name" in response.json()[0]
+        assert client.get("/api/prompts/all", params={"cursor": "bogus"}).status_code == 400
+        assert client.get("/api/prompts/all", params={"sort": "size"}).status_code == 400
+
+    def test_directory_names_are_looked_up_once_per_listing(self, service):
+        class CountingList(list):
+            iterations = 0
+
+            def __iter__(self):
+                CountingList.iterations += 1
+                return super().__iter__()
+
+        for sub in ("one", "two"):
+            service.create_prompt(name=sub, content=sub, directory=os.path.join(service.directories[0].path, sub))
+        service.directories = CountingList(service.directories)
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+        client = TestClient(app)
+
+        def iterations_for(fields):
+            before = CountingList.iterations
+            response = client.get("/api/prompts/all", params={"fields": fields})
+            return response, CountingList.iterations - before
+
+        _, without_names = iterations_for("name")
+        response, with_names = iterations_for("name,directory_name")
+        # Three directories in the listing, one pass over the configured directories
+        assert len({p["directory_name"] for p in response.json()}) == 3
+        assert with_names - without_names == 1
@@ -0,0 +1,90 @@
+"""
+Unit tests for the PromptLoader and parallel bulk loading in PromptService.
+
+Modules/Classes Tested:
+- src.services.prompt_loader.PromptLoader
+- src.services.prompt_loader.parse_prompt_text
+- src.services.prompt_service.PromptService.load_all_prompts (parallel mode)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.prompt_loader import PromptLoader, parse_prompt_text
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_tree():
+    root = tempfile.mkdtemp()
+    dirs = [os.path.join(root, "alpha"), os.path.join(root, "beta")]
+    for d_idx, directory in enumerate(dirs):
+        for sub in ("", "nested", os.path.join("nested", "deeper")):
+            target = os.path.join(directory, sub)
+            os.makedirs(target, exist_ok=True)
+            for i in range(5):
+                with open(os.path.join(target, f"p{d_idx}_{i}.md"), "w") as f:
+                    f.write(f"---\ndescription: prompt {i}\ntags:\n- t{i}\n---\n\nBody {i} [[p{d_idx}_0]]\n")
+            with open(os.path.join(target, "ignored.txt"), "w") as f:
+                f.write("not a prompt")
+    yield dirs
+    shutil.rmtree(root)
+
+
+class TestParsePromptText:
+    def test_front_matter_is_split_from_body(self):
+        description, tags, content = parse_prompt_text("---\ndescription: d\ntags: [a, b]\n---\n\nhello\n")
+        assert description == "d"
+        assert tags == ["a", "b"]
+        assert content == "hello"
+
+    def test_text_without_front_matter_is_unchanged(self):
+        assert parse_prompt_text("just text") == (None, [], "just text")
+
+
+class TestPromptLoader:
+    def test_parallel_results_match_serial(self, prompt_tree):
+        serial = PromptLoader().load_directories(prompt_tree)
+        parallel = PromptLoader(workers=4).load_directories(prompt_tree)
+
+        assert [f.path for f in serial] == [f.path for f in parallel]
+        assert [(f.description, f.tags, f.content) for f in serial] == \
+               [(f.description, f.tags, f.content) for f in parallel]
+        assert len(serial) == 30
+
+    def test_results_are_grouped_by_directory_then_sorted(self, prompt_tree):
+        loaded = PromptLoader(workers=3).load_directories(list(reversed(prompt_tree)))
+        paths = [f.path for f in loaded]
+        beta = [p for p in paths if p.startswith(prompt_tree[1])]
+        alpha = [p for p in paths if p.startswith(prompt_tree[0])]
+        assert paths == beta + alpha
+        assert beta == sorted(beta) and alpha == sorted(alpha)
+
+    def test_process_pool_parsing(self, prompt_tree):
+        loader = PromptLoader(workers=2, parse_processes=2)
+        loaded = loader.load_directories(prompt_tree[:1])
+        assert all(f.description and f.description.startswith("prompt") for f in loaded)
+        assert loader.last_stats["parse_processes"] == 2
+
+    def test_stats_report_phase_timings(self, prompt_tree):
+        loader = PromptLoader(workers=2)
+        loader.load_directories(prompt_tree)
+        for key in ("scan_ms", "read_ms", "parse_ms"):
+            assert loader.last_stats[key] >= 0
+        assert loader.last_stats["files"] == 30
+
+
+class TestParallelServiceLoad:
+    def test_parallel_service_load_matches_serial(self, prompt_tree):
+        serial = PromptService(base_directories=prompt_tree, auto_load=False,
+                               create_default_directory_if_empty=False)
+        parallel = PromptService(base_directories=prompt_tree, auto_load=False,
+                                 create_default_directory_if_empty=False, load_workers=4)
+
+        assert serial.load_all_prompts() == parallel.load_all_prompts() == 30
+        assert list(serial.prompts) == list(parallel.prompts)
+        assert parallel.last_load_stats["workers"] == 4
+        assert "merge_ms" in parallel.last_load_stats
@@ -0,0 +1,119 @@
+"""
+Unit tests for compact prompt records.
+
+Modules/Classes Tested:
+- src.services.prompt_record.PromptRecord
+- src.services.prompt_record.compile_inclusions
+- src.services.prompt_index.PromptIndex (record storage)
+- src.services.prompt_service.PromptService (expansion over compiled segments)
+"""
+
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_record import NO_INCLUSIONS, PromptRecord, compile_inclusions
+
+
+class TestPromptRecord:
+    def test_round_trip_preserves_prompt_fields(self, make_prompt):
+        prompt = make_prompt("/p/general/restart", "see [[other]]", description="desc", tags=["a", "b"])
+        prompt.set_display_name_cache("general:restart")
+
+        record = PromptRecord.from_prompt(prompt)
+        restored = record.to_prompt()
+
+        assert restored.model_dump() == prompt.model_dump()
+        assert restored.display_name == "general:restart"
+        assert record.full_path == prompt.full_path
+        assert record.is_composite and restored.is_composite
+
+    def test_repeated_strings_are_shared(self, make_prompt):
+        first = PromptRecord.from_prompt(make_prompt("/p/shared/x", tags=["t" + "ag"]))
+        second = PromptRecord.from_prompt(make_prompt("/p/shared/y", tags=["ta" + "g"]))
+        assert first.directory is second.directory
+        assert first._tags[0] is second._tags[0]
+
+    def test_derived_fields_are_stored_compactly(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a"))
+        assert record._filename is None and record.filename == "a.md"
+        assert record.unique_id == record.id
+
+        record.unique_id = "legacy"
+        record.filename = "other.md"
+        assert (record.unique_id, record.filename) == ("legacy", "other.md")
+
+    def test_full_path_follows_path_changes(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a"))
+        assert record.full_path == "/p/a.md"
+        record.name = "b"
+        assert (record.filename, record.full_path) == ("a.md", "/p/a.md")
+        record.filename = "b.md"
+        record.directory = "/q"
+        assert (record._filename, record.full_path) == (None, "/q/b.md")
+
+    def test_composite_flag_follows_content_changes(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a", "plain"))
+        assert not record.is_composite
+        record.content = "now [[included]]"
+        assert record.is_composite
+
+    def test_metadata_only_record(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a", "x [[y]]"), keep_content=False)
+        assert record.content == "" and not record.content_loaded
+        assert record.is_composite
+        assert record.to_prompt("x [[y]]").content == "x [[y]]"
+
+    def test_tags_are_returned_as_a_fresh_list(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a", tags=["t"]))
+        record.tags.append("mutated")
+        assert record.tags == ["t"] and record.has_tag("t")
+
+
+class TestIndexStoresRecords:
+    def test_assigned_prompts_are_stored_as_records(self, make_prompt):
+        index = PromptIndex()
+        prompt = make_prompt("/p/a")
+        index[prompt.id] = prompt
+
+        stored = index[prompt.id]
+        assert isinstance(stored, PromptRecord)
+        assert stored.content == prompt.content
+        index[prompt.id] = stored
+        assert index[prompt.id] is stored
+
+
+class TestCompiledInclusions:
+    def test_spans_cover_markers_and_normalize_references(self):
+        content = "a [[x]] b [[y.md]] c [[.md]]"
+        spans = list(compile_inclusions(content))
+        assert [reference for _, _, reference in spans] == ["x", "y", ""]
+        assert [content[start:end] for start, end, _ in spans] == ["[[x]]", "[[y.md]]", "[[.md]]"]
+
+    def test_content_without_markers_shares_the_empty_result(self):
+        assert compile_inclusions("plain") is NO_INCLUSIONS
+        assert not compile_inclusions("plain")
+
+    def test_record_segments_follow_content(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a", "x [[y]]"))
+        assert [r for _, _, r in record.segments] == ["y"] and record.references == ("y",)
+        record.content = "[[z]] and [[z]]"
+        assert len(record.segments) == 2 and record.references == ("z",)
+
+    def test_metadata_only_record_keeps_references_not_segments(self, make_prompt):
+        record = PromptRecord.from_prompt(make_prompt("/p/a", "x [[y]]"), keep_content=False)
+        assert record.segments is None and record.references == ("y",)
+
+
+class TestSegmentExpansion:
+    def test_expansion_matches_in_both_storage_modes(self, tmp_path):
+        from src.services.prompt_service import PromptService
+
+        (tmp_path / "leaf.md").write_text("leaf")
+        (tmp_path / "top.md").write_text("a [[leaf]] b [[leaf.md]] c [[missing]] [[.md]] end")
+        results = []
+        for lazy in (False, True):
+            service = PromptService(base_directories=[str(tmp_path)], create_default_directory_if_empty=False,
+                                    lazy_content=lazy)
+            results.append(service.expand_prompt_content(str(tmp_path / "top")))
+        expanded, dependencies, warnings = results[0]
+        assert results[0] == results[1]
+        assert expanded == "a leaf b leaf c [[PROMPT NOT FOUND: missing]] [[EMPTY INCLUSION]] end"
+        assert sorted(dependencies) == ["leaf", "missing"] and len(warnings) == 1
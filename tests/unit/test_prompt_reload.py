@@ -0,0 +1,94 @@
+"""
+Unit tests for the reconciling (diff-based) reload.
+
+Modules/Classes Tested:
+- src.services.prompt_service.PromptService.reload_prompts
+- src.services.prompt_service.PromptService.load_all_prompts
+- src.services.prompt_index.PromptIndex (file signatures)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    os.makedirs(os.path.join(directory, "sub"))
+    for name in ("a", "b", os.path.join("sub", "c")):
+        write(os.path.join(directory, f"{name}.md"), f"---\ndescription: {name}\n---\nbody {name}")
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True,
+                         create_default_directory_if_empty=False)
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class TestReloadPrompts:
+    def test_unchanged_tree_reuses_prompts_without_reading(self, service, prompt_dir):
+        before = dict(service.prompts)
+
+        stats = service.reload_prompts()
+
+        assert (stats["added"], stats["changed"], stats["removed"], stats["unchanged"]) == (0, 0, 0, 3)
+        assert stats["total"] == 3 and stats["elapsed_ms"] >= 0
+        assert service.last_load_stats["files"] == 0
+        assert all(service.prompts[pid] is prompt for pid, prompt in before.items())
+
+    def test_reports_added_changed_and_removed(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "a.md"), "---\ndescription: a2\n---\nnew body for a")
+        write(os.path.join(prompt_dir, "d.md"), "d")
+        os.remove(os.path.join(prompt_dir, "b.md"))
+
+        stats = service.reload_prompts()
+
+        assert (stats["added"], stats["changed"], stats["removed"], stats["unchanged"]) == (1, 1, 1, 1)
+        assert service.prompts[os.path.join(prompt_dir, "a")].content == "new body for a"
+        assert os.path.join(prompt_dir, "b") not in service.prompts
+        assert service.last_load_stats["files"] == 2
+
+    def test_result_matches_a_fresh_load(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "sub", "e.md"), "e")
+        service.reload_prompts()
+
+        fresh = PromptService(base_directories=[prompt_dir], auto_load=True,
+                              create_default_directory_if_empty=False)
+        assert list(service.prompts) == list(fresh.prompts)
+        assert [p.content for p in service.prompts.values()] == [p.content for p in fresh.prompts.values()]
+
+    def test_prompts_replaced_in_memory_are_reloaded_from_disk(self, service, prompt_dir):
+        prompt_id = os.path.join(prompt_dir, "a")
+        edited = service.get_prompt(prompt_id)
+        edited.content = "unsaved edit"
+        service.prompts[prompt_id] = edited
+        service.prompts["orphan"] = edited.model_copy(update={"id": "orphan", "name": "orphan",
+                                                               "directory": "/nowhere"})
+
+        stats = service.reload_prompts()
+
+        assert service.prompts[prompt_id].content == "body a"
+        assert "orphan" not in service.prompts
+        assert stats["changed"] == 1 and stats["removed"] == 1
+
+    def test_load_all_prompts_returns_total(self, service):
+        assert service.load_all_prompts() == 3
+
+    def test_swap_keeps_display_names_current(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "c.md"), "top-level c")
+        service.reload_prompts()
+        service.calculate_and_cache_display_names()
+        names = {p.display_name for p in service.prompts.values() if p.name == "c"}
+        assert len(names) == 2
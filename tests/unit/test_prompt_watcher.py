@@ -0,0 +1,168 @@
+"""
+Unit tests for the filesystem watcher and incremental index updates.
+
+Modules/Classes Tested:
+- src.services.prompt_watcher.PromptWatcher
+- src.services.prompt_watcher._PollingBackend / _InotifyBackend
+- src.services.prompt_service.PromptService.apply_file_changes
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+from src.services.prompt_service import PromptService
+from src.services.prompt_watcher import PromptWatcher, _InotifyBackend, _PollingBackend
+
+
+@pytest.fixture
+def prompt_dir():
+    root = tempfile.mkdtemp()
+    directory = os.path.join(root, "prompts")
+    os.makedirs(os.path.join(directory, "sub"))
+    write(os.path.join(directory, "a.md"), "---\ndescription: A\n---\nalpha")
+    write(os.path.join(directory, "sub", "b.md"), "beta")
+    yield directory
+    shutil.rmtree(root)
+
+
+@pytest.fixture
+def service(prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True,
+                         create_default_directory_if_empty=False)
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+class TestApplyFileChanges:
+    def test_new_and_modified_files_are_upserted(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "c.md"), "gamma")
+        write(os.path.join(prompt_dir, "a.md"), "---\ndescription: A2\n---\nalpha 2")
+
+        result = service.apply_file_changes([os.path.join(prompt_dir, "c.md"),
+                                             os.path.join(prompt_dir, "a.md")])
+
+        assert result == {"upserted": 2, "removed": 0}
+        assert service.prompts[os.path.join(prompt_dir, "c")].content == "gamma"
+        assert service.prompts[os.path.join(prompt_dir, "a")].description == "A2"
+
+    def test_upserted_files_are_skipped_by_the_next_reload(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "c.md"), "gamma")
+        service.apply_file_changes([os.path.join(prompt_dir, "c.md")])
+        assert service.prompts.signature(os.path.join(prompt_dir, "c")) is not None
+
+        stats = service.reload_prompts()
+        assert (stats["added"], stats["changed"], stats["unchanged"]) == (0, 0, 3)
+
+    def test_deleted_file_and_directory_are_removed(self, service, prompt_dir):
+        os.remove(os.path.join(prompt_dir, "a.md"))
+        shutil.rmtree(os.path.join(prompt_dir, "sub"))
+
+        result = service.apply_file_changes([os.path.join(prompt_dir, "a.md"),
+                                             os.path.join(prompt_dir, "sub")])
+
+        assert result["removed"] == 2
+        assert len(service.prompts) == 0
+
+    def test_moved_in_directory_is_scanned(self, service, prompt_dir):
+        outside = tempfile.mkdtemp()
+        try:
+            write(os.path.join(outside, "d.md"), "delta")
+            target = os.path.join(prompt_dir, "moved")
+            shutil.move(outside, target)
+
+            service.apply_file_changes([target])
+
+            assert service.prompts[os.path.join(target, "d")].content == "delta"
+        finally:
+            shutil.rmtree(outside, ignore_errors=True)
+
+    def test_paths_outside_enabled_directories_are_ignored(self, service):
+        other = tempfile.mkdtemp()
+        try:
+            write(os.path.join(other, "x.md"), "x")
+            assert service.apply_file_changes([os.path.join(other, "x.md")]) == {"upserted": 0, "removed": 0}
+        finally:
+            shutil.rmtree(other)
+
+    def test_display_names_follow_changes(self, service, prompt_dir):
+        write(os.path.join(prompt_dir, "b.md"), "another b")
+        service.apply_file_changes([os.path.join(prompt_dir, "b.md")])
+        service.calculate_and_cache_display_names()
+        assert service.prompts[os.path.join(prompt_dir, "b")].display_name != "b"
+
+
+class TestBackends:
+    def test_polling_backend_reports_changed_paths(self, prompt_dir):
+        backend = _PollingBackend(interval=0)
+        backend.set_roots({prompt_dir})
+        stop = threading.Event()
+        assert backend.wait(0.1, stop) == []
+
+        new_file = os.path.join(prompt_dir, "new.md")
+        write(new_file, "new")
+        os.remove(os.path.join(prompt_dir, "a.md"))
+        changed = backend.wait(0.1, stop)
+        assert set(changed) == {new_file, os.path.join(prompt_dir, "a.md")}
+
+    @pytest.mark.skipif(not _InotifyBackend.available(), reason="inotify not available")
+    def test_inotify_backend_reports_changed_paths(self, prompt_dir):
+        backend = _InotifyBackend()
+        try:
+            backend.set_roots({prompt_dir})
+            stop = threading.Event()
+            new_file = os.path.join(prompt_dir, "sub", "new.md")
+            write(new_file, "new")
+            write(os.path.join(prompt_dir, "ignored.txt"), "x")
+
+            changed = set()
+            deadline = time.monotonic() + 2
+            while new_file not in changed and time.monotonic() < deadline:
+                changed.update(backend.wait(0.1, stop))
+            assert new_file in changed
+            assert os.path.join(prompt_dir, "ignored.txt") not in changed
+        finally:
+            backend.close()
+
+
+class TestPromptWatcher:
+    @pytest.mark.parametrize("backend", ["polling", "auto"])
+    def test_watcher_applies_external_edits(self, service, prompt_dir, backend):
+        watcher = PromptWatcher(service, debounce=0.05, poll_interval=0.05, backend=backend)
+        watcher.start()
+        try:
+            write(os.path.join(prompt_dir, "c.md"), "gamma")
+            os.remove(os.path.join(prompt_dir, "sub", "b.md"))
+
+            assert wait_for(lambda: os.path.join(prompt_dir, "c") in service.prompts
+                            and os.path.join(prompt_dir, "sub", "b") not in service.prompts)
+        finally:
+            watcher.stop()
+
+    def test_burst_of_events_is_coalesced(self, service, prompt_dir):
+        watcher = PromptWatcher(service, debounce=0.3, poll_interval=0.02, backend="polling")
+        watcher.start()
+        try:
+            for i in range(5):
+                write(os.path.join(prompt_dir, f"n{i}.md"), str(i))
+                time.sleep(0.03)
+            assert wait_for(lambda: len(service.prompts) == 7)
+            assert watcher.batches_applied == 1
+        finally:
+            watcher.stop()
@@ -0,0 +1,137 @@
+"""
+Unit tests for full-text prompt search.
+
+Modules/Classes Tested:
+- src.services.search_index (tokenize, parse_query, SearchIndex)
+- src.services.prompt_service.PromptService (find_prompts, search_prompts)
+- src.api.router (GET /api/prompts/search)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.prompt_index import PromptIndex
+from src.services.search_index import SearchIndex, parse_query, tokenize
+from src.services.prompt_service import PromptService
+
+
+@pytest.fixture
+def index(make_prompt):
+    prompts = PromptIndex()
+    search = SearchIndex(lambda record: record.content)
+    prompts.add_listener(search)
+    for prompt in (
+        make_prompt("/p/deploy_checklist", "Steps before a release: run the tests."),
+        make_prompt("/p/release_notes", "Write the notes for the release.", description="Release notes template"),
+        make_prompt("/p/code_review", "Review the code. Release it only when the tests pass."),
+        make_prompt("/p/unrelated", "Something else entirely."),
+    ):
+        prompts[prompt.id] = prompt
+    return prompts, search
+
+
+def ids(results):
+    return [prompt_id for prompt_id, _ in results]
+
+
+class TestQueryParsing:
+    def test_tokenize(self):
+        assert tokenize("Hello, World_Wide web-2!") == ["hello", "world", "wide", "web", "2"]
+
+    def test_clauses(self):
+        clauses = parse_query('alpha "Two Words" pre* snake_case')
+        assert [(c.terms, c.prefix) for c in clauses] == [
+            (("alpha",), False), (("two", "words"), False), (("pre",), True), (("snake", "case"), False)]
+
+
+class TestSearchIndex:
+    def test_name_outranks_description_and_content(self, index):
+        _, search = index
+        assert ids(search.search("release")) == ["/p/release_notes", "/p/deploy_checklist", "/p/code_review"]
+
+    def test_all_words_must_match(self, index):
+        _, search = index
+        assert ids(search.search("release tests")) == ["/p/deploy_checklist", "/p/code_review"]
+        assert search.search("release nowhere") == []
+
+    def test_phrase(self, index):
+        _, search = index
+        assert set(ids(search.search('"the tests"'))) == {"/p/code_review", "/p/deploy_checklist"}
+        assert ids(search.search('"tests the"')) == []
+        # Names and content are separate fields
+        assert search.search('"checklist steps"') == []
+
+    def test_prefix_and_limit(self, index):
+        _, search = index
+        assert set(ids(search.search("rel*"))) == {"/p/release_notes", "/p/deploy_checklist", "/p/code_review"}
+        assert ids(search.search("rel*", limit=1)) == ["/p/release_notes"]
+
+    def test_follows_index_changes(self, index, make_prompt):
+        prompts, search = index
+        prompts["/p/unrelated"] = make_prompt("/p/unrelated", "Now about a release.")
+        assert "/p/unrelated" in ids(search.search("release"))
+        del prompts["/p/release_notes"]
+        assert "/p/release_notes" not in ids(search.search("release"))
+        assert search.search("entirely") == []
+        assert search.search("template") == []
+
+    def test_reload_only_reindexes_changed_prompts(self, index, make_prompt):
+        prompts, search = index
+        search.flush()
+        reloaded = PromptIndex(prompts)
+        reloaded["/p/code_review"] = make_prompt("/p/code_review", "Fresh text")
+        reloaded.add_listener(search)
+        assert search.flush() == 1
+        assert search.search("review") and search.search("fresh")
+        assert search.search("pass") == []
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "alpha_guide.md": "---\ndescription: Guide to alpha\n---\nAll about the first letter.",
+        "mentions.md": "This one mentions alpha in passing.",
+        "other.md": "Nothing to see.",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture(params=[False, True], ids=["content", "lazy"])
+def service(request, prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False,
+                         lazy_content=request.param)
+
+
+class TestServiceSearch:
+    def test_find_prompts_is_ranked(self, service):
+        assert [p.name for p in service.find_prompts("alpha")] == ["alpha_guide", "mentions"]
+        assert [p.name for p in service.find_prompts("alpha", limit=1)] == ["alpha_guide"]
+
+    def test_saved_content_is_searchable(self, service):
+        prompt = service.get_prompt("other")
+        prompt.content = "Now there is an alpha here too."
+        assert service.save_prompt(prompt)
+        assert "other" in [p.name for p in service.find_prompts("alpha")]
+        assert service.find_prompts("nothing") == []
+
+    def test_search_endpoint(self, service):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+        response = TestClient(app).get("/api/prompts/search", params={"q": "alpha", "limit": 5})
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["name"] for r in results] == ["alpha_guide", "mentions"]
+        assert results[0]["description"] == "Guide to alpha"
+        assert results[0]["score"] > results[1]["score"]
@@ -0,0 +1,144 @@
+"""
+Unit tests for section inclusions.
+
+Modules/Classes Tested:
+- src.services.sections (compile_sections, find_section, heading_slug)
+- src.services.prompt_record (InclusionSpans.window, .md#heading normalization)
+- src.services.prompt_service.PromptService (expanding [[name#heading]] inclusions)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.prompt_record import compile_inclusions
+from src.services.prompt_service import PromptService
+from src.services.sections import compile_sections, find_section, heading_slug
+
+GUIDE = """# Guide
+Intro text.
+
+## Setup
+Install it.
+
+### Details
+Fine print.
+
+## Usage
+Run it ##
+
+```
+# not a heading
+```
+"""
+
+
+class TestCompileSections:
+    def test_sections_run_to_the_next_heading_of_the_same_level(self):
+        sections = compile_sections(GUIDE)
+        assert [(s.level, s.title) for s in sections] == [(1, "Guide"), (2, "Setup"), (3, "Details"), (2, "Usage")]
+        setup = sections[1]
+        assert GUIDE[setup.start:setup.end] == "## Setup\nInstall it.\n\n### Details\nFine print."
+        assert GUIDE[sections[2].start:sections[2].end] == "### Details\nFine print."
+
+    def test_fenced_code_is_not_scanned(self):
+        usage = compile_sections(GUIDE)[3]
+        assert GUIDE[usage.start:usage.end].endswith("# not a heading\n```")
+
+    def test_no_headings(self):
+        assert compile_sections("plain text\n#hashtag") == ()
+
+    @pytest.mark.parametrize("query", ["Setup", " SETUP ", "setup"])
+    def test_find_by_title_or_slug(self, query):
+        assert find_section(compile_sections(GUIDE), query).title == "Setup"
+
+    def test_slug(self):
+        assert heading_slug("Getting Started!") == "getting-started"
+        assert find_section(compile_sections("## Getting Started!\nx"), "getting-started") is not None
+        assert find_section(compile_sections(GUIDE), "Missing") is None
+
+
+class TestSectionMarkers:
+    def test_md_suffix_is_dropped_before_the_heading(self):
+        assert [r for _, _, r in compile_inclusions("[[guide.md#Setup]] [[guide#Setup]]")] == \
+            ["guide#Setup", "guide#Setup"]
+
+    def test_window(self):
+        content = "[[a]] x [[b]] y [[c]]"
+        window = compile_inclusions(content).window(6, 15)
+        assert list(window) == [(2, 7, "b")]
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    files = {
+        "guide.md": GUIDE.replace("Fine print.", "Fine print [[note]]."),
+        "note.md": "N",
+        "setup_only.md": "Before\n[[guide#Setup]]\nAfter",
+        "missing.md": "[[guide#Nowhere]]",
+        "manual_setup.md": "[[manual#Setup]]",
+        "looping.md": "# Top\n[[looping#Top]]",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield directory
+    shutil.rmtree(directory)
+
+
+@pytest.fixture(params=[False, True], ids=["content", "lazy"])
+def service(request, prompt_dir):
+    return PromptService(base_directories=[prompt_dir], auto_load=True, create_default_directory_if_empty=False,
+                         lazy_content=request.param)
+
+
+class TestSectionExpansion:
+    def test_section_is_expanded(self, service, prompt_dir):
+        expanded, dependencies, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "setup_only"))
+        assert expanded == "Before\n## Setup\nInstall it.\n\n### Details\nFine print N.\nAfter"
+        assert {"guide#Setup", "guide", "note"} == set(dependencies)
+        assert warnings == []
+
+    def test_missing_heading(self, service, prompt_dir):
+        expanded, _, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "missing"))
+        assert expanded == "[[SECTION NOT FOUND: guide#Nowhere]]"
+        assert warnings == ["Heading 'Nowhere' not found in prompt 'guide'"]
+
+    def test_creating_the_missing_prompt_invalidates_the_expansion(self, service, prompt_dir):
+        manual_setup_id = os.path.join(prompt_dir, "manual_setup")
+        assert service.expand_prompt_content(manual_setup_id)[0] == "[[PROMPT NOT FOUND: manual#Setup]]"
+        service.create_prompt(name="manual", content="## Setup\nRun it.", directory=prompt_dir)
+        assert service.expand_prompt_content(manual_setup_id)[0] == "## Setup\nRun it."
+
+    def test_section_including_itself(self, service, prompt_dir):
+        expanded, _, warnings = service.expand_prompt_content(os.path.join(prompt_dir, "looping"))
+        assert expanded == "# Top\n# Top\n[[CIRCULAR DEPENDENCY: looping#Top]]"
+        assert warnings[0].startswith("Circular dependency detected")
+
+    def test_saving_the_prompt_reindexes_its_sections(self, service, prompt_dir):
+        setup_id = os.path.join(prompt_dir, "setup_only")
+        service.expand_prompt_content(setup_id)
+        guide = service.get_prompt(os.path.join(prompt_dir, "guide"))
+        guide.content = "## Setup\nChanged."
+        service.save_prompt(guide)
+        assert service.expand_prompt_content(setup_id)[0] == "Before\n## Setup\nChanged.\nAfter"
+
+    def test_section_referrers(self, service, prompt_dir):
+        references = service.get_references_to_prompt(os.path.join(prompt_dir, "guide"))
+        assert {r["id"] for r in references} == {os.path.join(prompt_dir, "setup_only"),
+                                                 os.path.join(prompt_dir, "missing")}
+
+    def test_lazy_sections_follow_changes_on_disk(self, prompt_dir):
+        with open(os.path.join(prompt_dir, "setup_again.md"), "w", encoding="utf-8") as f:
+            f.write("X [[guide#Setup]] Y")
+        service = PromptService(base_directories=[prompt_dir], auto_load=True,
+                                create_default_directory_if_empty=False, lazy_content=True)
+        service.expand_prompt_content(os.path.join(prompt_dir, "setup_only"))
+        with open(os.path.join(prompt_dir, "guide.md"), "w", encoding="utf-8") as f:
+            f.write("# Preamble\nA longer preamble than before.\n\n## Setup\nChanged.")
+        service.content_cache.clear()
+        expanded, _, _ = service.expand_prompt_content(os.path.join(prompt_dir, "setup_again"))
+        assert expanded == "X ## Setup\nChanged. Y"
@@ -0,0 +1,129 @@
+"""
+Unit tests for [[ autocompletion suggestions.
+
+Modules/Classes Tested:
+- src.services.suggestion_index.SuggestionIndex
+- src.services.prompt_service.PromptService.search_prompt_suggestions
+"""
+
+import os
+import random
+import shutil
+import tempfile
+
+import pytest
+
+from src.services.display_names import DisplayNameIndex
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_service import PromptService
+from src.services.suggestion_index import SuggestionIndex
+
+IDS = [
+    "/lib/common/greeting",
+    "/lib/common/signature",
+    "/lib/work/greeting",
+    "/lib/work/report_intro",
+    "/lib/work/weekly_report",
+    "/lib/personal/letter",
+]
+
+
+@pytest.fixture
+def make_index(make_prompt):
+    def factory(ids=IDS):
+        prompts = PromptIndex()
+        display_names = DisplayNameIndex()
+        suggestions = SuggestionIndex(display_names.get)
+        prompts.add_listener(display_names)
+        prompts.add_listener(suggestions)
+        for prompt_id in ids:
+            prompts[prompt_id] = make_prompt(prompt_id, os.path.basename(prompt_id))
+        return prompts, display_names, suggestions
+
+    return factory
+
+
+def suggested(suggestions, query, **kwargs):
+    return [prompt_id for prompt_id, _ in suggestions.suggest(query, **kwargs)]
+
+
+class TestSuggestionIndex:
+    def test_prefix_matches_come_before_substring_matches(self, make_index):
+        _, _, suggestions = make_index()
+        assert suggested(suggestions, "rep") == ["/lib/work/report_intro", "/lib/work/weekly_report"]
+
+    def test_same_directory_first(self, make_index):
+        _, _, suggestions = make_index()
+        assert suggested(suggestions, "", directory="/lib/personal")[0] == "/lib/personal/letter"
+        assert suggested(suggestions, "report", directory="/lib/work", limit=1) == ["/lib/work/report_intro"]
+        assert suggested(suggestions, "eting", directory="/lib/work") == ["/lib/work/greeting",
+                                                                         "/lib/common/greeting"]
+
+    def test_display_names_are_returned_and_matched(self, make_index):
+        _, _, suggestions = make_index()
+        assert dict(suggestions.suggest("gree")) == {"/lib/common/greeting": "common:greeting",
+                                                     "/lib/work/greeting": "work:greeting"}
+        assert suggested(suggestions, "work:g") == ["/lib/work/greeting"]
+
+    def test_directory_path_matches(self, make_index):
+        _, _, suggestions = make_index()
+        assert set(suggested(suggestions, "personal")) == {"/lib/personal/letter"}
+        assert set(suggested(suggestions, "common/s")) == {"/lib/common/signature"}
+
+    def test_exclude_and_limit(self, make_index):
+        _, _, suggestions = make_index()
+        assert suggested(suggestions, "", limit=2, exclude_id="/lib/common/greeting") == [
+            "/lib/work/greeting", "/lib/personal/letter"]
+        assert "/lib/common/greeting" not in suggested(suggestions, "", exclude_id="/lib/common/greeting")
+        assert suggested(suggestions, "x", limit=0) == []
+
+    def test_display_names_follow_collisions(self, make_index, make_prompt):
+        prompts, _, suggestions = make_index()
+        assert dict(suggestions.suggest("letter")) == {"/lib/personal/letter": "letter"}
+        prompts["/lib/work/letter"] = make_prompt("/lib/work/letter")
+        assert dict(suggestions.suggest("letter")) == {"/lib/personal/letter": "personal:letter",
+                                                       "/lib/work/letter": "work:letter"}
+        del prompts["/lib/work/letter"]
+        assert dict(suggestions.suggest("letter")) == {"/lib/personal/letter": "letter"}
+
+    def test_reload(self, make_index, make_prompt):
+        prompts, _, suggestions = make_index()
+        reloaded = PromptIndex({prompt_id: make_prompt(prompt_id) for prompt_id in IDS[1:]})
+        reloaded["/lib/new"] = make_prompt("/lib/new")
+        reloaded.add_listener(suggestions)
+        assert "/lib/common/greeting" not in suggested(suggestions, "greeting")
+        assert suggested(suggestions, "new") == ["/lib/new"]
+        assert len(suggestions) == len(IDS)
+
+    def test_same_matches_as_a_scan(self, make_index):
+        rng = random.Random(3)
+        words = ["alpha", "beta", "gamma", "delta", "alp", "Mixed", "x"]
+        ids = sorted({f"/{rng.choice(words)}/{rng.choice(words)}_{rng.choice(words)}" for _ in range(300)})
+        _, display_names, suggestions = make_index(ids)
+        suggestions.MAX_HEAP_CANDIDATES = 20  # exercise both candidate strategies
+        for query in ["", "a", "al", "alp", "ALPHA", "ta_g", "ma/", "/x/", "xed_", "a_b", "nomatch"]:
+            expected = {prompt_id for prompt_id in ids
+                        if query.lower() in prompt_id.lower() or query.lower() in display_names.get(prompt_id).lower()}
+            assert set(suggested(suggestions, query, limit=1000)) == expected, query
+
+
+@pytest.fixture
+def prompt_dir():
+    directory = tempfile.mkdtemp()
+    for subdirectory, name in [("a", "intro"), ("a", "outro"), ("b", "intro_long"), ("b", "other")]:
+        os.makedirs(os.path.join(directory, subdirectory), exist_ok=True)
+        with open(os.path.join(directory, subdirectory, f"{name}.md"), "w", encoding="utf-8") as f:
+            f.write(name)
+    yield directory
+    shutil.rmtree(directory)
+
+
+class TestServiceSuggestions:
+    def test_search_prompt_suggestions(self, prompt_dir):
+        service = PromptService(base_directories=[prompt_dir], auto_load=True,
+                                create_default_directory_if_empty=False)
+        outro = os.path.join(prompt_dir, "a", "outro")
+        suggestions = service.search_prompt_suggestions("intro", exclude_id=outro)
+        assert [s["display_name"] for s in suggestions] == ["intro", "intro_long"]
+        assert all(s["id"] != outro for s in service.search_prompt_suggestions("", exclude_id=outro))
+        assert len(service.search_prompt_suggestions("", limit=2)) == 2
@@ -0,0 +1,115 @@
+"""
+Unit tests for the tag and facet index.
+
+Modules/Classes Tested:
+- src.services.tag_index (TagIndex, TagQuery)
+- src.services.prompt_service.PromptService (get_prompts_by_tag, query_prompts, tag_facets)
+- src.api.router (GET /api/prompts/tags/query, GET /api/prompts/tags/facets)
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.router import get_prompt_service_dependency, router
+from src.services.prompt_index import PromptIndex
+from src.services.prompt_service import PromptService
+from src.services.tag_index import TagIndex, TagQuery
+
+
+@pytest.fixture
+def index(make_prompt):
+    prompts = PromptIndex()
+    tags = TagIndex()
+    prompts.add_listener(tags)
+    for prompt in (
+        make_prompt("/a/one", tags=["x", "y"]),
+        make_prompt("/a/two", "[[one]]", tags=["x"]),
+        make_prompt("/b/three", tags=["y", "z"]),
+        make_prompt("/b/four", tags=[]),
+    ):
+        prompts[prompt.id] = prompt
+    return prompts, tags
+
+
+class TestTagIndex:
+    def test_boolean_queries(self, index):
+        _, tags = index
+        assert tags.query(TagQuery(all_tags=["x", "y"])) == ["/a/one"]
+        assert sorted(tags.query(TagQuery(any_tags=["x", "z"]))) == ["/a/one", "/a/two", "/b/three"]
+        assert sorted(tags.query(TagQuery(any_tags=["x", "z"], no_tags=["y"]))) == ["/a/two"]
+        assert sorted(tags.query(TagQuery(no_tags=["x"]))) == ["/b/four", "/b/three"]
+        assert tags.query(TagQuery(all_tags=["x", "missing"])) == []
+        assert tags.query(TagQuery(any_tags=["missing"])) == []
+
+    def test_directory_and_composite(self, index):
+        _, tags = index
+        assert tags.query(TagQuery(all_tags=["y"], directories=["/b"])) == ["/b/three"]
+        assert sorted(tags.query(TagQuery(all_tags=["y"], exclude_directories=["/b"]))) == ["/a/one"]
+        assert tags.query(TagQuery(is_composite=True)) == ["/a/two"]
+        assert tags.query(TagQuery(all_tags=["x"], is_composite=False)) == ["/a/one"]
+
+    def test_facets(self, index):
+        _, tags = index
+        assert tags.facets() == {"total": 4, "composite": 1, "tags": {"x": 2, "y": 2, "z": 1},
+                                 "directories": {"/a": 2, "/b": 2}}
+        assert tags.facets(tags.query(TagQuery(directories=["/b"]))) == {
+            "total": 2, "composite": 0, "tags": {"y": 1, "z": 1}, "directories": {"/b": 2}}
+
+    def test_follows_index_changes(self, index, make_prompt):
+        prompts, tags = index
+        prompts["/b/four"] = make_prompt("/b/four", tags=["x"])
+        del prompts["/a/one"]
+        assert sorted(tags.query(TagQuery(all_tags=["x"]))) == ["/a/two", "/b/four"]
+        assert tags.facets()["tags"] == {"x": 2, "y": 1, "z": 1}
+        prompts.clear()
+        assert tags.facets() == {"total": 0, "composite": 0, "tags": {}, "directories": {}}
+
+
+@pytest.fixture
+def service():
+    directory = tempfile.mkdtemp()
+    files = {
+        "guide.md": "---\ntags: [docs, public]\n---\nGuide",
+        "draft.md": "---\ntags: [docs, draft]\n---\nDraft [[guide]]",
+        "plain.md": "No tags",
+    }
+    for name, text in files.items():
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    yield PromptService(base_directories=[directory], auto_load=True, create_default_directory_if_empty=False)
+    shutil.rmtree(directory)
+
+
+class TestServiceTags:
+    def test_get_prompts_by_tag(self, service):
+        assert sorted(p.name for p in service.get_prompts_by_tag("docs")) == ["draft", "guide"]
+        assert service.get_prompts_by_tag("docs", directory="/elsewhere") == []
+        assert [p.name for p in service.get_composite_prompts()] == ["draft"]
+
+    def test_saved_tags_are_indexed(self, service):
+        prompt = service.get_prompt("plain")
+        prompt.tags = ["public"]
+        assert service.save_prompt(prompt)
+        assert sorted(p.name for p in service.get_prompts_by_tag("public")) == ["guide", "plain"]
+
+    def test_endpoints(self, service):
+        app = FastAPI()
+        app.include_router(router)
+        app.dependency_overrides[get_prompt_service_dependency] = lambda: service
+        client = TestClient(app)
+
+        response = client.get("/api/prompts/tags/query", params={"tag": "docs", "not_tag": "draft"})
+        assert response.status_code == 200
+        assert [p["name"] for p in response.json()] == ["guide"]
+        response = client.get("/api/prompts/tags/query", params={"any_tag": ["public", "draft"], "is_composite": True})
+        assert [p["name"] for p in response.json()] == ["draft"]
+
+        facets = client.get("/api/prompts/tags/facets").json()
+        assert facets["total"] == 3 and facets["tags"] == {"docs": 2, "draft": 1, "public": 1}
+        assert client.get("/api/prompts/tags/facets", params={"tag": "public"}).json()["tags"] == {
+            "docs": 1, "public": 1}